@@ -13,7 +13,15 @@ from quart import Quart
 from quart_cors import cors
 from quart_schema import QuartSchema, validate_response
 from src.api import guild, music
+from src.api.deps import init_remote
 from src.discord_bot import run_bot_in_background
+from src.harpi_lib.rpc import DEFAULT_SOCKET, RemoteControl
+from src.harpi_lib.shards import (
+    SHARD_COUNT,
+    SHARD_WORKERS,
+    ShardRouter,
+    worker_socket,
+)
 
 assert load_dotenv(), "dot env not loaded"
 logger.remove()
@@ -60,6 +68,19 @@ app.register_blueprint(guild.bp)
 
 @app.before_serving
 async def startup():
+    # "remote": the bot runs in its own process (bot_host.py).
+    if os.getenv("HARPI_BOT_MODE") == "remote":
+        if SHARD_WORKERS == 1:
+            init_remote(RemoteControl(DEFAULT_SOCKET))
+            logger.info(f"Using the Discord bot served on {DEFAULT_SOCKET}")
+            return
+        workers = [
+            RemoteControl(worker_socket(DEFAULT_SOCKET, i, SHARD_WORKERS))
+            for i in range(SHARD_WORKERS)
+        ]
+        init_remote(ShardRouter(workers, SHARD_COUNT))
+        logger.info(f"Routing guilds to {SHARD_WORKERS} shard workers")
+        return
     try:
         run_bot_in_background()
         logger.info("Discord bot initialization started")
@@ -0,0 +1,55 @@
+"""Run the Discord bot in its own process.
+
+Start the web app with ``HARPI_BOT_MODE=remote`` to drive this bot over
+the Unix socket in ``HARPI_BOT_SOCKET``.  With ``HARPI_SHARD_WORKERS``
+above 1, one worker process is started per range of the
+``HARPI_SHARD_COUNT`` shards, each on its own socket (see
+``src.harpi_lib.shards``).
+"""
+
+import asyncio
+import multiprocessing
+import sys
+
+from loguru import logger
+
+from src.discord_bot import serve_bot
+from src.harpi_lib.rpc import DEFAULT_SOCKET
+from src.harpi_lib.shards import (
+    SHARD_COUNT,
+    SHARD_WORKERS,
+    worker_shards,
+    worker_socket,
+)
+
+logger.remove()
+logger.add("spam.log", level="DEBUG")
+logger.add(sys.stdout, level="INFO")
+
+
+def run_worker(worker: int) -> None:
+    """Run shard worker *worker* until it stops."""
+    asyncio.run(
+        serve_bot(
+            worker_socket(DEFAULT_SOCKET, worker, SHARD_WORKERS),
+            worker_shards(worker, SHARD_WORKERS, SHARD_COUNT),
+            SHARD_COUNT,
+        )
+    )
+
+
+if __name__ == "__main__":
+    if SHARD_WORKERS == 1 and SHARD_COUNT == 1:
+        asyncio.run(serve_bot())
+    else:
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(
+                target=run_worker, args=(worker,), name=f"shard-{worker}"
+            )
+            for worker in range(SHARD_WORKERS)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
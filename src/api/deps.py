@@ -10,20 +10,32 @@ loop (which runs in a background thread) and awaits the result from the
 calling event loop (Quart).  This is the correct way to call discord.py
 APIs (e.g. ``channel.connect()``, ``voice_client.disconnect()``) from
 Quart handlers, which run on a different event loop.
+
+``get_client`` returns the ``BotControl`` the blueprints use: one over
+the in-process bot, or the ``RemoteControl`` (a ``ShardRouter`` for
+shard workers) registered with ``init_remote`` when the bot runs in
+other processes.
 """
 
 from __future__ import annotations
 
 import asyncio
 from collections.abc import Coroutine
-from typing import TYPE_CHECKING, Any, TypeVar
+from typing import TYPE_CHECKING, Any, TypeAlias, TypeVar
 
+from src.harpi_lib.control import BotControl
 
 if TYPE_CHECKING:
     from src.harpi_lib.api import HarpiAPI
     from src.harpi_lib.harpi_bot import HarpiBot
+    from src.harpi_lib.rpc import RemoteControl
+    from src.harpi_lib.shards import ShardRouter
+
+    # Whatever ``get_client`` returns; they share the control methods.
+    ControlClient: TypeAlias = BotControl | RemoteControl | ShardRouter
 
 _bot_ref: HarpiBot | None = None
+_remote: RemoteControl | ShardRouter | None = None
 
 _T = TypeVar("_T")
 
@@ -34,6 +46,19 @@ def init_bot(bot: HarpiBot) -> None:
     _bot_ref = bot
 
 
+def init_remote(remote: RemoteControl | ShardRouter) -> None:
+    """Use a bot running in another process. Called once during startup."""
+    global _remote
+    _remote = remote
+
+
+def get_client() -> ControlClient:
+    """The control surface of the bot, wherever it runs."""
+    if _remote is not None:
+        return _remote
+    return BotControl(get_api(), run_on_bot_loop)
+
+
 def get_bot() -> HarpiBot:
     """Get the bot instance. Raises if bot hasn't been initialized."""
     assert _bot_ref is not None, "Bot not initialized"
@@ -63,5 +88,6 @@ async def run_on_bot_loop(
         raise RuntimeError("Bot event loop is closed or unavailable")
 
     future = asyncio.run_coroutine_threadsafe(coro, loop)
-    # Await the concurrent.futures.Future from the current (Quart) loop
-    return await asyncio.wrap_future(future)
+    # Await the concurrent.futures.Future from the current (Quart) loop;
+    # timing out cancels the coroutine on the bot loop as well.
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
@@ -2,67 +2,29 @@
 
 Thread safety
 -------------
-The module-level ``guilds`` cache is populated and read exclusively from
-Quart's event loop (single-threaded async).  ``run_async`` is used to
-schedule coroutines on the bot's event loop when cross-loop access is
-needed.  No lock is required for the cache itself (MEDIUM-1 accepted
-risk — only one event loop serves HTTP requests).
+Guilds and voice channels come from the bot's ``GuildDirectory`` (kept
+current by gateway events on the bot's loop) through ``get_client``.
+Its snapshots are immutable and swapped atomically, so in-process reads
+need no blocking or cross-loop calls.  Connecting to a voice channel
+touches discord.py internals; ``BotControl`` runs it on the bot's loop.
 """
 
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Coroutine
-from typing import Any
+import dataclasses
 
-from discord import Guild, VoiceChannel
-from discord.ext.commands import Bot
 from loguru import logger
 from pydantic import BaseModel
 from quart import Blueprint, session
 from quart_schema import validate_request, validate_response
 
-from src.api.deps import get_api, get_bot
+from src.api.deps import get_client
+from src.harpi_lib.guild_directory import ChannelEntry, GuildEntry
 
 bp = Blueprint("guild", __name__)
 
-
-guilds: list[Guild] | None = None
-
-
-_SENTINEL = object()
-
-
-def run_async(bot: Bot, coro: Coroutine[Any, Any, Any]) -> Any:
-    """Run an async coroutine on the bot's event loop from a sync context."""
-    try:
-        loop = bot.loop
-        if loop and not loop.is_closed():
-            future = asyncio.run_coroutine_threadsafe(coro, loop)
-            result = future.result(timeout=10)
-            return result if result is not None else _SENTINEL
-        else:
-            logger.warning("Bot event loop is closed or unavailable")
-            return None
-    except Exception as e:
-        logger.opt(exception=True).error(f"Error in run_async: {e}")
-        return None
-
-
-async def _get_guilds() -> list[Guild]:
-    """Load guilds the bot is connected to."""
-    global guilds
-    if guilds is not None:
-        return guilds
-    bot = get_bot()
-    if not bot:
-        return []
-
-    async def load_guild():
-        return [guild async for guild in bot.fetch_guilds(limit=150)]
-
-    guilds = run_async(bot, load_guild()) or []
-    return guilds
+VOICE_CONNECT_TIMEOUT = 10.0
 
 
 class ChannelResponse(BaseModel):
@@ -72,8 +34,8 @@ class ChannelResponse(BaseModel):
     name: str
 
 
-def to_channel_response(channel: VoiceChannel) -> ChannelResponse:
-    """Convert a VoiceChannel to a ChannelResponse."""
+def to_channel_response(channel: ChannelEntry) -> ChannelResponse:
+    """Convert a directory channel to a ChannelResponse."""
     return ChannelResponse(
         id=str(channel.id),
         name=channel.name,
@@ -88,20 +50,15 @@ class GuildResponse(BaseModel):
     icon: str
 
 
-def to_guild_response(guild: Guild) -> GuildResponse:
-    """Convert a Guild to a GuildResponse."""
-    return GuildResponse(
-        id=str(guild.id),
-        name=guild.name,
-        icon=str(guild.icon.url) if guild.icon else "",
-    )
+def to_guild_response(guild: GuildEntry) -> GuildResponse:
+    """Convert a directory guild to a GuildResponse."""
+    return GuildResponse(id=str(guild.id), name=guild.name, icon=guild.icon)
 
 
 @bp.route("/api/guild")
 @validate_response(list[GuildResponse])
 async def get_guilds() -> list[GuildResponse]:
-    guilds_list = await _get_guilds()
-    return [to_guild_response(g) for g in guilds_list]
+    return [to_guild_response(g) for g in await get_client().guilds()]
 
 
 class ChannelsResponse(BaseModel):
@@ -116,16 +73,15 @@ class ChannelsResponse(BaseModel):
 async def get_channels(
     guild_id: str,
 ) -> ChannelsResponse | tuple[ChannelsResponse, int]:
-    bot = get_bot()
-    guild = bot.get_guild(int(guild_id))
+    if not guild_id.isdigit():
+        return ChannelsResponse(channels=[], current_channel=None), 400
+    client = get_client()
+    guild = await client.guild(int(guild_id))
     if not guild:
         return ChannelsResponse(channels=[], current_channel=None), 404
 
-    channel: str | None = None
-    if (guild_config := get_api().get_guild_config(int(guild_id))) and (
-        voice_channel := guild_config.channel
-    ):
-        channel = str(voice_channel.id)
+    channel_id = await client.current_channel(guild.id)
+    channel = str(channel_id) if channel_id is not None else None
 
     logger.debug(f"Connected to channel {channel}.")
 
@@ -135,6 +91,43 @@ async def get_channels(
     )
 
 
+class VoiceSchedulerResponse(BaseModel):
+    """Load of the shared voice scheduler (``HARPI_VOICE_SCHEDULER``)."""
+
+    streams: int
+    ticks: int
+    last_load: float
+    mean_load: float
+    peak_load: float
+    overruns: int
+    late_frames: int
+    stalled_renders: int
+
+
+class GuildResourcesResponse(BaseModel):
+    """What a connected guild holds in the bot process."""
+
+    sources: int = 0
+    threads: int = 0
+    ffmpeg_processes: int = 0
+    buffered_bytes: int = 0
+    voice_scheduler: VoiceSchedulerResponse | None = None
+    error: str | None = None
+
+
+@bp.route("/api/guild/<guild_id>/resources")
+@validate_response(GuildResourcesResponse)
+async def get_resources(
+    guild_id: str,
+) -> GuildResourcesResponse | tuple[GuildResourcesResponse, int]:
+    if not guild_id.isdigit():
+        return GuildResourcesResponse(error="Invalid guild ID"), 400
+    resources = await get_client().resources(int(guild_id))
+    if resources is None:
+        return GuildResourcesResponse(error="Guild not connected"), 404
+    return GuildResourcesResponse(**dataclasses.asdict(resources))
+
+
 class SelectGuildRequest(BaseModel):
     """Request to select a guild."""
 
@@ -155,15 +148,12 @@ class GuildSelectResponse(BaseModel):
 async def select_guild(
     data: SelectGuildRequest,
 ) -> GuildSelectResponse | tuple[GuildSelectResponse, int]:
-    bot = get_bot()
-
-    if bot and bot.is_ready():
-        guild = bot.get_guild(int(data.guild_id))
-        if guild:
-            session["guild_id"] = data.guild_id
-            return GuildSelectResponse(
-                success=True, guild=to_guild_response(guild)
-            )
+    guild = await get_client().guild(int(data.guild_id))
+    if guild:
+        session["guild_id"] = data.guild_id
+        return GuildSelectResponse(
+            success=True, guild=to_guild_response(guild)
+        )
 
     return GuildSelectResponse(
         success=False, error="Guild not found or bot not ready"
@@ -190,14 +180,18 @@ class ChannelSelectResponse(BaseModel):
 async def select_channel(
     data: SelectChannelRequest,
 ) -> ChannelSelectResponse | tuple[ChannelSelectResponse, int]:
-    bot = get_bot()
     logger.info(f"Connecting to channel {data.channel_id}.")
-    result = run_async(
-        bot,
-        get_api().connect_to_voice(int(data.guild_id), int(data.channel_id)),
-    )
-
-    if result is None:
+    try:
+        await asyncio.wait_for(
+            get_client().connect_to_voice(
+                int(data.guild_id), int(data.channel_id)
+            ),
+            VOICE_CONNECT_TIMEOUT,
+        )
+    except Exception as e:
+        logger.opt(exception=True).error(
+            f"Error connecting to channel {data.channel_id}: {e}"
+        )
         return ChannelSelectResponse(
             success=False, error="Failed to connect to voice channel"
         ), 500
@@ -1,19 +1,59 @@
-"""Music playback API endpoints."""
+"""Music playback API endpoints.
 
-from typing import cast, Literal
+Handlers reach the bot only through ``get_client``, so the same
+blueprint serves an in-process bot and one in another process (see
+``src.harpi_lib.control``).
+"""
 
-from discord import VoiceClient
-from loguru import logger
-from pydantic import BaseModel
-from quart import Blueprint
-from quart_schema import validate_response, validate_request
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, Annotated, Literal
 
-from src.api.deps import get_api, get_bot, run_on_bot_loop
+from loguru import logger
+from pydantic import BaseModel, Field
+from quart import Blueprint, Response, make_response, request
+from quart_schema import (
+    document_response,
+    validate_querystring,
+    validate_request,
+    validate_response,
+)
+
+from src.api.deps import get_client
 from src.harpi_lib.api import LoopMode
+from src.harpi_lib.control import DEFAULT_VOLUME, STATUS_QUEUE_PREVIEW
+from src.harpi_lib.audio.dsp import MAX_EFFECTS, EffectSpec
+from src.harpi_lib.services.admission import BudgetExceeded
+from src.harpi_lib.services.mix_batch import (
+    AddLayer,
+    LayerVolume,
+    MixOp,
+    MusicVolume,
+    RemoveLayer,
+    SetLoop,
+)
+from src.harpi_lib.status_events import StatusEvent
+
+if TYPE_CHECKING:
+    from src.api.deps import ControlClient
 
 bp = Blueprint("music", __name__)
 
-DEFAULT_VOLUME = 0.5
+# Status fields that change without a state version bump.
+PLAYBACK_FIELDS = frozenset({"progress", "is_playing", "is_paused"})
+MAX_QUEUE_PAGE = 200
+# Links accepted by one ``/api/music/add`` request.
+MAX_ADD_LINKS = 50
+# Operations accepted by one /api/music/batch request.
+MAX_BATCH_OPS = 64
+
+# Connected guilds whose status body is kept; the oldest entry goes.
+STATUS_CACHE_SIZE = 1024
+
+# guild_id -> (state version, status JSON without PLAYBACK_FIELDS).
+# A guild's entry is dropped once it is seen without a config.
+_status_cache: dict[int, tuple[int, bytes]] = {}
 
 LOOP_MODE_ALIASES: dict[str, LoopMode] = {}
 for _alias in ("off", "false", "0", "no", "n"):
@@ -42,25 +82,34 @@ class MusicLayerResponse(BaseModel):
     id: str
     url: str
     volume: float
+    paused: bool = False
 
 
 class QueueItemResponse(BaseModel):
     """Queue track information."""
 
+    id: int
     title: str
     duration: int
     url: str
 
 
 class MusicStatusResponse(BaseModel):
-    """Full music playback status for a guild."""
+    """Full music playback status for a guild.
+
+    ``queue`` holds the first ``STATUS_QUEUE_PREVIEW`` items only;
+    ``queue_length`` is the length of the whole queue.
+    """
 
     current_music: MusicTrackResponse | None
     progress: int
     queue: list[QueueItemResponse]
+    queue_length: int = 0
     layers: list[MusicLayerResponse]
     is_playing: bool
     is_paused: bool
+    # Only the queue track is paused (``is_paused`` pauses everything).
+    queue_paused: bool = False
     loop_mode: str
     volume: float
 
@@ -71,6 +120,7 @@ class MusicStatusResponse(BaseModel):
             current_music=None,
             progress=0,
             queue=[],
+            queue_length=0,
             layers=[],
             is_playing=False,
             is_paused=False,
@@ -79,6 +129,23 @@ class MusicStatusResponse(BaseModel):
         )
 
 
+class QueuePageQuery(BaseModel):
+    """Query string for a page of the queue."""
+
+    guild_id: str
+    offset: int = Field(0, ge=0)
+    limit: int = Field(STATUS_QUEUE_PREVIEW, ge=1, le=MAX_QUEUE_PAGE)
+
+
+class QueuePageResponse(BaseModel):
+    """A page of queue items."""
+
+    items: list[QueueItemResponse]
+    offset: int
+    limit: int
+    total: int
+
+
 class MusicControlResponse(BaseModel):
     """Response for a music control action."""
 
@@ -92,6 +159,13 @@ class GuildRequest(BaseModel):
     guild_id: str
 
 
+class PauseRequest(GuildRequest):
+    """Request to pause or resume playback or a single source."""
+
+    # "queue", "tts" or a layer ID; None pauses everything.
+    target: str | None = None
+
+
 class LoopRequest(BaseModel):
     """Request to change loop mode."""
 
@@ -121,20 +195,228 @@ class LayerVolumeRequest(BaseModel):
     volume: int
 
 
+class QueueMoveRequest(BaseModel):
+    """Request to move a queue item to a new position."""
+
+    guild_id: str
+    item_id: int
+    index: int = Field(ge=0)
+
+
+class QueueRemoveRequest(BaseModel):
+    """Request to remove a queue item."""
+
+    guild_id: str
+    item_id: int
+
+
 class MusicAddRequest(BaseModel):
-    """Request to add music to queue or as a layer."""
+    """Request to add music to queue or as a layer.
+
+    ``link`` and ``links`` may be combined; all of them are added, in
+    order, by a single job.
+    """
 
     guild_id: str
     channel_id: str | None = None
-    link: str
+    link: str | None = None
+    links: list[str] = Field(default_factory=list, max_length=MAX_ADD_LINKS)
     type: Literal["queue", "layer"] = "queue"
 
 
 class MusicAddResponse(BaseModel):
-    """Response after adding music."""
+    """Response after accepting an add request."""
+
+    status: str
+    error: str | None = None
+    job_id: str | None = None
+
+
+class MusicJobResponse(BaseModel):
+    """Progress of an add job."""
+
+    id: str
+    guild_id: str
+    kind: Literal["queue", "layer"]
+    links: list[str]
+    stage: Literal[
+        "pending", "resolve", "enqueue", "first_frame", "done", "failed"
+    ]
+    resolved: int
+    tracks: int
+    failed_links: list[str]
+    started: bool | None
+    error: str | None
+    stage_times: dict[str, float]
+
+
+class LayerVolumeOp(BaseModel):
+    """Batch operation: set a layer's volume."""
+
+    op: Literal["layer_volume"]
+    layer_id: str
+    volume: float = Field(ge=0)
+
+
+class LayerAddOp(BaseModel):
+    """Batch operation: add a layer from a link."""
+
+    op: Literal["add_layer"]
+    link: str
+    volume: float | None = Field(default=None, ge=0)
+
+
+class LayerRemoveOp(BaseModel):
+    """Batch operation: remove a layer."""
+
+    op: Literal["remove_layer"]
+    layer_id: str
+
+
+class LoopOp(BaseModel):
+    """Batch operation: change the loop mode."""
+
+    op: Literal["loop"]
+    mode: str
+
+
+class MasterVolumeOp(BaseModel):
+    """Batch operation: set the music volume."""
+
+    op: Literal["volume"]
+    volume: float = Field(ge=0)
+
+
+BatchOp = Annotated[
+    LayerVolumeOp | LayerAddOp | LayerRemoveOp | LoopOp | MasterVolumeOp,
+    Field(discriminator="op"),
+]
+
+
+class MusicBatchRequest(BaseModel):
+    """Request to apply several mix operations at once."""
+
+    guild_id: str
+    channel_id: str | None = None
+    ops: list[BatchOp] = Field(min_length=1, max_length=MAX_BATCH_OPS)
+
+
+class MusicBatchResponse(BaseModel):
+    """Response for a mix batch, with the IDs of the added layers."""
 
     status: str
     error: str | None = None
+    layer_ids: list[str] = Field(default_factory=list)
+
+
+class SceneLayerResponse(BaseModel):
+    """A layer of a saved scene."""
+
+    link: str
+    volume: float
+
+
+class SceneResponse(BaseModel):
+    """A saved scene preset."""
+
+    name: str
+    layers: list[SceneLayerResponse]
+
+
+class SceneListResponse(BaseModel):
+    """Saved scene presets of a guild."""
+
+    scenes: list[SceneResponse]
+
+
+class SceneRequest(BaseModel):
+    """Request naming a scene preset."""
+
+    guild_id: str
+    name: str = Field(min_length=1, max_length=64)
+
+
+class SceneLoadRequest(SceneRequest):
+    """Request to load a scene preset."""
+
+    channel_id: str | None = None
+
+
+class EffectModel(BaseModel):
+    """One effect of a source's chain."""
+
+    kind: Literal[
+        "lowpass",
+        "highpass",
+        "peaking",
+        "lowshelf",
+        "highshelf",
+        "pan",
+        "reverb",
+    ]
+    frequency: float = Field(default=1000.0, ge=20, le=22800)
+    q: float = Field(default=0.707, ge=0.1, le=20)
+    gain_db: float = Field(default=0.0, ge=-24, le=24)
+    pan: float = Field(default=0.0, ge=-1, le=1)
+    mix: float = Field(default=0.3, ge=0, le=1)
+    room: float = Field(default=0.5, ge=0, le=1)
+
+
+class EffectsRequest(BaseModel):
+    """Request to replace the effects of the queue, TTS or a layer."""
+
+    guild_id: str
+    # "queue", "tts" or a layer ID.
+    target: str = "queue"
+    effects: list[EffectModel] = Field(
+        default_factory=list, max_length=MAX_EFFECTS
+    )
+
+
+class EffectChainResponse(BaseModel):
+    """A source's effects and what they cost per 20 ms frame."""
+
+    target: str
+    effects: list[EffectModel]
+    mean_cost_ms: float
+    peak_cost_ms: float
+    bypassed: bool
+
+
+class EffectsResponse(BaseModel):
+    """Effect chains of a guild."""
+
+    chains: list[EffectChainResponse]
+
+
+class BusRequest(BaseModel):
+    """Request to change a mix bus; omitted fields stay as they are."""
+
+    guild_id: str
+    bus: Literal["music", "ambience", "sfx", "voice"]
+    # Percent, like the other volumes.
+    volume: float | None = Field(default=None, ge=0, le=200)
+    muted: bool | None = None
+    # An empty list removes the bus's effects.
+    effects: list[EffectModel] | None = Field(
+        default=None, max_length=MAX_EFFECTS
+    )
+
+
+class BusResponse(BaseModel):
+    """Settings of one mix bus."""
+
+    name: str
+    volume: float
+    muted: bool
+    effects: list[EffectModel]
+    bypassed: bool
+
+
+class BusesResponse(BaseModel):
+    """Mix buses of a guild."""
+
+    buses: list[BusResponse]
 
 
 # === Deprecated models (kept for backward-compat endpoint) ===
@@ -171,100 +453,232 @@ def _parse_guild_id(raw: str) -> int | None:
         return None
 
 
-def get_music_data(guild_id: int) -> MusicStatusResponse | None:
-    """Get music status data for a specific guild.
+def _status_etag(guild_id: int, version: int, playback: dict) -> str:
+    # Progress is left out: it changes every second while playing, and
+    # pollers advance it themselves between full responses.
+    return (
+        f"{guild_id}-{version}-"
+        f"{int(bool(playback['is_playing']))}{int(bool(playback['is_paused']))}"
+    )
+
 
-    Args:
-        guild_id: The guild ID to get music data for.
+async def _versioned_status_body(
+    client: "ControlClient", guild_id: int, version: int
+) -> bytes | None:
+    """Serialized status without the playback fields, cached per version.
 
-    Returns:
-        MusicStatusResponse with current track, progress, queue, and playback state.
-        None if bot is not ready or guild not found.
+    Versions are unique across guild configs and bot restarts, so a
+    cache hit is always current, even after the bot behind a remote
+    client restarts; a miss fetches the status once for the new version.
+    Guilds without a config (version 0) are not cached.
     """
-    bot = get_bot()
-    if not bot:
-        return None
-
-    guild = bot.get_guild(guild_id)
-    if not guild:
+    cached = _status_cache.get(guild_id)
+    if version and cached and cached[0] == version:
+        return cached[1]
+    status = await client.status(guild_id)
+    if status is None:
+        _status_cache.pop(guild_id, None)
         return None
-
-    guild_config = get_api().get_guild_config(guild_id)
-    current_music = guild_config.current_music if guild_config else None
-    queue = guild_config.queue if guild_config else None
-    background = guild_config.background if guild_config else None
-    loop_mode = guild_config.loop if guild_config else LoopMode.OFF
-
-    voice_client = (
-        cast(VoiceClient, guild.voice_client) if guild.voice_client else None
+    version, data = status
+    body = MusicStatusResponse.model_validate(data).model_dump_json(
+        exclude=PLAYBACK_FIELDS
     )
+    _status_cache.pop(guild_id, None)
+    if version:
+        if len(_status_cache) >= STATUS_CACHE_SIZE:
+            del _status_cache[next(iter(_status_cache))]
+        _status_cache[guild_id] = (version, body.encode())
+    return body.encode()
 
-    return MusicStatusResponse(
-        current_music=MusicTrackResponse(
-            title=current_music.title,
-            duration=current_music.duration,
-            url=current_music.url,
-        )
-        if current_music
-        else None,
-        progress=0,
-        queue=[
-            QueueItemResponse(title=m.title, duration=m.duration, url=m.url)
-            for m in (queue if queue else [])
-        ],
-        layers=[
-            MusicLayerResponse(
-                title=layer.title,
-                id=layer.id,
-                url=layer.url,
-                volume=layer.volume,
-            )
-            for layer in (background.values() if background else [])
-        ],
-        is_playing=voice_client.is_playing() if voice_client else False,
-        is_paused=voice_client.is_paused() if voice_client else False,
-        loop_mode=loop_mode.name.lower(),
-        volume=guild_config.volume if guild_config else DEFAULT_VOLUME,
-    )
 
-
-def _get_voice_client(guild_id: int) -> VoiceClient | None:
-    """Resolve the VoiceClient for a guild, or None."""
-    bot = get_bot()
-    if not bot:
-        return None
-    guild = bot.get_guild(guild_id)
-    if guild and guild.voice_client:
-        return cast(VoiceClient, guild.voice_client)
-    return None
+def _with_playback(body: bytes, playback: dict[str, object]) -> bytes:
+    """Splice the playback fields into a cached status body."""
+    fields = json.dumps(playback, separators=(",", ":")).encode()
+    return fields[:-1] + b"," + body[1:]
 
 
 # === Endpoints ===
 
 
 @bp.route("/api/music/<guild_id>/status")
-@validate_response(MusicStatusResponse)
+@document_response(MusicStatusResponse)
 async def music_status(
     guild_id: str,
-) -> MusicStatusResponse | tuple[MusicStatusResponse, int]:
+) -> Response | tuple[MusicStatusResponse, int]:
     """Get music status for a guild.
 
+    Supports ``If-None-Match``: the ETag combines the guild's state
+    version with its play/pause state, so unchanged polls get a 304
+    without rebuilding or re-serializing the status.  The position is
+    not part of it: a 304 while playing means the client advances the
+    ``progress`` it has (or follows the ``position`` events of
+    ``/events``).
+
     Query params:
         guild_id: The guild ID to get status for.
     """
-    if not guild_id:
+    parsed_id = _parse_guild_id(guild_id)
+    if parsed_id is None:
+        logger.error(f"Guild not found: {guild_id}")
         return MusicStatusResponse.empty(), 400
 
+    client = get_client()
+    version, playback = await client.status_tag(parsed_id)
+    if not version:
+        # Disconnected: its cached body will not be current again.
+        _status_cache.pop(parsed_id, None)
+    etag = _status_etag(parsed_id, version, playback)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    body = await _versioned_status_body(client, parsed_id, version)
+    if body is None:
+        return MusicStatusResponse.empty(), 404
+
+    response = Response(
+        _with_playback(body, playback), content_type="application/json"
+    )
+    response.set_etag(etag)
+    return response
+
+
+@bp.route("/api/music/<guild_id>/events")
+async def music_events(
+    guild_id: str,
+) -> Response | tuple[MusicControlResponse, int]:
+    """Stream status changes for a guild as Server-Sent Events.
+
+    The first event is a ``snapshot`` with the same shape as
+    ``/api/music/<guild_id>/status``.  It is followed by deltas
+    (``track``, ``queue``, ``volume``, ``loop``, ``layer_added``,
+    ``layer_removed``, ``layer_volume``, ``layers_cleared``,
+    ``playback``, ``job``, ``effects``, ``bus``, ``source_paused``) and a ``position`` tick every
+    ``POSITION_TICK_SECONDS``.  A client that falls too far behind gets
+    a new ``snapshot``.
+    """
+    parsed_id = _parse_guild_id(guild_id)
+    if parsed_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+
+    status_stream = await get_client().open_status_stream(parsed_id)
+    if status_stream is None:
+        return MusicControlResponse(status="", error="Guild not found"), 404
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            yield StatusEvent("snapshot", status_stream.snapshot).encode()
+            while (events := await status_stream.next()) is not None:
+                for event in events:
+                    yield event.encode()
+        except asyncio.CancelledError:
+            logger.debug(f"Status stream closed for guild {parsed_id}")
+            raise
+        finally:
+            status_stream.close()
+
+    response = await make_response(
+        stream(),
+        {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+    response.timeout = None
+    return response
+
+
+# --- Queue endpoints ---
+
+
+@bp.route("/api/music/queue")
+@validate_querystring(QueuePageQuery)
+@validate_response(QueuePageResponse)
+async def music_queue(
+    query_args: QueuePageQuery,
+) -> QueuePageResponse | tuple[MusicControlResponse, int]:
+    """Get a page of the queue.
+
+    Query params:
+        guild_id: The guild ID.
+        offset: Index of the first item (default 0).
+        limit: Page size (default ``STATUS_QUEUE_PREVIEW``, at most
+            ``MAX_QUEUE_PAGE``).
+    """
+    guild_id = _parse_guild_id(query_args.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    items, total = await get_client().queue_page(
+        guild_id, query_args.offset, query_args.limit
+    )
+    return QueuePageResponse(
+        items=[QueueItemResponse(**item) for item in items],
+        offset=query_args.offset,
+        limit=query_args.limit,
+        total=total,
+    )
+
+
+@bp.route("/api/music/queue/move", methods=["POST"])
+@validate_request(QueueMoveRequest)
+@validate_response(MusicControlResponse)
+async def music_queue_move(
+    data: QueueMoveRequest,
+) -> MusicControlResponse | tuple[MusicControlResponse, int]:
+    """Move a queue item to a new position."""
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        data = get_music_data(int(guild_id))
-        if data is None:
-            return MusicStatusResponse.empty(), 404
+        await get_client().send(
+            guild_id, "move", item_id=data.item_id, index=data.index
+        )
+        return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 404
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error moving queue item: {e}")
+        return MusicControlResponse(status="", error=str(e)), 500
 
-    except ValueError:
-        logger.error(f"Guild not found: {guild_id}")
-        return MusicStatusResponse.empty(), 400
 
-    return data
+@bp.route("/api/music/queue/remove", methods=["POST"])
+@validate_request(QueueRemoveRequest)
+@validate_response(MusicControlResponse)
+async def music_queue_remove(
+    data: QueueRemoveRequest,
+) -> MusicControlResponse | tuple[MusicControlResponse, int]:
+    """Remove an item from the queue."""
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    try:
+        await get_client().send(guild_id, "remove", item_id=data.item_id)
+        return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 404
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error removing queue item: {e}")
+        return MusicControlResponse(status="", error=str(e)), 500
+
+
+@bp.route("/api/music/queue/shuffle", methods=["POST"])
+@validate_request(GuildRequest)
+@validate_response(MusicControlResponse)
+async def music_queue_shuffle(
+    data: GuildRequest,
+) -> MusicControlResponse | tuple[MusicControlResponse, int]:
+    """Shuffle the queue."""
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    try:
+        await get_client().send(guild_id, "shuffle")
+        return MusicControlResponse(status="ok")
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error shuffling queue: {e}")
+        return MusicControlResponse(status="", error=str(e)), 500
 
 
 # --- Individual control endpoints ---
@@ -281,7 +695,7 @@ async def music_stop(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        await get_api().stop_music(guild_id)
+        await get_client().send(guild_id, "stop")
         return MusicControlResponse(status="ok")
     except Exception as e:
         logger.opt(exception=True).error(f"Error stopping music: {e}")
@@ -299,7 +713,7 @@ async def music_skip(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        await get_api().skip_music(guild_id)
+        await get_client().send(guild_id, "skip")
         return MusicControlResponse(status="ok")
     except Exception as e:
         logger.opt(exception=True).error(f"Error skipping music: {e}")
@@ -307,40 +721,51 @@ async def music_skip(
 
 
 @bp.route("/api/music/pause", methods=["POST"])
-@validate_request(GuildRequest)
+@validate_request(PauseRequest)
 @validate_response(MusicControlResponse)
 async def music_pause(
-    data: GuildRequest,
+    data: PauseRequest,
 ) -> MusicControlResponse | tuple[MusicControlResponse, int]:
-    """Pause music playback."""
+    """Pause playback, or only the source named by ``target``.
+
+    Without a target the whole voice playback pauses.  With one, only
+    that source stops being read; its stream stays open and resumes
+    from the same position.
+    """
     guild_id = _parse_guild_id(data.guild_id)
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        vc = _get_voice_client(guild_id)
-        if vc:
-            vc.pause()
+        if data.target is None:
+            await get_client().send(guild_id, "pause")
+        else:
+            await get_client().send(guild_id, "pause", target=data.target)
         return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 400
     except Exception as e:
         logger.opt(exception=True).error(f"Error pausing music: {e}")
         return MusicControlResponse(status="", error=str(e)), 500
 
 
 @bp.route("/api/music/resume", methods=["POST"])
-@validate_request(GuildRequest)
+@validate_request(PauseRequest)
 @validate_response(MusicControlResponse)
 async def music_resume(
-    data: GuildRequest,
+    data: PauseRequest,
 ) -> MusicControlResponse | tuple[MusicControlResponse, int]:
-    """Resume music playback."""
+    """Resume playback, or only the source named by ``target``."""
     guild_id = _parse_guild_id(data.guild_id)
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        vc = _get_voice_client(guild_id)
-        if vc:
-            vc.resume()
+        if data.target is None:
+            await get_client().send(guild_id, "resume")
+        else:
+            await get_client().send(guild_id, "resume", target=data.target)
         return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 400
     except Exception as e:
         logger.opt(exception=True).error(f"Error resuming music: {e}")
         return MusicControlResponse(status="", error=str(e)), 500
@@ -360,7 +785,7 @@ async def music_loop(
     if loop_mode is None:
         return MusicControlResponse(status="", error="Invalid loop mode"), 400
     try:
-        await get_api().set_loop(guild_id, loop_mode)
+        await get_client().send(guild_id, "loop", loop=loop_mode)
         return MusicControlResponse(status="ok")
     except Exception as e:
         logger.opt(exception=True).error(f"Error setting loop: {e}")
@@ -378,7 +803,7 @@ async def music_volume(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        await get_api().set_music_volume(guild_id, float(data.volume))
+        await get_client().send(guild_id, "volume", volume=float(data.volume))
         return MusicControlResponse(status="ok")
     except Exception as e:
         logger.opt(exception=True).error(f"Error setting volume: {e}")
@@ -396,7 +821,9 @@ async def music_layer_remove(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        await get_api().remove_background_audio(guild_id, data.layer_id)
+        await get_client().send(
+            guild_id, "remove_layer", layer_id=data.layer_id
+        )
         return MusicControlResponse(status="ok")
     except Exception as e:
         logger.opt(exception=True).error(f"Error removing layer: {e}")
@@ -414,7 +841,7 @@ async def music_layer_clean(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        await get_api().clean_background_audios(guild_id)
+        await get_client().send(guild_id, "clean_layers")
         return MusicControlResponse(status="ok")
     except Exception as e:
         logger.opt(exception=True).error(f"Error cleaning layers: {e}")
@@ -432,8 +859,11 @@ async def music_layer_volume(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
     try:
-        await get_api().set_background_volume(
-            guild_id, data.layer_id, float(data.volume)
+        await get_client().send(
+            guild_id,
+            "layer_volume",
+            layer_id=data.layer_id,
+            volume=float(data.volume),
         )
         return MusicControlResponse(status="ok")
     except Exception as e:
@@ -441,6 +871,261 @@ async def music_layer_volume(
         return MusicControlResponse(status="", error=str(e)), 500
 
 
+def _mix_op(op: BatchOp) -> MixOp:
+    """Convert a validated batch operation for the mix batch service."""
+    match op:
+        case LayerVolumeOp():
+            return LayerVolume(op.layer_id, op.volume)
+        case LayerAddOp():
+            return AddLayer(op.link, op.volume)
+        case LayerRemoveOp():
+            return RemoveLayer(op.layer_id)
+        case MasterVolumeOp():
+            return MusicVolume(op.volume)
+        case LoopOp():
+            loop_mode = LOOP_MODE_ALIASES.get(op.mode)
+            if loop_mode is None:
+                raise ValueError("Invalid loop mode")
+            return SetLoop(loop_mode)
+
+
+@bp.route("/api/music/batch", methods=["POST"])
+@validate_request(MusicBatchRequest)
+@validate_response(MusicBatchResponse)
+async def music_batch(
+    data: MusicBatchRequest,
+) -> MusicBatchResponse | tuple[MusicBatchResponse, int]:
+    """Apply several mix operations atomically, at one frame boundary.
+
+    Either every operation is applied or, if any of them is invalid,
+    none is (``400``).  Batches adding layers over the resource budgets
+    are rejected with ``429``.
+
+    Body:
+        guild_id: The guild ID.
+        channel_id: (Optional) Voice channel to connect to when the bot
+            is not connected yet.
+        ops: Operations, each with an ``op`` of 'layer_volume',
+            'add_layer', 'remove_layer', 'loop' or 'volume'.
+    """
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicBatchResponse(status="", error="Invalid guild_id"), 400
+    try:
+        channel_id = int(data.channel_id) if data.channel_id else None
+        ops = [_mix_op(op) for op in data.ops]
+    except ValueError as e:
+        return MusicBatchResponse(status="", error=str(e)), 400
+    try:
+        layer_ids = await get_client().send(
+            guild_id, "batch", ops=ops, channel_id=channel_id
+        )
+        return MusicBatchResponse(status="ok", layer_ids=layer_ids)
+    except BudgetExceeded as e:
+        return MusicBatchResponse(status="", error=str(e)), 429
+    except ValueError as e:
+        return MusicBatchResponse(status="", error=str(e)), 400
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error applying mix batch: {e}")
+        return MusicBatchResponse(status="", error=str(e)), 500
+
+
+# --- Scene presets ---
+
+
+@bp.route("/api/music/<guild_id>/scenes")
+@validate_response(SceneListResponse)
+async def music_scenes(
+    guild_id: str,
+) -> SceneListResponse | tuple[MusicControlResponse, int]:
+    """List the saved scene presets of a guild."""
+    parsed_id = _parse_guild_id(guild_id)
+    if parsed_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    scenes = await get_client().list_scenes(parsed_id)
+    return SceneListResponse(
+        scenes=[SceneResponse(**scene.to_dict()) for scene in scenes]
+    )
+
+
+@bp.route("/api/music/scenes/save", methods=["POST"])
+@validate_request(SceneRequest)
+@validate_response(SceneResponse)
+async def music_scene_save(
+    data: SceneRequest,
+) -> SceneResponse | tuple[MusicControlResponse, int]:
+    """Save the current background layers as a named scene."""
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    try:
+        scene = await get_client().send(guild_id, "save_scene", name=data.name)
+        return SceneResponse(**scene.to_dict())
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 400
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error saving scene: {e}")
+        return MusicControlResponse(status="", error=str(e)), 500
+
+
+@bp.route("/api/music/scenes/load", methods=["POST"])
+@validate_request(SceneLoadRequest)
+@validate_response(MusicBatchResponse)
+async def music_scene_load(
+    data: SceneLoadRequest,
+) -> MusicBatchResponse | tuple[MusicBatchResponse, int]:
+    """Replace the background layers with a saved scene.
+
+    All layers of the scene are resolved concurrently and swapped in at
+    once; if one fails, the current layers keep playing (``400``).
+    """
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicBatchResponse(status="", error="Invalid guild_id"), 400
+    try:
+        channel_id = int(data.channel_id) if data.channel_id else None
+    except ValueError:
+        return MusicBatchResponse(status="", error="Invalid channel_id"), 400
+    try:
+        layer_ids = await get_client().send(
+            guild_id, "load_scene", name=data.name, channel_id=channel_id
+        )
+        return MusicBatchResponse(status="ok", layer_ids=layer_ids)
+    except BudgetExceeded as e:
+        return MusicBatchResponse(status="", error=str(e)), 429
+    except ValueError as e:
+        return MusicBatchResponse(status="", error=str(e)), 400
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error loading scene: {e}")
+        return MusicBatchResponse(status="", error=str(e)), 500
+
+
+@bp.route("/api/music/scenes/delete", methods=["POST"])
+@validate_request(SceneRequest)
+@validate_response(MusicControlResponse)
+async def music_scene_delete(
+    data: SceneRequest,
+) -> MusicControlResponse | tuple[MusicControlResponse, int]:
+    """Delete a saved scene."""
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    try:
+        await get_client().delete_scene(guild_id, data.name)
+        return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 404
+
+
+# --- Effects ---
+
+
+@bp.route("/api/music/<guild_id>/effects")
+@validate_response(EffectsResponse)
+async def music_effects(
+    guild_id: str,
+) -> EffectsResponse | tuple[MusicControlResponse, int]:
+    """List the effect chains of a guild and their cost per frame."""
+    parsed_id = _parse_guild_id(guild_id)
+    if parsed_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    chains = await get_client().effects(parsed_id)
+    return EffectsResponse(
+        chains=[EffectChainResponse(**chain) for chain in chains]
+    )
+
+
+@bp.route("/api/music/effects", methods=["POST"])
+@validate_request(EffectsRequest)
+@validate_response(MusicControlResponse)
+async def music_set_effects(
+    data: EffectsRequest,
+) -> MusicControlResponse | tuple[MusicControlResponse, int]:
+    """Replace the effects of the queue, TTS or a layer.
+
+    Takes effect on the next frame without restarting the stream.
+    Sending the same kinds in the same order only changes parameters,
+    so a slider can call this continuously.  An empty list removes the
+    effects.
+    """
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    try:
+        await get_client().send(
+            guild_id,
+            "effects",
+            target=data.target,
+            effects=[EffectSpec(**e.model_dump()) for e in data.effects],
+        )
+        return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 400
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error setting effects: {e}")
+        return MusicControlResponse(status="", error=str(e)), 500
+
+
+# --- Buses ---
+
+
+@bp.route("/api/music/<guild_id>/buses")
+@validate_response(BusesResponse)
+async def music_buses(
+    guild_id: str,
+) -> BusesResponse | tuple[MusicControlResponse, int]:
+    """List the mix buses of a guild."""
+    parsed_id = _parse_guild_id(guild_id)
+    if parsed_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    buses = await get_client().buses(parsed_id)
+    return BusesResponse(
+        buses=[
+            BusResponse(
+                name=bus["name"],
+                volume=bus["gain"] * 100,
+                muted=bus["muted"],
+                effects=bus["effects"],
+                bypassed=bus["bypassed"],
+            )
+            for bus in buses
+        ]
+    )
+
+
+@bp.route("/api/music/bus", methods=["POST"])
+@validate_request(BusRequest)
+@validate_response(MusicControlResponse)
+async def music_set_bus(
+    data: BusRequest,
+) -> MusicControlResponse | tuple[MusicControlResponse, int]:
+    """Change the volume, mute or effects of a whole bus.
+
+    A bus is every source of one kind: ``music`` (the queue),
+    ``ambience`` (layers), ``sfx`` (buttons) and ``voice`` (TTS).
+    """
+    guild_id = _parse_guild_id(data.guild_id)
+    if guild_id is None:
+        return MusicControlResponse(status="", error="Invalid guild_id"), 400
+    try:
+        await get_client().send(
+            guild_id,
+            "bus",
+            bus=data.bus,
+            gain=None if data.volume is None else data.volume / 100,
+            muted=data.muted,
+            effects=None
+            if data.effects is None
+            else [EffectSpec(**e.model_dump()) for e in data.effects],
+        )
+        return MusicControlResponse(status="ok")
+    except ValueError as e:
+        return MusicControlResponse(status="", error=str(e)), 400
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error setting bus: {e}")
+        return MusicControlResponse(status="", error=str(e)), 500
+
+
 # --- Deprecated combined endpoint (kept for backward compatibility) ---
 
 
@@ -467,54 +1152,49 @@ async def music_control(
     if guild_id is None:
         return MusicControlResponse(status="", error="Invalid guild_id"), 400
 
-    bot = get_bot()
-    if not bot:
-        return MusicControlResponse(status="", error="Bot not ready"), 503
-
     try:
-        api = get_api()
+        client = get_client()
         action = data.action
 
         if action == "stop":
-            await api.stop_music(guild_id)
+            await client.send(guild_id, "stop")
         elif action == "skip":
-            await api.skip_music(guild_id)
+            await client.send(guild_id, "skip")
         elif action == "pause":
-            vc = _get_voice_client(guild_id)
-            if vc:
-                vc.pause()
+            await client.send(guild_id, "pause")
         elif action == "resume":
-            vc = _get_voice_client(guild_id)
-            if vc:
-                vc.resume()
+            await client.send(guild_id, "resume")
         elif action == "loop":
             loop_mode = LOOP_MODE_ALIASES.get(data.mode or "")
             if loop_mode is None:
                 return MusicControlResponse(
                     status="", error="Invalid loop mode"
                 ), 400
-            await api.set_loop(guild_id, loop_mode)
+            await client.send(guild_id, "loop", loop=loop_mode)
         elif action == "remove_layer":
             if not data.layer_id:
                 return MusicControlResponse(
                     status="", error="layer_id required"
                 ), 400
-            await api.remove_background_audio(guild_id, data.layer_id)
+            await client.send(guild_id, "remove_layer", layer_id=data.layer_id)
         elif action == "clean_layers":
-            await api.clean_background_audios(guild_id)
+            await client.send(guild_id, "clean_layers")
         elif action == "set_volume":
             if data.volume is None:
                 return MusicControlResponse(
                     status="", error="volume required"
                 ), 400
-            await api.set_music_volume(guild_id, float(data.volume))
+            await client.send(guild_id, "volume", volume=float(data.volume))
         elif action == "set_layer_volume":
             if not data.layer_id or data.volume is None:
                 return MusicControlResponse(
                     status="", error="layer_id and volume required"
                 ), 400
-            await api.set_background_volume(
-                guild_id, data.layer_id, float(data.volume)
+            await client.send(
+                guild_id,
+                "layer_volume",
+                layer_id=data.layer_id,
+                volume=float(data.volume),
             )
         else:
             return MusicControlResponse(status="", error="Invalid action"), 400
@@ -531,28 +1211,30 @@ async def music_control(
 
 @bp.route("/api/music/add", methods=["POST"])
 @validate_request(MusicAddRequest)
-@validate_response(MusicAddResponse)
+@validate_response(MusicAddResponse, 202)
 async def music_add(
     data: MusicAddRequest,
-) -> MusicAddResponse | tuple[MusicAddResponse, int]:
-    """Add music to queue via link.
+) -> tuple[MusicAddResponse, int]:
+    """Start adding music to the queue (or as layers) via links.
+
+    Returns ``202`` with a ``job_id`` as soon as the job is registered;
+    follow it with ``/api/music/jobs/<job_id>`` or the ``job`` event of
+    ``/api/music/<guild_id>/events``.
 
     Body:
         guild_id: The guild ID.
         channel_id: The voice channel ID to connect to.
-        link: The music URL (YouTube, etc).
+        link: A music URL (YouTube, etc) or search query.
+        links: (Optional) More links, resolved concurrently.
         type: (Optional) 'queue' (default) or 'layer'.
     """
-    guild_id_str = data.guild_id
-    link = data.link
-    music_type = data.type
-
-    if not guild_id_str or not link:
+    links = [link for link in [data.link, *data.links] if link]
+    if not data.guild_id or not links:
         return MusicAddResponse(
             status="", error="guild_id and link required"
         ), 400
 
-    guild_id = _parse_guild_id(guild_id_str)
+    guild_id = _parse_guild_id(data.guild_id)
     if guild_id is None:
         return MusicAddResponse(status="", error="Invalid guild_id"), 400
 
@@ -561,28 +1243,30 @@ async def music_add(
     except (ValueError, TypeError):
         return MusicAddResponse(status="", error="Invalid channel_id"), 400
 
-    bot = get_bot()
-    if not bot:
-        return MusicAddResponse(status="", error="Bot not ready"), 503
-
     try:
-        api = get_api()
-        guild_config = api.get_guild_config(guild_id)
-        if not guild_config and not channel_id:
+        client = get_client()
+        if not channel_id and not await client.is_connected(guild_id):
             return MusicAddResponse(
                 status="", error="channel_id required when bot not connected"
             ), 400
 
-        if music_type == "layer":
-            await run_on_bot_loop(
-                api.add_background_audio(guild_id, channel_id or 0, link)
-            )
-        else:
-            await run_on_bot_loop(
-                api.add_music_to_queue(guild_id, channel_id or 0, link)
-            )
-        return MusicAddResponse(status="ok")
+        job_id = await client.submit_add_job(
+            guild_id, channel_id or 0, links, data.type
+        )
+        return MusicAddResponse(status="accepted", job_id=job_id), 202
 
     except Exception as e:
         logger.opt(exception=True).error(f"Error adding music: {e}")
         return MusicAddResponse(status="", error=str(e)), 500
+
+
+@bp.route("/api/music/jobs/<job_id>")
+@validate_response(MusicJobResponse)
+async def music_job(
+    job_id: str,
+) -> MusicJobResponse | tuple[MusicControlResponse, int]:
+    """Get the progress of an add job."""
+    job = await get_client().get_add_job(job_id)
+    if job is None:
+        return MusicControlResponse(status="", error="Job not found"), 404
+    return MusicJobResponse(**job)
@@ -1,36 +1,67 @@
 """RPG Dice Cog module."""
 
-from typing import Dict, List
+import asyncio
+import re
 
 from discord import Message
 from discord.ext.commands import Bot, Cog, command
 from discord.ext.commands.context import Context
 from loguru import logger
 
-from src.harpi_lib.math.parser import DiceParser, RollResult
+from src.harpi_lib.math.distribution import Distribution, DistributionEngine
+from src.harpi_lib.math.monte_carlo import MonteCarloEngine, SimulationStats
+from src.harpi_lib.math.parser import DiceParser
+
+MAX_MONTE_CARLO_ITERATIONS = 10_000_000
+TOP_RESULTS_SHOWN = 5
+PERCENTILES_SHOWN = (10, 25, 50, 75, 90)
+
+# "<expression> >= <k>" (or "≥") asks for P(X ≥ k) as well.
+THRESHOLD_PATTERN = re.compile(
+    r"^(?P<expression>.+?)\s*(?:>=|≥)\s*(?P<threshold>-?\d+(?:\.\d+)?)\s*$"
+)
 
 
 class DiceCog(Cog):
     """Cog for handling dice."""
 
-    def __init__(self, bot: Bot) -> None:
+    def __init__(
+        self,
+        bot: Bot,
+        parser: DiceParser | None = None,
+        monte_carlo_engine: MonteCarloEngine | None = None,
+        distribution_engine: DistributionEngine | None = None,
+    ) -> None:
         """Initialize the cog.
 
         Args:
             bot (discord.ext.commands.Bot): The bot.
+            parser (DiceParser | None): Parser shared by every command
+                and message handled by this cog.
+            monte_carlo_engine (MonteCarloEngine | None): Vectorized
+                sampler used by the ``monte`` command.
+            distribution_engine (DistributionEngine | None): Exact
+                distribution engine used by the ``prob`` command.
 
         """
         self.bot = bot
+        self.parser = parser or DiceParser()
+        self.monte_carlo_engine = monte_carlo_engine or MonteCarloEngine(
+            limits=self.parser.limits
+        )
+        self.distribution_engine = distribution_engine or DistributionEngine(
+            self.monte_carlo_engine
+        )
 
     @Cog.listener()
     async def on_message(self, message: Message) -> None:
         """Listen for messages and roll the dice."""
         if message.author == self.bot.user:
             return
-        parser = DiceParser()
-        if not parser.is_valid_dice_string(message.content):
+        if not self.parser.is_valid_dice_string(message.content):
             return
-        response = parser.roll(message.content)
+        # Off the event loop, like ``monte`` and ``prob``.
+        response = await asyncio.to_thread(self.parser.roll, message.content)
         await message.reply(response)
 
     @command(
@@ -45,8 +76,7 @@ class DiceCog(Cog):
             (e.g. 2d6 or 1d20+5)
 
         """
-        parser = DiceParser()
-        response = parser.roll(args)
+        response = await asyncio.to_thread(self.parser.roll, args)
         await ctx.reply(response)
 
     @command(name="monte", aliases=["montecarlo", "simulation"])
@@ -60,16 +90,23 @@ class DiceCog(Cog):
             roll_expression (str): Dice expression to simulate (e.g. 2d6+3)
 
         """
-        assert n > 0, "O número de iterações deve ser positivo"
-        assert n <= 10000, "Número máximo de iterações é 10000"
+        if not 0 < n <= MAX_MONTE_CARLO_ITERATIONS:
+            await ctx.reply(
+                "O número de iterações deve estar entre 1 e "
+                f"{MAX_MONTE_CARLO_ITERATIONS:,}"
+            )
+            return
 
         try:
-            results = self._run_monte_carlo_simulation(n, roll_expression)
-            response = self._format_monte_carlo_results(
-                results, n, roll_expression
+            stats = await asyncio.to_thread(
+                self._run_monte_carlo_simulation, n, roll_expression
             )
+            response = self._format_monte_carlo_results(stats, roll_expression)
             await ctx.reply(response)
 
+        except ValueError as e:
+            # Over the dice limits or an invalid expression.
+            await ctx.reply(f"Erro ao executar simulação: {e}")
         except Exception as e:
             logger.opt(exception=True).error(
                 f"Erro na simulação Monte Carlo: {e}"
@@ -78,7 +115,7 @@ class DiceCog(Cog):
 
     def _run_monte_carlo_simulation(
         self, n: int, roll_expression: str
-    ) -> List[int]:
+    ) -> SimulationStats:
         """Run the Monte Carlo simulation.
 
         Args:
@@ -86,84 +123,122 @@ class DiceCog(Cog):
             roll_expression (str): Dice expression
 
         Returns:
-            List[int]: List with the results of each iteration
+            SimulationStats: Histogram-backed statistics of the samples
 
         """
-
-        results: List[int] = []
-
-        for _ in range(n):
-            parser = DiceParser()
-            result: RollResult = parser.parse(roll_expression)
-            results.append(result.value)
-
-        return results
+        compiled = self.parser.compile(roll_expression)
+        return self.monte_carlo_engine.simulate(compiled, n)
 
     def _format_monte_carlo_results(
-        self, results: List[int], n: int, expression: str
+        self, stats: SimulationStats, expression: str
     ) -> str:
         """Format the Monte Carlo simulation results.
 
         Args:
-            results (List[int]): Simulation results
-            n (int): Number of iterations
+            stats (SimulationStats): Simulation statistics
             expression (str): Original expression
 
         Returns:
             str: Formatted message with the results
 
         """
-        stats = self._calculate_statistics(results)
-
+        n = stats.iterations
         response_lines = [
             f"🎲 **Simulação Monte Carlo** - {expression}",
             f"📊 **Iterações:** {n:,}",
-            f"📈 **Média:** {stats['mean']:.2f}",
-            f"📉 **Mediana:** {stats['median']:.2f}",
-            f"⬆️ **Máximo:** {stats['max']}",
-            f"⬇️ **Mínimo:** {stats['min']}",
-            f"📏 **Desvio Padrão:** {stats['std_dev']:.2f}",
+            f"📈 **Média:** {stats.mean:.2f}",
+            f"📉 **Mediana:** {stats.median:.2f}",
+            f"⬆️ **Máximo:** {stats.maximum}",
+            f"⬇️ **Mínimo:** {stats.minimum}",
+            f"📏 **Desvio Padrão:** {stats.std_dev:.2f}",
             "",
             "**Distribuição dos resultados mais frequentes:**",
         ]
 
-        if isinstance(stats["top_results"], list):
-            for value, count in stats["top_results"]:
-                percentage = (count / n) * 100
-                response_lines.append(
-                    f"`{value}`: {count:,} vezes ({percentage:.1f}%)"
-                )
+        for value, count in stats.top_results(TOP_RESULTS_SHOWN):
+            percentage = (count / n) * 100
+            response_lines.append(
+                f"`{value}`: {count:,} vezes ({percentage:.1f}%)"
+            )
 
         return "\n".join(response_lines)
 
-    def _calculate_statistics(
-        self, results: List[int]
-    ) -> Dict[str, float | int | List[tuple]]:
-        """Calculate statistics from the results.
+    @command(name="prob", aliases=["odds", "chance", "chances"])
+    async def probability(self, ctx: Context, *, args: str) -> None:
+        """Show the exact distribution of a dice expression.
 
         Args:
-            results (List[int]): List of results
+            ctx (Context)
+            args (str): Dice expression, optionally followed by
+            ``>= k`` to also get P(X ≥ k) (e.g. 4d6kh3+2 >= 15)
+
+        """
+        roll_expression, threshold = self._split_threshold(args)
+        try:
+            compiled = self.parser.compile(roll_expression)
+            distribution = await asyncio.to_thread(
+                self.distribution_engine.distribution, compiled
+            )
+            response = self._format_distribution(
+                distribution, roll_expression, threshold
+            )
+            await ctx.reply(response)
+
+        except ValueError as e:
+            # Over the dice limits or an invalid expression.
+            await ctx.reply(f"Erro ao calcular distribuição: {e}")
+        except Exception as e:
+            logger.opt(exception=True).error(
+                f"Erro ao calcular distribuição: {e}"
+            )
+            await ctx.reply(f"Erro ao calcular distribuição: {str(e)}")
+
+    @staticmethod
+    def _split_threshold(args: str) -> tuple[str, float | None]:
+        """Split ``"<expression> >= k"`` into the expression and ``k``."""
+        match = THRESHOLD_PATTERN.match(args.strip())
+        if not match:
+            return args.strip(), None
+        return match.group("expression"), float(match.group("threshold"))
+
+    def _format_distribution(
+        self,
+        distribution: Distribution,
+        expression: str,
+        threshold: float | None,
+    ) -> str:
+        """Format the distribution summary.
+
+        Args:
+            distribution (Distribution): Distribution of the expression
+            expression (str): Original expression
+            threshold (float | None): Optional k for P(X ≥ k)
 
         Returns:
-            Dict: Dictionary with the calculated statistics
+            str: Formatted message with the results
 
         """
-        import statistics
-        from collections import Counter
-
-        mean = statistics.mean(results)
-        median = statistics.median(results)
-        std_dev = statistics.stdev(results) if len(results) > 1 else 0.0
-
-        # Top 5 most common results
-        counter = Counter(results)
-        top_results = counter.most_common(5)
-
-        return {
-            "mean": mean,
-            "median": median,
-            "max": max(results),
-            "min": min(results),
-            "std_dev": std_dev,
-            "top_results": top_results,
-        }
+        title = (
+            "Distribuição exata"
+            if distribution.exact
+            else "Distribuição estimada por amostragem"
+        )
+        percentiles = " · ".join(
+            f"P{p}: {distribution.percentile(p)}" for p in PERCENTILES_SHOWN
+        )
+        response_lines = [
+            f"🎯 **{title}** - {expression}",
+            f"📈 **Média:** {distribution.mean:.2f}",
+            f"📏 **Desvio Padrão:** {distribution.std_dev:.2f}",
+            f"⬆️ **Máximo:** {distribution.maximum}",
+            f"⬇️ **Mínimo:** {distribution.minimum}",
+            f"📊 **Percentis:** {percentiles}",
+        ]
+
+        if threshold is not None:
+            chance = distribution.probability_at_least(threshold) * 100
+            response_lines.append(
+                f"🎲 **P(X ≥ {threshold:g}):** {chance:.2f}%"
+            )
+
+        return "\n".join(response_lines)
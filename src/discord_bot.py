@@ -5,6 +5,7 @@ from __future__ import annotations
 import asyncio
 import os
 import threading
+from collections.abc import Sequence
 
 import discord
 from dotenv import load_dotenv
@@ -16,7 +17,9 @@ from src.cogs.music import MusicCog
 from src.cogs.test import TestCog
 from src.cogs.tts import TTSCog
 from src.api.deps import init_bot
-from src.harpi_lib.harpi_bot import HarpiBot
+from src.harpi_lib.control import BotControl, on_current_loop
+from src.harpi_lib.harpi_bot import HarpiBot, ShardedHarpiBot
+from src.harpi_lib.rpc import DEFAULT_SOCKET, RpcServer
 
 assert load_dotenv(), "dot env not loaded"
 
@@ -41,9 +44,16 @@ def get_token() -> str:
     raise ValueError
 
 
-async def create_bot() -> HarpiBot:
+async def create_bot(
+    shard_ids: Sequence[int] | None = None, shard_count: int | None = None
+) -> HarpiBot:
     """Start the bot.
 
+    Parameters
+    ----------
+    shard_ids, shard_count
+        Run only these of *shard_count* shards (a shard worker).
+
     Returns
     -------
     HarpiBot
@@ -55,7 +65,16 @@ async def create_bot() -> HarpiBot:
 
     logger.info("Creating Discord bot client...")
     prefix = os.getenv("PREFIX") or "-"
-    client = HarpiBot(command_prefix=prefix, intents=intents)
+    if shard_ids is None:
+        client = HarpiBot(command_prefix=prefix, intents=intents)
+    else:
+        logger.info(f"Running shards {list(shard_ids)} of {shard_count}")
+        client = ShardedHarpiBot(
+            command_prefix=prefix,
+            intents=intents,
+            shard_ids=list(shard_ids),
+            shard_count=shard_count,
+        )
 
     logger.info("Adding cogs to bot...")
     await client.add_cog(TTSCog(client))
@@ -120,6 +139,31 @@ def run_bot_in_background() -> None:
     logger.info("Discord bot started in background thread")
 
 
+async def serve_bot(
+    socket_path: str | os.PathLike = DEFAULT_SOCKET,
+    shard_ids: Sequence[int] | None = None,
+    shard_count: int | None = None,
+) -> None:
+    """Run the bot in this process and serve it over a Unix socket.
+
+    The counterpart of ``HARPI_BOT_MODE=remote`` in the web app, which
+    then reaches the bot through ``rpc.RemoteControl`` (or, for shard
+    workers, ``shards.ShardRouter``).
+    """
+    global bot_instance
+    client = await create_bot(shard_ids, shard_count)
+    bot_instance = client
+    init_bot(client)
+
+    server = RpcServer(BotControl(client.api, on_current_loop), socket_path)
+    await server.start()
+    try:
+        logger.info("Starting Discord bot connection...")
+        await client.start(get_token())
+    finally:
+        await server.close()
+
+
 def get_bot_instance() -> HarpiBot:
     """Get the global bot instance.
 
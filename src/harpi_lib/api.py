@@ -8,22 +8,34 @@ event loop (running in a background thread).
 
 Individual field mutations on ``GuildConfig`` (e.g. setting ``volume``,
 ``current_music``, ``loop``) are atomic under CPython's GIL, so they are
-safe without explicit locking.  Compound read-modify-write sequences
-(e.g. iterating ``queue`` while another thread appends) are technically
-racy but acceptable in practice because:
-
-* Queue mutations happen exclusively on the bot's event loop.
-* Quart handlers only read queue contents for display purposes.
-* The ``guilds`` dict itself is only mutated (insert/delete) from the
-  bot's event loop via ``VoiceConnectionService``.
-
-This is an **accepted risk** documented here rather than papered over
-with locks that would add complexity without preventing real bugs.
+safe without explicit locking.  The ``guilds`` dict itself is only
+mutated (insert/delete) from the bot's event loop via
+``VoiceConnectionService``.
+
+``queue`` is a ``TrackQueue``: it is only mutated on the bot's event
+loop, and Quart handlers read it through immutable snapshots (iterating
+it takes one), so they never see a half-applied edit.
+
+Playback commands from HTTP handlers and the mixer's queue-end callback
+go through ``HarpiAPI.commands`` (a ``CommandBus``), which runs each
+guild's commands one at a time on the bot's event loop.
+
+``GuildConfig.version`` is bumped (under a per-config lock) after every
+mutation made by the services or the ``AudioController``, so readers can
+cache anything derived from a guild's state and only rebuild it when the
+version changes.
+
+``directory`` (a ``GuildDirectory``) lists the bot's guilds and voice
+channels from gateway events; Quart handlers read its snapshots
+directly.
 """
 
 import enum
+import itertools
+import threading
+import time
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import discord
 from discord.channel import VoiceChannel
@@ -31,10 +43,28 @@ from discord.ext.commands import Bot, Context
 
 from src.harpi_lib.audio.mixer import MixerSource
 from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.command_bus import CommandBus
+from src.harpi_lib.guild_directory import GuildDirectory
+from src.harpi_lib.jobs import AddJob, JobKind, JobRegistry
+from src.harpi_lib.music.track_queue import TrackQueue
 from src.harpi_lib.music.ytmusicdata import (
     YoutubeDLSource,
     YTMusicData,
 )
+from src.harpi_lib.scenes import SCENES_FILE, ScenePreset, SceneStore
+from src.harpi_lib.status_events import StatusHub
+
+if TYPE_CHECKING:
+    from src.harpi_lib.services.mix_batch import MixOp
+    from src.harpi_lib.services.voice_connection import GuildResources
+
+
+# Shared by every GuildConfig so that a version is never reused, even by
+# a new config created when the bot reconnects to the same guild.  It
+# starts at the boot time in microseconds, so a restarted bot does not
+# hand a remote web process versions it has already cached.
+_BOOT_EPOCH = time.time_ns() // 1000
+_STATE_VERSIONS = itertools.count(_BOOT_EPOCH)
 
 
 class LoopMode(enum.Enum):
@@ -51,6 +81,10 @@ class GuildConfig:
 
     Thread safety: individual field writes are atomic under CPython's GIL.
     See module docstring for the full threading contract.
+
+    ``version`` increases whenever the state changes (see
+    ``bump_version``); it is unique across all guild configs and across
+    restarts of the bot.
     """
 
     id: int
@@ -58,12 +92,28 @@ class GuildConfig:
     controller: AudioController
     ctx: Context | None = None
     voice_client: discord.VoiceClient | None = None
-    queue: list[YTMusicData] | None = None
+    queue: TrackQueue | None = None
     background: dict[str, YoutubeDLSource] | None = None
     current_music: YTMusicData | None = None
     loop: LoopMode = LoopMode.OFF
     channel: VoiceChannel | None = None
     volume: float = 0.7
+    version: int = field(
+        default_factory=lambda: next(_STATE_VERSIONS), init=False
+    )
+    _version_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if self.queue is not None and not isinstance(self.queue, TrackQueue):
+            self.queue = TrackQueue(self.queue)
+
+    def bump_version(self) -> int:
+        """Record a state change and return the new version (any thread)."""
+        with self._version_lock:
+            self.version = next(_STATE_VERSIONS)
+            return self.version
 
 
 class HarpiAPI:
@@ -73,34 +123,122 @@ class HarpiAPI:
     """
 
     def __init__(self, bot: Bot) -> None:
+        from src.harpi_lib.services.add_jobs import AddJobService
+        from src.harpi_lib.services.admission import Admission
         from src.harpi_lib.services.background_audio import (
             BackgroundAudioService,
         )
+        from src.harpi_lib.services.buses import BusService
+        from src.harpi_lib.services.effects import EffectsService
+        from src.harpi_lib.services.mix_batch import MixBatchService
         from src.harpi_lib.services.music_queue import MusicQueueService
+        from src.harpi_lib.services.scenes import SceneService
         from src.harpi_lib.services.tts import TTSService
+        from src.harpi_lib.audio import broadcast, loudness, voice_scheduler
         from src.harpi_lib.services.voice_connection import (
             VoiceConnectionService,
         )
 
         self.bot: Bot = bot
         self.guilds: dict[int, GuildConfig] = {}
+        self.status_events = StatusHub()
+        self.directory = GuildDirectory(bot)
+        self.directory.attach()
+        # One send loop for all guilds, or discord.py's thread per guild.
+        self.voice_scheduler = (
+            voice_scheduler.VoiceScheduler()
+            if voice_scheduler.VOICE_SCHEDULER == "shared"
+            else None
+        )
+
+        # Measured loudness of queue tracks, for normalization.
+        self.loudness = (
+            loudness.LoudnessCache(loudness.LOUDNESS_FILE)
+            if loudness.NORMALIZE
+            else None
+        )
+
+        # One decoder per stream, shared by the guilds playing it.
+        self.broadcasts = (
+            broadcast.BroadcastRegistry() if broadcast.SHARE_STREAMS else None
+        )
 
         # Build the service graph — music_queue provides the callbacks
         # that voice_connection needs, so we create music_queue first
         # (with a placeholder voice_service) then wire them up.
-        self._music_queue = MusicQueueService(bot, self.guilds, None)  # type: ignore[arg-type]
+        self._music_queue = MusicQueueService(
+            bot,
+            self.guilds,
+            None,  # type: ignore[arg-type]
+            status_events=self.status_events,
+            broadcasts=self.broadcasts,
+        )
         self._voice = VoiceConnectionService(
             bot,
             self.guilds,
             on_queue_end=self._music_queue.on_queue_end,
             on_track_end=self._music_queue.on_track_end,
+            voice_scheduler=self.voice_scheduler,
+            loudness=self.loudness,
         )
         self._music_queue.voice_service = self._voice
+        self._voice.attach()
 
+        self.admission = Admission(self.guilds)
         self._background = BackgroundAudioService(
-            bot, self.guilds, self._voice
+            bot,
+            self.guilds,
+            self._voice,
+            status_events=self.status_events,
+            admission=self.admission,
+            broadcasts=self.broadcasts,
         )
         self._tts = TTSService(bot, self.guilds, self._voice)
+        self._mix_batch = MixBatchService(
+            bot,
+            self.guilds,
+            self._voice,
+            status_events=self.status_events,
+            admission=self.admission,
+            broadcasts=self.broadcasts,
+        )
+        self._scenes = SceneService(
+            self.guilds, self._mix_batch, SceneStore(SCENES_FILE)
+        )
+        self._effects = EffectsService(
+            self.guilds, status_events=self.status_events
+        )
+        self._buses = BusService(self.guilds, status_events=self.status_events)
+        self.commands = CommandBus(
+            bot,
+            {
+                "stop": self._music_queue.stop,
+                "skip": self._music_queue.skip,
+                "advance": self._music_queue.advance,
+                "pause": self._music_queue.pause,
+                "resume": self._music_queue.resume,
+                "loop": self._music_queue.set_loop,
+                "volume": self._music_queue.set_volume,
+                "move": self._music_queue.move,
+                "remove": self._music_queue.remove,
+                "shuffle": self._music_queue.shuffle,
+                "enqueue": self._music_queue.enqueue,
+                "add_layer": self._background.add_resolved,
+                "remove_layer": self._background.remove,
+                "clean_layers": self._background.clean_all,
+                "layer_volume": self._background.set_volume,
+                "batch": self._mix_batch.apply,
+                "save_scene": self._scenes.save,
+                "load_scene": self._scenes.load,
+                "effects": self._effects.set_effects,
+                "bus": self._buses.set_bus,
+            },
+        )
+        self._music_queue.commands = self.commands
+        self.jobs = JobRegistry(self.status_events)
+        self._add_jobs = AddJobService(
+            bot, self.guilds, self.commands, self.jobs
+        )
 
     # -- Helpers (kept for callers that import them or patch them) --
 
@@ -126,6 +264,15 @@ class HarpiAPI:
         """Disconnect from a voice channel and clean up."""
         await self._voice.disconnect(guild_id)
 
+    def guild_resources(self, guild_id: int) -> "GuildResources | None":
+        """Threads, FFmpeg processes and buffers a guild holds."""
+        return self._voice.resources(guild_id)
+
+    def close(self) -> None:
+        """Stop the shared voice scheduler's threads (blocks; bot shutdown)."""
+        if self.voice_scheduler is not None:
+            self.voice_scheduler.close()
+
     # -- Music queue --
 
     def _mixer_callback(self, guild_config: GuildConfig) -> None:
@@ -170,6 +317,36 @@ class HarpiAPI:
         """Set the playback volume for the music queue."""
         await self._music_queue.set_volume(guild_id, volume)
 
+    async def move_queue_item(
+        self, guild_id: int, item_id: int, index: int
+    ) -> None:
+        """Move a queued track to a new position."""
+        await self._music_queue.move(guild_id, item_id, index)
+
+    async def remove_queue_item(self, guild_id: int, item_id: int) -> None:
+        """Remove a queued track by its queue item ID."""
+        await self._music_queue.remove(guild_id, item_id)
+
+    async def shuffle_queue(self, guild_id: int) -> None:
+        """Shuffle the music queue."""
+        await self._music_queue.shuffle(guild_id)
+
+    # -- Add jobs --
+
+    def submit_add_job(
+        self,
+        guild_id: int,
+        channel_id: int,
+        links: list[str],
+        kind: JobKind = "queue",
+    ) -> AddJob:
+        """Start adding *links* in the background and return the job."""
+        return self._add_jobs.submit(guild_id, channel_id, links, kind)
+
+    def get_add_job(self, job_id: str) -> dict[str, Any] | None:
+        """Current state of an add job, or None if unknown or expired."""
+        return self.jobs.payload(job_id)
+
     # -- Background audio --
 
     async def add_background_audio(
@@ -204,6 +381,35 @@ class HarpiAPI:
         """Remove all background audio layers."""
         await self._background.clean_all(guild_id)
 
+    async def apply_mix_batch(
+        self,
+        guild_id: int,
+        ops: "list[MixOp]",
+        channel_id: int | None = None,
+    ) -> list[str]:
+        """Apply several mix operations at one frame boundary."""
+        return await self._mix_batch.apply(guild_id, ops, channel_id)
+
+    # -- Scenes --
+
+    def list_scenes(self, guild_id: int) -> list[ScenePreset]:
+        """Saved scene presets of a guild, by name."""
+        return self._scenes.list_scenes(guild_id)
+
+    def delete_scene(self, guild_id: int, name: str) -> None:
+        """Delete a saved scene preset."""
+        self._scenes.delete(guild_id, name)
+
+    # -- Effects --
+
+    def effects_status(self, guild_id: int) -> list[dict[str, Any]]:
+        """Effect chains of a guild's sources and their cost per frame."""
+        return self._effects.status(guild_id)
+
+    def bus_status(self, guild_id: int) -> list[dict[str, Any]]:
+        """Mix buses of a guild and their settings."""
+        return self._buses.status(guild_id)
+
     # -- TTS --
 
     async def play_tts_source(
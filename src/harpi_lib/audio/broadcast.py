@@ -0,0 +1,206 @@
+"""One decoder per stream, shared by every guild playing it.
+
+Ambience loops and popular songs often play in several guilds at once.
+Without sharing, each guild runs its own yt-dlp extraction and FFmpeg
+process for the same URL.  A ``BroadcastRegistry`` keeps one
+``Broadcast`` per stream key (the track's URL): the first guild to play
+the stream opens the decoder, and every guild reads it through a
+``BroadcastCursor`` of its own.  A cursor wraps like any other
+decoder: each guild's ``YoutubeDLSource`` keeps its own volume, ID and
+progress on top of it.
+
+The broadcast keeps the last ``BROADCAST_FRAMES`` decoded frames.  A
+cursor that asks for the frame after the newest one decodes it for
+everyone, so the stream moves at the pace of its fastest listener and
+never ahead of it.  A cursor that falls further behind than the buffer
+skips to the oldest frame still held.
+
+How a guild joins depends on what it plays:
+
+* live (layers): at the newest frame, whenever the broadcast started;
+* from the start (queue tracks): only while the first frame is still
+  buffered, so a song never starts halfway.  Otherwise the guild opens
+  a broadcast of its own, which later guilds join instead.
+
+When the last cursor is cleaned up, the decoder is cleaned up and the
+broadcast leaves the registry.  Sharing happens within one bot process;
+shard workers each have their own registry.
+
+Thread safety
+-------------
+Cursors are read from the mixers' reader threads of different guilds.
+``Broadcast._lock`` guards the buffer and subscriber count, and the
+decoder is only read under it, so one frame is decoded at a time.
+``BroadcastRegistry._lock`` guards the registry and may be held while
+taking a broadcast's lock, never the other way round: a broadcast
+releases its own lock before calling back into the registry.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from collections.abc import Callable
+from typing import Any, override
+
+import discord
+
+# "0" gives every guild its own decoder.
+SHARE_STREAMS = os.getenv("HARPI_SHARE_STREAMS", "1") != "0"
+# Frames buffered per broadcast (5 s at 20 ms); also how long after a
+# song starts another guild can still join it from the start.
+BROADCAST_FRAMES = int(os.getenv("HARPI_BROADCAST_FRAMES", "250"))
+
+
+class Broadcast:
+    """A decoder whose frames several cursors read independently."""
+
+    def __init__(
+        self,
+        key: str,
+        decoder: discord.AudioSource,
+        data: dict[str, Any],
+        frames: int = BROADCAST_FRAMES,
+        on_idle: Callable[[Broadcast], None] | None = None,
+    ) -> None:
+        self.key = key
+        self.decoder = decoder
+        self.data = data
+        self._on_idle = on_idle
+        self._lock = threading.Lock()
+        self._frames: deque[bytes] = deque(maxlen=frames)
+        # Index of the next frame to decode.
+        self._produced = 0
+        self._ended = False
+        self._released = False
+        self.subscribers = 0
+
+    def join(self, live: bool) -> BroadcastCursor | None:
+        """A new cursor, or None if this broadcast cannot be joined."""
+        with self._lock:
+            if self._released or self._ended:
+                return None
+            if live:
+                position = self._produced
+            elif self._produced - len(self._frames) == 0:
+                position = 0
+            else:
+                return None
+            self.subscribers += 1
+        return BroadcastCursor(self, position)
+
+    def frame(self, position: int) -> tuple[bytes, int]:
+        """The frame at *position* and the position it was read from.
+
+        A position older than the buffer moves up to the oldest frame
+        held.  Empty bytes mean the stream has ended.
+        """
+        with self._lock:
+            oldest = self._produced - len(self._frames)
+            position = max(position, oldest)
+            if position < self._produced:
+                return self._frames[position - oldest], position
+            if self._ended or self._released:
+                return b"", position
+            data = self.decoder.read()
+            if not data:
+                self._ended = True
+                return b"", position
+            self._frames.append(data)
+            self._produced += 1
+            return data, position
+
+    def leave(self) -> None:
+        """Drop a subscriber; the last one releases the decoder."""
+        with self._lock:
+            self.subscribers -= 1
+            if self.subscribers > 0 or self._released:
+                return
+            self._released = True
+            self._frames.clear()
+        if self._on_idle is not None:
+            self._on_idle(self)
+        self.decoder.cleanup()
+
+
+class BroadcastCursor(discord.AudioSource):
+    """One guild's read position in a ``Broadcast``."""
+
+    def __init__(self, broadcast: Broadcast, position: int) -> None:
+        self.broadcast = broadcast
+        self.position = position
+        self._closed = False
+
+    @override
+    def read(self) -> bytes:
+        if self._closed:
+            return b""
+        data, self.position = self.broadcast.frame(self.position)
+        if data:
+            self.position += 1
+        return data
+
+    @override
+    def cleanup(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.broadcast.leave()
+
+
+class BroadcastRegistry:
+    """The broadcasts of one bot process, by stream key."""
+
+    def __init__(self, frames: int = BROADCAST_FRAMES) -> None:
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._broadcasts: dict[str, Broadcast] = {}
+
+    def subscribe(self, key: str, live: bool) -> BroadcastCursor | None:
+        """Join the broadcast of *key*, if there is one that can be joined."""
+        with self._lock:
+            broadcast = self._broadcasts.get(key)
+            return broadcast.join(live) if broadcast else None
+
+    def publish(
+        self,
+        key: str,
+        decoder: discord.AudioSource,
+        data: dict[str, Any],
+        live: bool,
+    ) -> BroadcastCursor:
+        """Start broadcasting *decoder* under *key* and join it.
+
+        If another guild published *key* meanwhile and it can be
+        joined, that broadcast is joined and *decoder* cleaned up
+        instead.
+        """
+        with self._lock:
+            existing = self._broadcasts.get(key)
+            cursor = existing.join(live) if existing else None
+            if cursor is None:
+                broadcast = Broadcast(
+                    key, decoder, data, self.frames, on_idle=self._release
+                )
+                # An older broadcast of the key keeps its cursors.
+                self._broadcasts[key] = broadcast
+                cursor = broadcast.join(live)
+                assert cursor is not None
+                return cursor
+        decoder.cleanup()
+        return cursor
+
+    def _release(self, broadcast: Broadcast) -> None:
+        with self._lock:
+            if self._broadcasts.get(broadcast.key) is broadcast:
+                del self._broadcasts[broadcast.key]
+
+    def stats(self) -> dict[str, int]:
+        """Streams being decoded and the cursors reading them."""
+        with self._lock:
+            broadcasts = list(self._broadcasts.values())
+        return {
+            "streams": len(broadcasts),
+            "listeners": sum(b.subscribers for b in broadcasts),
+        }
@@ -0,0 +1,105 @@
+"""Mix buses between a guild's sources and the master output.
+
+Every source plays on one bus, chosen by its kind (``BUS_OF``): queue
+tracks on ``music``, layers on ``ambience``, button sounds on ``sfx``
+and TTS on ``voice``.  The mixer sums each bus's sources first, then
+applies the bus's gain, mute and optional ``DspChain`` once to the sum,
+and only then adds the bus to the master.  Turning all the ambience
+down, or putting a reverb on it, is one operation however many layers
+are playing.
+
+While the voice bus has audio, the music bus is ducked by ``DUCK_DB``.
+Gain changes are ramped across one frame, so muting, ducking and
+sliders never click.
+
+Thread safety
+-------------
+``AudioController`` creates its buses once and changes their settings
+under its lock with ``Bus.configure``.  The mixer reads them without
+the lock: each setting is a single attribute, and ``render`` (with the
+ramp state it keeps) only ever runs on the mixer's thread.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Sequence
+
+import numpy as np
+
+from src.harpi_lib.audio.dsp import CHANNELS, DspChain, EffectSpec
+
+MUSIC = "music"
+AMBIENCE = "ambience"
+SFX = "sfx"
+VOICE = "voice"
+BUSES = (MUSIC, AMBIENCE, SFX, VOICE)
+# Bus of each source kind returned by ``get_playing_sounds``.
+BUS_OF = {"queue": MUSIC, "track": AMBIENCE, "button": SFX, "tts": VOICE}
+# Music attenuation while TTS speaks; "0" disables ducking.
+DUCK_DB = float(os.getenv("HARPI_DUCK_DB", "-10"))
+MAX_BUS_GAIN = 2.0
+
+
+class Bus:
+    """Gain, mute and effects shared by every source of one kind."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.gain = 1.0
+        self.muted = False
+        self.chain: DspChain | None = None
+        # Gain applied at the end of the last rendered frame.
+        self._applied = 1.0
+
+    def configure(
+        self,
+        gain: float | None = None,
+        muted: bool | None = None,
+        effects: Sequence[EffectSpec] | None = None,
+    ) -> None:
+        """Change the given settings; ``effects=[]`` removes the chain."""
+        if gain is not None and not 0 <= gain <= MAX_BUS_GAIN:
+            raise ValueError(
+                f"Volume do barramento deve estar entre 0 e "
+                f"{MAX_BUS_GAIN * 100:.0f}"
+            )
+        # Effects first: they are the only setting that can still fail.
+        if effects is not None:
+            if not effects:
+                self.chain = None
+            elif self.chain is None:
+                self.chain = DspChain(effects)
+            else:
+                self.chain.configure(effects)
+        if gain is not None:
+            self.gain = gain
+        if muted is not None:
+            self.muted = muted
+
+    def target_gain(self, ducked: bool = False) -> float:
+        """Gain this frame should end on."""
+        if self.muted:
+            return 0.0
+        if ducked:
+            return self.gain * 10 ** (DUCK_DB / 20)
+        return self.gain
+
+    def render(self, pcm: np.ndarray, ducked: bool = False) -> np.ndarray:
+        """Process one frame of the bus's summed, interleaved samples."""
+        target = self.target_gain(ducked)
+        start, self._applied = self._applied, target
+        if start == target == 0.0:
+            return np.zeros_like(pcm)
+        if self.chain is not None:
+            pcm = self.chain.process(pcm)
+        if start == target == 1.0:
+            return pcm
+        if start == target:
+            return (pcm * target).astype(np.int32)
+        ramp = np.linspace(start, target, len(pcm) // CHANNELS)
+        return (pcm * np.repeat(ramp, CHANNELS)).astype(np.int32)
+
+    def idle(self, ducked: bool = False) -> None:
+        """Note a frame without audio, so the next one starts ramped."""
+        self._applied = self.target_gain(ducked)
@@ -3,19 +3,72 @@
 Thread safety
 -------------
 All mutable state is protected by ``self._lock``.  Callbacks registered
-via ``on_queue_empty`` are invoked **outside** the lock to prevent
-deadlocks if a callback needs to re-enter the controller.
+via ``on_queue_empty`` and ``on_change`` are invoked **outside** the lock
+to prevent deadlocks if a callback needs to re-enter the controller.
+
+``on_change`` callbacks run after every mutation, from whichever thread
+made it (the bot loop, Quart handlers or the voice-sending thread); the
+voice service uses them to bump ``GuildConfig.version``.
+
+Frame batches
+-------------
+``schedule_batch`` queues a ``FrameBatch`` without touching the mix.
+The mixer calls ``apply_pending`` at the start of every frame, before it
+takes the list of playing sounds, so every change of a batch is heard
+from the same frame on and no frame mixes half of a scene change.
+Layers a batch removes are cleaned up after the lock is released: that
+stops their FFmpeg processes, which must not hold up other threads
+waiting on the controller.
+
+Effects
+-------
+``set_effects`` gives a target (``"queue"``, ``"tts"`` or a layer ID) a
+``DspChain``; the mixer runs it over that target's frames.  The queue's
+chain outlives individual tracks; a layer's goes away with the layer.
+
+Pausing sources
+---------------
+``set_paused`` pauses one source (``"queue"``, ``"tts"`` or a layer ID)
+while everything else keeps playing.  A paused source stays held but is
+left out of ``get_playing_sounds``, so the mixer stops reading it: its
+decoder is not torn down and simply blocks on its full pipe, and
+resuming continues from the next frame.  The pause belongs to the
+source, not the target: a new queue track starts unpaused.
+
+Buses
+-----
+Every source also plays on a ``Bus`` (see ``buses``) whose gain, mute
+and effects apply to the sum of its sources.  The buses live as long as
+the controller; ``set_bus`` changes their settings under the lock.
 """
 
+from src.harpi_lib.audio.buses import BUSES, Bus
+from src.harpi_lib.audio.dsp import DspChain, EffectSpec
 from src.harpi_lib.music.ytmusicdata import UniqueAudioSource
 from typing import Callable
 from collections.abc import Iterable
+from dataclasses import dataclass, field
+import concurrent.futures
 import threading
 import uuid
 
 import discord
 
 
+@dataclass
+class FrameBatch:
+    """Layer and volume changes applied together at one frame boundary."""
+
+    add_layers: list[UniqueAudioSource] = field(default_factory=list)
+    remove_layers: list[str] = field(default_factory=list)
+    # (source, volume) pairs, applied in order.
+    volumes: list[tuple[discord.AudioSource, float]] = field(
+        default_factory=list
+    )
+    # Volume for whichever queue track is playing when the batch applies.
+    queue_volume: float | None = None
+
+
 class AudioController:
     """Manages all audio sources for a guild: queue tracks, layers, button sounds, and TTS."""
 
@@ -26,7 +79,15 @@ class AudioController:
         self._queue: list[discord.AudioSource] = []
         self._current_queue_source: discord.AudioSource | None = None
         self._tts_track: discord.AudioSource | None = None
+        # Effect chains by target: "queue", "tts" or a layer ID.
+        self._effects: dict[str, DspChain] = {}
+        self._paused: set[discord.AudioSource] = set()
+        self._buses: dict[str, Bus] = {name: Bus(name) for name in BUSES}
         self._on_queue_empty_callbacks: list[Callable] = []
+        self._on_change_callbacks: list[Callable[[], object]] = []
+        self._pending_batches: list[
+            tuple[FrameBatch, concurrent.futures.Future[None]]
+        ] = []
 
     # --- Private helpers ---
 
@@ -66,34 +127,198 @@ class AudioController:
             self._current_queue_source = None
             return list(self._on_queue_empty_callbacks)
 
+    def _notify_changed(self) -> None:
+        """Invoke the change callbacks. Caller must NOT hold the lock."""
+        with self._lock:
+            callbacks = list(self._on_change_callbacks)
+        for cb in callbacks:
+            cb()
+
+    def _apply_batch(self, batch: FrameBatch) -> list[discord.AudioSource]:
+        """Apply one frame batch. Caller must hold lock.
+
+        Returns the removed layers, for the caller to clean up once it
+        has released the lock.
+        """
+        removed: list[discord.AudioSource] = []
+        for layer_id in batch.remove_layers:
+            source = self._layers.pop(layer_id, None)
+            if source is not None:
+                removed.append(source)
+            self._effects.pop(layer_id, None)
+        for source in batch.add_layers:
+            self._layers[source.id] = source
+        for source, volume in batch.volumes:
+            source.volume = volume  # type: ignore[attr-defined]
+        if batch.queue_volume is not None and hasattr(
+            self._current_queue_source, "volume"
+        ):
+            self._current_queue_source.volume = batch.queue_volume  # type: ignore[union-attr]
+        return removed
+
     # --- Public API ---
 
+    def schedule_batch(
+        self, batch: FrameBatch
+    ) -> concurrent.futures.Future[None]:
+        """Queue *batch* for the next frame; the future resolves once applied."""
+        future: concurrent.futures.Future[None] = concurrent.futures.Future()
+        with self._lock:
+            self._pending_batches.append((batch, future))
+        return future
+
+    def apply_pending(self) -> None:
+        """Apply every scheduled batch at once.
+
+        Called by the mixer at the start of each frame, and by callers
+        that cannot wait for a frame (e.g. nothing is playing).
+        """
+        # Unlocked fast path for the common, empty case (read under GIL).
+        if not self._pending_batches:
+            return
+        removed: list[discord.AudioSource] = []
+        with self._lock:
+            batches, self._pending_batches = self._pending_batches, []
+            for batch, _ in batches:
+                removed.extend(self._apply_batch(batch))
+        if not batches:
+            return
+        self._cleanup_collection(removed)
+        self._notify_changed()
+        for _, future in batches:
+            if not future.done():
+                future.set_result(None)
+
+    def _held_sounds(self) -> list[tuple[str, discord.AudioSource]]:
+        """(type, source) of every source that can play. Caller holds lock."""
+        sounds: list[tuple[str, discord.AudioSource]] = []
+        for source in self._layers.values():
+            sounds.append(("track", source))
+        for source in self._button_sounds.values():
+            sounds.append(("button", source))
+        if self._current_queue_source:
+            sounds.append(("queue", self._current_queue_source))
+        if self._tts_track:
+            sounds.append(("tts", self._tts_track))
+        return sounds
+
+    def _target_source(self, target: str) -> discord.AudioSource | None:
+        """The source *target* names. Caller must hold lock."""
+        if target == "queue":
+            return self._current_queue_source
+        if target == "tts":
+            return self._tts_track
+        return self._layers.get(target)
+
     def get_playing_sounds(self) -> list[tuple[str, discord.AudioSource]]:
         """Return a list of (type, source) tuples of all currently active sounds for the mixer."""
         with self._lock:
-            sounds: list[tuple[str, discord.AudioSource]] = []
-            for source in self._layers.values():
-                sounds.append(("track", source))
-            for source in self._button_sounds.values():
-                sounds.append(("button", source))
+            sounds = self._held_sounds()
+            if not self._paused:
+                return sounds
+            # Forget pauses of sources that are gone.
+            self._paused &= {source for _, source in sounds}
+            return [item for item in sounds if item[1] not in self._paused]
+
+    def get_paused_sounds(self) -> list[tuple[str, discord.AudioSource]]:
+        """(type, source) of the held sources that are paused."""
+        # Unlocked fast path for the common, empty case (read under GIL).
+        if not self._paused:
+            return []
+        with self._lock:
+            return [
+                item for item in self._held_sounds() if item[1] in self._paused
+            ]
+
+    def set_paused(self, target: str, paused: bool) -> None:
+        """Pause or resume *target* without touching other sources."""
+        with self._lock:
+            source = self._target_source(target)
+            if source is None:
+                raise ValueError(f"Fonte {target} não encontrada")
+            if paused == (source in self._paused):
+                return
+            if paused:
+                self._paused.add(source)
+            else:
+                self._paused.discard(source)
+        self._notify_changed()
+
+    def is_paused(self, target: str) -> bool:
+        """Whether *target* is held and paused."""
+        with self._lock:
+            source = self._target_source(target)
+            return source is not None and source in self._paused
+
+    def all_sources(self) -> list[discord.AudioSource]:
+        """Every source held, playing or waiting in the queue."""
+        with self._lock:
+            sources = [*self._layers.values(), *self._button_sounds.values()]
+            sources.extend(self._queue)
             if self._current_queue_source:
-                sounds.append(("queue", self._current_queue_source))
+                sources.append(self._current_queue_source)
             if self._tts_track:
-                sounds.append(("tts", self._tts_track))
-            return sounds
+                sources.append(self._tts_track)
+            return sources
+
+    def set_effects(self, target: str, specs: list[EffectSpec]) -> None:
+        """Set the effect chain of *target*; no specs removes it.
+
+        An existing chain is reconfigured in place, so its filters keep
+        their state across a parameter change.
+        """
+        with self._lock:
+            chain = self._effects.get(target)
+            if not specs:
+                self._effects.pop(target, None)
+            elif chain is None:
+                self._effects[target] = DspChain(specs)
+            else:
+                chain.configure(specs)
+        self._notify_changed()
+
+    def get_effects(self) -> dict[str, DspChain]:
+        """Effect chains by target (a snapshot)."""
+        # Unlocked fast path for the common, empty case (read under GIL).
+        if not self._effects:
+            return {}
+        with self._lock:
+            return dict(self._effects)
+
+    def set_bus(
+        self,
+        name: str,
+        gain: float | None = None,
+        muted: bool | None = None,
+        effects: list[EffectSpec] | None = None,
+    ) -> None:
+        """Change the given settings of bus *name*; None keeps a setting."""
+        bus = self._buses.get(name)
+        if bus is None:
+            raise ValueError(f"Barramento {name} não existe")
+        with self._lock:
+            bus.configure(gain=gain, muted=muted, effects=effects)
+        self._notify_changed()
+
+    def get_buses(self) -> dict[str, Bus]:
+        """The buses by name; the dict itself never changes."""
+        return self._buses
 
     def add_layer(self, source: UniqueAudioSource) -> str:
         """Add a background audio layer and return its ID."""
         with self._lock:
             self._layers[source.id] = source
+        self._notify_changed()
         return source.id
 
     def remove_layer(self, layer_id: str) -> None:
         """Remove a background audio layer by its ID."""
         with self._lock:
-            if layer_id in self._layers:
-                source = self._layers.pop(layer_id)
-                self._safe_cleanup(source)
+            source = self._layers.pop(layer_id, None)
+            self._effects.pop(layer_id, None)
+            self._safe_cleanup(source)
+        if source is not None:
+            self._notify_changed()
 
     def get_layer_id(self, source: discord.AudioSource) -> str | None:
         """Find and return the layer ID for a given audio source, or None if not found."""
@@ -108,20 +333,23 @@ class AudioController:
         button_id = str(uuid.uuid4())
         with self._lock:
             self._button_sounds[button_id] = source
+        self._notify_changed()
         return button_id
 
     def remove_button_sound(self, button_id: str) -> None:
         """Remove a button sound effect by its ID."""
         with self._lock:
-            if button_id in self._button_sounds:
-                source = self._button_sounds.pop(button_id)
-                self._safe_cleanup(source)
+            source = self._button_sounds.pop(button_id, None)
+            self._safe_cleanup(source)
+        if source is not None:
+            self._notify_changed()
 
     def set_queue_source(self, source: discord.AudioSource | None) -> None:
         """Set the current queue track, cleaning up any previous one."""
         with self._lock:
             self._safe_cleanup(self._current_queue_source)
             self._current_queue_source = source
+        self._notify_changed()
 
     def get_queue_source(self) -> discord.AudioSource | None:
         """Return the current queue track, or None if nothing is playing."""
@@ -132,6 +360,7 @@ class AudioController:
         """Clear the current queue track with cleanup."""
         with self._lock:
             self._clear_queue_source()
+        self._notify_changed()
 
     def add_to_queue(self, source: discord.AudioSource) -> None:
         """Add a track to the playback queue, or start playing immediately if queue is empty."""
@@ -140,6 +369,7 @@ class AudioController:
                 self._current_queue_source = source
             else:
                 self._queue.append(source)
+        self._notify_changed()
 
     def clear_queue(self) -> None:
         """Clear all queued tracks and the current queue source with cleanup."""
@@ -147,12 +377,18 @@ class AudioController:
             self._cleanup_collection(self._queue)
             self._queue.clear()
             self._clear_queue_source()
+        self._notify_changed()
 
     def on_queue_empty(self, callback: Callable) -> None:
         """Register a callback to be invoked when the queue becomes empty."""
         with self._lock:
             self._on_queue_empty_callbacks.append(callback)
 
+    def on_change(self, callback: Callable[[], object]) -> None:
+        """Register a callback invoked after every state mutation."""
+        with self._lock:
+            self._on_change_callbacks.append(callback)
+
     def _on_track_finished(self, source: discord.AudioSource) -> None:
         """Handle track completion by cleaning up the source and advancing the queue.
 
@@ -160,9 +396,11 @@ class AudioController:
         """
         callbacks: list[Callable] = []
         with self._lock:
-            if self._current_queue_source == source:
-                self._safe_cleanup(source)
-                callbacks = self._advance_queue()
+            if self._current_queue_source != source:
+                return
+            self._safe_cleanup(source)
+            callbacks = self._advance_queue()
+        self._notify_changed()
         for cb in callbacks:
             cb()
 
@@ -171,42 +409,53 @@ class AudioController:
         with self._lock:
             self._clear_tts_track()
             self._tts_track = source
+        self._notify_changed()
 
     def remove_finished_source(self, source: discord.AudioSource) -> None:
         """Remove a finished source from whichever collection it belongs to.
 
         Callbacks are invoked outside the lock to avoid deadlock.
         """
-        callbacks: list[Callable] = []
         with self._lock:
-            for layer_id, src in list(self._layers.items()):
-                if src == source:
-                    del self._layers[layer_id]
-                    self._safe_cleanup(source)
-                    return
-            for button_id, src in list(self._button_sounds.items()):
-                if src == source:
-                    del self._button_sounds[button_id]
-                    self._safe_cleanup(source)
-                    return
-            if source in self._queue:
-                self._queue.remove(source)
-                self._safe_cleanup(source)
-                return
-            if self._tts_track == source:
-                self._safe_cleanup(source)
-                self._tts_track = None
-            if self._current_queue_source == source:
-                self._safe_cleanup(source)
-                callbacks = self._advance_queue()
+            callbacks = self._remove_finished_source(source)
+        self._notify_changed()
         for cb in callbacks:
             cb()
 
+    def _remove_finished_source(
+        self, source: discord.AudioSource
+    ) -> list[Callable]:
+        """Drop *source* and return queue-empty callbacks. Caller holds lock."""
+        for layer_id, src in list(self._layers.items()):
+            if src == source:
+                del self._layers[layer_id]
+                self._effects.pop(layer_id, None)
+                self._safe_cleanup(source)
+                return []
+        for button_id, src in list(self._button_sounds.items()):
+            if src == source:
+                del self._button_sounds[button_id]
+                self._safe_cleanup(source)
+                return []
+        if source in self._queue:
+            self._queue.remove(source)
+            self._safe_cleanup(source)
+            return []
+        if self._tts_track == source:
+            self._safe_cleanup(source)
+            self._tts_track = None
+        if self._current_queue_source == source:
+            self._safe_cleanup(source)
+            return self._advance_queue()
+        return []
+
     def cleanup_all(self) -> None:
         """Clean up all audio sources and release resources."""
         with self._lock:
             self._cleanup_collection(self._layers.values())
             self._layers.clear()
+            self._effects.clear()
+            self._paused.clear()
 
             self._cleanup_collection(self._button_sounds.values())
             self._button_sounds.clear()
@@ -216,3 +465,4 @@ class AudioController:
 
             self._clear_queue_source()
             self._clear_tts_track()
+        self._notify_changed()
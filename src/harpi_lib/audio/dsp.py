@@ -0,0 +1,341 @@
+"""Block-based filters for the mixer's 960-sample frames.
+
+``Biquad`` runs a second-order IIR filter over a whole frame with numpy
+instead of a per-sample Python loop.  A biquad is linear, so its output
+over a block of ``N`` samples is
+
+* the zero-state response: the input convolved with the filter's first
+  ``N`` impulse-response samples (exact, since no output in the block
+  depends on an older input), done as one FFT convolution;
+* plus the zero-input response: the state left by the previous block
+  decaying through the filter.
+
+The new state is a linear function of the old state and the block's
+samples too.  The responses and state matrices depend only on the
+coefficients and are computed once in ``set``, so a frame costs two
+FFTs and a few small matrix products per filter, for every channel at
+once.
+
+Effect chains
+-------------
+A ``DspChain`` runs a source's effects (``EffectSpec``: biquad filters,
+pan, reverb) over each of its frames inside the mixer, so changing an
+effect never restarts FFmpeg.  ``configure`` with the same kinds in the
+same order only updates parameters and keeps every filter's state.
+
+A chain holds at most ``MAX_EFFECTS`` effects and times every frame it
+processes.  If it stays over ``DSP_BUDGET`` for ``OVERRUN_FRAMES``
+frames in a row, it is bypassed (the source plays dry) until it is
+configured again, so effects can never make the mixer miss frames.
+
+Thread safety
+-------------
+A filter keeps state between frames and belongs to the thread that
+processes its source (the mixer's).  ``set`` may be called from another
+thread: it builds the new matrices first and swaps them in with one
+assignment, keeping the state, so a live parameter change never clicks
+or tears a frame.  ``DspChain.configure`` likewise builds new effects
+before swapping the list in.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+SAMPLE_RATE = 48000
+FRAME_SAMPLES = 960
+CHANNELS = 2
+
+MAX_EFFECTS = 4
+# Processing time a chain may take per 20 ms frame.
+DSP_BUDGET = float(os.getenv("HARPI_DSP_BUDGET_MS", "2")) / 1000
+OVERRUN_FRAMES = 50
+# Smoothing of ``DspChain.mean_cost``.
+COST_SMOOTHING = 0.05
+
+FILTER_KINDS = frozenset({
+    "lowpass",
+    "highpass",
+    "peaking",
+    "lowshelf",
+    "highshelf",
+})
+EFFECT_KINDS = FILTER_KINDS | {"pan", "reverb"}
+
+
+class _Response:
+    """Block responses of one set of biquad coefficients."""
+
+    def __init__(self, b: Sequence[float], a: Sequence[float], block: int):
+        a0 = a[0]
+        b0, b1, b2 = (c / a0 for c in b)
+        a1, a2 = a[1] / a0, a[2] / a0
+        # Transposed direct form II: s[n+1] = A s[n] + B x[n],
+        # y[n] = s1[n] + b0 x[n].
+        transition = np.array([[-a1, 1.0], [-a2, 0.0]])
+        drive = np.array([b1 - a1 * b0, b2 - a2 * b0])
+
+        powers = np.empty((block + 1, 2, 2))
+        powers[0] = np.eye(2)
+        for n in range(block):
+            powers[n + 1] = transition @ powers[n]
+
+        impulse = np.empty(block)
+        impulse[0] = b0
+        impulse[1:] = (powers[: block - 1] @ drive)[:, 0]
+        # Long enough for a linear (not circular) convolution.
+        self.fft_size = 1 << (2 * block - 1).bit_length()
+        self.spectrum = np.fft.rfft(impulse, self.fft_size)
+        # Output of the carried-over state, sample by sample.
+        self.zero_input = powers[:block, 0, :]
+        self.carry = powers[block]
+        # Contribution of each input sample to the next block's state.
+        self.state_gain = (powers[block - 1 :: -1] @ drive).T
+
+
+class Biquad:
+    """A second-order IIR filter processing one frame at a time."""
+
+    def __init__(
+        self,
+        b: Sequence[float],
+        a: Sequence[float],
+        channels: int = CHANNELS,
+        block: int = FRAME_SAMPLES,
+    ) -> None:
+        self.block = block
+        self.state = np.zeros((2, channels))
+        self.set(b, a)
+
+    def set(self, b: Sequence[float], a: Sequence[float]) -> None:
+        """Change the coefficients, keeping the filter's state."""
+        self._response = _Response(b, a, self.block)
+
+    def reset(self) -> None:
+        self.state = np.zeros_like(self.state)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filter *x* (samples × channels, at most ``block`` samples)."""
+        response = self._response
+        n = len(x)
+        if n < self.block:
+            # A short final frame: run it as a full block of silence.
+            x = np.pad(x, ((0, self.block - n), (0, 0)))
+        size = response.fft_size
+        spectrum = np.fft.rfft(x, size, axis=0)
+        y = np.fft.irfft(spectrum * response.spectrum[:, None], size, axis=0)
+        y = y[: self.block] + response.zero_input @ self.state
+        self.state = response.carry @ self.state + response.state_gain @ x
+        return y[:n]
+
+
+def k_weighting() -> list[Biquad]:
+    """The ITU-R BS.1770 K-weighting filter at 48 kHz, as two stages."""
+    return [
+        # High shelf: the acoustic effect of the head.
+        Biquad(
+            [1.53512485958697, -2.69169618940638, 1.19839281085285],
+            [1.0, -1.69065929318241, 0.73248077421585],
+        ),
+        # RLB high-pass.
+        Biquad(
+            [1.0, -2.0, 1.0],
+            [1.0, -1.99004745483398, 0.99007225036621],
+        ),
+    ]
+
+
+@dataclass(frozen=True)
+class EffectSpec:
+    """One effect of a chain and its parameters.
+
+    Filters use ``frequency`` (Hz), ``q`` and, for peaking and shelf
+    filters, ``gain_db``; ``pan`` goes from -1 (left) to 1 (right);
+    ``reverb`` uses ``mix`` (wet share) and ``room`` (decay), both 0-1.
+    """
+
+    kind: str
+    frequency: float = 1000.0
+    q: float = 0.707
+    gain_db: float = 0.0
+    pan: float = 0.0
+    mix: float = 0.3
+    room: float = 0.5
+
+    def validate(self) -> None:
+        if self.kind not in EFFECT_KINDS:
+            raise ValueError(f"Efeito desconhecido: {self.kind}")
+        if not 20 <= self.frequency <= SAMPLE_RATE / 2 * 0.95:
+            raise ValueError("Frequência fora do intervalo")
+        if not 0.1 <= self.q <= 20:
+            raise ValueError("Q fora do intervalo")
+        if not -24 <= self.gain_db <= 24:
+            raise ValueError("Ganho fora do intervalo")
+        if not -1 <= self.pan <= 1:
+            raise ValueError("Pan fora do intervalo")
+        if not (0 <= self.mix <= 1 and 0 <= self.room <= 1):
+            raise ValueError("Reverb fora do intervalo")
+
+
+def filter_coefficients(
+    spec: EffectSpec,
+) -> tuple[list[float], list[float]]:
+    """Biquad ``(b, a)`` of a filter spec (RBJ audio EQ cookbook)."""
+    w0 = 2 * math.pi * spec.frequency / SAMPLE_RATE
+    cos_w0, alpha = math.cos(w0), math.sin(w0) / (2 * spec.q)
+    amp = 10 ** (spec.gain_db / 40)
+    if spec.kind == "lowpass":
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif spec.kind == "highpass":
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif spec.kind == "peaking":
+        b = [1 + alpha * amp, -2 * cos_w0, 1 - alpha * amp]
+        a = [1 + alpha / amp, -2 * cos_w0, 1 - alpha / amp]
+    else:
+        sign = 1 if spec.kind == "lowshelf" else -1
+        root = 2 * math.sqrt(amp) * alpha
+        up, down = amp + 1, amp - 1
+        b = [
+            amp * (up - sign * down * cos_w0 + root),
+            sign * 2 * amp * (down - sign * up * cos_w0),
+            amp * (up - sign * down * cos_w0 - root),
+        ]
+        a = [
+            up + sign * down * cos_w0 + root,
+            -sign * 2 * (down + sign * up * cos_w0),
+            up + sign * down * cos_w0 - root,
+        ]
+    return b, a
+
+
+class _Filter:
+    def __init__(self, spec: EffectSpec) -> None:
+        self.biquad = Biquad(*filter_coefficients(spec))
+
+    def update(self, spec: EffectSpec) -> None:
+        self.biquad.set(*filter_coefficients(spec))
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        return self.biquad.process(x)
+
+
+class _Pan:
+    """Constant-power stereo balance."""
+
+    def __init__(self, spec: EffectSpec) -> None:
+        self.update(spec)
+
+    def update(self, spec: EffectSpec) -> None:
+        angle = (spec.pan + 1) * math.pi / 4
+        # Unity gain on both channels when centered.
+        self.gains = math.sqrt(2) * np.array([
+            math.cos(angle),
+            math.sin(angle),
+        ])
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        return x * self.gains
+
+
+class _Reverb:
+    """Parallel feedback combs, each longer than a frame.
+
+    A comb's output at sample *n* needs its output ``delay`` samples
+    earlier; with every delay above ``FRAME_SAMPLES`` that is always in
+    an earlier frame, so a whole frame is one vector operation.
+    """
+
+    # Freeverb's comb lengths, scaled to 48 kHz.
+    DELAYS = (1214, 1293, 1390, 1476)
+
+    def __init__(self, spec: EffectSpec) -> None:
+        self.history = [np.zeros((delay, CHANNELS)) for delay in self.DELAYS]
+        self.update(spec)
+
+    def update(self, spec: EffectSpec) -> None:
+        self.mix = spec.mix
+        self.feedback = 0.7 + 0.28 * spec.room
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        n = len(x)
+        wet = np.zeros_like(x)
+        for index, history in enumerate(self.history):
+            y = x + self.feedback * history[:n]
+            self.history[index] = np.concatenate((history[n:], y))
+            wet += y
+        wet *= (1 - self.feedback) / len(self.history)
+        return x * (1 - self.mix) + wet * self.mix
+
+
+def _effect(spec: EffectSpec) -> _Filter | _Pan | _Reverb:
+    if spec.kind == "pan":
+        return _Pan(spec)
+    if spec.kind == "reverb":
+        return _Reverb(spec)
+    return _Filter(spec)
+
+
+class DspChain:
+    """The effects of one source, run frame by frame in the mixer."""
+
+    def __init__(self, specs: Sequence[EffectSpec] = ()) -> None:
+        self.specs: tuple[EffectSpec, ...] = ()
+        self._effects: list[_Filter | _Pan | _Reverb] = []
+        self.last_cost = 0.0
+        self.mean_cost = 0.0
+        self.peak_cost = 0.0
+        self.bypassed = False
+        self._over_budget = 0
+        self.configure(specs)
+
+    def configure(self, specs: Sequence[EffectSpec]) -> None:
+        """Set the effects, keeping filter state if only parameters change."""
+        specs = tuple(specs)
+        if len(specs) > MAX_EFFECTS:
+            raise ValueError(f"No máximo {MAX_EFFECTS} efeitos por fonte")
+        for spec in specs:
+            spec.validate()
+        if [s.kind for s in specs] == [s.kind for s in self.specs]:
+            for effect, spec in zip(self._effects, specs, strict=True):
+                effect.update(spec)
+        else:
+            self._effects = [_effect(spec) for spec in specs]
+        self.specs = specs
+        self.bypassed = False
+        self._over_budget = 0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Run a frame of interleaved stereo samples through the chain."""
+        if self.bypassed or not self._effects:
+            return chunk
+        started = time.perf_counter()
+        x = chunk.reshape(-1, CHANNELS).astype(np.float64)
+        for effect in self._effects:
+            x = effect.process(x)
+        out = np.clip(x, -32768, 32767).astype(np.int32).reshape(-1)
+        self._record(time.perf_counter() - started)
+        return out
+
+    def _record(self, cost: float) -> None:
+        self.last_cost = cost
+        self.mean_cost += (cost - self.mean_cost) * COST_SMOOTHING
+        self.peak_cost = max(self.peak_cost, cost)
+        if cost <= DSP_BUDGET:
+            self._over_budget = 0
+            return
+        self._over_budget += 1
+        if self._over_budget >= OVERRUN_FRAMES:
+            self.bypassed = True
+            logger.warning(
+                f"Effects over budget ({self.mean_cost * 1000:.2f} ms per "
+                "frame); bypassing them"
+            )
@@ -0,0 +1,521 @@
+"""Out-of-process audio engine.
+
+With ``HARPI_AUDIO_ENGINE=process`` each voice connection plays an
+``EngineMixerSource`` instead of a ``MixerSource``.  The FFmpeg pipe
+reads, volume scaling and mixing of every URL-backed source then happen
+in an engine process, which runs its own ``AudioController`` and
+``MixerSource`` and writes finished 20 ms frames into a ``FrameRing``.
+The bot process only copies one frame out of shared memory per tick, so
+gateway traffic and HTTP load on the bot's GIL no longer delay the mix.
+
+The bot-side ``AudioController`` stays the source of truth: services add,
+remove and re-volume sources exactly as before.  On every frame the
+``EngineMixerSource`` diffs the controller's playing sounds against what
+it has sent to the engine and sends the differences as one ``sync``
+message, so a frame batch still lands in the engine as a unit.  Effect
+chains set with ``AudioController.set_effects`` travel as specs and run
+in the engine, on the source's own samples.  Each source is mixed on
+the bus of its bot-side kind.  The bot also sends the buses' gain, mute
+and effects, and whether the music must duck under a TTS it mixes
+itself, so the engine's frame arrives already through its buses and is
+added after the bot's own.  The engine reports back over a second
+queue:
+
+* ``("progress", {source_id: frames})``: frames read per source, which
+  become the bot-side sources' ``frames_read`` (and fire
+  ``on_first_frame``);
+* ``("ended", source_id, frames)``: a source ran out; the bot handles
+  it like ``MixerSource`` does (``track_end`` / ``queue_end``
+  observers, advancing the queue).
+
+Sources that cannot be reopened from a URL (TTS piped through stdin,
+test tones) keep being read and mixed in the bot process, on top of the
+engine's frame.
+
+Control changes are heard after the frames already in the ring, at most
+``DEFAULT_SLOTS`` x 20 ms later.
+
+Thread safety
+-------------
+``EngineMixerSource.read()`` runs on the voice-sending thread and is the
+only user of the ring's read side and of the event queue; ``cleanup()``
+may run on the bot loop.  ``multiprocessing`` queues are process- and
+thread-safe.  In the engine process a single thread drains control
+messages and renders frames.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, cast, override
+
+import discord
+import numpy as np
+from loguru import logger
+
+from src.harpi_lib.audio.buses import BUS_OF, BUSES, DUCK_DB, VOICE
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.dsp import EffectSpec
+from src.harpi_lib.audio.frame_ring import DEFAULT_SLOTS, FRAME_SIZE, FrameRing
+from src.harpi_lib.audio.mixer import MixerSource, _effect_target
+from src.harpi_lib.music.ytmusicdata import (
+    FFmpegPCMAudio,
+    UniqueAudioSource,
+    YoutubeDLSource,
+)
+
+# "process": mix new voice connections in an engine process.
+AUDIO_ENGINE = os.getenv("HARPI_AUDIO_ENGINE", "thread")
+# Frames between progress reports of a playing source.
+PROGRESS_EVERY = 10
+ENGINE_STOP_TIMEOUT = 2.0
+# Engine sleep while the ring is full.
+IDLE_SLEEP = 0.005
+
+_SILENCE = bytes(FRAME_SIZE)
+
+# Control operations, in the order they must be applied:
+#   ("add", source_id, StreamSpec, volume, bus)
+#   ("remove", source_id)
+#   ("volume", source_id, volume)
+#   ("pause", source_id, paused)
+#   ("effects", source_id, tuple[EffectSpec, ...])
+#   ("bus", name, gain, muted, tuple[EffectSpec, ...])
+#   ("duck", ducked)
+Op = tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class StreamSpec:
+    """What the engine needs to reopen a source: an FFmpeg input."""
+
+    url: str
+    before_options: str | None = None
+    options: str | None = None
+
+    def open(self) -> discord.AudioSource:
+        return FFmpegPCMAudio(
+            self.url,
+            before_options=self.before_options,
+            options=self.options,
+        )
+
+
+def stream_spec(source: discord.AudioSource) -> StreamSpec | None:
+    """The spec to play *source* in the engine; None to mix it locally."""
+    inner = source
+    while isinstance(inner, discord.PCMVolumeTransformer):
+        inner = inner.original
+    if (
+        isinstance(inner, FFmpegPCMAudio)
+        and not inner.pipe
+        and isinstance(inner.source, str)
+    ):
+        return StreamSpec(inner.source, inner.before_options, inner.options)
+    return None
+
+
+# --- Engine process ---
+
+
+class _EngineSource(UniqueAudioSource):
+    """A reopened source, under the bot's ID, counting its frames."""
+
+    def __init__(
+        self,
+        source_id: str,
+        original: discord.AudioSource,
+        volume: float,
+        bus: str,
+    ) -> None:
+        super().__init__(original=original, volume=volume)
+        self.id = source_id
+        self.bus = bus
+        self.frames = 0
+
+    @override
+    def read(self) -> bytes:
+        data = super().read()
+        if data:
+            self.frames += 1
+        return data
+
+
+class _EngineMixer(MixerSource):
+    """Mixes every source on its bot-side bus, ducking when told to."""
+
+    def __init__(self, controller: AudioController) -> None:
+        super().__init__(controller)
+        # TTS being mixed in the bot, which the engine cannot hear.
+        self.ducked = False
+
+    @override
+    def _bus_of(self, source_type: str, source: discord.AudioSource) -> str:
+        return cast("_EngineSource", source).bus
+
+    @override
+    def _ducking(self, buses: dict[str, np.ndarray]) -> bool:
+        return self.ducked or super()._ducking(buses)
+
+
+class _EngineWorker:
+    """Applies control messages and renders frames into the ring."""
+
+    def __init__(
+        self,
+        ring: FrameRing,
+        control: multiprocessing.Queue,
+        events: multiprocessing.Queue,
+    ) -> None:
+        self.ring = ring
+        self.control = control
+        self.events = events
+        self.controller = AudioController()
+        self.mixer = _EngineMixer(self.controller)
+        self.mixer.add_observer("track_end", self._on_ended)
+        self.sources: dict[str, _EngineSource] = {}
+        self._reported: set[str] = set()
+        self._tick = 0
+
+    def apply(self, ops: list[Op]) -> None:
+        for op in ops:
+            kind, source_id = op[0], op[1]
+            if kind == "bus":
+                _, name, gain, muted, effects = op
+                self.controller.set_bus(
+                    name, gain=gain, muted=muted, effects=list(effects)
+                )
+            elif kind == "duck":
+                self.mixer.ducked = op[1]
+            elif kind == "add":
+                _, _, spec, volume, bus = op
+                source = _EngineSource(source_id, spec.open(), volume, bus)
+                self.sources[source_id] = source
+                self.controller.add_layer(source)
+            elif kind == "remove":
+                if self.sources.pop(source_id, None) is not None:
+                    self._reported.discard(source_id)
+                    self.controller.remove_layer(source_id)
+            elif kind == "volume":
+                if source := self.sources.get(source_id):
+                    source.volume = op[2]
+            elif kind == "pause":
+                if source_id in self.sources:
+                    self.controller.set_paused(source_id, op[2])
+            elif kind == "effects":
+                if source_id in self.sources:
+                    self.controller.set_effects(source_id, list(op[2]))
+
+    def _on_ended(self, to_remove: list[discord.AudioSource]) -> None:
+        for source in cast("list[_EngineSource]", to_remove):
+            if self.sources.pop(source.id, None) is None:
+                continue
+            self._reported.discard(source.id)
+            self.events.put(("ended", source.id, source.frames))
+
+    def render(self) -> None:
+        """Mix one frame into the ring and report progress."""
+        self.ring.write(self.mixer.read())
+        self._tick += 1
+        due = self._tick % PROGRESS_EVERY == 0
+        progress = {}
+        for source_id, source in self.sources.items():
+            if source.frames and (due or source_id not in self._reported):
+                self._reported.add(source_id)
+                progress[source_id] = source.frames
+        if progress:
+            self.events.put(("progress", progress))
+
+    def drain_control(self) -> bool:
+        """Apply queued control messages; False once told to stop."""
+        while True:
+            try:
+                message = self.control.get_nowait()
+            except queue.Empty:
+                return True
+            if message[0] == "stop":
+                return False
+            self.apply(message[1])
+
+    def run(self) -> None:
+        parent = os.getppid()
+        while self.drain_control():
+            if self.ring.available() < self.ring.slots:
+                self.render()
+            elif os.getppid() != parent:
+                logger.warning("Bot process gone; stopping audio engine")
+                return
+            else:
+                time.sleep(IDLE_SLEEP)
+
+    def close(self) -> None:
+        self.controller.cleanup_all()
+        self.mixer.cleanup()
+
+
+def run_engine(
+    ring_name: str,
+    slots: int,
+    control: multiprocessing.Queue,
+    events: multiprocessing.Queue,
+) -> None:
+    """Entry point of the engine process."""
+    ring = FrameRing.attach(ring_name, slots)
+    worker = _EngineWorker(ring, control, events)
+    try:
+        worker.run()
+    finally:
+        worker.close()
+        ring.close()
+
+
+# --- Bot process ---
+
+
+class AudioEngine:
+    """An engine process with its frame ring and message queues."""
+
+    def __init__(self, slots: int = DEFAULT_SLOTS) -> None:
+        # Never fork the bot: its threads and sockets must not be copied.
+        context = multiprocessing.get_context("spawn")
+        self.ring = FrameRing.create(slots)
+        self.control = context.Queue()
+        self.events = context.Queue()
+        self.process = context.Process(
+            target=run_engine,
+            args=(self.ring.name, slots, self.control, self.events),
+            name="harpi-audio-engine",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self.process.start()
+
+    def sync(self, ops: list[Op]) -> None:
+        self.control.put(("sync", ops))
+
+    def poll_events(self) -> list[tuple[Any, ...]]:
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self) -> None:
+        """Stop the process and free the ring."""
+        if self.process.is_alive():
+            self.control.put(("stop",))
+            self.process.join(ENGINE_STOP_TIMEOUT)
+            if self.process.is_alive():
+                logger.warning("Audio engine did not stop; terminating it")
+                self.process.terminate()
+                self.process.join(ENGINE_STOP_TIMEOUT)
+        self.control.close()
+        self.events.close()
+        self.ring.close()
+
+
+@dataclass
+class _RemoteSource:
+    """What the engine knows about a bot-side source."""
+
+    id: str
+    source_type: str
+    volume: float
+    paused: bool = False
+    effects: tuple[EffectSpec, ...] = ()
+
+
+class EngineMixerSource(MixerSource):
+    """``MixerSource`` whose URL-backed sources are mixed by an engine."""
+
+    def __init__(
+        self, controller: AudioController, engine: AudioEngine | None = None
+    ) -> None:
+        super().__init__(controller)
+        if engine is None:
+            engine = AudioEngine()
+            engine.start()
+        self.engine = engine
+        self._remote: dict[discord.AudioSource, _RemoteSource] = {}
+        # Sources the engine finished, until the controller drops them.
+        self._finished: set[discord.AudioSource] = set()
+        # Bus settings and ducking as last sent; the engine starts flat.
+        self._buses: dict[str, tuple[float, bool, tuple[EffectSpec, ...]]]
+        self._buses = dict.fromkeys(BUSES, (1.0, False, ()))
+        self._ducked = False
+        self.underruns = 0
+
+    def _sync(
+        self,
+        sounds: list[tuple[str, discord.AudioSource]],
+        paused: Sequence[tuple[str, discord.AudioSource]] = (),
+    ) -> list[tuple[str, discord.AudioSource]]:
+        """Send the engine this frame's changes; return the local sounds.
+
+        Paused sources stay in the engine, paused there too.
+        """
+        paused_sources = {source for _, source in paused}
+        playing = {source for _, source in sounds} | paused_sources
+        # Removals first, so the engine frees their readers before it
+        # opens new ones.
+        ops: list[Op] = [
+            ("remove", self._remote.pop(source).id)
+            for source in [s for s in self._remote if s not in playing]
+        ]
+        local = []
+        chains = self.controller.get_effects()
+        for source_type, source in [*sounds, *paused]:
+            if source in self._finished:
+                continue
+            spec = stream_spec(source)
+            if spec is None:
+                if source not in paused_sources:
+                    local.append((source_type, source))
+                continue
+            volume = float(getattr(source, "volume", 1.0))
+            remote = self._remote.get(source)
+            if remote is None:
+                remote = _RemoteSource(uuid.uuid4().hex, source_type, volume)
+                self._remote[source] = remote
+                ops.append((
+                    "add",
+                    remote.id,
+                    spec,
+                    volume,
+                    BUS_OF[source_type],
+                ))
+            remote.source_type = source_type
+            if remote.volume != volume:
+                remote.volume = volume
+                ops.append(("volume", remote.id, volume))
+            if remote.paused != (source in paused_sources):
+                remote.paused = not remote.paused
+                ops.append(("pause", remote.id, remote.paused))
+            chain = chains.get(_effect_target(source_type, source))
+            effects = chain.specs if chain is not None else ()
+            if remote.effects != effects:
+                remote.effects = effects
+                ops.append(("effects", remote.id, effects))
+        self._finished &= playing
+        ops.extend(self._bus_ops(local))
+        if ops:
+            self.engine.sync(ops)
+        return local
+
+    def _bus_ops(
+        self, local: list[tuple[str, discord.AudioSource]]
+    ) -> list[Op]:
+        """Bus changes since the last frame, and whether to duck."""
+        ops: list[Op] = []
+        buses = self.controller.get_buses()
+        for name, bus in buses.items():
+            state = (
+                bus.gain,
+                bus.muted,
+                bus.chain.specs if bus.chain is not None else (),
+            )
+            if self._buses[name] != state:
+                self._buses[name] = state
+                ops.append(("bus", name, *state))
+        ducked = (
+            bool(DUCK_DB)
+            and not buses[VOICE].muted
+            and any(BUS_OF[source_type] == VOICE for source_type, _ in local)
+        )
+        if ducked != self._ducked:
+            self._ducked = ducked
+            ops.append(("duck", ducked))
+        return ops
+
+    @staticmethod
+    def _set_progress(source: discord.AudioSource, frames: int) -> None:
+        if not isinstance(source, YoutubeDLSource):
+            return
+        started = source.frames_read == 0 and frames > 0
+        source.frames_read = frames
+        if started and source.on_first_frame:
+            source.on_first_frame()
+
+    def _handle_events(self) -> None:
+        events = self.engine.poll_events()
+        if not events:
+            return
+        by_id = {remote.id: source for source, remote in self._remote.items()}
+        for event in events:
+            if event[0] == "progress":
+                for source_id, frames in event[1].items():
+                    if source := by_id.get(source_id):
+                        self._set_progress(source, frames)
+            elif event[0] == "ended":
+                _, source_id, frames = event
+                source = by_id.get(source_id)
+                if source is None or source not in self._remote:
+                    continue
+                self._set_progress(source, frames)
+                remote = self._remote.pop(source)
+                self._finished.add(source)
+                self._handle_source_removal(remote.source_type, source)
+                self.controller.remove_finished_source(source)
+
+    @property
+    def remote_sources(self) -> int:
+        """Sources being decoded in the engine process."""
+        return len(self._remote)
+
+    @override
+    def buffered_bytes(self) -> int:
+        return super().buffered_bytes() + self.engine.ring.available() * (
+            FRAME_SIZE
+        )
+
+    @override
+    def read(self) -> bytes:
+        """Take the engine's next frame and mix the local sources into it."""
+        if self._shutdown:
+            return _SILENCE
+
+        self.controller.apply_pending()
+        self._handle_events()
+        paused = self.controller.get_paused_sounds()
+        local = self._sync(self.controller.get_playing_sounds(), paused)
+
+        frame = self.engine.ring.read()
+        if frame is None:
+            if self._remote:
+                self.underruns += 1
+            frame = _SILENCE
+        mixed_audio = np.frombuffer(frame, dtype=np.int16).astype(np.int32)
+
+        self._submit_read_futures(local)
+        self._prune_stale_futures(local, paused)
+        self._await_futures(local)
+        to_remove, has_active = self._collect_and_mix(local, mixed_audio)
+        for source in to_remove:
+            self.controller.remove_finished_source(source)
+
+        self.has_active_tracks = has_active or bool(self._remote)
+
+        np.clip(mixed_audio, -32768, 32767, out=mixed_audio)
+        return mixed_audio.astype(np.int16).tobytes()
+
+    @override
+    def cleanup(self) -> None:
+        """Shut down the local readers and the engine process."""
+        with self._lock:
+            shutdown = self._shutdown
+        super().cleanup()
+        if shutdown:
+            return
+        self._remote.clear()
+        try:
+            self.engine.close()
+        except Exception:
+            logger.opt(exception=True).warning("Error closing audio engine")
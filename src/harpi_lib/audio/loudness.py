@@ -0,0 +1,187 @@
+"""Integrated loudness of queue tracks, measured once and cached.
+
+Tracks queued by different people can differ by 10 dB or more.  The
+mixer measures each track's integrated loudness (ITU-R BS.1770 /
+EBU R128: K-weighted, 400 ms blocks every 100 ms, absolute gate at
+-70 LUFS and relative gate 10 LU below) from the frames it is already
+mixing during the track's first play, so no extra decoding happens.
+When the track ends, the result goes to the ``LoudnessCache`` under the
+track's ID; later plays look it up and the mixer scales the track by
+``gain_for`` to reach ``TARGET_LUFS``.
+
+A track only partly played (skipped) is not cached, and it is mixed
+unchanged until a complete measurement exists.  The guild volume still
+applies on top.
+
+Gated blocks go into a histogram of 0.1 LU bins, as in libebur128, so
+a meter uses the same memory however long the track is.
+
+Thread safety
+-------------
+A ``LoudnessMeter`` is fed from the mixer's thread only.
+``LoudnessCache._lock`` guards the cache and file writes; ``put`` writes
+the file on a thread of its own, so a track ending never blocks the
+mixer on disk.  The file is replaced atomically.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from pathlib import Path
+
+import discord
+import numpy as np
+from loguru import logger
+
+from src.harpi_lib.audio.dsp import SAMPLE_RATE, k_weighting
+
+# "0" turns normalization off.
+NORMALIZE = os.getenv("HARPI_NORMALIZE", "1") != "0"
+LOUDNESS_FILE = Path(os.getenv("HARPI_LOUDNESS_FILE", ".loudness.json"))
+TARGET_LUFS = float(os.getenv("HARPI_TARGET_LUFS", "-16"))
+# Quiet tracks are raised by at most this much, to keep noise down.
+MAX_BOOST_DB = 12.0
+# Shorter measurements are not worth caching.
+MIN_MEASURED_SECONDS = 10.0
+MAX_CACHED_TRACKS = 20000
+
+_SEGMENT_SAMPLES = SAMPLE_RATE // 10
+_BLOCK_SEGMENTS = 4
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+_BIN_LU = 0.1
+_BINS = 800
+
+
+def _lufs(power: float) -> float:
+    return -0.691 + 10 * math.log10(power)
+
+
+def gain_for(lufs: float, target: float = TARGET_LUFS) -> float:
+    """Linear gain bringing a track at *lufs* to *target*."""
+    return 10 ** (min(target - lufs, MAX_BOOST_DB) / 20)
+
+
+def track_key(source: discord.AudioSource) -> str | None:
+    """Cache key of a queue track (extractor and video ID), if known."""
+    data = getattr(source, "data", None)
+    if not isinstance(data, dict) or not data.get("id"):
+        return None
+    return f"{data.get('extractor_key', '')}:{data['id']}"
+
+
+class LoudnessMeter:
+    """Incremental integrated-loudness measurement of one track."""
+
+    def __init__(self) -> None:
+        self._filters = k_weighting()
+        self._energy = 0.0
+        self._samples = 0
+        # Mean-square power of the last segments (100 ms each).
+        self._segments: list[float] = []
+        self._counts = np.zeros(_BINS, dtype=np.int64)
+        self._powers = np.zeros(_BINS)
+        self.seconds = 0.0
+
+    def feed(self, pcm: np.ndarray, volume: float = 1.0) -> None:
+        """Measure a frame of interleaved stereo int16 *pcm*.
+
+        *volume* is the gain already applied to it, which is undone so
+        the measurement does not depend on the guild volume.
+        """
+        if volume <= 0:
+            return
+        x = pcm.reshape(-1, 2) / (32768.0 * volume)
+        for stage in self._filters:
+            x = stage.process(x)
+        self._energy += float(np.einsum("ij,ij->", x, x))
+        self._samples += len(x)
+        self.seconds += len(x) / SAMPLE_RATE
+        if self._samples >= _SEGMENT_SAMPLES:
+            self._segments.append(self._energy / self._samples)
+            self._energy, self._samples = 0.0, 0
+            if len(self._segments) == _BLOCK_SEGMENTS:
+                self._add_block(sum(self._segments) / _BLOCK_SEGMENTS)
+                self._segments.pop(0)
+
+    def _add_block(self, power: float) -> None:
+        if power <= 0:
+            return
+        loudness = _lufs(power)
+        if loudness < _ABSOLUTE_GATE:
+            return
+        index = min(int((loudness - _ABSOLUTE_GATE) / _BIN_LU), _BINS - 1)
+        self._counts[index] += 1
+        self._powers[index] += power
+
+    def integrated(self) -> float | None:
+        """Gated loudness in LUFS, or None if every block was silent."""
+        count = self._counts.sum()
+        if not count:
+            return None
+        gate = _lufs(self._powers.sum() / count) + _RELATIVE_GATE
+        start = max(0, math.ceil((gate - _ABSOLUTE_GATE) / _BIN_LU))
+        gated = self._counts[start:].sum()
+        if not gated:
+            return None
+        return _lufs(self._powers[start:].sum() / gated)
+
+
+class LoudnessCache:
+    """Measured loudness by track key, optionally persisted to JSON."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._tracks: dict[str, float] = {}
+        if path is not None:
+            self._load()
+
+    def get(self, key: str) -> float | None:
+        with self._lock:
+            return self._tracks.get(key)
+
+    def put(self, key: str, lufs: float) -> None:
+        with self._lock:
+            self._tracks.pop(key, None)
+            self._tracks[key] = round(lufs, 2)
+            while len(self._tracks) > MAX_CACHED_TRACKS:
+                # Dicts keep insertion order: drop the oldest measurement.
+                del self._tracks[next(iter(self._tracks))]
+        if self.path is not None:
+            threading.Thread(
+                target=self._write, name="LoudnessCacheWrite", daemon=True
+            ).start()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tracks)
+
+    def _load(self) -> None:
+        assert self.path is not None
+        try:
+            raw = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.opt(exception=True).error(
+                f"Could not read loudness cache from {self.path}"
+            )
+            return
+        self._tracks = {str(k): float(v) for k, v in raw.items()}
+
+    def _write(self) -> None:
+        assert self.path is not None
+        with self._lock:
+            raw = json.dumps(self._tracks)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            try:
+                tmp.write_text(raw)
+                os.replace(tmp, self.path)
+            except OSError:
+                logger.opt(exception=True).error(
+                    f"Could not write loudness cache to {self.path}"
+                )
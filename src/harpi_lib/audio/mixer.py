@@ -13,26 +13,91 @@ event loops.
 * ``cleanup()`` sets ``_shutdown = True`` under the lock, then tears
   down the executor.  ``read()`` checks ``_shutdown`` early to avoid
   submitting work to a dead pool.
+
+Load shedding
+-------------
+A ``read()`` whose own work takes longer than a frame means the mixer
+is not keeping up: its readers get too little CPU for the number of
+sources.  Time spent waiting on slow readers (up to ``READ_TIMEOUT``) is
+not counted, so one stalled source cannot shed healthy ones.  After
+``SHED_AFTER_FRAMES`` such frames in a row, the lowest-priority source
+is dropped, as if it had ended: button sounds first, then layers from
+the quietest up.  The queue track and TTS are never shed.
+
+Loudness
+--------
+With a ``LoudnessCache``, queue tracks are normalized: a track's first
+play is measured from the frames being mixed, and later plays are
+scaled by the cached gain (see ``loudness``).  Meters and gains are
+only touched from ``read()``.
+
+A source paused in the controller is not read, and the frame its
+reader already fetched is kept for when it resumes.
+
+Each source's effect chain (see ``dsp``) runs on its frame after
+normalization, before it is summed.
+
+Buses
+-----
+Sources are summed into their bus (see ``buses``) rather than straight
+into the output; each bus's gain, mute, effects and ducking then run
+once on that sum, and the buses add up to the master.
 """
 
+from src.harpi_lib.audio.buses import BUS_OF, DUCK_DB, MUSIC, VOICE
 from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.loudness import (
+    MIN_MEASURED_SECONDS,
+    LoudnessCache,
+    LoudnessMeter,
+    gain_for,
+    track_key,
+)
 import concurrent.futures
+import os
+from collections.abc import Iterable
 import threading
+import time
 from typing import Callable, override
 
 import discord
 import numpy as np
 from loguru import logger
 
+FRAME_SECONDS = 0.02
+# Consecutive frames over FRAME_SECONDS before a source is shed; 0
+# disables shedding.
+SHED_AFTER_FRAMES = int(os.getenv("HARPI_SHED_AFTER_FRAMES", "25"))
+# Lower sheds first; other source types are never shed.
+SHED_PRIORITY = {"button": 0, "track": 1}
+
+
+def _effect_target(source_type: str, source: discord.AudioSource) -> str:
+    """The ``AudioController.set_effects`` target a source plays under."""
+    if source_type == "track":
+        return getattr(source, "id", "")
+    return source_type
+
 
 class MixerSource(discord.AudioSource):
     """Read from multiple audio sources and mix them into a single PCM stream."""
 
-    def __init__(self, controller: AudioController) -> None:
+    def __init__(
+        self,
+        controller: AudioController,
+        loudness: LoudnessCache | None = None,
+    ) -> None:
         self._lock: threading.Lock = threading.Lock()
         self._shutdown: bool = False
         self.has_active_tracks: bool = False
         self.controller: AudioController = controller
+        # Consecutive frames that took longer than a frame to mix.
+        self.late_frames: int = 0
+        self.shed_sources: int = 0
+        self.loudness = loudness
+        # Queue tracks being measured, and those with a known gain.
+        self._meters: dict[discord.AudioSource, LoudnessMeter] = {}
+        self._gains: dict[discord.AudioSource, float] = {}
         self._observers: dict[str, list[Callable]] = {}
 
         self.executor = concurrent.futures.ThreadPoolExecutor(
@@ -106,10 +171,17 @@ class MixerSource(discord.AudioSource):
                     return
 
     def _prune_stale_futures(
-        self, sources: list[tuple[str, discord.AudioSource]]
+        self,
+        sources: list[tuple[str, discord.AudioSource]],
+        paused: Iterable[tuple[str, discord.AudioSource]] = (),
     ) -> None:
-        """Cancel and remove futures for sources no longer in the active set."""
+        """Cancel and remove futures for sources no longer in the active set.
+
+        A paused source keeps its future: the frame it holds, read just
+        before the pause, is the first one mixed on resume.
+        """
         active_sources = {s for _, s in sources}
+        active_sources.update(s for _, s in paused)
         for s in list(self.pending_futures.keys()):
             if s not in active_sources:
                 self.pending_futures[s].cancel()
@@ -135,6 +207,8 @@ class MixerSource(discord.AudioSource):
         """Read completed futures, mix into mixed_audio, return (to_remove, has_active)."""
         to_remove: list[discord.AudioSource] = []
         has_active = False
+        effects = self.controller.get_effects()
+        buses: dict[str, np.ndarray] = {}
 
         for source_type, source_obj in sources:
             if source_obj not in self.pending_futures:
@@ -168,14 +242,50 @@ class MixerSource(discord.AudioSource):
                     audio_chunk = padded
                     should_remove = True
 
-                mixed_audio += audio_chunk
+                if source_type == "queue" and self.loudness is not None:
+                    audio_chunk = self._normalize(source_obj, audio_chunk)
+                if effects:
+                    chain = effects.get(
+                        _effect_target(source_type, source_obj)
+                    )
+                    if chain is not None:
+                        audio_chunk = chain.process(audio_chunk)
+                bus = self._bus_of(source_type, source_obj)
+                if bus in buses:
+                    buses[bus] += audio_chunk
+                else:
+                    buses[bus] = audio_chunk.astype(np.int32)
 
             if should_remove:
                 to_remove.append(source_obj)
                 self._handle_source_removal(source_type, source_obj)
 
+        self._mix_buses(buses, mixed_audio)
         return to_remove, has_active
 
+    def _bus_of(self, source_type: str, source: discord.AudioSource) -> str:
+        """The bus a source plays on."""
+        return BUS_OF[source_type]
+
+    def _ducking(self, buses: dict[str, np.ndarray]) -> bool:
+        """Whether this frame's music is ducked under the voice bus."""
+        voice = self.controller.get_buses()[VOICE]
+        return bool(DUCK_DB) and VOICE in buses and not voice.muted
+
+    def _mix_buses(
+        self, buses: dict[str, np.ndarray], mixed_audio: np.ndarray
+    ) -> None:
+        """Run each bus's stage over its sum and add it to *mixed_audio*."""
+        all_buses = self.controller.get_buses()
+        ducking = self._ducking(buses)
+        for name, bus in all_buses.items():
+            ducked = ducking and name == MUSIC
+            pcm = buses.get(name)
+            if pcm is None:
+                bus.idle(ducked)
+            else:
+                mixed_audio += bus.render(pcm, ducked)
+
     def _handle_source_removal(
         self, source_type: str, source_obj: discord.AudioSource
     ) -> None:
@@ -183,27 +293,136 @@ class MixerSource(discord.AudioSource):
         if source_type == "track":
             self._notify_observers("track_end", to_remove=[source_obj])
         elif source_type == "queue":
+            self._finish_measurement(source_obj)
             self._notify_observers("queue_end")
             self.controller._on_track_finished(source_obj)
         elif source_type == "tts":
             self.controller.set_tts_track(None)
         # "button" sources need no special handling
 
+    def _normalize(
+        self, source: discord.AudioSource, chunk: np.ndarray
+    ) -> np.ndarray:
+        """Scale a queue track's frame to the target loudness.
+
+        Until the track's loudness is known the frame is measured and
+        returned unchanged.
+        """
+        gain = self._gains.get(source)
+        if gain is None:
+            meter = self._meters.get(source)
+            if meter is None:
+                assert self.loudness is not None
+                key = track_key(source)
+                lufs = self.loudness.get(key) if key else None
+                if key is None or lufs is not None:
+                    gain = gain_for(lufs) if lufs is not None else 1.0
+                    self._gains[source] = gain
+                else:
+                    meter = self._meters[source] = LoudnessMeter()
+            if meter is not None:
+                meter.feed(chunk, getattr(source, "volume", 1.0))
+                return chunk
+        if gain == 1.0:
+            return chunk
+        return (chunk * gain).astype(np.int32)
+
+    def _finish_measurement(self, source: discord.AudioSource) -> None:
+        """Cache the loudness of a queue track that played to the end."""
+        self._gains.pop(source, None)
+        meter = self._meters.pop(source, None)
+        key = track_key(source)
+        if meter is None or key is None or self.loudness is None:
+            return
+        lufs = meter.integrated()
+        if lufs is None or meter.seconds < MIN_MEASURED_SECONDS:
+            return
+        logger.debug(f"Measured {key} at {lufs:.1f} LUFS")
+        self.loudness.put(key, lufs)
+
+    def _forget_loudness(
+        self, sources: list[tuple[str, discord.AudioSource]]
+    ) -> None:
+        """Drop meters and gains of tracks no longer playing (skipped)."""
+        active = {s for _, s in sources}
+        for state in (self._meters, self._gains):
+            for source in [s for s in state if s not in active]:
+                del state[source]
+
+    def reader_threads(self) -> int:
+        """Reader threads started by the pool (they live until cleanup)."""
+        return len(self.executor._threads)
+
+    def buffered_bytes(self) -> int:
+        """PCM already read from the sources and not mixed yet."""
+        return sum(
+            len(future.result())
+            for future in list(self.pending_futures.values())
+            if future.done()
+            and not future.cancelled()
+            and future.exception() is None
+        )
+
+    def _shed_if_starved(
+        self, elapsed: float, sources: list[tuple[str, discord.AudioSource]]
+    ) -> None:
+        """Drop the lowest-priority source after a run of late frames."""
+        if elapsed <= FRAME_SECONDS:
+            self.late_frames = 0
+            return
+        self.late_frames += 1
+        if not SHED_AFTER_FRAMES or self.late_frames < SHED_AFTER_FRAMES:
+            return
+        self.late_frames = 0
+        candidates = [
+            (source_type, source)
+            for source_type, source in sources
+            if source_type in SHED_PRIORITY
+        ]
+        if not candidates:
+            return
+        source_type, source = min(
+            candidates,
+            key=lambda item: (
+                SHED_PRIORITY[item[0]],
+                getattr(item[1], "volume", 1.0),
+            ),
+        )
+        logger.warning(
+            f"Mixer falling behind ({elapsed * 1000:.0f} ms per frame); "
+            f"shedding a {source_type} source"
+        )
+        future = self.pending_futures.pop(source, None)
+        if future is not None:
+            future.cancel()
+        self.shed_sources += 1
+        self._handle_source_removal(source_type, source)
+        self.controller.remove_finished_source(source)
+
     @override
     def read(self) -> bytes:
         """Read and mix one frame from all active sources."""
         if self._shutdown:
             return b"\x00" * self.FRAME_SIZE
+        started = time.perf_counter()
 
         mixed_audio = np.zeros(
             self.SAMPLES_PER_FRAME * self.CHANNELS, dtype=np.int32
         )
 
+        # Frame boundary: staged control batches land before any source
+        # of this frame is read.
+        self.controller.apply_pending()
         sources = self.controller.get_playing_sounds()
+        paused = self.controller.get_paused_sounds()
 
         self._submit_read_futures(sources)
-        self._prune_stale_futures(sources)
+        self._prune_stale_futures(sources, paused)
+        if self._meters or self._gains:
+            self._forget_loudness(sources + paused)
+        waiting = time.perf_counter()
         self._await_futures(sources)
+        waited = time.perf_counter() - waiting
 
         to_remove, has_active = self._collect_and_mix(sources, mixed_audio)
 
@@ -211,6 +430,10 @@ class MixerSource(discord.AudioSource):
             self.controller.remove_finished_source(source)
 
         self.has_active_tracks = has_active
+        self._shed_if_starved(
+            time.perf_counter() - started - waited,
+            [item for item in sources if item[1] not in to_remove],
+        )
 
         np.clip(mixed_audio, -32768, 32767, out=mixed_audio)
         return mixed_audio.astype(np.int16).tobytes()
@@ -0,0 +1,475 @@
+"""One voice-send loop for every guild.
+
+``discord.VoiceClient.play`` starts an ``AudioPlayer`` thread per voice
+connection; each one sleeps, reads a frame from its source, Opus-encodes
+it and sends it, so threads and timer wake-ups grow with the number of
+guilds.  With ``HARPI_VOICE_SCHEDULER=shared`` voice connections are
+``ScheduledVoiceClient`` instances instead, and ``play`` hands the
+source to the process's ``VoiceScheduler``:
+
+* one scheduler thread wakes once per 20 ms tick for all guilds (every
+  stream has the same period, so the timer wheel has a single slot);
+* each tick, every stream due for a frame is rendered (``read`` plus
+  Opus encoding) on a fixed pool of ``VOICE_SEND_WORKERS`` threads;
+  libopus runs through ctypes without the GIL, so encodes of different
+  guilds overlap;
+* at the tick deadline, the packets that are ready are sent.  A stream
+  whose source is slow (the mixer may wait up to its read timeout) just
+  misses the tick and is sent on a later one.
+* a slow render keeps its worker busy, so once every worker is stuck
+  on one, the other streams' renders go to a second pool of up to
+  ``VOICE_STALL_WORKERS`` threads instead of queueing behind them.
+  Finishing a stream, which may block too, always runs there.
+
+Thread count is ``1 + VOICE_SEND_WORKERS`` while sources keep up, plus
+at most ``VOICE_STALL_WORKERS`` (started on first use) once they stall;
+wake-ups are 50 per second whatever the number of guilds.
+``VoiceScheduler.stats`` reports the load of recent ticks, and the
+resources endpoint includes it.
+
+Thread safety
+-------------
+``VoiceStream.pause`` / ``resume`` / ``stop`` are called from the bot's
+event loop and only flip flags; packets, including the silence sent on
+pause, are only ever sent from the scheduler thread, so a voice client's
+sequence numbers are never advanced concurrently.  Renders of one stream
+never overlap: a stream gets a new render only after the previous one
+was collected.  Finishing a stream (its ``after`` callback and source
+cleanup) runs on the stall pool, as it may block.  ``_stats`` is
+updated by the scheduler thread and read by ``stats`` under ``_lock``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from typing import Any, override
+
+import discord
+from discord import opus
+from discord.gateway import DiscordVoiceWebSocket
+from loguru import logger
+
+# "shared": send every guild's audio from one VoiceScheduler.
+VOICE_SCHEDULER = os.getenv("HARPI_VOICE_SCHEDULER", "thread")
+VOICE_SEND_WORKERS = int(os.getenv("HARPI_VOICE_SEND_WORKERS", "2"))
+# Extra render threads used only while every send worker is stuck.
+VOICE_STALL_WORKERS = int(os.getenv("HARPI_VOICE_STALL_WORKERS", "8"))
+
+TICK = opus.Encoder.FRAME_LENGTH / 1000
+# Past this many ticks behind, the schedule restarts from now instead
+# of bursting frames to catch up.
+MAX_LAG_TICKS = 5
+# Smoothing of ``TickStats.mean_load``.
+LOAD_SMOOTHING = 0.05
+OVERRUN_LOG_INTERVAL = 10.0
+SILENCE_PACKETS = 5
+# One Opus frame of silence, sent after a pause like ``AudioPlayer`` does.
+OPUS_SILENCE = b"\xf8\xff\xfe"
+
+After = Callable[[Exception | None], Any]
+
+
+@dataclass
+class TickStats:
+    """Load of the scheduler's ticks.
+
+    Load is the time spent in a tick divided by the tick length; above
+    1.0 the scheduler cannot keep up.
+    """
+
+    streams: int = 0
+    ticks: int = 0
+    last_load: float = 0.0
+    mean_load: float = 0.0
+    peak_load: float = 0.0
+    # Ticks that took longer than a tick.
+    overruns: int = 0
+    # Frames not rendered by the end of their tick.
+    late_frames: int = 0
+    # Renders sent to the stall pool because every worker was busy.
+    stalled_renders: int = 0
+
+
+class VoiceStream:
+    """A source played on a voice client by the scheduler."""
+
+    def __init__(
+        self,
+        client: discord.VoiceClient,
+        source: discord.AudioSource,
+        after: After | None,
+    ) -> None:
+        self.client = client
+        self.source = source
+        self.after = after
+        self.error: Exception | None = None
+        self.pending: concurrent.futures.Future[bytes | None] | None = None
+        # Whether ``pending`` runs on one of the send workers.
+        self.on_worker = False
+        self._encode = not source.is_opus()
+        self._paused = False
+        self._ended = False
+        self._silence = 0
+        self._disconnected_at: float | None = None
+
+    # --- Called from the bot loop ---
+
+    def pause(self) -> None:
+        self._paused = True
+        self._silence = SILENCE_PACKETS
+        self._speak(discord.SpeakingState.none)
+
+    def resume(self) -> None:
+        self._paused = False
+        self._speak(discord.SpeakingState.voice)
+
+    def stop(self) -> None:
+        if not self._ended:
+            self._ended = True
+            self._speak(discord.SpeakingState.none)
+
+    def is_playing(self) -> bool:
+        return not self._paused and not self._ended
+
+    def is_paused(self) -> bool:
+        return self._paused and not self._ended
+
+    @property
+    def ended(self) -> bool:
+        return self._ended
+
+    def set_source(self, source: discord.AudioSource) -> None:
+        """Play *source* from the next frame on."""
+        self._encode = not source.is_opus()
+        self.source = source
+
+    def _speak(self, state: discord.SpeakingState) -> None:
+        ws: DiscordVoiceWebSocket = self.client.ws
+        try:
+            asyncio.run_coroutine_threadsafe(
+                ws.speak(state), self.client.client.loop
+            )
+        except Exception:
+            logger.opt(exception=True).warning("Speaking update failed")
+
+    # --- Called from the scheduler ---
+
+    def wants_frame(self, now: float) -> bool:
+        """Whether to render a frame this tick (stops a lost stream)."""
+        if self._ended or self._paused or self.pending is not None:
+            return False
+        if self.client.is_connected():
+            self._disconnected_at = None
+            return True
+        # Like AudioPlayer: wait for a reconnect, but not forever.
+        if self._disconnected_at is None:
+            self._disconnected_at = now
+        elif now - self._disconnected_at > self.client.timeout:
+            logger.debug("Voice client stayed disconnected; stopping stream")
+            self.stop()
+        return False
+
+    def render(self) -> bytes | None:
+        """Read and encode one frame (pool thread); None at the end."""
+        data = self.source.read()
+        if not data:
+            return None
+        if self._encode:
+            return self.client.encoder.encode(
+                data, opus.Encoder.SAMPLES_PER_FRAME
+            )
+        return data
+
+    def send(self, packet: bytes) -> None:
+        self.client.send_audio_packet(packet, encode=False)
+
+    def send_silence(self) -> None:
+        """Send the silence owed since a pause, if any."""
+        count, self._silence = self._silence, 0
+        try:
+            for _ in range(count):
+                self.send(OPUS_SILENCE)
+        except Exception:
+            pass
+
+    def fail(self, error: Exception) -> None:
+        self.error = error
+        self.stop()
+
+    def finish(self) -> None:
+        """Run ``after`` and clean the source up, as ``AudioPlayer`` does."""
+        if self.error is None:
+            self.error = getattr(self.source, "_current_error", None)
+        try:
+            if self.after is not None:
+                self.after(self.error)
+            elif self.error:
+                logger.opt(exception=self.error).error(
+                    "Error in scheduled voice stream"
+                )
+        except Exception:
+            logger.opt(exception=True).error("Voice stream callback failed")
+        finally:
+            self.source.cleanup()
+
+
+class VoiceScheduler:
+    """Sends the audio of every registered voice stream, tick by tick."""
+
+    def __init__(
+        self,
+        workers: int = VOICE_SEND_WORKERS,
+        stall_workers: int = VOICE_STALL_WORKERS,
+    ) -> None:
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._streams: list[VoiceStream] = []
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Pool threads only start with the first render.
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            self.workers, thread_name_prefix="VoiceRender"
+        )
+        self._stall_pool = concurrent.futures.ThreadPoolExecutor(
+            max(1, stall_workers), thread_name_prefix="VoiceStall"
+        )
+        self._closed = False
+        self._stats = TickStats()
+        self._last_overrun_log = 0.0
+
+    def add(
+        self,
+        client: discord.VoiceClient,
+        source: discord.AudioSource,
+        after: After | None = None,
+    ) -> VoiceStream:
+        """Start playing *source* on *client*."""
+        stream = VoiceStream(client, source, after)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Voice scheduler is closed")
+            self._streams.append(stream)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="VoiceScheduler", daemon=True
+                )
+                self._thread.start()
+        stream.resume()
+        self._wakeup.set()
+        return stream
+
+    def stats(self) -> TickStats:
+        with self._lock:
+            return replace(self._stats, streams=len(self._streams))
+
+    def close(self) -> None:
+        """Stop every stream and the scheduler thread."""
+        with self._lock:
+            self._closed = True
+            streams = list(self._streams)
+        for stream in streams:
+            stream.stop()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._pool.shutdown(wait=True)
+        self._stall_pool.shutdown(wait=True)
+
+    # --- Scheduler thread ---
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        ticks = 0
+        while True:
+            with self._lock:
+                streams = list(self._streams)
+                closed = self._closed
+            if closed and not streams:
+                return
+            if not streams:
+                # Idle: sleep until a stream is added.
+                self._wakeup.wait()
+                self._wakeup.clear()
+                start, ticks = time.perf_counter(), 0
+                continue
+
+            tick_start = time.perf_counter()
+            ticks += 1
+            deadline = start + TICK * ticks
+            if deadline < tick_start - TICK * MAX_LAG_TICKS:
+                start, ticks = tick_start, 1
+                deadline = tick_start + TICK
+            self.tick(streams, deadline)
+            self._record(time.perf_counter() - tick_start)
+
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def tick(self, streams: list[VoiceStream], deadline: float) -> None:
+        """Render and send one frame of every stream that is due."""
+        now = time.perf_counter()
+        # Workers still stuck on a render from an earlier tick.
+        stuck = sum(
+            1
+            for s in streams
+            if s.on_worker and s.pending is not None and not s.pending.done()
+        )
+        stalled = 0
+        for stream in streams:
+            if not stream.wants_frame(now):
+                continue
+            stream.on_worker = stuck < self.workers
+            if stream.on_worker:
+                stream.pending = self._pool.submit(stream.render)
+            else:
+                stalled += 1
+                stream.pending = self._stall_pool.submit(stream.render)
+
+        in_flight = [s.pending for s in streams if s.pending is not None]
+        if in_flight:
+            concurrent.futures.wait(
+                in_flight, timeout=max(0.0, deadline - time.perf_counter())
+            )
+
+        late = 0
+        for stream in streams:
+            stream.send_silence()
+            future = stream.pending
+            if future is None:
+                continue
+            if not future.done():
+                late += 1
+                continue
+            stream.pending = None
+            try:
+                packet = future.result()
+                if packet is None:
+                    stream.stop()
+                else:
+                    stream.send(packet)
+            except Exception as e:
+                stream.fail(e)
+
+        finished = [s for s in streams if s.ended and s.pending is None]
+        if finished:
+            with self._lock:
+                self._streams = [s for s in self._streams if s not in finished]
+            for stream in finished:
+                self._stall_pool.submit(stream.finish)
+        with self._lock:
+            self._stats.late_frames += late
+            self._stats.stalled_renders += stalled
+
+    def _record(self, busy: float) -> None:
+        load = busy / TICK
+        with self._lock:
+            stats = self._stats
+            stats.ticks += 1
+            stats.last_load = load
+            stats.mean_load += (load - stats.mean_load) * LOAD_SMOOTHING
+            stats.peak_load = max(stats.peak_load, load)
+            if load <= 1.0:
+                return
+            stats.overruns += 1
+            overruns, streams = stats.overruns, len(self._streams)
+        now = time.monotonic()
+        if now - self._last_overrun_log >= OVERRUN_LOG_INTERVAL:
+            self._last_overrun_log = now
+            logger.warning(
+                f"Voice tick took {busy * 1000:.1f} ms "
+                f"({streams} streams, {overruns} overruns)"
+            )
+
+
+class ScheduledVoiceClient(discord.VoiceClient):
+    """``VoiceClient`` whose audio is sent by a ``VoiceScheduler``.
+
+    Pass ``voice_client_class(scheduler)`` as ``cls`` to
+    ``VoiceChannel.connect``.
+    """
+
+    def __init__(
+        self,
+        client: discord.Client,
+        channel: discord.abc.Connectable,
+        *,
+        scheduler: VoiceScheduler,
+    ) -> None:
+        super().__init__(client, channel)
+        self.scheduler = scheduler
+        self._stream: VoiceStream | None = None
+
+    @override
+    def play(
+        self,
+        source: discord.AudioSource,
+        *,
+        after: After | None = None,
+        **encoder_options: Any,
+    ) -> None:
+        if not self.is_connected():
+            raise discord.ClientException("Not connected to voice.")
+        if self.is_playing():
+            raise discord.ClientException("Already playing audio.")
+        if not isinstance(source, discord.AudioSource):
+            raise TypeError(
+                f"source must be an AudioSource not {type(source).__name__}"
+            )
+        if not source.is_opus():
+            self.encoder = opus.Encoder(**encoder_options)
+        self._stream = self.scheduler.add(self, source, after)
+
+    @override
+    def is_playing(self) -> bool:
+        return self._stream is not None and self._stream.is_playing()
+
+    @override
+    def is_paused(self) -> bool:
+        return self._stream is not None and self._stream.is_paused()
+
+    @override
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+
+    @override
+    def pause(self) -> None:
+        if self._stream is not None:
+            self._stream.pause()
+
+    @override
+    def resume(self) -> None:
+        if self._stream is not None:
+            self._stream.resume()
+
+    @property
+    @override
+    def source(self) -> discord.AudioSource | None:
+        return self._stream.source if self._stream else None
+
+    @source.setter
+    @override
+    def source(self, value: discord.AudioSource) -> None:
+        if not isinstance(value, discord.AudioSource):
+            raise TypeError(
+                f"expected AudioSource not {type(value).__name__}."
+            )
+        if self._stream is None:
+            raise ValueError("Not playing anything.")
+        self._stream.set_source(value)
+
+
+def voice_client_class(
+    scheduler: VoiceScheduler,
+) -> Callable[..., ScheduledVoiceClient]:
+    """``cls`` for ``VoiceChannel.connect`` playing through *scheduler*."""
+    return functools.partial(ScheduledVoiceClient, scheduler=scheduler)
@@ -0,0 +1,179 @@
+"""Per-guild command actors fed by a thread-safe command bus.
+
+Playback commands (stop, skip, loop, volume, layer and queue edits, and
+the mixer's "track ended" signal) are submitted to a ``CommandBus`` from
+any thread or loop.  The bus hands them to the bot's event loop in
+batches and routes each one to the ``GuildActor`` of its guild, which
+runs its guild's commands one at a time, in submission order.  Two
+commands for the same guild can therefore never interleave, e.g. a skip
+and a queue end can no longer both resolve a next track.
+
+While a command runs, later commands wait in the actor's mailbox, where
+a new command is merged into the one before it when running both would
+be redundant (see ``_coalesce``): repeated skips become one skip over
+several tracks, repeated volume or loop changes keep the last value.
+Every caller still gets a result — merged commands share one.
+
+Thread safety
+-------------
+``submit`` and ``send`` may be called from any thread.  The inbox is
+guarded by ``CommandBus._lock``, and at most one dispatch callback is
+pending on the bot loop at a time, so a burst of submissions costs one
+cross-loop handoff.  Actors and their mailboxes are only touched on the
+bot's event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from discord.ext.commands import Bot
+from loguru import logger
+
+Handler = Callable[..., Awaitable[Any]]
+
+# Commands where only the most recent arguments matter.
+LAST_WINS = frozenset({"volume", "loop", "layer_volume"})
+# Commands that move past the current track.
+ADVANCING = frozenset({"skip", "advance"})
+
+
+@dataclass
+class Command:
+    """A command for one guild and the futures of everyone awaiting it."""
+
+    guild_id: int
+    name: str
+    args: dict[str, Any] = field(default_factory=dict)
+    futures: list[concurrent.futures.Future[Any]] = field(default_factory=list)
+
+
+def _coalesce(last: Command, new: Command) -> Command | None:
+    """Merge *new* into the pending *last* command, if redundant.
+
+    Returns the merged command, or None to queue *new* after *last*.
+    """
+    merged = None
+    if last.name == new.name and new.name in LAST_WINS:
+        if last.args.get("layer_id") == new.args.get("layer_id"):
+            merged = Command(new.guild_id, new.name, new.args)
+    elif last.name == "skip" and new.name == "skip":
+        count = last.args.get("count", 1) + new.args.get("count", 1)
+        merged = Command(new.guild_id, "skip", {"count": count})
+    elif last.name in ADVANCING and new.name in ADVANCING:
+        # A queue end next to a skip refers to the same track.
+        merged = last if last.name == "skip" else new
+        merged = Command(new.guild_id, merged.name, merged.args)
+    elif new.name == "stop" and last.name in ADVANCING | {"stop"}:
+        # Resolving a next track that a stop clears right away is wasted.
+        merged = Command(new.guild_id, "stop", new.args)
+    if merged is not None:
+        merged.futures = last.futures + new.futures
+    return merged
+
+
+class GuildActor:
+    """Runs one guild's commands sequentially on the bot loop."""
+
+    def __init__(
+        self,
+        guild_id: int,
+        handlers: dict[str, Handler],
+        on_idle: Callable[[GuildActor], None],
+    ) -> None:
+        self.guild_id = guild_id
+        self.mailbox: deque[Command] = deque()
+        self._handlers = handlers
+        self._on_idle = on_idle
+        self._task: asyncio.Task[None] | None = None
+
+    def post(self, command: Command) -> None:
+        merged = _coalesce(self.mailbox[-1], command) if self.mailbox else None
+        if merged is not None:
+            self.mailbox[-1] = merged
+        else:
+            self.mailbox.append(command)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            while self.mailbox:
+                await self._execute(self.mailbox.popleft())
+        finally:
+            self._task = None
+            self._on_idle(self)
+
+    async def _execute(self, command: Command) -> None:
+        try:
+            handler = self._handlers[command.name]
+            result = await handler(self.guild_id, **command.args)
+        except Exception as e:
+            logger.opt(exception=True).debug(
+                f"Command {command.name} failed in guild {self.guild_id}"
+            )
+            for future in command.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in command.futures:
+            if not future.done():
+                future.set_result(result)
+
+
+class CommandBus:
+    """Thread-safe entry point that batches commands onto the bot loop."""
+
+    def __init__(self, bot: Bot, handlers: dict[str, Handler]) -> None:
+        self.bot = bot
+        self.handlers = handlers
+        self._lock = threading.Lock()
+        self._inbox: list[Command] = []
+        self._dispatch_pending = False
+        self._actors: dict[int, GuildActor] = {}
+
+    def submit(
+        self, guild_id: int, name: str, /, **args: Any
+    ) -> concurrent.futures.Future[Any]:
+        """Queue a command (any thread) and return a future for its result."""
+        if name not in self.handlers:
+            raise ValueError(f"Unknown command: {name}")
+        loop = self.bot.loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("Bot event loop is closed or unavailable")
+        future: concurrent.futures.Future[Any] = concurrent.futures.Future()
+        with self._lock:
+            self._inbox.append(Command(guild_id, name, args, [future]))
+            schedule = not self._dispatch_pending
+            self._dispatch_pending = True
+        if schedule:
+            loop.call_soon_threadsafe(self._dispatch)
+        return future
+
+    async def send(self, guild_id: int, name: str, /, **args: Any) -> Any:
+        """Submit a command and await its result from any event loop."""
+        return await asyncio.wrap_future(self.submit(guild_id, name, **args))
+
+    def _dispatch(self) -> None:
+        """Route the queued batch to the guild actors (bot loop)."""
+        with self._lock:
+            batch, self._inbox = self._inbox, []
+            self._dispatch_pending = False
+        for command in batch:
+            actor = self._actors.get(command.guild_id)
+            if actor is None:
+                actor = GuildActor(
+                    command.guild_id, self.handlers, self._actor_idle
+                )
+                self._actors[command.guild_id] = actor
+            actor.post(command)
+
+    def _actor_idle(self, actor: GuildActor) -> None:
+        if self._actors.get(actor.guild_id) is actor and not actor.mailbox:
+            del self._actors[actor.guild_id]
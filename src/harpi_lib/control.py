@@ -0,0 +1,279 @@
+"""The bot's control surface for the HTTP layer.
+
+``BotControl`` collects every operation the Quart blueprints need —
+status reads, queue pages, the guild directory, commands, scenes, add
+jobs and status streams — as coroutines that take and return plain,
+picklable data (dicts, tuples, frozen dataclasses), never live objects
+such as ``GuildConfig`` or voice clients.
+
+That makes the same surface usable in two deployments:
+
+* in-process (development): the Quart app and the bot share a process
+  and ``src.api.deps.get_client`` wraps ``HarpiAPI`` in a ``BotControl``
+  directly;
+* split (``HARPI_BOT_MODE=remote``): the bot runs in its own process
+  (``bot_host.py``), where ``rpc.RpcServer`` serves a ``BotControl``
+  over a Unix socket, and the Quart process talks to it through
+  ``rpc.RemoteControl``, which has the same methods.  HTTP handling and
+  response serialization then never compete with the bot's voice
+  threads for a GIL.
+
+Thread safety
+-------------
+Status reads follow the ``HarpiAPI`` contract (atomic field reads and
+queue snapshots), so they may run on any loop.  Work that must happen
+on the bot's event loop (connecting to voice, the snapshot that starts
+a status stream) goes through the ``on_bot_loop`` callable: in-process
+it is ``run_on_bot_loop``; in the bot host, where ``BotControl`` already
+runs on the bot loop, it simply awaits the coroutine.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable, Coroutine
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import discord
+
+from src.harpi_lib.guild_directory import GuildEntry, voice_client_of
+from src.harpi_lib.jobs import JobKind
+from src.harpi_lib.scenes import ScenePreset
+from src.harpi_lib.status_events import (
+    StatusEvent,
+    StatusSubscription,
+    layer_payload,
+    playback_payload,
+    queue_item_payload,
+    track_payload,
+)
+
+if TYPE_CHECKING:
+    from src.harpi_lib.api import GuildConfig, HarpiAPI
+    from src.harpi_lib.services.voice_connection import GuildResources
+
+_T = TypeVar("_T")
+OnBotLoop = Callable[[Coroutine[Any, Any, _T]], Awaitable[_T]]
+
+# Interval of the ``position`` tick on a status stream.
+POSITION_TICK_SECONDS = 2.0
+# Queue items included in a status; page through the rest with
+# ``queue_page``.
+STATUS_QUEUE_PREVIEW = 50
+DEFAULT_VOLUME = 0.5
+
+
+async def on_current_loop(coro: Coroutine[Any, Any, _T]) -> _T:
+    """``on_bot_loop`` for code that already runs on the bot loop."""
+    return await coro
+
+
+class BotControl:
+    """Coroutines the HTTP layer uses to read and drive the bot."""
+
+    def __init__(self, api: HarpiAPI, on_bot_loop: OnBotLoop) -> None:
+        self.api = api
+        self.on_bot_loop = on_bot_loop
+
+    # --- Status ---
+
+    def _voice_client(self, guild_id: int) -> discord.VoiceClient | None:
+        return voice_client_of(self.api.bot, guild_id)
+
+    def _playback(self, guild_id: int) -> dict[str, Any]:
+        return playback_payload(
+            self.api.get_guild_config(guild_id), self._voice_client(guild_id)
+        )
+
+    def _status(self, guild_id: int) -> tuple[int, dict[str, Any]] | None:
+        if not self.api.bot.get_guild(guild_id):
+            return None
+        guild_config = self.api.get_guild_config(guild_id)
+        if guild_config is None:
+            return 0, _empty_status(self._playback(guild_id))
+        # Read the version first: the state may only be newer than it.
+        version = guild_config.version
+        return version, _guild_status(guild_config, self._playback(guild_id))
+
+    async def status_tag(self, guild_id: int) -> tuple[int, dict[str, Any]]:
+        """The guild's state version and its playback fields.
+
+        Enough to tell whether a cached status is still current.
+        """
+        guild_config = self.api.get_guild_config(guild_id)
+        version = guild_config.version if guild_config else 0
+        return version, self._playback(guild_id)
+
+    async def status(self, guild_id: int) -> tuple[int, dict[str, Any]] | None:
+        """Full status (shaped like ``MusicStatusResponse``) and its version.
+
+        None if the bot is not in the guild.
+        """
+        return self._status(guild_id)
+
+    async def queue_page(
+        self, guild_id: int, offset: int, limit: int
+    ) -> tuple[list[dict[str, Any]], int]:
+        """A page of queue items and the length of the whole queue."""
+        guild_config = self.api.get_guild_config(guild_id)
+        queue = guild_config.queue if guild_config else None
+        if queue is None:
+            return [], 0
+        snapshot = queue.snapshot()
+        items = [
+            queue_item_payload(entry)
+            for entry in snapshot.entries(offset, limit)
+        ]
+        return items, len(snapshot)
+
+    async def open_status_stream(self, guild_id: int) -> StatusStream | None:
+        """Subscribe to a guild's status; None if the bot is not in it."""
+        hub = self.api.status_events
+        subscription = hub.subscribe(guild_id)
+        snapshot = await self.on_bot_loop(self._snapshot_for(subscription))
+        if snapshot is None:
+            hub.unsubscribe(subscription)
+            return None
+        return StatusStream(self, subscription, snapshot)
+
+    async def _snapshot_for(
+        self, subscription: StatusSubscription
+    ) -> dict[str, Any] | None:
+        """Take a status snapshot on the bot loop.
+
+        Mutations and their events also happen on the bot loop, so the
+        deltas drained here are exactly those the snapshot reflects.
+        """
+        subscription.drain()
+        subscription.resynced()
+        status = self._status(subscription.guild_id)
+        return status[1] if status else None
+
+    # --- Guilds ---
+
+    async def guilds(self) -> tuple[GuildEntry, ...]:
+        return self.api.directory.guilds()
+
+    async def guild(self, guild_id: int) -> GuildEntry | None:
+        return self.api.directory.get(guild_id)
+
+    async def current_channel(self, guild_id: int) -> int | None:
+        """The voice channel the bot plays in, if connected."""
+        guild_config = self.api.get_guild_config(guild_id)
+        if guild_config and guild_config.channel:
+            return guild_config.channel.id
+        return None
+
+    async def is_connected(self, guild_id: int) -> bool:
+        return self.api.get_guild_config(guild_id) is not None
+
+    async def connect_to_voice(self, guild_id: int, channel_id: int) -> None:
+        await self.on_bot_loop(self.api.connect_to_voice(guild_id, channel_id))
+
+    async def resources(self, guild_id: int) -> GuildResources | None:
+        return self.api.guild_resources(guild_id)
+
+    # --- Commands, jobs and scenes ---
+
+    async def send(self, guild_id: int, name: str, /, **args: Any) -> Any:
+        """Run a ``CommandBus`` command and return its result."""
+        return await self.api.commands.send(guild_id, name, **args)
+
+    async def submit_add_job(
+        self,
+        guild_id: int,
+        channel_id: int,
+        links: list[str],
+        kind: JobKind = "queue",
+    ) -> str:
+        """Start an add job and return its ID."""
+        return self.api.submit_add_job(guild_id, channel_id, links, kind).id
+
+    async def get_add_job(self, job_id: str) -> dict[str, Any] | None:
+        return self.api.get_add_job(job_id)
+
+    async def list_scenes(self, guild_id: int) -> list[ScenePreset]:
+        return self.api.list_scenes(guild_id)
+
+    async def delete_scene(self, guild_id: int, name: str) -> None:
+        self.api.delete_scene(guild_id, name)
+
+    async def effects(self, guild_id: int) -> list[dict[str, Any]]:
+        return self.api.effects_status(guild_id)
+
+    async def buses(self, guild_id: int) -> list[dict[str, Any]]:
+        return self.api.bus_status(guild_id)
+
+
+class StatusStream:
+    """A status snapshot followed by the deltas of one guild."""
+
+    def __init__(
+        self,
+        control: BotControl,
+        subscription: StatusSubscription,
+        snapshot: dict[str, Any],
+    ) -> None:
+        self.snapshot = snapshot
+        self._control = control
+        self._subscription = subscription
+
+    async def next(self) -> list[StatusEvent] | None:
+        """Wait for the next events; None once the guild is gone.
+
+        A subscriber that fell behind gets a new ``snapshot`` event, and
+        ``position`` ticks fill the gaps between changes.
+        """
+        subscription = self._subscription
+        events = await subscription.wait(POSITION_TICK_SECONDS)
+        if subscription.needs_resync:
+            fresh = await self._control.on_bot_loop(
+                self._control._snapshot_for(subscription)
+            )
+            return None if fresh is None else [StatusEvent("snapshot", fresh)]
+        if not events:
+            playback = self._control._playback(subscription.guild_id)
+            return [StatusEvent("position", playback)]
+        return events
+
+    def close(self) -> None:
+        self._control.api.status_events.unsubscribe(self._subscription)
+
+
+def _empty_status(playback: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "current_music": None,
+        **playback,
+        "queue": [],
+        "queue_length": 0,
+        "layers": [],
+        "queue_paused": False,
+        "loop_mode": "off",
+        "volume": DEFAULT_VOLUME,
+    }
+
+
+def _guild_status(
+    guild_config: GuildConfig, playback: dict[str, Any]
+) -> dict[str, Any]:
+    queue = guild_config.queue.snapshot() if guild_config.queue else None
+    background = guild_config.background or {}
+    return {
+        "current_music": track_payload(guild_config.current_music),
+        **playback,
+        "queue": [
+            queue_item_payload(entry)
+            for entry in (
+                queue.entries(0, STATUS_QUEUE_PREVIEW) if queue else ()
+            )
+        ],
+        "queue_length": len(queue) if queue else 0,
+        "layers": [
+            layer_payload(
+                layer_id, layer, guild_config.controller.is_paused(layer_id)
+            )
+            for layer_id, layer in list(background.items())
+        ],
+        "queue_paused": guild_config.controller.is_paused("queue"),
+        "loop_mode": guild_config.loop.name.lower(),
+        "volume": guild_config.volume,
+    }
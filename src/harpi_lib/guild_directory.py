@@ -0,0 +1,160 @@
+"""Directory of the guilds the bot is in and their voice channels.
+
+The directory is built from the bot's gateway cache (``bot.guilds``) when
+it becomes ready and is kept current by gateway events: guilds joined,
+left, updated or becoming (un)available, and voice channels created,
+changed or deleted.  It never calls the REST API, so every guild is
+listed, however many there are.
+
+Thread safety
+-------------
+Gateway events are handled on the bot's event loop, which is the only
+writer.  Each change builds a new immutable ``DirectorySnapshot`` and
+swaps it in with a single attribute assignment, so Quart handlers read
+``snapshot`` (or ``guilds`` / ``get``) without locks, blocking or
+cross-loop round-trips, and always see a complete snapshot.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import discord
+from discord.ext.commands import Bot
+
+
+@dataclass(frozen=True)
+class ChannelEntry:
+    """A voice channel of a guild."""
+
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class GuildEntry:
+    """A guild and its voice channels, in display order."""
+
+    id: int
+    name: str
+    icon: str
+    voice_channels: tuple[ChannelEntry, ...]
+
+    @classmethod
+    def from_guild(cls, guild: discord.Guild) -> GuildEntry:
+        return cls(
+            id=guild.id,
+            name=guild.name,
+            icon=str(guild.icon.url) if guild.icon else "",
+            voice_channels=tuple(
+                ChannelEntry(channel.id, channel.name)
+                for channel in guild.voice_channels
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class DirectorySnapshot:
+    """An immutable view of the directory."""
+
+    by_id: Mapping[int, GuildEntry]
+    # Sorted by name, for listings.
+    guilds: tuple[GuildEntry, ...]
+
+    @classmethod
+    def build(cls, entries: Iterable[GuildEntry]) -> DirectorySnapshot:
+        by_id = {entry.id: entry for entry in entries}
+        ordered = sorted(by_id.values(), key=lambda e: (e.name.lower(), e.id))
+        return cls(MappingProxyType(by_id), tuple(ordered))
+
+
+def voice_client_of(bot: Bot, guild_id: int) -> discord.VoiceClient | None:
+    """The bot's voice client in *guild_id*, if any."""
+    guild = bot.get_guild(guild_id)
+    if guild and guild.voice_client:
+        return guild.voice_client  # type: ignore[return-value]
+    return None
+
+
+class GuildDirectory:
+    """Guilds and voice channels, kept current by gateway events."""
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self.snapshot = DirectorySnapshot.build(())
+
+    def attach(self) -> None:
+        """Subscribe to the bot's gateway events."""
+        bot = self.bot
+        bot.add_listener(self._on_ready, "on_ready")
+        for event in ("on_guild_join", "on_guild_available"):
+            bot.add_listener(self._on_guild, event)
+        for event in ("on_guild_remove", "on_guild_unavailable"):
+            bot.add_listener(self._on_guild_gone, event)
+        bot.add_listener(self._on_guild_update, "on_guild_update")
+        for event in ("on_guild_channel_create", "on_guild_channel_delete"):
+            bot.add_listener(self._on_channel, event)
+        bot.add_listener(self._on_channel_update, "on_guild_channel_update")
+
+    # --- Readers (any thread) ---
+
+    def guilds(self) -> tuple[GuildEntry, ...]:
+        return self.snapshot.guilds
+
+    def get(self, guild_id: int) -> GuildEntry | None:
+        return self.snapshot.by_id.get(guild_id)
+
+    # --- Writers (bot loop) ---
+
+    def rebuild(self, guilds: Iterable[discord.Guild]) -> None:
+        """Replace the directory with *guilds*."""
+        self.snapshot = DirectorySnapshot.build(
+            GuildEntry.from_guild(guild) for guild in guilds
+        )
+
+    def upsert(self, guild: discord.Guild) -> None:
+        """Add *guild*, or refresh its name, icon and voice channels."""
+        entries = dict(self.snapshot.by_id)
+        entries[guild.id] = GuildEntry.from_guild(guild)
+        self.snapshot = DirectorySnapshot.build(entries.values())
+
+    def remove(self, guild_id: int) -> None:
+        if guild_id not in self.snapshot.by_id:
+            return
+        self.snapshot = DirectorySnapshot.build(
+            entry
+            for entry in self.snapshot.by_id.values()
+            if entry.id != guild_id
+        )
+
+    # --- Gateway listeners ---
+
+    async def _on_ready(self) -> None:
+        self.rebuild(self.bot.guilds)
+
+    async def _on_guild(self, guild: discord.Guild) -> None:
+        self.upsert(guild)
+
+    async def _on_guild_gone(self, guild: discord.Guild) -> None:
+        self.remove(guild.id)
+
+    async def _on_guild_update(
+        self, before: discord.Guild, after: discord.Guild
+    ) -> None:
+        self.upsert(after)
+
+    async def _on_channel(self, channel: discord.abc.GuildChannel) -> None:
+        if isinstance(channel, discord.VoiceChannel):
+            self.upsert(channel.guild)
+
+    async def _on_channel_update(
+        self,
+        before: discord.abc.GuildChannel,
+        after: discord.abc.GuildChannel,
+    ) -> None:
+        if isinstance(before, discord.VoiceChannel) or isinstance(
+            after, discord.VoiceChannel
+        ):
+            self.upsert(after.guild)
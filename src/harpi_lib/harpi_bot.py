@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from discord.ext import commands
@@ -10,3 +11,16 @@ class HarpiBot(commands.Bot):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self.api: HarpiAPI = HarpiAPI(self)
+
+    async def close(self) -> None:
+        """Disconnect, then release what the API holds for every guild."""
+        await super().close()
+        await asyncio.to_thread(self.api.close)
+
+
+class ShardedHarpiBot(HarpiBot, commands.AutoShardedBot):
+    """Harpi bot running several shards on one connection pool.
+
+    Pass ``shard_ids`` and ``shard_count`` to run a range of the shards
+    (see ``src.harpi_lib.shards``).
+    """
@@ -0,0 +1,150 @@
+"""Registry of asynchronous "add music" jobs.
+
+An add request (one or more links, for the queue or as layers) becomes
+an ``AddJob`` that moves through ``JobStage`` stages on the bot's event
+loop while the HTTP request that created it has already returned.
+Clients follow a job by polling ``/api/music/jobs/<job_id>`` or through
+the ``job`` event on the guild's status stream.
+
+Thread safety
+-------------
+Jobs are created from Quart handlers and advanced on the bot's event
+loop.  ``JobRegistry._lock`` guards the registry and every job field:
+jobs are only changed through ``JobRegistry.update`` and only read
+through ``JobRegistry.payload``, which copies the job under the lock.
+
+Finished jobs are kept for ``JOB_TTL_SECONDS`` so late pollers still
+see the outcome; at most ``MAX_JOBS`` are retained.
+"""
+
+from __future__ import annotations
+
+import enum
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from src.harpi_lib.status_events import StatusHub
+
+JOB_TTL_SECONDS = 600.0
+MAX_JOBS = 1_000
+
+JobKind = Literal["queue", "layer"]
+
+
+class JobStage(enum.Enum):
+    """Stages of an add job, in order."""
+
+    PENDING = "pending"
+    RESOLVE = "resolve"
+    ENQUEUE = "enqueue"
+    FIRST_FRAME = "first_frame"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class AddJob:
+    """Progress of one add request."""
+
+    id: str
+    guild_id: int
+    kind: JobKind
+    links: list[str]
+    stage: JobStage = JobStage.PENDING
+    # Links resolved so far (successfully or not) and the tracks found.
+    resolved: int = 0
+    tracks: int = 0
+    failed_links: list[str] = field(default_factory=list)
+    # Whether the first added track produced audio; None when it was only
+    # queued behind a playing track.
+    started: bool | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    # Seconds from creation until each stage was entered.
+    stage_times: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in (JobStage.DONE, JobStage.FAILED)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "guild_id": str(self.guild_id),
+            "kind": self.kind,
+            "links": list(self.links),
+            "stage": self.stage.value,
+            "resolved": self.resolved,
+            "tracks": self.tracks,
+            "failed_links": list(self.failed_links),
+            "started": self.started,
+            "error": self.error,
+            "stage_times": dict(self.stage_times),
+        }
+
+
+class JobRegistry:
+    """Create, advance and look up add jobs."""
+
+    def __init__(
+        self,
+        status_events: StatusHub | None = None,
+        ttl: float = JOB_TTL_SECONDS,
+        max_jobs: int = MAX_JOBS,
+    ) -> None:
+        self.status_events = status_events or StatusHub()
+        self._ttl = ttl
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: dict[str, AddJob] = {}
+
+    def create(self, guild_id: int, kind: JobKind, links: list[str]) -> AddJob:
+        job = AddJob(uuid.uuid4().hex, guild_id, kind, list(links))
+        with self._lock:
+            self._evict(job.created_at)
+            self._jobs[job.id] = job
+        return job
+
+    def payload(self, job_id: str) -> dict[str, Any] | None:
+        """A copy of the job's current state, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def update(
+        self, job: AddJob, stage: JobStage | None = None, **changes: Any
+    ) -> None:
+        """Apply *changes* (and a new *stage*), then publish the job."""
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            if stage is not None and stage is not job.stage:
+                job.stage = stage
+                now = time.monotonic()
+                job.stage_times[stage.value] = round(now - job.created_at, 3)
+                if job.finished:
+                    job.finished_at = now
+            data = job.to_dict()
+        self.status_events.publish(job.guild_id, "job", data)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired finished jobs, then the oldest beyond the cap."""
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None
+            and now - job.finished_at > self._ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        # Insertion order is creation order.
+        while len(self._jobs) >= self._max_jobs:
+            del self._jobs[next(iter(self._jobs))]
@@ -0,0 +1,111 @@
+"""NumPy rolling for dice groups too large to roll one die at a time.
+
+Only the first few dice of a large group are ever shown to the user, so
+only those are drawn individually.  The rest are drawn as per-face
+counts: a single multinomial draw when the die has fewer faces than
+there are dice, or one bulk array draw otherwise.  Totals and
+keep-highest/lowest selection then work on ``(face, count)`` pairs, so
+time and memory depend on the number of faces rather than on the
+number of dice.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True, slots=True)
+class BulkRoll:
+    """Result of a bulk roll.
+
+    ``shown`` holds the individually drawn leading dice and
+    ``kept_mask`` says which of them count towards ``total`` (``None``
+    when every die is kept).
+    """
+
+    total: int
+    shown: list[int]
+    kept_mask: list[bool] | None
+
+
+def roll_bulk(
+    rng: np.random.Generator,
+    count: int,
+    faces: tuple[int, int],
+    keep: tuple[str, int] | None,
+    shown_count: int,
+) -> BulkRoll:
+    """Roll *count* dice with inclusive *faces* range ``(low, high)``.
+
+    *keep* is ``(mode, n)`` for ``kh``/``kl`` groups.
+    """
+    low, high = faces
+    shown = rng.integers(
+        low, high, size=min(count, shown_count), endpoint=True
+    )
+    values, counts = _face_counts(rng, low, high, count - len(shown))
+    values, counts = _merge_counts(values, counts, shown)
+
+    if keep is None or keep[1] >= count:
+        return BulkRoll(int(np.dot(values, counts)), shown.tolist(), None)
+
+    mode, keep_count = keep
+    if mode == "kh":
+        values, counts = values[::-1], counts[::-1]
+    return _keep(values, counts, max(keep_count, 0), shown.tolist(), mode)
+
+
+def _face_counts(
+    rng: np.random.Generator, low: int, high: int, count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Draw *count* dice and return ascending faces with their counts."""
+    sides = high - low + 1
+    if sides <= count:
+        faces = np.arange(low, high + 1)
+        return faces, rng.multinomial(count, np.full(sides, 1 / sides))
+    draws = rng.integers(low, high, size=count, endpoint=True)
+    return np.unique(draws, return_counts=True)
+
+
+def _merge_counts(
+    values: np.ndarray, counts: np.ndarray, extra: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    merged, inverse = np.unique(
+        np.concatenate([values, extra]), return_inverse=True
+    )
+    weights = np.concatenate([counts, np.ones(len(extra), dtype=np.int64)])
+    merged_counts = np.bincount(inverse, weights=weights).astype(np.int64)
+    return merged, merged_counts
+
+
+def _keep(
+    values: np.ndarray,
+    counts: np.ndarray,
+    keep_count: int,
+    shown: list[int],
+    mode: str,
+) -> BulkRoll:
+    """Keep the first *keep_count* dice of the preference-ordered faces.
+
+    Dice showing the cut-off face are interchangeable, so the shown ones
+    are marked kept first.
+    """
+    cumulative = np.cumsum(counts)
+    cut = int(np.searchsorted(cumulative, keep_count))
+    before_cut = int(cumulative[cut - 1]) if cut else 0
+    threshold = int(values[cut])
+    threshold_quota = keep_count - before_cut
+    total = int(np.dot(values[:cut], counts[:cut])) + (
+        threshold * threshold_quota
+    )
+
+    kept_mask: list[bool] = []
+    for value in shown:
+        better = value > threshold if mode == "kh" else value < threshold
+        tied = value == threshold and threshold_quota > 0
+        if tied:
+            threshold_quota -= 1
+        kept_mask.append(better or tied)
+    return BulkRoll(total, shown, kept_mask)
@@ -0,0 +1,353 @@
+"""Exact probability distributions of compiled dice expressions.
+
+``DistributionEngine`` walks a ``CompiledExpression`` and combines the
+distribution of every sub-expression:
+
+* plain dice sums are powers of the single-die polynomial, computed by
+  repeated squaring with direct or FFT convolution;
+* keep-highest/lowest groups are enumerated with an order-statistics
+  dynamic program over face values;
+* ``+``/``-`` between integer distributions are convolutions, and every
+  other operator enumerates the (small) joint support of its operands.
+
+All dice groups in an expression are independent, so the results are
+exact.  When a support grows past the configured limits the engine
+falls back to a Monte Carlo estimate and marks the result as inexact.
+
+Expressions are checked against ``DiceLimits`` before any work, and
+every exact computation is sized from the dice count and sides before
+anything is allocated, so neither path grows with an unchecked input.
+The fallback draws as many samples as ``max_simulated_dice`` allows, up
+to ``FALLBACK_SAMPLES``.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from src.harpi_lib.math.expression import (
+    ChainNode,
+    CompiledExpression,
+    DiceNode,
+    GroupNode,
+    Node,
+    NumberNode,
+)
+from src.harpi_lib.math.monte_carlo import (
+    VECTOR_OPERATORS,
+    MonteCarloEngine,
+    narrow_integral,
+)
+from src.harpi_lib.math.parser import DiceLimits
+
+DISTRIBUTION_CACHE_SIZE = 256
+FALLBACK_SAMPLES = 1_000_000
+
+# Largest dense integer support kept in memory for a single distribution.
+MAX_DENSE_SUPPORT = 1 << 20
+# Largest joint support enumerated for non-additive operators.
+MAX_ENUMERATED_PAIRS = 1 << 20
+# Largest dice count handled by the keep-highest/lowest enumeration.
+MAX_ORDER_STATISTIC_DICE = 60
+# Largest (face, assigned, showing) loop of that enumeration: it grows
+# with sides x count², and each step is a row update.
+MAX_ORDER_STATISTIC_STEPS = 1 << 18
+# Below this many multiply-adds, direct convolution beats FFT.
+DIRECT_CONVOLUTION_LIMIT = 1 << 16
+# FFT round-off shows up as tiny (possibly negative) probabilities.
+FFT_NOISE_FLOOR = 1e-15
+
+
+class _NeedsSampling(Exception):
+    """Raised internally when an exact computation would be too large."""
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Distribution:
+    """Discrete distribution over sorted, distinct ``values``.
+
+    ``exact`` is ``False`` when the probabilities were estimated by
+    sampling instead of computed.
+    """
+
+    values: np.ndarray
+    probs: np.ndarray
+    exact: bool = True
+
+    @classmethod
+    def point(cls, value: int | float) -> Distribution:
+        return cls(np.array([value]), np.array([1.0]))
+
+    @classmethod
+    def from_dense(cls, offset: int, probs: np.ndarray) -> Distribution:
+        """Build from probabilities of consecutive integers from *offset*."""
+        support = np.flatnonzero(probs > 0)
+        return cls(offset + support, probs[support])
+
+    @property
+    def is_integral(self) -> bool:
+        return self.values.dtype.kind in "iu"
+
+    @property
+    def mean(self) -> float:
+        return float(np.dot(self.values, self.probs))
+
+    @property
+    def std_dev(self) -> float:
+        deviations = self.values - self.mean
+        variance = np.dot(self.probs, deviations * deviations)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    @property
+    def minimum(self) -> int | float:
+        return self.values[0].item()
+
+    @property
+    def maximum(self) -> int | float:
+        return self.values[-1].item()
+
+    def percentile(self, percent: float) -> int | float:
+        """Smallest value whose cumulative probability reaches *percent*."""
+        cumulative = np.cumsum(self.probs)
+        target = percent / 100 * cumulative[-1]
+        index = np.searchsorted(cumulative, target - 1e-12)
+        return self.values[min(index, len(self.values) - 1)].item()
+
+    def probability_at_least(self, threshold: float) -> float:
+        """P(X ≥ *threshold*)."""
+        return float(self.probs[self.values >= threshold].sum())
+
+    def negated(self) -> Distribution:
+        return Distribution(-self.values[::-1], self.probs[::-1], self.exact)
+
+    def dense(self) -> tuple[int, np.ndarray]:
+        """Return ``(offset, probs)`` over consecutive integers."""
+        offset = int(self.values[0])
+        width = int(self.values[-1]) - offset + 1
+        if width > MAX_DENSE_SUPPORT:
+            raise _NeedsSampling
+        probs = np.zeros(width)
+        probs[self.values - offset] = self.probs
+        return offset, probs
+
+
+def convolve(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Polynomial product of two probability vectors."""
+    if len(first) * len(second) <= DIRECT_CONVOLUTION_LIMIT:
+        return np.convolve(first, second)
+    size = len(first) + len(second) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    product = np.fft.irfft(
+        np.fft.rfft(first, fft_size) * np.fft.rfft(second, fft_size),
+        fft_size,
+    )[:size]
+    product[product < FFT_NOISE_FLOOR] = 0.0
+    return product
+
+
+def _convolution_power(probs: np.ndarray, exponent: int) -> np.ndarray:
+    """``probs`` convolved with itself *exponent* times (by squaring)."""
+    result = np.ones(1)
+    base = probs
+    while exponent:
+        if exponent & 1:
+            result = convolve(result, base)
+        exponent >>= 1
+        if exponent:
+            base = convolve(base, base)
+    return result
+
+
+def _shifted_add(
+    target: np.ndarray, source: np.ndarray, shift: int, weight: float
+) -> None:
+    """``target += weight * source`` moved *shift* slots to the right."""
+    if shift >= 0:
+        target[shift:] += weight * source[: len(source) - shift]
+    else:
+        target[:shift] += weight * source[-shift:]
+
+
+def keep_distribution(
+    count: int, faces: Sequence[int], keep_mode: str, keep_count: int
+) -> Distribution:
+    """Distribution of the kept-dice sum of *count* uniform dice.
+
+    Faces are visited from most to least preferred (descending for
+    ``kh``, ascending for ``kl``).  The state after each face is the
+    number of dice assigned so far and the sum of the kept ones; the
+    kept count is implied by the assigned count, so the table has
+    ``count + 1`` rows.
+
+    *faces* must be sorted ascending; a ``range`` is never expanded
+    unless the enumeration fits the limits.
+    """
+    if count > MAX_ORDER_STATISTIC_DICE:
+        raise _NeedsSampling
+    if len(faces) * (count + 1) ** 2 // 2 > MAX_ORDER_STATISTIC_STEPS:
+        raise _NeedsSampling
+    offset = min(0, keep_count * faces[0])
+    width = max(0, keep_count * faces[-1]) - offset + 1
+    if (count + 1) * width > MAX_DENSE_SUPPORT:
+        raise _NeedsSampling
+    ordered = sorted(faces, reverse=keep_mode == "kh")
+    face_probability = 1 / len(faces)
+
+    table = np.zeros((count + 1, width))
+    table[0, -offset] = 1.0
+    for face in ordered:
+        next_table = np.zeros_like(table)
+        for assigned in range(count + 1):
+            row = table[assigned]
+            if not row.any():
+                continue
+            kept_so_far = min(assigned, keep_count)
+            for showing in range(count - assigned + 1):
+                kept_now = min(showing, keep_count - kept_so_far)
+                weight = (
+                    math.comb(count - assigned, showing)
+                    * face_probability**showing
+                )
+                _shifted_add(
+                    next_table[assigned + showing],
+                    row,
+                    kept_now * face,
+                    weight,
+                )
+        table = next_table
+    return Distribution.from_dense(offset, table[count])
+
+
+class DistributionEngine:
+    """Compute (and cache) the distribution of compiled expressions.
+
+    *limits* default to the sampler's, so both paths share one bound.
+    """
+
+    def __init__(
+        self,
+        sampler: MonteCarloEngine | None = None,
+        limits: DiceLimits | None = None,
+    ) -> None:
+        self.sampler = sampler or MonteCarloEngine(limits=limits)
+        self.limits = limits or self.sampler.limits
+        self.distribution = lru_cache(maxsize=DISTRIBUTION_CACHE_SIZE)(
+            self._distribution
+        )
+
+    def _distribution(self, compiled: CompiledExpression) -> Distribution:
+        if compiled.root is None:
+            return Distribution.point(0)
+        self.limits.check(compiled)
+        try:
+            return self._of(compiled.root)
+        except _NeedsSampling:
+            return self._sampled(compiled)
+
+    def _sampled(self, compiled: CompiledExpression) -> Distribution:
+        # Fewer samples for heavy expressions; ``simulate`` still raises
+        # if a single sample is over the sampler's limits.
+        dice_per_sample = max(1, sum(dice.count for dice in compiled.dice))
+        samples = min(
+            FALLBACK_SAMPLES,
+            max(1, self.limits.max_simulated_dice // dice_per_sample),
+        )
+        stats = self.sampler.simulate(compiled, samples)
+        return Distribution(
+            stats.values, stats.counts / stats.iterations, exact=False
+        )
+
+    def _of(self, node: Node) -> Distribution:
+        match node:
+            case NumberNode(value=value):
+                return Distribution.point(value)
+            case DiceNode():
+                return self._dice(node)
+            case GroupNode(inner=inner):
+                return self._of(inner)
+            case ChainNode():
+                operands = [self._of(operand) for operand in node.operands]
+                return self._fold_chain(node, operands)
+
+    def _fold_chain(
+        self, node: ChainNode, operands: list[Distribution]
+    ) -> Distribution:
+        ops = [op for op, _ in node.rest]
+        if node.right_assoc:
+            result = operands[-1]
+            for op, left in zip(
+                reversed(ops), reversed(operands[:-1]), strict=True
+            ):
+                result = self._combine(op, left, result)
+            return result
+        result = operands[0]
+        for op, right in zip(ops, operands[1:], strict=True):
+            result = self._combine(op, result, right)
+        return result
+
+    def _combine(
+        self, op: str, left: Distribution, right: Distribution
+    ) -> Distribution:
+        if op in ("+", "-") and left.is_integral and right.is_integral:
+            if op == "-":
+                right = right.negated()
+            return _add(left, right)
+        if op in ("/", "//", "%") and 0 in right.values:
+            raise ZeroDivisionError("division by zero")
+        return _enumerate(VECTOR_OPERATORS[op], left, right)
+
+    @staticmethod
+    def _dice(dice: DiceNode) -> Distribution:
+        faces: Sequence[int]
+        if dice.sides is None:
+            faces = [-1, 0, 1]
+        elif dice.sides <= 0:
+            raise ValueError("Invalid dice specification")
+        else:
+            # A range, so huge dice are rejected below before allocating.
+            faces = range(1, dice.sides + 1)
+
+        keep_count = dice.keep_count
+        if dice.keep_mode and keep_count is not None:
+            if keep_count <= 0:
+                return Distribution.point(0)
+            if keep_count < dice.count:
+                return keep_distribution(
+                    dice.count, faces, dice.keep_mode, keep_count
+                )
+
+        if (len(faces) - 1) * dice.count + 1 > MAX_DENSE_SUPPORT:
+            raise _NeedsSampling
+        die = np.full(len(faces), 1 / len(faces))
+        return Distribution.from_dense(
+            faces[0] * dice.count, _convolution_power(die, dice.count)
+        )
+
+
+def _add(left: Distribution, right: Distribution) -> Distribution:
+    left_offset, left_probs = left.dense()
+    right_offset, right_probs = right.dense()
+    return Distribution.from_dense(
+        left_offset + right_offset, convolve(left_probs, right_probs)
+    )
+
+
+def _enumerate(
+    op: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    left: Distribution,
+    right: Distribution,
+) -> Distribution:
+    """Apply *op* to every pair of outcomes and merge equal results."""
+    if len(left.values) * len(right.values) > MAX_ENUMERATED_PAIRS:
+        raise _NeedsSampling
+    outcomes = narrow_integral(
+        op(left.values[:, None], right.values[None, :]).ravel()
+    )
+    weights = np.outer(left.probs, right.probs).ravel()
+    values, inverse = np.unique(outcomes, return_inverse=True)
+    return Distribution(values, np.bincount(inverse, weights=weights))
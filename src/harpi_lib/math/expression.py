@@ -0,0 +1,129 @@
+"""Compiled dice expression tree.
+
+``DiceParser.compile`` turns expression text into an immutable tree of
+the nodes below.  Every node records the ``Span`` of source text it was
+parsed from, so results can be mapped back onto the original string
+without searching it again.
+
+Compiled expressions hold no roll state: they are cached by expression
+text and shared between every evaluation of that text.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Span:
+    """Half-open ``[start, end)`` character range in the source text."""
+
+    start: int
+    end: int
+
+
+@dataclass(frozen=True, slots=True)
+class NumberNode:
+    """Numeric literal (or an implicit ``0`` for a missing operand)."""
+
+    value: int | float
+    text: str
+    span: Span
+
+
+@dataclass(frozen=True, slots=True)
+class DiceNode:
+    """Dice group such as ``2d6``, ``4d6kh3`` or ``4dF``.
+
+    ``sides`` is ``None`` for fudge dice.
+    """
+
+    count: int
+    sides: int | None
+    keep_mode: str | None
+    keep_count: int | None
+    notation: str
+    span: Span
+
+    @property
+    def is_fudge(self) -> bool:
+        """Whether each die rolls -1, 0 or +1."""
+        return self.sides is None
+
+
+@dataclass(frozen=True, slots=True)
+class GroupNode:
+    """Parenthesized sub-expression."""
+
+    inner: Node
+    span: Span
+
+
+@dataclass(frozen=True, slots=True)
+class ChainNode:
+    """Operands joined by operators of the same precedence level.
+
+    ``rest`` pairs each operator with its right-hand operand.  Chains
+    are folded left to right unless ``right_assoc`` is set (``^``).
+    Keeping the chain flat lets long sums evaluate iteratively instead
+    of recursing once per term.
+    """
+
+    first: Node
+    rest: tuple[tuple[str, Node], ...]
+    right_assoc: bool
+    span: Span
+
+    @property
+    def operands(self) -> list[Node]:
+        """All operands in source order."""
+        return [self.first, *(operand for _, operand in self.rest)]
+
+
+Node = NumberNode | DiceNode | GroupNode | ChainNode
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledExpression:
+    """Parsed dice expression ready for repeated evaluation.
+
+    ``dice`` lists the dice groups in evaluation (and source) order, so
+    the n-th roll of any evaluation belongs to ``dice[n]``.
+    """
+
+    source: str
+    root: Node | None
+    dice: tuple[DiceNode, ...]
+    expression: str
+
+
+def iter_dice(node: Node) -> Iterator[DiceNode]:
+    """Yield every dice group under *node* in source order."""
+    match node:
+        case DiceNode():
+            yield node
+        case GroupNode(inner=inner):
+            yield from iter_dice(inner)
+        case ChainNode():
+            for operand in node.operands:
+                yield from iter_dice(operand)
+        case NumberNode():
+            return
+
+
+def render(node: Node) -> str:
+    """Render *node* in the canonical ``a + b`` display form."""
+    match node:
+        case NumberNode(text=text):
+            return text
+        case DiceNode(notation=notation):
+            return notation
+        case GroupNode(inner=inner):
+            return f"({render(inner)})"
+        case ChainNode(first=first, rest=rest):
+            parts = [render(first)]
+            for op, operand in rest:
+                parts.append(op)
+                parts.append(render(operand))
+            return " ".join(parts)
@@ -0,0 +1,284 @@
+"""Vectorized Monte Carlo sampling of compiled dice expressions.
+
+``MonteCarloEngine`` evaluates a ``CompiledExpression`` for a whole batch
+of samples at once: every dice group becomes a ``(samples, count)``
+array drawn from a ``numpy.random.Generator`` and operators act on whole
+columns.  Samples are produced in batches sized to a fixed cell budget,
+so memory stays bounded however many iterations are requested, and each
+batch is folded into a value histogram from which all statistics are
+derived exactly.
+
+Before sampling, an expression is checked against ``DiceLimits``: its
+dice and sides, one sample's dice against the cell budget (so a single
+batch never exceeds it), and iterations x dice per sample against
+``max_simulated_dice``, which bounds the time of a whole simulation.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.harpi_lib.math.expression import (
+    ChainNode,
+    CompiledExpression,
+    DiceNode,
+    GroupNode,
+    Node,
+    NumberNode,
+)
+from src.harpi_lib.math.parser import DiceLimits
+
+# Upper bound on dice drawn per batch (int64 cells, ~32 MB).
+BATCH_CELL_BUDGET = 1 << 22
+
+_EXACT_FLOAT_LIMIT = 2**53
+
+
+def _checked_divisor(divisor: np.ndarray) -> np.ndarray:
+    if np.any(divisor == 0):
+        raise ZeroDivisionError("division by zero")
+    return divisor
+
+
+def _power(base: np.ndarray, exponent: np.ndarray) -> np.ndarray:
+    # Float math mirrors Python for negative exponents and avoids int64
+    # overflow; integral results are narrowed back by ``narrow_integral``.
+    return np.power(base.astype(np.float64), exponent)
+
+
+VECTOR_OPERATORS: dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": lambda a, b: np.true_divide(a, _checked_divisor(b)),
+    "//": lambda a, b: np.floor_divide(a, _checked_divisor(b)),
+    "%": lambda a, b: np.mod(a, _checked_divisor(b)),
+    "^": _power,
+}
+
+
+def narrow_integral(values: np.ndarray) -> np.ndarray:
+    """Return integral float samples as int64 so results display as ints."""
+    if values.dtype.kind != "f" or not np.all(np.isfinite(values)):
+        return values
+    if np.all(values == np.round(values)) and np.all(
+        np.abs(values) < _EXACT_FLOAT_LIMIT
+    ):
+        return values.astype(np.int64)
+    return values
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationStats:
+    """Summary of a simulation, derived from its value histogram.
+
+    ``values`` is sorted ascending and ``counts[i]`` is how many samples
+    produced ``values[i]``.
+    """
+
+    iterations: int
+    values: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def mean(self) -> float:
+        return float(np.dot(self.values, self.counts) / self.iterations)
+
+    @property
+    def std_dev(self) -> float:
+        """Sample standard deviation (``statistics.stdev`` semantics)."""
+        if self.iterations < 2:
+            return 0.0
+        deviations = self.values - self.mean
+        variance = np.dot(self.counts, deviations * deviations)
+        return float(np.sqrt(variance / (self.iterations - 1)))
+
+    @property
+    def median(self) -> float:
+        cumulative = np.cumsum(self.counts)
+        lower, upper = np.searchsorted(
+            cumulative,
+            [(self.iterations - 1) // 2 + 1, self.iterations // 2 + 1],
+        )
+        return float((self.values[lower] + self.values[upper]) / 2)
+
+    @property
+    def minimum(self) -> int | float:
+        return self.values[0].item()
+
+    @property
+    def maximum(self) -> int | float:
+        return self.values[-1].item()
+
+    def top_results(self, limit: int) -> list[tuple[int | float, int]]:
+        """Most frequent values with their counts, most common first."""
+        order = np.argsort(-self.counts, kind="stable")[:limit]
+        return [(self.values[i].item(), int(self.counts[i])) for i in order]
+
+
+class _Histogram:
+    """Streaming value histogram merged batch by batch."""
+
+    def __init__(self) -> None:
+        self._values = np.empty(0)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._total = 0
+
+    def add(self, samples: np.ndarray) -> None:
+        values, counts = np.unique(samples, return_counts=True)
+        self._total += len(samples)
+        if not len(self._values):
+            self._values, self._counts = values, counts.astype(np.int64)
+            return
+        merged, inverse = np.unique(
+            np.concatenate([self._values, values]), return_inverse=True
+        )
+        self._counts = np.bincount(
+            inverse,
+            weights=np.concatenate([self._counts, counts]),
+            minlength=len(merged),
+        ).astype(np.int64)
+        self._values = merged
+
+    def stats(self) -> SimulationStats:
+        return SimulationStats(self._total, self._values, self._counts)
+
+
+class MonteCarloEngine:
+    """Sample compiled dice expressions in vectorized batches."""
+
+    def __init__(
+        self,
+        rng: np.random.Generator | None = None,
+        cell_budget: int = BATCH_CELL_BUDGET,
+        limits: DiceLimits | None = None,
+    ) -> None:
+        self.rng = rng or np.random.default_rng()
+        self.cell_budget = cell_budget
+        self.limits = limits or DiceLimits()
+
+    def check(self, compiled: CompiledExpression, iterations: int) -> None:
+        """Raise ValueError unless simulating *compiled* stays bounded."""
+        if iterations <= 0:
+            raise ValueError("iterations must be positive")
+        self.limits.check(compiled)
+        dice_per_sample = sum(dice.count for dice in compiled.dice)
+        if dice_per_sample > self.cell_budget:
+            raise ValueError(
+                f"Too many dice per sample: {dice_per_sample:,} "
+                f"(max {self.cell_budget:,})"
+            )
+        total = iterations * dice_per_sample
+        if total > self.limits.max_simulated_dice:
+            raise ValueError(
+                f"Simulation too large: {total:,} dice "
+                f"(max {self.limits.max_simulated_dice:,})"
+            )
+
+    def simulate(
+        self, compiled: CompiledExpression, iterations: int
+    ) -> SimulationStats:
+        """Run *iterations* samples and summarize them."""
+        self.check(compiled, iterations)
+        histogram = _Histogram()
+        for batch in self._batches(compiled, iterations):
+            histogram.add(batch)
+        return histogram.stats()
+
+    def iter_batches(
+        self, compiled: CompiledExpression, iterations: int
+    ) -> Iterator[np.ndarray]:
+        """Yield sample arrays whose lengths add up to *iterations*.
+
+        Raises ValueError, before any sampling, if the simulation is
+        over the limits (see ``check``).
+        """
+        self.check(compiled, iterations)
+        return self._batches(compiled, iterations)
+
+    def _batches(
+        self, compiled: CompiledExpression, iterations: int
+    ) -> Iterator[np.ndarray]:
+        batch_size = self.batch_size(compiled)
+        remaining = iterations
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            yield self.sample(compiled, size)
+            remaining -= size
+
+    def batch_size(self, compiled: CompiledExpression) -> int:
+        """Samples per batch so that drawn dice stay within the budget."""
+        dice_per_sample = sum(dice.count for dice in compiled.dice)
+        return max(1, self.cell_budget // max(1, dice_per_sample))
+
+    def sample(self, compiled: CompiledExpression, size: int) -> np.ndarray:
+        """Evaluate *compiled* for *size* independent samples."""
+        if compiled.root is None:
+            return np.zeros(size, dtype=np.int64)
+        return narrow_integral(self._evaluate(compiled.root, size))
+
+    def _evaluate(self, node: Node, size: int) -> np.ndarray:
+        match node:
+            case NumberNode(value=value):
+                return np.full(size, value)
+            case DiceNode():
+                return self._roll(node, size)
+            case GroupNode(inner=inner):
+                return self._evaluate(inner, size)
+            case ChainNode():
+                values = [
+                    self._evaluate(operand, size) for operand in node.operands
+                ]
+                return self._fold_chain(node, values)
+
+    @staticmethod
+    def _fold_chain(node: ChainNode, values: list[np.ndarray]) -> np.ndarray:
+        ops = [op for op, _ in node.rest]
+        if node.right_assoc:
+            result = values[-1]
+            for op, left in zip(
+                reversed(ops), reversed(values[:-1]), strict=True
+            ):
+                result = VECTOR_OPERATORS[op](left, result)
+            return result
+        result = values[0]
+        for op, right in zip(ops, values[1:], strict=True):
+            result = VECTOR_OPERATORS[op](result, right)
+        return result
+
+    def _roll(self, dice: DiceNode, size: int) -> np.ndarray:
+        """Roll one dice group for every sample and total the kept dice."""
+        if dice.sides is None:
+            low, high = -1, 1
+        elif dice.sides <= 0:
+            raise ValueError("Invalid dice specification")
+        else:
+            low, high = 1, dice.sides
+
+        rolls = self.rng.integers(
+            low, high, size=(size, dice.count), endpoint=True
+        )
+        return keep_sum(rolls, dice.keep_mode, dice.keep_count)
+
+
+def keep_sum(
+    rolls: np.ndarray, keep_mode: str | None, keep_count: int | None
+) -> np.ndarray:
+    """Sum each row of *rolls*, keeping only the highest/lowest dice.
+
+    Uses ``np.partition`` along the last axis, which is linear per row
+    instead of a full sort.
+    """
+    count = rolls.shape[-1]
+    if keep_mode is None or keep_count is None or keep_count >= count:
+        return rolls.sum(axis=-1)
+    if keep_count <= 0:
+        return np.zeros(rolls.shape[:-1], dtype=rolls.dtype)
+    if keep_mode == "kh":
+        split = count - keep_count
+        return np.partition(rolls, split, axis=-1)[..., split:].sum(axis=-1)
+    split = keep_count - 1
+    return np.partition(rolls, split, axis=-1)[..., :keep_count].sum(axis=-1)
@@ -7,6 +7,15 @@ Supported notation
 * Fudge/Fate dice: ``4dF`` (each die is -1, 0, or +1)
 * Repeat operator: ``3#d20+5`` (roll ``d20+5`` three times independently)
 * Arithmetic: ``+``, ``-``, ``*``, ``/``, ``//``, ``%``, ``^``, ``()``
+
+Dice groups larger than ``DiceLimits.bulk_threshold`` are rolled with
+NumPy (see ``bulk_roll``) and only their first dice are displayed.
+``DiceLimits`` also caps how many dice and repetitions one roll may ask
+for, which bounds the time spent on any single chat message.
+
+Evaluation happens in two steps: ``compile`` parses the text once into
+an immutable ``CompiledExpression`` (cached per expression text), and
+``evaluate`` rolls it.  Both steps are linear in the expression size.
 """
 
 from typing import Callable
@@ -15,20 +24,249 @@ import operator
 import random
 import re
 from collections import namedtuple
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from src.harpi_lib.math.bulk_roll import roll_bulk
+
+from src.harpi_lib.math.expression import (
+    ChainNode,
+    CompiledExpression,
+    DiceNode,
+    GroupNode,
+    Node,
+    NumberNode,
+    Span,
+    iter_dice,
+    render,
+)
 
 # ``rolls`` is a list of ``(individual_values, notation, kept_mask | None)``
 # tuples.  ``kept_mask`` is a list[bool] the same length as
 # ``individual_values`` indicating which dice were kept (for kh/kl);
-# ``None`` means all dice were kept.
+# ``None`` means all dice were kept.  For bulk-rolled groups
+# ``individual_values`` only holds the first (displayed) dice.
 RollResult = namedtuple("RollResult", ["value", "rolls", "expression"])
 
 _FUDGE_SYMBOLS = {-1: "-", 0: "\u2007", 1: "+"}
 
+COMPILE_CACHE_SIZE = 1024
+
+# Dice pattern: NdX, NdXkhY, NdXklY, NdF
+# Groups: (count, sides_or_F, optional_keep_mode, optional_keep_count)
+DICE_PATTERN = re.compile(r"(\d+)d([fF]|\d+)(?:(kh|kl)(\d+))?$")
+TOKEN_PATTERN = re.compile(
+    r"(\d+d(?:[fF]|\d+)(?:(?:kh|kl)\d+)?|\d+\.\d+|\d+|\/\/|[\+\-\*\/\(\)\^\%])"
+)
+REPEAT_PATTERN = re.compile(r"(\d+)#(.+)$")
+BARE_DICE_PATTERN = re.compile(r"\bd(\d+|[fF])")
+# Necessary condition for ``is_valid_dice_string``, checked in one pass:
+# only dice-grammar characters (after an optional ``N#``) and at least one
+# ``dX``/``dF``.  Ordinary chat fails at its first letter outside
+# ``dfFkhl``, so most messages never reach the tokenizer.
+DICE_CANDIDATE_PATTERN = re.compile(
+    r"\s*(?:\d+#)?(?=[\d dfFkhl.()+\-*/%^]*\s*\Z)(?s:.*?)d[\dfF]"
+)
+_SIDES_PATTERN = re.compile(r"d(\d+)")
+_OPERATOR_PATTERN = re.compile(r"\*\*|//|[+\-*/%^]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass(frozen=True, slots=True)
+class DiceLimits:
+    """Hard limits on the work a single roll may trigger."""
+
+    max_dice: int = 10_000_000
+    max_sides: int = 1_000_000_000
+    max_repeat: int = 100
+    bulk_threshold: int = 1_000
+    displayed_rolls: int = 20
+    # Dice drawn by one simulation: iterations x dice per sample.
+    max_simulated_dice: int = 100_000_000
+    # Size of any intermediate integer; bounds ``^`` before it runs.
+    max_result_bits: int = 4096
+
+    def check_result(self, value: int | float) -> None:
+        """Reject an integer result larger than ``max_result_bits``."""
+        if (
+            isinstance(value, int)
+            and value.bit_length() > self.max_result_bits
+        ):
+            raise ValueError(
+                f"Result too large: over {self.max_result_bits:,} bits"
+            )
+
+    def check_power(self, base: int | float, exponent: int | float) -> None:
+        """Reject ``base ^ exponent`` before computing it if too large."""
+        if not (isinstance(base, int) and isinstance(exponent, int)):
+            return
+        if exponent <= 0 or abs(base) <= 1:
+            return
+        # bit_length(base ** e) > (bit_length(base) - 1) * e
+        if (abs(base).bit_length() - 1) * exponent >= self.max_result_bits:
+            raise ValueError(
+                f"Result too large: over {self.max_result_bits:,} bits"
+            )
+
+    def check(
+        self, compiled: CompiledExpression, repetitions: int = 1
+    ) -> None:
+        """Reject expressions with too many dice or sides, before rolling."""
+        total_dice = sum(dice.count for dice in compiled.dice) * repetitions
+        if total_dice > self.max_dice:
+            raise ValueError(
+                f"Too many dice: {total_dice:,} (max {self.max_dice:,})"
+            )
+        for dice in compiled.dice:
+            if dice.sides is not None and dice.sides > self.max_sides:
+                raise ValueError(
+                    f"Too many sides: {dice.sides:,} (max {self.max_sides:,})"
+                )
+
+
+_ADDITIVE_OPERATORS = frozenset({"+", "-"})
+_MULTIPLICATIVE_OPERATORS = frozenset({"*", "/", "//", "%"})
+_POWER_OPERATORS = frozenset({"^"})
+
+
+class _ExpressionCompiler:
+    """Single-use recursive descent compiler for one expression.
+
+    Tokens are consumed through an index cursor, so parsing is linear in
+    the number of tokens.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self._source = expression
+        self._tokens = [
+            (match.group(0), Span(match.start(), match.end()))
+            for match in TOKEN_PATTERN.finditer(expression)
+        ]
+        self._pos = 0
+
+    def compile(self) -> CompiledExpression:
+        """Parse the whole token list into a ``CompiledExpression``."""
+        if not self._tokens:
+            return CompiledExpression(self._source, None, (), "")
+        root = self._parse_addition()
+        return CompiledExpression(
+            source=self._source,
+            root=root,
+            dice=tuple(iter_dice(root)),
+            expression=render(root),
+        )
+
+    def _peek(self) -> str | None:
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos][0]
+        return None
+
+    def _advance(self) -> tuple[str, Span]:
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _end_of_input(self) -> Span:
+        """Empty span right after the last consumed token."""
+        position = self._tokens[self._pos - 1][1].end if self._pos else 0
+        return Span(position, position)
+
+    def _parse_chain(
+        self,
+        operators: frozenset[str],
+        parse_operand: Callable[[], Node],
+    ) -> Node:
+        """Parse ``operand (op operand)*`` for one precedence level."""
+        first = parse_operand()
+        rest: list[tuple[str, Node]] = []
+        while self._peek() in operators:
+            op, _ = self._advance()
+            rest.append((op, parse_operand()))
+        if not rest:
+            return first
+        return ChainNode(
+            first=first,
+            rest=tuple(rest),
+            right_assoc=operators is _POWER_OPERATORS,
+            span=Span(first.span.start, rest[-1][1].span.end),
+        )
+
+    def _parse_addition(self) -> Node:
+        """Parse addition and subtraction."""
+        return self._parse_chain(
+            _ADDITIVE_OPERATORS, self._parse_multiplication
+        )
+
+    def _parse_multiplication(self) -> Node:
+        """Parse multiplication, division, and modulo."""
+        return self._parse_chain(
+            _MULTIPLICATIVE_OPERATORS, self._parse_exponentiation
+        )
+
+    def _parse_exponentiation(self) -> Node:
+        """Parse exponentiation (right-associative)."""
+        return self._parse_chain(_POWER_OPERATORS, self._parse_primary)
+
+    def _parse_primary(self) -> Node:
+        """Parse primary expressions (numbers, dice rolls, parentheses)."""
+        if self._peek() is None:
+            return NumberNode(0, "", self._end_of_input())
+
+        token, span = self._advance()
+
+        # Parenthesized sub-expression
+        if token == "(":
+            inner = self._parse_addition()
+            if self._peek() != ")":
+                raise ValueError("Mismatched parentheses")
+            _, closing = self._advance()
+            return GroupNode(inner, Span(span.start, closing.end))
+
+        # Dice roll
+        dice_match = DICE_PATTERN.match(token)
+        if dice_match:
+            return self._dice_node(dice_match, span)
+
+        # Number literal
+        try:
+            value = float(token)
+            if value.is_integer():
+                value = int(value)
+            return NumberNode(value, str(value), span)
+        except ValueError as e:
+            raise ValueError(f"Unexpected token: {token}") from e
+
+    @staticmethod
+    def _dice_node(dice_match: re.Match[str], span: Span) -> DiceNode:
+        count_str, sides_str, keep_mode, keep_count_str = dice_match.groups()
+        return DiceNode(
+            count=int(count_str),
+            sides=None if sides_str.upper() == "F" else int(sides_str),
+            keep_mode=keep_mode,
+            keep_count=int(keep_count_str) if keep_count_str else None,
+            notation=dice_match.group(0),
+            span=span,
+        )
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Compile *expression*, reusing the cached tree for repeated text."""
+    return _ExpressionCompiler(expression).compile()
+
 
 class DiceParser:
     """Recursive descent parser for dice notation expressions (e.g. '2d6+3')."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        limits: DiceLimits | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> None:
+        self.limits = limits or DiceLimits()
+        self.rng = rng or np.random.default_rng()
         self.operators: dict[
             str, Callable[[int | float, int | float], int | float]
         ] = {
@@ -41,21 +279,20 @@ class DiceParser:
             "^": operator.pow,
         }
 
-        # Dice pattern: NdX, NdXkhY, NdXklY, NdF
-        # Groups: (count, sides_or_F, optional_keep_mode, optional_keep_count)
-        self.dice_pattern = re.compile(r"(\d+)d([fF]|\d+)(?:(kh|kl)(\d+))?$")
-        self.token_pattern = re.compile(
-            r"(\d+d(?:[fF]|\d+)(?:(?:kh|kl)\d+)?|\d+\.\d+|\d+|\/\/|[\+\-\*\/\(\)\^\%])"
-        )
+        self.dice_pattern = DICE_PATTERN
+        self.token_pattern = TOKEN_PATTERN
 
     def tokenize(self, expression: str) -> list[str]:
         """Convert the expression string into tokens."""
         return self.token_pattern.findall(expression)
 
+    def compile(self, expression: str) -> CompiledExpression:
+        """Parse *expression* into a reusable, cached expression tree."""
+        return compile_expression(expression)
+
     def parse(self, expression: str) -> RollResult:
         """Parse and evaluate a dice expression (single evaluation)."""
-        tokens = self.tokenize(expression)
-        return self._evaluate_expression(tokens)
+        return self.evaluate(self.compile(expression))
 
     def is_valid_dice_string(self, expression: str) -> bool:
         """Check if the string is a valid dice expression.
@@ -68,19 +305,23 @@ class DiceParser:
 
         Pure arithmetic (``2+3``) returns ``False`` so the bot does not
         auto-reply to every number in chat.
+
+        This runs on every chat message, so ``DICE_CANDIDATE_PATTERN``
+        rejects non-dice text before any normalization or tokenizing.
         """
-        if not expression or not expression.strip():
+        if not DICE_CANDIDATE_PATTERN.match(expression):
             return False
+        return self._matches_dice_grammar(expression.strip())
 
-        expr = expression.strip()
-
+    def _matches_dice_grammar(self, expr: str) -> bool:
+        """Full check of a stripped candidate against the tokenizer."""
         # Strip optional N# repeat prefix
-        repeat_match = re.match(r"(\d+)#(.+)$", expr)
+        repeat_match = REPEAT_PATTERN.match(expr)
         if repeat_match:
             expr = repeat_match.group(2)
 
         # Normalize bare dX / dF → 1dX / 1dF so the tokenizer picks them up
-        expr = re.sub(r"\bd(\d+|[fF])", r"1d\1", expr)
+        expr = BARE_DICE_PATTERN.sub(r"1d\1", expr)
 
         # Tokenize and verify the tokens fully reconstruct the expression
         # (i.e. no unrecognized characters were silently skipped).
@@ -95,122 +336,116 @@ class DiceParser:
         return any(self.dice_pattern.match(t) for t in tokens)
 
     # ------------------------------------------------------------------
-    # Recursive descent parser
+    # Evaluation
     # ------------------------------------------------------------------
 
-    def _evaluate_expression(self, tokens: list[str]) -> RollResult:
-        """Evaluate the expression using recursive descent parsing."""
-        if not tokens:
-            return RollResult(0, [], "")
-        return self._parse_addition(tokens)
-
-    def _parse_addition(self, tokens: list[str]) -> RollResult:
-        """Parse addition and subtraction."""
-        left = self._parse_multiplication(tokens)
-
-        while tokens and tokens[0] in ("+", "-"):
-            op = tokens.pop(0)
-            right = self._parse_multiplication(tokens)
-
-            result = self.operators[op](left.value, right.value)
-            combined_rolls = left.rolls + right.rolls
-            combined_expression = f"{left.expression} {op} {right.expression}"
-            left = RollResult(result, combined_rolls, combined_expression)
-
-        return left
-
-    def _parse_multiplication(self, tokens: list[str]) -> RollResult:
-        """Parse multiplication, division, and modulo."""
-        left = self._parse_exponentiation(tokens)
-
-        while tokens and tokens[0] in ("*", "/", "//", "%"):
-            op = tokens.pop(0)
-            right = self._parse_exponentiation(tokens)
-
-            result = self.operators[op](left.value, right.value)
-            combined_rolls = left.rolls + right.rolls
-            combined_expression = f"{left.expression} {op} {right.expression}"
-            left = RollResult(result, combined_rolls, combined_expression)
-
-        return left
-
-    def _parse_exponentiation(self, tokens: list[str]) -> RollResult:
-        """Parse exponentiation (right-associative)."""
-        left = self._parse_primary(tokens)
-
-        if tokens and tokens[0] == "^":
-            tokens.pop(0)
-            right = self._parse_exponentiation(tokens)
-
-            result = self.operators["^"](left.value, right.value)
-            combined_rolls = left.rolls + right.rolls
-            combined_expression = f"{left.expression} ^ {right.expression}"
-            return RollResult(result, combined_rolls, combined_expression)
-
-        return left
-
-    def _parse_primary(self, tokens: list[str]) -> RollResult:
-        """Parse primary expressions (numbers, dice rolls, parentheses)."""
-        if not tokens:
+    def evaluate(self, compiled: CompiledExpression) -> RollResult:
+        """Roll a compiled expression once."""
+        self._check_dice_limit(compiled, 1)
+        if compiled.root is None:
             return RollResult(0, [], "")
+        rolls: list[tuple[list[int], str, list[bool] | None]] = []
+        value = self._evaluate_node(compiled.root, rolls)
+        return RollResult(value, rolls, compiled.expression)
 
-        token = tokens.pop(0)
-
-        # Parenthesized sub-expression
-        if token == "(":
-            result = self._evaluate_expression(tokens)
-            if tokens and tokens[0] == ")":
-                tokens.pop(0)
-            else:
-                raise ValueError("Mismatched parentheses")
-            return RollResult(
-                result.value, result.rolls, f"({result.expression})"
-            )
+    def _check_dice_limit(
+        self, compiled: CompiledExpression, repetitions: int
+    ) -> None:
+        """Reject expressions that would roll more dice than allowed."""
+        self.limits.check(compiled, repetitions)
 
-        # Dice roll
-        dice_match = self.dice_pattern.match(token)
-        if dice_match:
-            return self._roll_dice(dice_match)
-
-        # Number literal
+    def _evaluate_node(
+        self,
+        node: Node,
+        rolls: list[tuple[list[int], str, list[bool] | None]],
+    ) -> int | float:
+        """Evaluate *node*, appending every dice group rolled to *rolls*."""
+        match node:
+            case NumberNode(value=value):
+                return value
+            case DiceNode():
+                result = self._roll_dice(node)
+                rolls.extend(result.rolls)
+                return result.value
+            case GroupNode(inner=inner):
+                return self._evaluate_node(inner, rolls)
+            case ChainNode():
+                # Operands are evaluated left to right so dice are always
+                # rolled in source order, whatever the associativity.
+                values = [
+                    self._evaluate_node(operand, rolls)
+                    for operand in node.operands
+                ]
+                return self._fold_chain(node, values)
+
+    def _fold_chain(
+        self, node: ChainNode, values: list[int | float]
+    ) -> int | float:
+        """Combine already evaluated chain operands with their operators."""
+        ops = [op for op, _ in node.rest]
+        if node.right_assoc:
+            result = values[-1]
+            for op, left in zip(
+                reversed(ops), reversed(values[:-1]), strict=True
+            ):
+                result = self._apply(op, left, result)
+            return result
+        result = values[0]
+        for op, right in zip(ops, values[1:], strict=True):
+            result = self._apply(op, result, right)
+        return result
+
+    def _apply(
+        self, op: str, left: int | float, right: int | float
+    ) -> int | float:
+        """Apply one operator within ``DiceLimits.max_result_bits``."""
+        if op == "^":
+            self.limits.check_power(left, right)
         try:
-            value = float(token)
-            if value.is_integer():
-                value = int(value)
-            return RollResult(value, [], str(value))
-        except ValueError as e:
-            raise ValueError(f"Unexpected token: {token}") from e
+            result = self.operators[op](left, right)
+        except OverflowError as e:
+            raise ValueError(
+                f"Result too large: over {self.limits.max_result_bits:,} bits"
+            ) from e
+        self.limits.check_result(result)
+        return result
 
     # ------------------------------------------------------------------
     # Dice rolling
     # ------------------------------------------------------------------
 
-    def _roll_dice(self, dice_match: re.Match[str]) -> RollResult:
-        """Roll dice based on the matched notation.
+    def _roll_dice(self, dice: DiceNode) -> RollResult:
+        """Roll a single dice group.
 
         Supports: NdX, NdXkhY, NdXklY, NdF.
         """
-        count_str, sides_str, keep_mode, keep_count_str = dice_match.groups()
-        count = int(count_str)
-        is_fudge = sides_str.upper() == "F"
-        original_notation = dice_match.group(0)
+        count = dice.count
+
+        if dice.sides is None:
+            faces = (-1, 1)
+        elif dice.sides <= 0 or count < 0:
+            raise ValueError("Invalid dice specification")
+        elif dice.sides > self.limits.max_sides:
+            raise ValueError(
+                f"Too many sides: {dice.sides:,} "
+                f"(max {self.limits.max_sides:,})"
+            )
+        else:
+            faces = (1, dice.sides)
 
-        if is_fudge:
-            sides = 0  # not used for range, just for max-bold check
+        if count > self.limits.bulk_threshold:
+            return self._roll_bulk(dice, faces)
+
+        if dice.sides is None:
             rolls = [random.choice([-1, 0, 1]) for _ in range(count)]
         else:
-            sides = int(sides_str)
-            if sides <= 0 or count < 0:
-                raise ValueError("Invalid dice specification")
-            rolls = [random.randint(1, sides) for _ in range(count)]
+            rolls = [random.randint(1, dice.sides) for _ in range(count)]
 
         # Keep-highest / keep-lowest filtering
         kept_mask: list[bool] | None = None
-        if keep_mode and keep_count_str:
-            keep_n = int(keep_count_str)
-            if keep_n > count:
-                keep_n = count
-            if keep_mode == "kh":
+        if dice.keep_mode and dice.keep_count is not None:
+            keep_n = min(dice.keep_count, count)
+            if dice.keep_mode == "kh":
                 # Indices of the highest keep_n values
                 sorted_indices = sorted(
                     range(count), key=lambda i: rolls[i], reverse=True
@@ -224,7 +459,23 @@ class DiceParser:
             total = sum(rolls)
 
         return RollResult(
-            total, [(rolls, original_notation, kept_mask)], original_notation
+            total, [(rolls, dice.notation, kept_mask)], dice.notation
+        )
+
+    def _roll_bulk(self, dice: DiceNode, faces: tuple[int, int]) -> RollResult:
+        """Roll a large dice group with NumPy, keeping only a preview."""
+        keep = (
+            (dice.keep_mode, dice.keep_count)
+            if dice.keep_mode and dice.keep_count is not None
+            else None
+        )
+        bulk = roll_bulk(
+            self.rng, dice.count, faces, keep, self.limits.displayed_rolls
+        )
+        return RollResult(
+            bulk.total,
+            [(bulk.shown, dice.notation, bulk.kept_mask)],
+            dice.notation,
         )
 
     # ------------------------------------------------------------------
@@ -239,13 +490,13 @@ class DiceParser:
         independently and display each result.
         """
         try:
-            repeat_match = re.match(r"(\d+)#(.+)$", expression)
+            repeat_match = REPEAT_PATTERN.match(expression)
             if repeat_match:
                 return self._roll_repeated(
                     int(repeat_match.group(1)), repeat_match.group(2)
                 )
-            result = self.parse(expression)
-            return self._format_result(result, expression)
+            compiled = self.compile(expression)
+            return self._format_compiled(self.evaluate(compiled), compiled)
         except Exception as e:
             return f"Error: {str(e)}"
 
@@ -253,16 +504,22 @@ class DiceParser:
         """Evaluate *sub_expression* *count* times and format all results."""
         if count <= 0:
             return "Error: repeat count must be positive"
+        if count > self.limits.max_repeat:
+            return (
+                f"Error: repeat count must be at most {self.limits.max_repeat}"
+            )
 
         # Normalize bare "dX" to "1dX" so the tokenizer picks it up
-        sub_expression = re.sub(r"\bd(\d+|[fF])", r"1d\1", sub_expression)
+        sub_expression = BARE_DICE_PATTERN.sub(r"1d\1", sub_expression)
+        compiled = self.compile(sub_expression)
+        self._check_dice_limit(compiled, count)
 
         lines: list[str] = []
         values: list[int | float] = []
         for _ in range(count):
-            result = self.parse(sub_expression)
+            result = self.evaluate(compiled)
             values.append(result.value)
-            lines.append(self._format_result(result, sub_expression))
+            lines.append(self._format_compiled(result, compiled))
 
         if count > 1:
             lines.append(f"Max: {max(values)}")
@@ -285,6 +542,19 @@ class DiceParser:
     # Formatting
     # ------------------------------------------------------------------
 
+    def _format_compiled(
+        self, result: RollResult, compiled: CompiledExpression
+    ) -> str:
+        """Format an evaluation of *compiled* using its recorded spans."""
+        if not result.rolls:
+            return f"` {result.value} ` ⟵ {compiled.source}"
+        spans = [dice.span for dice in compiled.dice]
+        return self._format_rolls(
+            result,
+            compiled.source,
+            list(zip(result.rolls, spans, strict=True)),
+        )
+
     def _format_result(
         self, result: RollResult, original_expression: str
     ) -> str:
@@ -294,30 +564,37 @@ class DiceParser:
         if not result.rolls:
             return f"` {result.value} ` ⟵ {original_expression}"
 
-        # Build the formatted expression by replacing each dice token
-        # left-to-right with its individual roll values.
-        # We use placeholder tokens to prevent already-replaced text from
-        # being matched again when the same notation appears multiple times
-        # (e.g. "1d6-1d6" — each 1d6 must get its own roll values).
-        placeholders: list[tuple[str, str]] = []
-        formatted_expr = original_expression
-        for i, (rolls, notation, kept_mask) in enumerate(result.rolls):
-            formatted_roll = self._format_single_dice(
-                rolls, notation, kept_mask
-            )
-            placeholder = f"\x00DICE{i}\x00"
-            placeholders.append((placeholder, formatted_roll))
-            formatted_expr = formatted_expr.replace(notation, placeholder, 1)
-
-        # Restore placeholders with actual formatted values
-        for placeholder, formatted_roll in placeholders:
-            formatted_expr = formatted_expr.replace(
-                placeholder, formatted_roll
-            )
+        # Without compiled spans, locate each dice token left-to-right so
+        # repeated notation (e.g. "1d6-1d6") gets its own roll values.
+        located: list[tuple[tuple, Span]] = []
+        cursor = 0
+        for roll in result.rolls:
+            start = original_expression.find(roll[1], cursor)
+            if start < 0:
+                continue
+            cursor = start + len(roll[1])
+            located.append((roll, Span(start, cursor)))
+
+        return self._format_rolls(result, original_expression, located)
+
+    def _format_rolls(
+        self,
+        result: RollResult,
+        source: str,
+        located_rolls: list[tuple[tuple, Span]],
+    ) -> str:
+        """Splice formatted dice into *source* in a single pass."""
+        parts: list[str] = []
+        cursor = 0
+        for (rolls, notation, kept_mask), span in located_rolls:
+            parts.append(source[cursor : span.start])
+            parts.append(self._format_single_dice(rolls, notation, kept_mask))
+            cursor = span.end
+        parts.append(source[cursor:])
 
         # Add spaces around arithmetic operators for readability, but
         # protect bold markers (**) from being treated as multiplication.
-        formatted_expr = self._space_operators(formatted_expr)
+        formatted_expr = self._space_operators("".join(parts))
 
         return f"` {result.value} ` ⟵ {formatted_expr}"
 
@@ -330,8 +607,13 @@ class DiceParser:
         """Format the roll values for a single dice group.
 
         Returns a string like ``[3, **6**] 2d6`` or ``[-, +, +] 3dF``.
-        Dropped dice (from kh/kl) are shown with strikethrough.
+        Dropped dice (from kh/kl) are shown with strikethrough.  Only the
+        first ``limits.displayed_rolls`` dice are listed; the rest are
+        summarized as ``… N more``.
         """
+        omitted = max(len(rolls), self._extract_count(notation))
+        rolls = rolls[: self.limits.displayed_rolls]
+        omitted -= len(rolls)
         is_fudge = "d" in notation and notation.split("d", 1)[
             1
         ].upper().startswith("F")
@@ -346,7 +628,6 @@ class DiceParser:
                     parts.append(f"~~{sym}~~")
                 else:
                     parts.append(sym)
-            roll_str = f"[{', '.join(parts)}]"
         else:
             # Extract sides for max-bold detection
             sides = self._extract_sides(notation)
@@ -360,39 +641,45 @@ class DiceParser:
                 if not kept:
                     text = f"~~{text}~~"
                 parts.append(text)
-            roll_str = f"[{', '.join(parts)}]"
+
+        if omitted:
+            parts.append(f"… {omitted:,} more")
+        roll_str = f"[{', '.join(parts)}]"
 
         # Append the notation label (e.g. "2d6", "4d6kh3", "4dF")
         return f"{roll_str} {notation}"
 
+    @staticmethod
+    def _extract_count(notation: str) -> int:
+        """Extract the number of dice from a notation like '2d6kh1'."""
+        m = DICE_PATTERN.match(notation)
+        return int(m.group(1)) if m else 0
+
     @staticmethod
     def _extract_sides(notation: str) -> int:
         """Extract the number of sides from a notation like '2d6kh1'."""
-        m = re.search(r"d(\d+)", notation)
+        m = _SIDES_PATTERN.search(notation)
         return int(m.group(1)) if m else 0
 
     @staticmethod
     def _space_operators(expr: str) -> str:
         """Add spaces around arithmetic operators without corrupting bold ``**`` markers.
 
-        Strategy: temporarily replace multi-char sequences (``**`` bold,
-        ``//`` floor-div) with placeholders, space the remaining single-char
-        operators, then restore.
+        A single regex pass matches ``**`` (bold) and ``//`` (floor-div)
+        before the single-char operators, so bold markers are kept intact
+        and only real operators get padded.
         """
-        bold_ph = "\x00BOLD\x00"
-        fdiv_ph = "\x00FDIV\x00"
-        expr = expr.replace("**", bold_ph)
-        expr = expr.replace("//", fdiv_ph)
-
-        # Space single-char operators
-        for op in ("+", "-", "*", "/", "%", "^"):
-            expr = expr.replace(op, f" {op} ")
+        expr = _OPERATOR_PATTERN.sub(_pad_operator, expr)
 
         # Clean up multiple spaces
-        expr = re.sub(r"\s+", " ", expr).strip()
+        expr = _WHITESPACE_PATTERN.sub(" ", expr).strip()
         # Tighten parens
-        expr = expr.replace("( ", "(").replace(" )", ")")
+        return expr.replace("( ", "(").replace(" )", ")")
+
 
-        expr = expr.replace(bold_ph, "**")
-        expr = expr.replace(fdiv_ph, " // ")
-        return expr
+def _pad_operator(match: re.Match[str]) -> str:
+    """Pad an operator match with spaces, leaving bold markers alone."""
+    op = match.group(0)
+    if op == "**":
+        return op
+    return f" {op} "
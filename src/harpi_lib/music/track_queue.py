@@ -0,0 +1,326 @@
+"""Indexed music queue with stable entry ids and immutable snapshots.
+
+``TrackQueue`` is a persistent (path-copying) treap ordered by integer
+position keys and augmented with subtree sizes:
+
+* insert at an index, remove by id, move and pop-front are O(log n)
+  expected;
+* ``snapshot()`` is O(1): it hands out the current root, which is never
+  mutated afterwards;
+* ``extend`` builds a balanced treap of the new entries in O(k) and
+  joins it in O(log n);
+* ``QueueSnapshot.entries(offset, limit)`` is O(log n + limit).
+
+Inserts take the midpoint between the keys of their neighbours.  Keys
+start ``KEY_SPACING`` apart, so renumbering (O(n)) only happens after
+many inserts into the same gap.
+
+Thread safety
+-------------
+Mutations must all happen on one thread (the bot's event loop).  Each
+one builds a new root and publishes it with a single attribute
+assignment, atomic under CPython's GIL.  Readers on other threads
+(Quart handlers) take a ``snapshot()`` — iterating the queue does so
+implicitly — and see a consistent queue however it changes afterwards.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from src.harpi_lib.music.ytmusicdata import YTMusicData
+
+KEY_SPACING = 1 << 32
+
+
+@dataclass(frozen=True, slots=True)
+class QueueEntry:
+    """A queued track with an id that stays the same while it is queued."""
+
+    id: int
+    item: YTMusicData
+
+
+class _Node(NamedTuple):
+    key: int
+    priority: float
+    entry: QueueEntry
+    left: _Node | None
+    right: _Node | None
+    size: int
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node else 0
+
+
+def _with_children(
+    node: _Node, left: _Node | None, right: _Node | None
+) -> _Node:
+    return _Node(
+        node.key,
+        node.priority,
+        node.entry,
+        left,
+        right,
+        _size(left) + _size(right) + 1,
+    )
+
+
+def _split(node: _Node | None, key: int) -> tuple[_Node | None, _Node | None]:
+    """Split into keys ``< key`` and keys ``>= key``."""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        return _with_children(node, node.left, left), right
+    left, right = _split(node.left, key)
+    return left, _with_children(node, right, node.right)
+
+
+def _merge(left: _Node | None, right: _Node | None) -> _Node | None:
+    """Join two treaps where every key in *left* is below *right*."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        return _with_children(left, left.left, _merge(left.right, right))
+    return _with_children(right, _merge(left, right.left), right.right)
+
+
+def _build(
+    entries: list[QueueEntry],
+    keys: list[int],
+    low: int,
+    high: int,
+    max_priority: float,
+) -> _Node | None:
+    """Balanced treap over ``entries[low:high]`` with heap-ordered priorities.
+
+    The root priority is drawn like the maximum of ``high - low``
+    uniform priorities below *max_priority*, so the result is a valid
+    treap that later random-priority inserts keep balanced.
+    """
+    if low >= high:
+        return None
+    middle = (low + high) // 2
+    priority = max_priority * random.random() ** (1 / (high - low))
+    left = _build(entries, keys, low, middle, priority)
+    right = _build(entries, keys, middle + 1, high, priority)
+    return _Node(
+        keys[middle],
+        priority,
+        entries[middle],
+        left,
+        right,
+        high - low,
+    )
+
+
+def _at(node: _Node | None, index: int) -> _Node:
+    while node is not None:
+        left_size = _size(node.left)
+        if index < left_size:
+            node = node.left
+        elif index == left_size:
+            return node
+        else:
+            index -= left_size + 1
+            node = node.right
+    raise IndexError("queue index out of range")
+
+
+def _rank(node: _Node | None, key: int) -> int:
+    """Number of keys below *key*."""
+    rank = 0
+    while node is not None:
+        if node.key < key:
+            rank += _size(node.left) + 1
+            node = node.right
+        else:
+            node = node.left
+    return rank
+
+
+def _iter_from(node: _Node | None, offset: int) -> Iterator[QueueEntry]:
+    """In-order entries starting at *offset*."""
+    stack: list[_Node] = []
+    while node is not None:
+        left_size = _size(node.left)
+        if offset < left_size:
+            stack.append(node)
+            node = node.left
+        elif offset == left_size:
+            stack.append(node)
+            break
+        else:
+            offset -= left_size + 1
+            node = node.right
+    while stack:
+        node = stack.pop()
+        yield node.entry
+        child = node.right
+        while child is not None:
+            stack.append(child)
+            child = child.left
+
+
+class QueueSnapshot:
+    """Immutable view of a ``TrackQueue`` at one point in time."""
+
+    __slots__ = ("_root",)
+
+    def __init__(self, root: _Node | None) -> None:
+        self._root = root
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __iter__(self) -> Iterator[YTMusicData]:
+        return (entry.item for entry in _iter_from(self._root, 0))
+
+    def __getitem__(self, index: int) -> QueueEntry:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("queue index out of range")
+        return _at(self._root, index).entry
+
+    def entries(
+        self, offset: int = 0, limit: int | None = None
+    ) -> list[QueueEntry]:
+        """Entries ``[offset, offset + limit)`` in queue order."""
+        return list(itertools.islice(_iter_from(self._root, offset), limit))
+
+
+class TrackQueue:
+    """Music queue supporting indexed edits by stable entry id."""
+
+    def __init__(self, items: Iterable[YTMusicData] = ()) -> None:
+        self._root: _Node | None = None
+        self._keys: dict[int, int] = {}
+        self._ids = itertools.count(1)
+        self.extend(items)
+
+    # -- Reads (safe from any thread) --
+
+    def snapshot(self) -> QueueSnapshot:
+        return QueueSnapshot(self._root)
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __bool__(self) -> bool:
+        return self._root is not None
+
+    def __iter__(self) -> Iterator[YTMusicData]:
+        return iter(self.snapshot())
+
+    def __contains__(self, item: object) -> bool:
+        return any(queued is item or queued == item for queued in self)
+
+    def index_of(self, entry_id: int) -> int:
+        """Current position of an entry."""
+        return _rank(self._root, self._key_of(entry_id))
+
+    # -- Mutations (bot loop only) --
+
+    def append(self, item: YTMusicData) -> QueueEntry:
+        return self.extend((item,))[0]
+
+    def extend(self, items: Iterable[YTMusicData]) -> list[QueueEntry]:
+        entries = [QueueEntry(next(self._ids), item) for item in items]
+        start = _at(self._root, len(self) - 1).key + KEY_SPACING if self else 0
+        self._join(entries, start)
+        return entries
+
+    def insert(self, index: int, item: YTMusicData) -> QueueEntry:
+        """Insert *item* before position *index* (clamped to the ends)."""
+        entry = QueueEntry(next(self._ids), item)
+        self._insert_entry(index, entry)
+        return entry
+
+    def popleft(self) -> YTMusicData:
+        if self._root is None:
+            raise IndexError("pop from an empty queue")
+        return self.remove(_at(self._root, 0).entry.id)
+
+    def remove(self, entry_id: int) -> YTMusicData:
+        """Remove an entry by id and return its item."""
+        key = self._key_of(entry_id)
+        left, rest = _split(self._root, key)
+        removed, right = _split(rest, key + 1)
+        self._root = _merge(left, right)
+        del self._keys[entry_id]
+        assert removed is not None
+        return removed.entry.item
+
+    def move(self, entry_id: int, index: int) -> None:
+        """Move an entry so that it ends up at position *index*."""
+        key = self._key_of(entry_id)
+        entry = _at(self._root, _rank(self._root, key)).entry
+        self.remove(entry_id)
+        self._insert_entry(index, entry)
+
+    def shuffle(self, rng: random.Random | None = None) -> None:
+        entries = self.snapshot().entries()
+        (rng or random).shuffle(entries)
+        self._rebuild(entries)
+
+    def clear(self) -> None:
+        self._root = None
+        self._keys.clear()
+
+    # -- Internals --
+
+    def _key_of(self, entry_id: int) -> int:
+        try:
+            return self._keys[entry_id]
+        except KeyError:
+            raise ValueError("Música não encontrada na fila") from None
+
+    def _insert_entry(self, index: int, entry: QueueEntry) -> None:
+        index = max(0, min(index, len(self)))
+        key = self._key_for(index)
+        if key is None:
+            self._rebuild(self.snapshot().entries())
+            key = self._key_for(index)
+            assert key is not None
+        left, right = _split(self._root, key)
+        node = _Node(key, random.random(), entry, None, None, 1)
+        self._root = _merge(_merge(left, node), right)
+        self._keys[entry.id] = key
+
+    def _key_for(self, index: int) -> int | None:
+        """A free key between positions ``index - 1`` and ``index``."""
+        size = len(self)
+        before = _at(self._root, index - 1).key if index > 0 else None
+        after = _at(self._root, index).key if index < size else None
+        if before is None:
+            return 0 if after is None else after - KEY_SPACING
+        if after is None:
+            return before + KEY_SPACING
+        if after - before < 2:
+            return None
+        return (before + after) // 2
+
+    def _rebuild(self, entries: list[QueueEntry]) -> None:
+        """Re-key *entries* in order with fresh spacing."""
+        self.clear()
+        self._join(entries, 0)
+
+    def _join(self, entries: list[QueueEntry], start: int) -> None:
+        """Append *entries* with keys from *start* (above every key)."""
+        keys = range(start, start + len(entries) * KEY_SPACING, KEY_SPACING)
+        self._root = _merge(
+            self._root, _build(entries, list(keys), 0, len(entries), 1.0)
+        )
+        self._keys.update(
+            (entry.id, key) for entry, key in zip(entries, keys, strict=True)
+        )
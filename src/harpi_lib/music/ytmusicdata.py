@@ -2,10 +2,16 @@
 
 Thread safety
 -------------
-* ``ytdl`` (module-level ``yt_dlp.YoutubeDL`` singleton) is called from
-  the bot's event loop via ``run_in_executor``.  yt-dlp is not documented
-  as thread-safe, but in practice only one extraction runs at a time
-  because callers ``await`` the result.  This is an **accepted risk**.
+* yt-dlp is not documented as thread-safe, and ``search`` and
+  ``from_music_data`` run on executor threads, several at once (link
+  resolution, guilds starting tracks, scenes opening layers).  Both use
+  the executor thread's own ``YoutubeDL`` from ``_thread_ytdl``, so no
+  instance is ever used by two threads.
+* ``YoutubeDLSource.on_first_frame`` is called on the voice-sending
+  thread; it must only hand off to another loop (e.g. with
+  ``call_soon_threadsafe``).
+* With a ``BroadcastRegistry``, ``from_music_data`` may hand out a
+  cursor on another guild's decoder; see ``audio.broadcast``.
 * ``FFmpegPCMAudio.read()`` is called from discord.py's voice-sending
   thread.  ``cleanup()`` may be called from the bot or Quart event loops.
   A ``threading.Lock`` (``_proc_lock``) serialises process spawn and
@@ -22,6 +28,7 @@ import subprocess  # noqa: S404
 import threading
 import time
 import uuid
+from collections.abc import Callable
 from typing import IO, Any, cast, override
 
 import discord
@@ -30,6 +37,7 @@ from discord.opus import Encoder
 from loguru import logger
 
 from src.errors.nothingfound import NothingFoundError
+from src.harpi_lib.audio.broadcast import BroadcastRegistry
 
 ytdl_format_options = {
     "format": "m4a/bestaudio/best",
@@ -48,7 +56,16 @@ ffmpeg_options = {
     "before_options": "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5",
 }
 
-ytdl = yt_dlp.YoutubeDL(ytdl_format_options)
+_search_ytdl = threading.local()
+
+
+def _thread_ytdl() -> yt_dlp.YoutubeDL:
+    """Return the calling thread's own ``YoutubeDL`` instance."""
+    instance = getattr(_search_ytdl, "instance", None)
+    if instance is None:
+        instance = yt_dlp.YoutubeDL(ytdl_format_options)
+        _search_ytdl.instance = instance
+    return instance
 
 
 class AudioSourceTracked(discord.AudioSource):
@@ -86,18 +103,40 @@ class YoutubeDLSource(UniqueAudioSource):
 
         self.title: str = data.get("title", "Unknown Title")
         self.url: str = data.get("url", "Unknown URL")
+        self.frames_read: int = 0
+        self.on_first_frame: Callable[[], None] | None = None
+
+    @override
+    def read(self) -> bytes:
+        data = super().read()
+        if data:
+            if self.frames_read == 0 and self.on_first_frame:
+                self.on_first_frame()
+            self.frames_read += 1
+        return data
+
+    @property
+    def progress(self) -> float:
+        """Seconds of audio read so far (20 ms per frame)."""
+        return self.frames_read * Encoder.FRAME_LENGTH / 1000
 
     @classmethod
     async def from_music_data(
         cls,
         musicdata: YTMusicData,
         volume: float = 0.3,
+        broadcasts: BroadcastRegistry | None = None,
+        live: bool = False,
     ) -> YoutubeDLSource:
         """Create a YoutubeDLSource instance from a YTMusicData.
 
         Args:
             musicdata (YTMusicData): Music data to use.
             volume (float, optional): Volume to be set. Defaults to 0.3.
+            broadcasts (BroadcastRegistry, optional): Share the decoder
+                with other guilds playing the same URL.
+            live (bool, optional): Join a shared stream where it is now
+                rather than only from its start.
 
         Raises:
             BadLink: If the link is invalid.
@@ -106,10 +145,17 @@ class YoutubeDLSource(UniqueAudioSource):
             YoutubeDLSource: The created YoutubeDLSource instance.
 
         """
+        key = musicdata.get_url()
+        if broadcasts is not None:
+            cursor = broadcasts.subscribe(key, live)
+            if cursor is not None:
+                return cls(
+                    cursor, data=dict(cursor.broadcast.data), volume=volume
+                )
         loop = asyncio.get_event_loop()
         data = await loop.run_in_executor(
             None,
-            lambda: ytdl.extract_info(musicdata.get_url(), download=False),
+            lambda: _thread_ytdl().extract_info(key, download=False),
         )
 
         if not isinstance(data, dict):
@@ -123,15 +169,14 @@ class YoutubeDLSource(UniqueAudioSource):
         if not isinstance(url, str):
             raise ValueError("Invalid URL from ytdl: expected string")
         # Use the URL directly for streaming instead of downloading the file
-        return cls(
-            FFmpegPCMAudio(
-                source=url,
-                options=ffmpeg_options["options"],
-                before_options=ffmpeg_options["before_options"],
-            ),
-            data=dict(data),
-            volume=volume,
+        decoder: discord.AudioSource = FFmpegPCMAudio(
+            source=url,
+            options=ffmpeg_options["options"],
+            before_options=ffmpeg_options["before_options"],
         )
+        if broadcasts is not None:
+            decoder = broadcasts.publish(key, decoder, dict(data), live)
+        return cls(decoder, data=dict(data), volume=volume)
 
 
 def search(arg: str) -> dict[str, Any]:
@@ -159,7 +204,7 @@ def search(arg: str) -> dict[str, Any]:
                 dict[str, str | int],
                 cast(
                     object,
-                    ytdl.extract_info(
+                    _thread_ytdl().extract_info(
                         f"ytsearch:{arg}",
                         download=True,
                         process=False,
@@ -171,7 +216,9 @@ def search(arg: str) -> dict[str, Any]:
                 dict[str, str | int],
                 cast(
                     object,
-                    ytdl.extract_info(arg, download=True, process=False),
+                    _thread_ytdl().extract_info(
+                        arg, download=True, process=False
+                    ),
                 ),
             )
     except Exception as e:
@@ -218,7 +265,8 @@ class YTMusicData:
 
         """
         logger.info(f"Searching for {url}")
-        result = search(url)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, search, url)
         if result.get("entries"):
             logger.info(
                 f"Found {result.get('entries')} results.",
@@ -0,0 +1,398 @@
+"""RPC between the HTTP process and the bot process over a Unix socket.
+
+``RpcServer`` runs in the bot process, on the bot's event loop, and
+serves a ``BotControl``.  ``RemoteControl`` runs in the Quart process
+and exposes the same coroutines, so the blueprints do not care which
+side of the socket the bot is on (see ``src.harpi_lib.control``).
+
+Wire format
+-----------
+Every message is a 4-byte big-endian length followed by a pickle:
+
+* request: ``(call_id, method, args, kwargs)``;
+* reply: ``(call_id, ok, value)``, where *value* is the result or, when
+  ``ok`` is false, the exception raised by the method.
+
+Calls are multiplexed over one connection and answered out of order.
+``open_status_stream`` is special: it takes a connection of its own, the
+first reply carries the snapshot (or None) and every further reply a
+batch of ``StatusEvent``; a None batch ends the stream.  Closing the
+connection unsubscribes.
+
+Security
+--------
+The socket lives in a directory only the bot's user can enter (by
+default ``harpi-<uid>`` in the temp directory).  ``RpcServer`` creates
+it with mode 0700 before binding, and both ends refuse a directory
+that another user owns or can write to, so no one else can connect,
+nor put a socket of their own in its place.
+
+Frames are still pickles, because replies and errors are frozen
+dataclasses and exception types (``BudgetExceeded`` must stay a
+``ValueError`` across the socket), but they are loaded with an
+allow-list: containers, exception classes, and the dataclasses and
+enums of this package.  A frame naming anything else (a function, a
+class from another library) is rejected before it can be called, and
+errors that would not load on the other side are sent as
+``RuntimeError``.
+
+Thread safety
+-------------
+``RpcServer`` must be started on the bot loop; each request runs as a
+task there, so a slow call (a voice connect) does not hold up the
+others.  A ``RemoteControl`` belongs to the event loop that first uses
+it (Quart's).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import enum
+import io
+import itertools
+import os
+import pickle
+import stat
+import struct
+import sys
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from src.harpi_lib.control import BotControl
+    from src.harpi_lib.status_events import StatusEvent
+
+DEFAULT_SOCKET = Path(
+    os.getenv(
+        "HARPI_BOT_SOCKET",
+        str(Path(tempfile.gettempdir()) / f"harpi-{os.getuid()}" / "bot.sock"),
+    )
+)
+# Refuse frames larger than this (a full status is a few hundred KB).
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+_HEADER = struct.Struct(">I")
+_STREAM_METHOD = "open_status_stream"
+# BotControl coroutines callable over the socket.
+CALLS = frozenset({
+    "status_tag",
+    "status",
+    "queue_page",
+    "guilds",
+    "guild",
+    "current_channel",
+    "is_connected",
+    "connect_to_voice",
+    "resources",
+    "send",
+    "submit_add_job",
+    "get_add_job",
+    "list_scenes",
+    "delete_scene",
+    "effects",
+    "buses",
+})
+
+
+# Builtins a frame may name besides exception classes.
+_SAFE_BUILTINS = frozenset({"set", "frozenset", "bytearray", "complex"})
+# Packages whose dataclasses and enums a frame may name.
+_SAFE_PACKAGE = "src."
+
+
+class _FrameUnpickler(pickle.Unpickler):
+    """Loads only the allow-listed classes of the module docstring."""
+
+    def find_class(self, module: str, name: str) -> Any:
+        # Only modules already imported: a frame never triggers imports.
+        value = getattr(sys.modules.get(module), name, None)
+        if isinstance(value, type) and _allowed(module, name, value):
+            return value
+        raise pickle.UnpicklingError(f"RPC frame refers to {module}.{name}")
+
+
+def _allowed(module: str, name: str, cls: type) -> bool:
+    if issubclass(cls, BaseException):
+        return True
+    if module == "builtins":
+        return name in _SAFE_BUILTINS
+    return module.startswith(_SAFE_PACKAGE) and (
+        dataclasses.is_dataclass(cls) or issubclass(cls, enum.Enum)
+    )
+
+
+def _loads(payload: bytes) -> Any:
+    return _FrameUnpickler(io.BytesIO(payload)).load()
+
+
+def _private_dir(path: Path, create: bool = False) -> None:
+    """Raise PermissionError unless only this user can use *path*."""
+    if create:
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = path.stat()
+    if info.st_uid != os.getuid() or info.st_mode & (
+        stat.S_IRWXG | stat.S_IRWXO
+    ):
+        raise PermissionError(
+            f"RPC socket directory {path} must belong to this user "
+            f"and have mode 0700"
+        )
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Any:
+    header = await reader.readexactly(_HEADER.size)
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ConnectionError(f"RPC frame too large: {size} bytes")
+    payload = await reader.readexactly(size)
+    try:
+        return _loads(payload)
+    except pickle.UnpicklingError as e:
+        raise ConnectionError(f"Invalid RPC frame: {e}") from e
+
+
+def _encode(message: Any) -> bytes:
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload)) + payload
+
+
+def _picklable_error(error: BaseException) -> BaseException:
+    """*error* if it loads on the other side, else a ``RuntimeError`` copy."""
+    try:
+        _loads(pickle.dumps(error))
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+    return error
+
+
+class RpcServer:
+    """Serves a ``BotControl`` on a Unix socket."""
+
+    def __init__(
+        self, control: BotControl, path: Path | str = DEFAULT_SOCKET
+    ) -> None:
+        self.control = control
+        self.path = Path(path)
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        _private_dir(self.path.parent, create=True)
+        self.path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=str(self.path)
+        )
+        os.chmod(self.path, 0o600)
+        logger.info(f"Bot RPC listening on {self.path}")
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.path.unlink(missing_ok=True)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        tasks: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                call_id, method, args, kwargs = await _read_frame(reader)
+                if method == _STREAM_METHOD:
+                    # The connection now belongs to the stream.
+                    await self._stream(writer, reader, call_id, args)
+                    return
+                task = asyncio.create_task(
+                    self._call(writer, call_id, method, args, kwargs)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _call(
+        self,
+        writer: asyncio.StreamWriter,
+        call_id: int,
+        method: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None:
+        try:
+            if method not in CALLS:
+                raise AttributeError(f"Unknown RPC method: {method}")
+            result = await getattr(self.control, method)(*args, **kwargs)
+            reply = (call_id, True, result)
+        except Exception as e:
+            reply = (call_id, False, _picklable_error(e))
+        try:
+            writer.write(_encode(reply))
+        except Exception as e:
+            writer.write(_encode((call_id, False, _picklable_error(e))))
+        await writer.drain()
+
+    async def _stream(
+        self,
+        writer: asyncio.StreamWriter,
+        reader: asyncio.StreamReader,
+        call_id: int,
+        args: tuple[Any, ...],
+    ) -> None:
+        stream = await self.control.open_status_stream(*args)
+        writer.write(_encode((call_id, True, stream and stream.snapshot)))
+        await writer.drain()
+        if stream is None:
+            return
+        # The client never writes on a stream connection; EOF means it
+        # has gone away.
+        gone = asyncio.create_task(reader.read())
+        try:
+            while True:
+                batch = asyncio.create_task(stream.next())
+                await asyncio.wait(
+                    {batch, gone}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if gone.done():
+                    batch.cancel()
+                    return
+                events = batch.result()
+                writer.write(_encode((call_id, True, events)))
+                await writer.drain()
+                if events is None:
+                    return
+        finally:
+            gone.cancel()
+            stream.close()
+
+
+class RemoteControl:
+    """``BotControl`` of a bot running in another process."""
+
+    def __init__(self, path: Path | str = DEFAULT_SOCKET) -> None:
+        self.path = Path(path)
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._connecting: asyncio.Lock | None = None
+
+    async def _connection(self) -> asyncio.StreamWriter:
+        """The shared call connection, (re)opened on demand."""
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self._writer is None or self._writer.is_closing():
+                _private_dir(self.path.parent)
+                reader, self._writer = await asyncio.open_unix_connection(
+                    str(self.path)
+                )
+                self._reader_task = asyncio.create_task(
+                    self._read_replies(reader)
+                )
+            return self._writer
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        error: BaseException = ConnectionError("Bot RPC connection lost")
+        try:
+            while True:
+                call_id, ok, value = await _read_frame(reader)
+                future = self._pending.pop(call_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            error = ConnectionError(f"Bot RPC connection lost: {e}")
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _call(self, method: str, /, *args: Any, **kwargs: Any) -> Any:
+        writer = await self._connection()
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            writer.write(_encode((call_id, method, args, kwargs)))
+            await writer.drain()
+            return await future
+        finally:
+            self._pending.pop(call_id, None)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+    def __getattr__(self, method: str) -> Callable[..., Any]:
+        if method not in CALLS:
+            raise AttributeError(method)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._call(method, *args, **kwargs)
+
+        call.__name__ = method
+        return call
+
+    async def open_status_stream(
+        self, guild_id: int
+    ) -> RemoteStatusStream | None:
+        _private_dir(self.path.parent)
+        reader, writer = await asyncio.open_unix_connection(str(self.path))
+        try:
+            writer.write(_encode((0, _STREAM_METHOD, (guild_id,), {})))
+            await writer.drain()
+            _, ok, snapshot = await _read_frame(reader)
+        except BaseException:
+            writer.close()
+            raise
+        if not ok:
+            writer.close()
+            raise snapshot
+        if snapshot is None:
+            writer.close()
+            return None
+        return RemoteStatusStream(reader, writer, snapshot)
+
+
+class RemoteStatusStream:
+    """``StatusStream`` read from the bot process."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        snapshot: dict[str, Any],
+    ) -> None:
+        self.snapshot = snapshot
+        self._reader = reader
+        self._writer = writer
+
+    async def next(self) -> list[StatusEvent] | None:
+        try:
+            _, ok, events = await _read_frame(self._reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        if not ok:
+            raise events
+        return events
+
+    def close(self) -> None:
+        self._writer.close()
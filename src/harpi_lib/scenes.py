@@ -0,0 +1,131 @@
+"""Named scene presets: saved sets of background layers per guild.
+
+A scene ("tavern", "forest at night") records the link and volume of
+each background layer playing when it was saved.  ``SceneService`` (see
+``services/scenes.py``) restores it as one mix batch.
+
+Scenes are kept in a JSON file (``SCENES_FILE`` by default) so they
+survive restarts and voice disconnects; without a path the store only
+lives in memory.
+
+Thread safety
+-------------
+``SceneStore._lock`` guards the scene dict and file writes.  Readers get
+copies (``ScenePreset`` and ``SceneLayer`` are frozen), so they can be
+used from the Quart and bot loops alike.  The file is replaced
+atomically, so a crash mid-write never leaves a truncated store.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+SCENES_FILE = Path(os.getenv("SCENES_FILE", ".scenes.json"))
+MAX_SCENES_PER_GUILD = 50
+
+
+@dataclass(frozen=True)
+class SceneLayer:
+    """A layer of a scene: what to play and how loud."""
+
+    link: str
+    volume: float
+
+
+@dataclass(frozen=True)
+class ScenePreset:
+    """A named set of layers."""
+
+    name: str
+    layers: tuple[SceneLayer, ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "layers": [asdict(layer) for layer in self.layers],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ScenePreset:
+        return cls(
+            data["name"],
+            tuple(SceneLayer(**layer) for layer in data["layers"]),
+        )
+
+
+class SceneStore:
+    """Scene presets by guild, optionally persisted to a JSON file."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._scenes: dict[int, dict[str, ScenePreset]] = {}
+        if path is not None:
+            self._load()
+
+    def scenes(self, guild_id: int) -> list[ScenePreset]:
+        with self._lock:
+            return sorted(
+                self._scenes.get(guild_id, {}).values(),
+                key=lambda scene: scene.name,
+            )
+
+    def get(self, guild_id: int, name: str) -> ScenePreset | None:
+        with self._lock:
+            return self._scenes.get(guild_id, {}).get(name)
+
+    def save(self, guild_id: int, scene: ScenePreset) -> None:
+        """Add or replace a scene."""
+        with self._lock:
+            scenes = self._scenes.setdefault(guild_id, {})
+            if (
+                scene.name not in scenes
+                and len(scenes) >= MAX_SCENES_PER_GUILD
+            ):
+                raise ValueError("Limite de cenas atingido")
+            scenes[scene.name] = scene
+            self._write()
+
+    def delete(self, guild_id: int, name: str) -> None:
+        with self._lock:
+            scenes = self._scenes.get(guild_id, {})
+            if name not in scenes:
+                raise ValueError("Cena não encontrada")
+            del scenes[name]
+            self._write()
+
+    def _load(self) -> None:
+        assert self.path is not None
+        try:
+            raw = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.opt(exception=True).error(
+                f"Could not read scenes from {self.path}"
+            )
+            return
+        for guild_id, scenes in raw.items():
+            self._scenes[int(guild_id)] = {
+                scene["name"]: ScenePreset.from_dict(scene) for scene in scenes
+            }
+
+    def _write(self) -> None:
+        """Persist every scene. Caller must hold lock."""
+        if self.path is None:
+            return
+        raw = {
+            str(guild_id): [scene.to_dict() for scene in scenes.values()]
+            for guild_id, scenes in self._scenes.items()
+            if scenes
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(raw, indent=2))
+        os.replace(tmp, self.path)
@@ -0,0 +1,181 @@
+"""Asynchronous add-music jobs.
+
+``submit`` registers an ``AddJob`` and schedules ``run`` on the bot's
+event loop without waiting for it, so an HTTP handler can answer at once
+and leave slow yt-dlp extractions to the job:
+
+1. ``resolve`` — every link is resolved concurrently (at most
+   ``RESOLVE_CONCURRENCY`` extractions at a time); a failing link is
+   recorded and skipped.
+2. ``enqueue`` — the tracks are queued, or added as layers, in the
+   order their links were given, connecting to voice if needed.  This
+   goes through the ``CommandBus`` (``enqueue`` and ``add_layer``
+   commands), so it is serialized with the guild's other playback
+   commands: a stop or skip sent while the job resolves runs before
+   the tracks are queued, never in the middle of it.
+3. ``first_frame`` — if one of the new tracks started playing, wait
+   (up to ``FIRST_FRAME_TIMEOUT`` seconds) until it produces audio.
+
+Thread safety
+-------------
+``submit`` may be called from any thread; ``run`` executes on the bot's
+event loop and leaves queue mutations to the guild's actor.  The
+first-frame hook fires
+on the voice-sending thread and only resolves a future through
+``call_soon_threadsafe``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from discord.ext.commands import Bot
+from loguru import logger
+
+from src.harpi_lib.jobs import AddJob, JobKind, JobRegistry, JobStage
+from src.harpi_lib.music.ytmusicdata import YoutubeDLSource, YTMusicData
+
+if TYPE_CHECKING:
+    from src.harpi_lib.api import GuildConfig
+    from src.harpi_lib.command_bus import CommandBus
+
+RESOLVE_CONCURRENCY = 4
+FIRST_FRAME_TIMEOUT = 20.0
+
+
+class AddJobService:
+    """Runs add requests as background jobs tracked by a registry."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        guilds: dict[int, GuildConfig],
+        commands: CommandBus,
+        jobs: JobRegistry,
+    ) -> None:
+        self.bot = bot
+        self.guilds = guilds
+        self.commands = commands
+        self.jobs = jobs
+
+    def submit(
+        self,
+        guild_id: int,
+        channel_id: int,
+        links: list[str],
+        kind: JobKind = "queue",
+    ) -> AddJob:
+        """Register a job and start it on the bot loop (any thread)."""
+        if not links:
+            raise ValueError("Nenhum link informado")
+        loop = self.bot.loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("Bot event loop is closed or unavailable")
+        job = self.jobs.create(guild_id, kind, links)
+        asyncio.run_coroutine_threadsafe(self.run(job, channel_id), loop)
+        return job
+
+    async def run(self, job: AddJob, channel_id: int) -> None:
+        """Drive *job* through its stages; never raises."""
+        try:
+            tracks = await self._resolve(job)
+            if not tracks:
+                self.jobs.update(
+                    job, JobStage.FAILED, error="Nenhum áudio encontrado"
+                )
+                return
+            self.jobs.update(job, JobStage.ENQUEUE, tracks=len(tracks))
+            source = await self._enqueue(job, channel_id, tracks)
+            if source is None:
+                self.jobs.update(job, JobStage.DONE)
+                return
+            self.jobs.update(job, JobStage.FIRST_FRAME)
+            started = await self._first_frame(source)
+            self.jobs.update(job, JobStage.DONE, started=started)
+        except Exception as e:
+            logger.opt(exception=True).error(f"Add job {job.id} failed: {e}")
+            self.jobs.update(job, JobStage.FAILED, error=str(e))
+
+    async def _resolve(self, job: AddJob) -> list[YTMusicData]:
+        """Resolve all links concurrently, keeping their order."""
+        self.jobs.update(job, JobStage.RESOLVE)
+        limit = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+
+        async def resolve(link: str) -> list[YTMusicData]:
+            async with limit:
+                try:
+                    found = await YTMusicData.from_url(link)
+                except Exception:
+                    logger.opt(exception=True).warning(
+                        f"Could not resolve {link} for job {job.id}"
+                    )
+                    found = []
+            self.jobs.update(
+                job,
+                resolved=job.resolved + 1,
+                failed_links=job.failed_links + ([] if found else [link]),
+            )
+            return found
+
+        results = await asyncio.gather(*(resolve(link) for link in job.links))
+        return [track for found in results for track in found]
+
+    async def _enqueue(
+        self, job: AddJob, channel_id: int, tracks: list[YTMusicData]
+    ) -> YoutubeDLSource | None:
+        """Add *tracks*; return the source of a new track that started."""
+        if job.kind == "layer":
+            layer_ids = [
+                await self.commands.send(
+                    job.guild_id,
+                    "add_layer",
+                    channel_id=channel_id,
+                    music_data=track,
+                )
+                for track in tracks
+            ]
+            guild_config = self.guilds.get(job.guild_id)
+            if guild_config is None:
+                # Disconnected meanwhile: nothing will start playing.
+                return None
+            return (guild_config.background or {}).get(layer_ids[0])
+
+        entries = await self.commands.send(
+            job.guild_id,
+            "enqueue",
+            channel_id=channel_id,
+            music_data_list=tracks,
+        )
+        guild_config = self.guilds.get(job.guild_id)
+        if (
+            guild_config is None
+            or guild_config.current_music is not entries[0].item
+        ):
+            return None
+        source = guild_config.controller.get_queue_source()
+        return source if isinstance(source, YoutubeDLSource) else None
+
+    @staticmethod
+    async def _first_frame(source: YoutubeDLSource) -> bool:
+        """Wait until *source* has produced audio; False on timeout."""
+        loop = asyncio.get_running_loop()
+        started: asyncio.Future[None] = loop.create_future()
+
+        def mark_started() -> None:
+            if not started.done():
+                started.set_result(None)
+
+        def on_first_frame() -> None:
+            loop.call_soon_threadsafe(mark_started)
+
+        source.on_first_frame = on_first_frame
+        if source.frames_read:
+            return True
+        try:
+            await asyncio.wait_for(started, FIRST_FRAME_TIMEOUT)
+        except TimeoutError:
+            return False
+        finally:
+            source.on_first_frame = None
+        return True
@@ -0,0 +1,186 @@
+"""Resource budgets and admission control for mixer sources.
+
+Every layer is an FFmpeg process decoding a network stream, so a guild
+stacking layers, or a few busy guilds together, can exhaust the
+container's memory.  ``Admission`` checks a request against the budgets
+before any source is opened, so a rejected request never starts a
+decoder:
+
+* ``guild_sources``: sources one guild's mixer may hold (layers, button
+  sounds, the queue track, TTS);
+* ``guild_decoders``: FFmpeg-backed sources per guild;
+* ``decoders``: FFmpeg-backed sources in the whole bot;
+* ``memory_bytes``: estimated memory of all decoders
+  (``DECODER_MEMORY_BYTES`` each) plus the PCM buffered by the mixers.
+
+A budget of 0 is unlimited.  Requests over budget raise
+``BudgetExceeded``, a ``ValueError`` with a message for the user; they
+are rejected rather than queued, so a caller never waits on capacity
+that may not free up.  Queue tracks and TTS replace the guild's previous
+one and are not checked.
+
+Admission bounds what a guild may start; when the mixer itself falls
+behind, ``MixerSource`` sheds its lowest-priority sources instead.
+
+Thread safety
+-------------
+``admit`` and ``reserve`` run on the bot's event loop.  ``reserve``
+counts the decoders being opened until they reach a controller, so
+concurrent requests cannot both take the last slot.  Controllers are
+read under their own locks.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import discord
+
+from src.harpi_lib.audio.broadcast import BroadcastCursor
+from src.harpi_lib.music.ytmusicdata import FFmpegPCMAudio
+
+if TYPE_CHECKING:
+    from src.harpi_lib.api import GuildConfig
+
+MIB = 1024 * 1024
+# Typical resident size of an FFmpeg audio decoder with its buffers.
+DECODER_MEMORY_BYTES = 12 * MIB
+
+
+MAX_GUILD_SOURCES = int(os.getenv("HARPI_MAX_GUILD_SOURCES", "16"))
+MAX_GUILD_DECODERS = int(os.getenv("HARPI_MAX_GUILD_DECODERS", "8"))
+MAX_DECODERS = int(os.getenv("HARPI_MAX_DECODERS", "64"))
+MAX_AUDIO_MEMORY = int(os.getenv("HARPI_MAX_AUDIO_MEMORY_MB", "768")) * MIB
+
+
+@dataclass(frozen=True)
+class ResourceBudget:
+    """Limits on mixer sources; 0 means unlimited."""
+
+    guild_sources: int = MAX_GUILD_SOURCES
+    guild_decoders: int = MAX_GUILD_DECODERS
+    decoders: int = MAX_DECODERS
+    memory_bytes: int = MAX_AUDIO_MEMORY
+
+
+class BudgetExceeded(ValueError):
+    """A request would go over a resource budget."""
+
+
+def decoder_of(
+    source: discord.AudioSource,
+) -> FFmpegPCMAudio | discord.FFmpegAudio | None:
+    """The FFmpeg reader behind *source*, if it has one.
+
+    Guilds sharing a broadcast share its decoder.
+    """
+    inner: object = source
+    while isinstance(inner, discord.PCMVolumeTransformer):
+        inner = inner.original
+    if isinstance(inner, BroadcastCursor):
+        inner = inner.broadcast.decoder
+    if isinstance(inner, FFmpegPCMAudio | discord.FFmpegAudio):
+        return inner
+    return None
+
+
+@dataclass(frozen=True)
+class Usage:
+    """Sources and decoders held, for one guild or the whole bot."""
+
+    sources: int
+    decoders: int
+    buffered_bytes: int
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.decoders * DECODER_MEMORY_BYTES + self.buffered_bytes
+
+
+class Admission:
+    """Admits new sources against a ``ResourceBudget``."""
+
+    def __init__(
+        self,
+        guilds: dict[int, GuildConfig],
+        budget: ResourceBudget | None = None,
+    ) -> None:
+        self.guilds = guilds
+        self.budget = budget or ResourceBudget()
+        # Decoders being opened, per guild.
+        self._reserved: Counter[int] = Counter()
+
+    def usage(self, guild_id: int | None = None) -> Usage:
+        """What *guild_id* (or every guild) holds, reservations included."""
+        if guild_id is None:
+            configs = list(self.guilds.values())
+            reserved = sum(self._reserved.values())
+        else:
+            config = self.guilds.get(guild_id)
+            configs = [config] if config else []
+            reserved = self._reserved[guild_id]
+        sources = buffered = 0
+        # A shared decoder counts once, however many guilds read it.
+        decoders: set[int] = set()
+        for config in configs:
+            held = config.controller.all_sources()
+            sources += len(held)
+            decoders.update(
+                id(decoder)
+                for decoder in map(decoder_of, held)
+                if decoder is not None
+            )
+            buffered += config.mixer.buffered_bytes()
+        return Usage(sources + reserved, len(decoders) + reserved, buffered)
+
+    def admit(self, guild_id: int, decoders: int = 1) -> None:
+        """Raise ``BudgetExceeded`` unless *decoders* more sources fit."""
+        if decoders <= 0:
+            return
+        budget = self.budget
+        guild = self.usage(guild_id)
+        if budget.guild_sources and (
+            guild.sources + decoders > budget.guild_sources
+        ):
+            raise BudgetExceeded(
+                f"Limite de {budget.guild_sources} sons simultâneos "
+                "neste servidor atingido"
+            )
+        if budget.guild_decoders and (
+            guild.decoders + decoders > budget.guild_decoders
+        ):
+            raise BudgetExceeded(
+                f"Limite de {budget.guild_decoders} camadas neste "
+                "servidor atingido"
+            )
+        total = self.usage()
+        if budget.decoders and total.decoders + decoders > budget.decoders:
+            raise BudgetExceeded(
+                "Limite de áudio do bot atingido; tente novamente mais tarde"
+            )
+        memory = total.memory_bytes + decoders * DECODER_MEMORY_BYTES
+        if budget.memory_bytes and memory > budget.memory_bytes:
+            raise BudgetExceeded(
+                "Memória de áudio do bot esgotada; tente novamente mais tarde"
+            )
+
+    @contextlib.contextmanager
+    def reserve(self, guild_id: int, decoders: int = 1) -> Iterator[None]:
+        """Admit *decoders* and hold their slots while they are opened.
+
+        Leave the block once the sources are in the guild's controller
+        (or have failed to open).
+        """
+        self.admit(guild_id, decoders)
+        self._reserved[guild_id] += decoders
+        try:
+            yield
+        finally:
+            self._reserved[guild_id] -= decoders
+            if self._reserved[guild_id] <= 0:
+                del self._reserved[guild_id]
@@ -11,6 +11,12 @@ mutating directly (see ``MusicQueueService``).
 Volume adjustments (``set_background_volume``) write to
 ``YoutubeDLSource.volume``, a simple float attribute — atomic under
 CPython's GIL.
+
+Layer changes bump ``GuildConfig.version`` and are published to
+``status_events`` after each mutation.
+
+New layers are admitted against the resource budgets (see
+``admission``) before the guild is connected or a decoder is opened.
 """
 
 from __future__ import annotations
@@ -20,11 +26,16 @@ from typing import TYPE_CHECKING, Any
 from discord.ext.commands import Bot, Context
 
 from src.harpi_lib.music.ytmusicdata import YoutubeDLSource, YTMusicData
+from src.harpi_lib.services.admission import Admission
+from src.harpi_lib.status_events import StatusHub, layer_payload
 
 if TYPE_CHECKING:
+    from src.harpi_lib.audio.broadcast import BroadcastRegistry
     from src.harpi_lib.api import GuildConfig
     from src.harpi_lib.services.voice_connection import VoiceConnectionService
 
+DEFAULT_LAYER_VOLUME = 0.7
+
 
 class BackgroundAudioService:
     """Manages background audio layers (ambient sounds, etc.)."""
@@ -34,10 +45,17 @@ class BackgroundAudioService:
         bot: Bot,
         guilds: dict[int, GuildConfig],
         voice_service: VoiceConnectionService,
+        status_events: StatusHub | None = None,
+        admission: Admission | None = None,
+        broadcasts: BroadcastRegistry | None = None,
     ) -> None:
         self.bot = bot
         self.guilds = guilds
         self.voice_service = voice_service
+        self.status_events = status_events or StatusHub()
+        self.admission = admission or Admission(guilds)
+        # Decoders shared with other guilds playing the same stream.
+        self.broadcasts = broadcasts
 
     async def add(
         self,
@@ -50,17 +68,35 @@ class BackgroundAudioService:
         music_data_list = await YTMusicData.from_url(link)
         if not music_data_list:
             raise ValueError(f"No audio found for URL: {link}")
-        guild_config = self.guilds.get(guild_id)
-        if not guild_config:
-            guild_config = await self.voice_service.connect(
-                guild_id, channel_id, ctx
+        return await self.add_resolved(
+            guild_id, channel_id, music_data_list[0], ctx
+        )
+
+    async def add_resolved(
+        self,
+        guild_id: int,
+        channel_id: int,
+        music_data: YTMusicData,
+        ctx: Context | None = None,
+    ) -> str:
+        """Add an already-resolved track as a layer and return its ID."""
+        with self.admission.reserve(guild_id):
+            guild_config = self.guilds.get(guild_id)
+            if not guild_config:
+                guild_config = await self.voice_service.connect(
+                    guild_id, channel_id, ctx
+                )
+            source = await YoutubeDLSource.from_music_data(
+                music_data, broadcasts=self.broadcasts, live=True
             )
-        source = await YoutubeDLSource.from_music_data(music_data_list[0])
-        source.volume = 0.7
-        layer_id = guild_config.controller.add_layer(source)
+            source.volume = DEFAULT_LAYER_VOLUME
+            layer_id = guild_config.controller.add_layer(source)
         if not guild_config.background:
             guild_config.background = {}
         guild_config.background[layer_id] = source
+        self.status_events.changed(
+            guild_config, "layer_added", layer_payload(layer_id, source)
+        )
         return layer_id
 
     async def remove(self, guild_id: int, layer_id: str) -> YoutubeDLSource:
@@ -76,6 +112,9 @@ class BackgroundAudioService:
 
         found_layer = guild_config.background.pop(layer_id)
         guild_config.controller.remove_layer(layer_id)
+        self.status_events.changed(
+            guild_config, "layer_removed", {"id": layer_id}
+        )
         return found_layer
 
     async def set_volume(
@@ -93,7 +132,13 @@ class BackgroundAudioService:
                 f"Layer {layer_id} não encontrado em {guild_config.background.keys() if guild_config.background else 'Nenhuma guilda'}"
             )
 
-        guild_config.background[layer_id].volume = max(0.0, min(2.0, volume))
+        layer = guild_config.background[layer_id]
+        layer.volume = max(0.0, min(2.0, volume))
+        self.status_events.changed(
+            guild_config,
+            "layer_volume",
+            {"id": layer_id, "volume": layer.volume},
+        )
 
     def get_status(self, guild_id: int) -> list[dict[str, Any]]:
         """Get status info for all background audio layers."""
@@ -127,3 +172,4 @@ class BackgroundAudioService:
         guild_config.controller.cleanup_all()
         if guild_config.background:
             guild_config.background.clear()
+        self.status_events.changed(guild_config, "layers_cleared", {})
@@ -0,0 +1,73 @@
+"""Gain, mute and effects of a guild's mix buses.
+
+Thread safety
+-------------
+``set_bus`` runs on the bot's event loop as a ``CommandBus`` command;
+the buses belong to the guild's ``AudioController``, which changes them
+under its lock.  ``status`` only reads settings and may run on any
+loop.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from src.harpi_lib.audio.dsp import EffectSpec
+from src.harpi_lib.status_events import StatusHub
+
+if TYPE_CHECKING:
+    from src.harpi_lib.api import GuildConfig
+
+
+class BusService:
+    """Sets and reports the buses of a guild's mixer."""
+
+    def __init__(
+        self,
+        guilds: dict[int, GuildConfig],
+        status_events: StatusHub | None = None,
+    ) -> None:
+        self.guilds = guilds
+        self.status_events = status_events or StatusHub()
+
+    async def set_bus(
+        self,
+        guild_id: int,
+        bus: str,
+        gain: float | None = None,
+        muted: bool | None = None,
+        effects: list[EffectSpec] | None = None,
+    ) -> None:
+        """Change the given settings of *bus*; None keeps a setting."""
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            raise ValueError("Guilda não conectada")
+        guild_config.controller.set_bus(
+            bus, gain=gain, muted=muted, effects=effects
+        )
+        self.status_events.changed(
+            guild_config, "bus", self._describe(guild_config, bus)
+        )
+
+    def status(self, guild_id: int) -> list[dict[str, Any]]:
+        """Every bus of the guild with its settings."""
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            return []
+        return [
+            self._describe(guild_config, name)
+            for name in guild_config.controller.get_buses()
+        ]
+
+    @staticmethod
+    def _describe(guild_config: GuildConfig, name: str) -> dict[str, Any]:
+        bus = guild_config.controller.get_buses()[name]
+        chain = bus.chain
+        return {
+            "name": name,
+            "gain": bus.gain,
+            "muted": bus.muted,
+            "effects": [asdict(s) for s in chain.specs] if chain else [],
+            "bypassed": chain.bypassed if chain else False,
+        }
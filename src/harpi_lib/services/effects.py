@@ -0,0 +1,73 @@
+"""Live audio effects on the queue track, TTS and layers.
+
+Effects run in the mixer (see ``audio.dsp``), so setting or adjusting
+them takes effect on the next frame without restarting FFmpeg or
+fetching the stream again.
+
+Thread safety
+-------------
+``set_effects`` runs on the bot's event loop as a ``CommandBus``
+command.  The chains it configures live in the guild's
+``AudioController``, which guards them with its lock.  ``status`` only
+reads counters and may run on any loop.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from src.harpi_lib.audio.dsp import EffectSpec
+from src.harpi_lib.status_events import StatusHub
+
+if TYPE_CHECKING:
+    from src.harpi_lib.api import GuildConfig
+
+# Targets other than layer IDs.
+SOURCE_TARGETS = frozenset({"queue", "tts"})
+
+
+class EffectsService:
+    """Sets and reports the effect chains of a guild's sources."""
+
+    def __init__(
+        self,
+        guilds: dict[int, GuildConfig],
+        status_events: StatusHub | None = None,
+    ) -> None:
+        self.guilds = guilds
+        self.status_events = status_events or StatusHub()
+
+    async def set_effects(
+        self, guild_id: int, target: str, effects: list[EffectSpec]
+    ) -> None:
+        """Replace *target*'s effects; an empty list removes them."""
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            raise ValueError("Guilda não conectada")
+        if target not in SOURCE_TARGETS and target not in (
+            guild_config.background or {}
+        ):
+            raise ValueError(f"Layer {target} não encontrado")
+        guild_config.controller.set_effects(target, effects)
+        self.status_events.changed(
+            guild_config,
+            "effects",
+            {"target": target, "effects": [asdict(e) for e in effects]},
+        )
+
+    def status(self, guild_id: int) -> list[dict[str, Any]]:
+        """Every chain of the guild with its cost per frame."""
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            return []
+        return [
+            {
+                "target": target,
+                "effects": [asdict(spec) for spec in chain.specs],
+                "mean_cost_ms": chain.mean_cost * 1000,
+                "peak_cost_ms": chain.peak_cost * 1000,
+                "bypassed": chain.bypassed,
+            }
+            for target, chain in guild_config.controller.get_effects().items()
+        ]
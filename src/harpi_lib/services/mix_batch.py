@@ -0,0 +1,282 @@
+"""Atomic multi-operation mix changes.
+
+A mix batch is a list of ``MixOp`` operations — ``LayerVolume``,
+``AddLayer``, ``RemoveLayer``, ``SetLoop`` and ``MusicVolume`` — applied
+as one change:
+
+1. Every operation is validated against the guild's current layers
+   before anything changes; one bad operation rejects the whole batch.
+2. The layers the batch adds (net of those it removes) are admitted
+   against the resource budgets (see ``admission``).  New layers are
+   then resolved and opened concurrently, so the batch waits
+   for the slowest link rather than for all of them in turn.  If one
+   fails, the sources opened so far are cleaned up and nothing changes.
+3. The audio changes go to ``AudioController.schedule_batch`` as a
+   single ``FrameBatch`` and land between two mixed frames.  When the
+   mixer is not reading (e.g. the bot is paused), the batch is applied
+   directly after ``FRAME_APPLY_TIMEOUT`` seconds.
+4. ``GuildConfig`` is updated and the changes are published.
+
+Thread safety
+-------------
+``apply`` runs on the bot's event loop (through the ``batch`` command
+of the ``CommandBus``), like every other playback command, so batches
+of a guild never interleave with each other or with single commands.
+The only cross-thread step is the frame batch itself, which the
+controller applies under its lock.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from discord.ext.commands import Bot
+from loguru import logger
+
+from src.harpi_lib.audio.controller import AudioController, FrameBatch
+from src.harpi_lib.music.ytmusicdata import YoutubeDLSource, YTMusicData
+from src.harpi_lib.services.admission import Admission
+from src.harpi_lib.services.background_audio import DEFAULT_LAYER_VOLUME
+from src.harpi_lib.status_events import StatusHub, layer_payload
+
+if TYPE_CHECKING:
+    from src.harpi_lib.audio.broadcast import BroadcastRegistry
+    from src.harpi_lib.api import GuildConfig, LoopMode
+    from src.harpi_lib.services.voice_connection import VoiceConnectionService
+
+FRAME_APPLY_TIMEOUT = 0.1
+
+
+@dataclass(frozen=True)
+class LayerVolume:
+    """Set the volume of an existing layer."""
+
+    layer_id: str
+    volume: float
+
+
+@dataclass(frozen=True)
+class AddLayer:
+    """Open *link* as a new layer; no volume means the default one."""
+
+    link: str
+    volume: float | None = None
+
+
+@dataclass(frozen=True)
+class RemoveLayer:
+    """Remove an existing layer."""
+
+    layer_id: str
+
+
+@dataclass(frozen=True)
+class SetLoop:
+    """Change the loop mode."""
+
+    loop: LoopMode
+
+
+@dataclass(frozen=True)
+class MusicVolume:
+    """Set the music volume."""
+
+    volume: float
+
+
+MixOp = LayerVolume | AddLayer | RemoveLayer | SetLoop | MusicVolume
+
+
+def _clamp_volume(volume: float) -> float:
+    return max(0.0, min(2.0, volume))
+
+
+class MixBatchService:
+    """Validates, resolves and applies mix batches."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        guilds: dict[int, GuildConfig],
+        voice_service: VoiceConnectionService,
+        status_events: StatusHub | None = None,
+        admission: Admission | None = None,
+        broadcasts: BroadcastRegistry | None = None,
+    ) -> None:
+        self.bot = bot
+        self.guilds = guilds
+        self.voice_service = voice_service
+        self.status_events = status_events or StatusHub()
+        self.admission = admission or Admission(guilds)
+        # Decoders shared with other guilds playing the same stream.
+        self.broadcasts = broadcasts
+
+    async def apply(
+        self,
+        guild_id: int,
+        ops: list[MixOp],
+        channel_id: int | None = None,
+    ) -> list[str]:
+        """Apply *ops* atomically and return the IDs of the added layers.
+
+        Raises ValueError, without changing anything, if an operation is
+        invalid or a new layer cannot be resolved.
+        """
+        guild_config = self.guilds.get(guild_id)
+        if guild_config is None and channel_id is None:
+            raise ValueError("Guilda não conectada")
+        layers = (guild_config.background or {}) if guild_config else {}
+        self._validate(ops, set(layers))
+
+        links = [op.link for op in ops if isinstance(op, AddLayer)]
+        removed = sum(1 for op in ops if isinstance(op, RemoveLayer))
+        with self.admission.reserve(guild_id, max(0, len(links) - removed)):
+            return await self._open_and_apply(
+                guild_id, guild_config, ops, channel_id
+            )
+
+    async def _open_and_apply(
+        self,
+        guild_id: int,
+        guild_config: GuildConfig | None,
+        ops: list[MixOp],
+        channel_id: int | None,
+    ) -> list[str]:
+        layers = (guild_config.background or {}) if guild_config else {}
+        sources = await self._open_layers([
+            op.link for op in ops if isinstance(op, AddLayer)
+        ])
+        if guild_config is None:
+            assert channel_id is not None  # checked by ``apply``
+            try:
+                guild_config = await self.voice_service.connect(
+                    guild_id, channel_id
+                )
+            except Exception:
+                for source in sources:
+                    source.cleanup()
+                raise
+            layers = {}
+
+        batch = FrameBatch(add_layers=list(sources))
+        added = iter(sources)
+        for op in ops:
+            match op:
+                case AddLayer(volume=volume):
+                    source = next(added)
+                    source.volume = _clamp_volume(
+                        DEFAULT_LAYER_VOLUME if volume is None else volume
+                    )
+                case RemoveLayer(layer_id=layer_id):
+                    batch.remove_layers.append(layer_id)
+                case LayerVolume(layer_id=layer_id, volume=volume):
+                    # A layer may have ended on its own while links
+                    # resolved.
+                    layer = layers.get(layer_id)
+                    if layer is not None:
+                        batch.volumes.append((layer, _clamp_volume(volume)))
+                case MusicVolume(volume=volume):
+                    batch.queue_volume = _clamp_volume(volume)
+
+        await self._apply_at_frame(guild_config.controller, batch)
+        self._commit(guild_config, ops, sources)
+        return [source.id for source in sources]
+
+    @staticmethod
+    def _validate(ops: list[MixOp], layer_ids: set[str]) -> None:
+        """Reject the batch if any operation is invalid, in order."""
+        if not ops:
+            raise ValueError("Nenhuma operação informada")
+        for op in ops:
+            match op:
+                case (
+                    LayerVolume(layer_id=layer_id)
+                    | RemoveLayer(layer_id=layer_id)
+                ):
+                    if layer_id not in layer_ids:
+                        raise ValueError(f"Layer {layer_id} não encontrado")
+                    if isinstance(op, RemoveLayer):
+                        layer_ids.discard(layer_id)
+                case AddLayer(link=link) if not link:
+                    raise ValueError("Link não informado")
+
+    async def _open_layers(self, links: list[str]) -> list[YoutubeDLSource]:
+        """Resolve and open every link concurrently, keeping their order."""
+
+        async def open_layer(link: str) -> YoutubeDLSource:
+            found = await YTMusicData.from_url(link)
+            if not found:
+                raise ValueError(f"No audio found for URL: {link}")
+            return await YoutubeDLSource.from_music_data(
+                found[0], broadcasts=self.broadcasts, live=True
+            )
+
+        results = await asyncio.gather(
+            *(open_layer(link) for link in links), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        sources = [r for r in results if not isinstance(r, BaseException)]
+        if errors:
+            for source in sources:
+                source.cleanup()
+            raise errors[0]
+        return sources
+
+    @staticmethod
+    async def _apply_at_frame(
+        controller: AudioController, batch: FrameBatch
+    ) -> None:
+        """Hand *batch* to the mixer, applying it here if no frame comes."""
+        applied = asyncio.wrap_future(controller.schedule_batch(batch))
+        done, _ = await asyncio.wait({applied}, timeout=FRAME_APPLY_TIMEOUT)
+        if not done:
+            logger.debug("No mixer frame within timeout, applying batch")
+            controller.apply_pending()
+            await applied
+
+    def _commit(
+        self,
+        guild_config: GuildConfig,
+        ops: list[MixOp],
+        sources: list[YoutubeDLSource],
+    ) -> None:
+        """Record the applied batch in *guild_config* and publish it."""
+        if guild_config.background is None:
+            guild_config.background = {}
+        background = guild_config.background
+        added = iter(sources)
+        for op in ops:
+            match op:
+                case AddLayer():
+                    source = next(added)
+                    background[source.id] = source
+                    self.status_events.changed(
+                        guild_config,
+                        "layer_added",
+                        layer_payload(source.id, source),
+                    )
+                case RemoveLayer(layer_id=layer_id):
+                    background.pop(layer_id, None)
+                    self.status_events.changed(
+                        guild_config, "layer_removed", {"id": layer_id}
+                    )
+                case LayerVolume(layer_id=layer_id, volume=volume):
+                    self.status_events.changed(
+                        guild_config,
+                        "layer_volume",
+                        {"id": layer_id, "volume": _clamp_volume(volume)},
+                    )
+                case MusicVolume(volume=volume):
+                    guild_config.volume = _clamp_volume(volume)
+                    self.status_events.changed(
+                        guild_config, "volume", {"volume": guild_config.volume}
+                    )
+                case SetLoop(loop=loop):
+                    guild_config.loop = loop
+                    self.status_events.changed(
+                        guild_config,
+                        "loop",
+                        {"loop_mode": loop.name.lower()},
+                    )
@@ -7,10 +7,16 @@ discord.py's **voice-sending thread** (via ``MixerSource.read()``).  They
 must not call asyncio APIs that are not thread-safe or directly mutate
 shared data structures that the bot/Quart event loops also access.
 
-* ``on_queue_end`` uses ``asyncio.run_coroutine_threadsafe`` to schedule
-  the ``next_music`` coroutine on the bot's event loop.
+* ``on_queue_end`` submits an ``advance`` command to ``commands`` (the
+  ``CommandBus``), so it is serialized with user commands such as
+  ``skip``.  Without a bus it falls back to scheduling ``next_music`` on
+  the bot's event loop with ``asyncio.run_coroutine_threadsafe``.
 * ``on_track_end`` uses ``bot.loop.call_soon_threadsafe`` to schedule dict
   mutations on the bot's event loop rather than mutating directly.
+
+Every state change bumps ``GuildConfig.version`` and is published to
+``status_events`` from the bot's event loop, right after the mutation it
+describes (see ``StatusHub.changed``).
 """
 
 from __future__ import annotations
@@ -22,10 +28,20 @@ import discord
 from discord.ext.commands import Bot, Context
 from loguru import logger
 
+from src.harpi_lib.guild_directory import voice_client_of
+from src.harpi_lib.music.track_queue import QueueEntry, TrackQueue
 from src.harpi_lib.music.ytmusicdata import YoutubeDLSource, YTMusicData
+from src.harpi_lib.status_events import (
+    StatusHub,
+    playback_payload,
+    queue_item_payload,
+    track_payload,
+)
 
 if TYPE_CHECKING:
+    from src.harpi_lib.audio.broadcast import BroadcastRegistry
     from src.harpi_lib.api import GuildConfig, LoopMode
+    from src.harpi_lib.command_bus import CommandBus
     from src.harpi_lib.services.voice_connection import VoiceConnectionService
 
 
@@ -37,21 +53,49 @@ class MusicQueueService:
         bot: Bot,
         guilds: dict[int, GuildConfig],
         voice_service: VoiceConnectionService,
+        status_events: StatusHub | None = None,
+        commands: CommandBus | None = None,
+        broadcasts: BroadcastRegistry | None = None,
     ) -> None:
         self.bot = bot
         self.guilds = guilds
         self.voice_service = voice_service
+        self.status_events = status_events or StatusHub()
+        self.commands = commands
+        # Decoders shared with other guilds playing the same track.
+        self.broadcasts = broadcasts
+
+    def _publish_track(self, guild_config: GuildConfig) -> None:
+        self.status_events.changed(
+            guild_config,
+            "track",
+            {"current_music": track_payload(guild_config.current_music)},
+        )
+
+    def _publish_queue(
+        self, guild_config: GuildConfig, op: str, **data: object
+    ) -> None:
+        self.status_events.changed(guild_config, "queue", {"op": op, **data})
 
     def on_queue_end(self, guild_config: GuildConfig) -> None:
         """Callback when the current track ends.
 
-        Called from the voice-sending thread — uses
-        ``run_coroutine_threadsafe`` instead of ``create_task``.
+        Called from the voice-sending thread — hands off to the bot loop
+        instead of using ``create_task``.
         """
+        if self.commands is not None:
+            self.commands.submit(guild_config.id, "advance")
+            return
         asyncio.run_coroutine_threadsafe(
             self.next_music(guild_config), self.bot.loop
         )
 
+    async def advance(self, guild_id: int) -> None:
+        """Play the next track after the current one ended."""
+        guild_config = self.guilds.get(guild_id)
+        if guild_config:
+            await self.next_music(guild_config)
+
     def on_track_end(
         self,
         guild_config: GuildConfig,
@@ -72,13 +116,15 @@ class MusicQueueService:
                     self._remove_background_layer, guild_config, layer_id
                 )
 
-    @staticmethod
     def _remove_background_layer(
-        guild_config: GuildConfig, layer_id: str
+        self, guild_config: GuildConfig, layer_id: str
     ) -> None:
         """Remove a background layer entry (runs on the bot's event loop)."""
         if guild_config.background and layer_id in guild_config.background:
             del guild_config.background[layer_id]
+            self.status_events.changed(
+                guild_config, "layer_removed", {"id": layer_id}
+            )
 
     async def next_music(
         self, guild_config: GuildConfig, force_next: bool = False
@@ -94,6 +140,7 @@ class MusicQueueService:
             # Clear current track so the queue doesn't get stuck
             guild_config.current_music = None
             guild_config.controller.clear_queue_source()
+            self._publish_track(guild_config)
 
     async def _next_music_inner(
         self, guild_config: GuildConfig, force_next: bool = False
@@ -108,30 +155,40 @@ class MusicQueueService:
                     f"in guild {guild_config.id}"
                 )
                 source = await YoutubeDLSource.from_music_data(
-                    guild_config.current_music, volume=guild_config.volume
+                    guild_config.current_music,
+                    volume=guild_config.volume,
+                    broadcasts=self.broadcasts,
                 )
                 source.volume = guild_config.volume
                 guild_config.controller.set_queue_source(source)
                 return
 
             if guild_config.loop == LoopMode.QUEUE:
-                if not guild_config.queue:
-                    guild_config.queue = []
-                guild_config.queue.append(guild_config.current_music)
+                if guild_config.queue is None:
+                    guild_config.queue = TrackQueue()
+                entry = guild_config.queue.append(guild_config.current_music)
+                self._publish_queue(
+                    guild_config, "extend", items=[queue_item_payload(entry)]
+                )
 
-        if not guild_config.queue or len(guild_config.queue) == 0:
+        if not guild_config.queue:
             logger.debug(f"Queue empty for guild {guild_config.id}")
             guild_config.current_music = None
             guild_config.controller.clear_queue_source()
+            self._publish_track(guild_config)
             return
 
-        music_data = guild_config.queue.pop(0)
+        music_data = guild_config.queue.popleft()
         guild_config.current_music = music_data
+        self._publish_queue(guild_config, "pop_front")
+        self._publish_track(guild_config)
         logger.info(
             f"Playing next track '{music_data.title}' in guild {guild_config.id}"
         )
         source = await YoutubeDLSource.from_music_data(
-            music_data, volume=guild_config.volume
+            music_data,
+            volume=guild_config.volume,
+            broadcasts=self.broadcasts,
         )
         source.volume = guild_config.volume
         guild_config.controller.set_queue_source(source)
@@ -147,39 +204,157 @@ class MusicQueueService:
         music_data_list = await YTMusicData.from_url(link)
         if not music_data_list:
             raise ValueError(f"No audio found for URL: {link}")
+        await self.enqueue(guild_id, channel_id, music_data_list, ctx)
+
+    async def enqueue(
+        self,
+        guild_id: int,
+        channel_id: int,
+        music_data_list: list[YTMusicData],
+        ctx: Context | None = None,
+    ) -> list[QueueEntry]:
+        """Queue already-resolved tracks, connecting first if needed.
+
+        Starts playback when nothing is playing.
+        """
         guild_config = self.guilds.get(guild_id)
         if not guild_config:
             guild_config = await self.voice_service.connect(
                 guild_id, channel_id, ctx
             )
-        if not guild_config.queue:
-            guild_config.queue = []
-        guild_config.queue.extend(music_data_list)
+        if guild_config.queue is None:
+            guild_config.queue = TrackQueue()
+        entries = guild_config.queue.extend(music_data_list)
+        self._publish_queue(
+            guild_config,
+            "extend",
+            items=[queue_item_payload(entry) for entry in entries],
+        )
         logger.info(
             f"Added {len(music_data_list)} track(s) to queue in guild {guild_id}"
         )
         if not guild_config.current_music:
             await self.next_music(guild_config)
+        return entries
 
     async def stop(self, guild_id: int) -> None:
         """Stop current playback and clear the queue."""
         guild_config = self.guilds.get(guild_id)
         if not guild_config:
             raise ValueError("Guilda não conectada")
-        if not guild_config.queue:
-            guild_config.queue = []
+        if guild_config.queue is None:
+            guild_config.queue = TrackQueue()
         guild_config.queue.clear()
         guild_config.controller.clear_queue_source()
         guild_config.current_music = None
+        self._publish_queue(guild_config, "clear")
+        self._publish_track(guild_config)
         logger.info(f"Stopped music and cleared queue in guild {guild_id}")
 
-    async def skip(self, guild_id: int) -> None:
-        """Skip the current track and play the next."""
+    async def skip(self, guild_id: int, count: int = 1) -> None:
+        """Skip the current track and the next ``count - 1`` queued ones.
+
+        Only the track that ends up playing is resolved.
+        """
+        from src.harpi_lib.api import LoopMode
+
         guild_config = self.guilds.get(guild_id)
         if not guild_config:
             raise ValueError("Guilda não conectada")
-        logger.info(f"Skipping track in guild {guild_id}")
+        logger.info(f"Skipping {count} track(s) in guild {guild_id}")
+        queue = guild_config.queue
+        skipped = []
+        for _ in range(min(count - 1, len(queue) if queue else 0)):
+            assert queue is not None
+            skipped.append(queue.popleft())
+            self._publish_queue(guild_config, "pop_front")
         await self.next_music(guild_config, force_next=True)
+        if skipped and guild_config.loop == LoopMode.QUEUE:
+            # Same order as skipping one by one: after the current track.
+            assert queue is not None
+            entries = queue.extend(skipped)
+            self._publish_queue(
+                guild_config,
+                "extend",
+                items=[queue_item_payload(entry) for entry in entries],
+            )
+
+    async def move(self, guild_id: int, item_id: int, index: int) -> None:
+        """Move a queued track so that it ends up at *index*."""
+        queue = self._queue(guild_id)
+        queue.move(item_id, index)
+        self._publish_queue(
+            self.guilds[guild_id],
+            "move",
+            id=item_id,
+            index=queue.index_of(item_id),
+        )
+
+    async def remove(self, guild_id: int, item_id: int) -> None:
+        """Remove a queued track by its queue item id."""
+        self._queue(guild_id).remove(item_id)
+        self._publish_queue(self.guilds[guild_id], "remove", id=item_id)
+
+    async def shuffle(self, guild_id: int) -> None:
+        """Shuffle the tracks waiting in the queue."""
+        queue = self._queue(guild_id)
+        queue.shuffle()
+        self._publish_queue(
+            self.guilds[guild_id],
+            "shuffle",
+            order=[entry.id for entry in queue.snapshot().entries()],
+        )
+
+    def _queue(self, guild_id: int) -> TrackQueue:
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            raise ValueError("Guilda não conectada")
+        if guild_config.queue is None:
+            guild_config.queue = TrackQueue()
+        return guild_config.queue
+
+    async def pause(self, guild_id: int, target: str | None = None) -> None:
+        """Pause *target*, or the guild's voice playback (all sources).
+
+        *target* is ``"queue"``, ``"tts"`` or a layer ID; the other
+        sources keep playing.
+        """
+        if target is None:
+            self._set_paused(guild_id, True)
+        else:
+            self._set_source_paused(guild_id, target, True)
+
+    async def resume(self, guild_id: int, target: str | None = None) -> None:
+        """Resume *target*, or the guild's voice playback."""
+        if target is None:
+            self._set_paused(guild_id, False)
+        else:
+            self._set_source_paused(guild_id, target, False)
+
+    def _set_source_paused(
+        self, guild_id: int, target: str, paused: bool
+    ) -> None:
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            raise ValueError("Guilda não conectada")
+        guild_config.controller.set_paused(target, paused)
+        self.status_events.changed(
+            guild_config, "source_paused", {"target": target, "paused": paused}
+        )
+
+    def _set_paused(self, guild_id: int, paused: bool) -> None:
+        voice_client = voice_client_of(self.bot, guild_id)
+        if voice_client is None:
+            return
+        if paused:
+            voice_client.pause()
+        else:
+            voice_client.resume()
+        self.status_events.publish(
+            guild_id,
+            "playback",
+            playback_payload(self.guilds.get(guild_id), voice_client),
+        )
 
     async def set_loop(self, guild_id: int, loop: LoopMode) -> None:
         """Set the loop mode (off, track, or queue)."""
@@ -187,6 +362,9 @@ class MusicQueueService:
         if not guild_config:
             raise ValueError("Guilda não conectada")
         guild_config.loop = loop
+        self.status_events.changed(
+            guild_config, "loop", {"loop_mode": loop.name.lower()}
+        )
 
     async def set_volume(self, guild_id: int, volume: float) -> None:
         """Set the playback volume for the music queue."""
@@ -195,6 +373,9 @@ class MusicQueueService:
             raise ValueError("Guilda não conectada")
 
         guild_config.volume = max(0.0, min(2.0, volume))
+        self.status_events.changed(
+            guild_config, "volume", {"volume": guild_config.volume}
+        )
         queue_source = guild_config.controller.get_queue_source()
         if queue_source and hasattr(queue_source, "volume"):
             try:
@@ -0,0 +1,90 @@
+"""Scene preset service: save the current layers, restore them later.
+
+Loading a scene is a single mix batch (see ``MixBatchService``) that
+removes the current layers and adds the scene's: every layer is
+resolved and opened concurrently, and the old and new sets are swapped
+in one controller update.  A scene change therefore takes about as long
+as its slowest layer, and nothing changes if any layer fails.
+
+Thread safety
+-------------
+``save`` and ``load`` read and change ``GuildConfig.background``, so
+they run on the bot's event loop as ``save_scene`` and ``load_scene``
+commands of the ``CommandBus``.  ``SceneStore`` is thread-safe; listing
+and deleting scenes may be done from any thread.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.harpi_lib.music.ytmusicdata import YoutubeDLSource
+from src.harpi_lib.scenes import SceneLayer, ScenePreset, SceneStore
+from src.harpi_lib.services.mix_batch import AddLayer, MixOp, RemoveLayer
+
+if TYPE_CHECKING:
+    from src.harpi_lib.api import GuildConfig
+    from src.harpi_lib.services.mix_batch import MixBatchService
+
+
+def _layer_link(source: YoutubeDLSource) -> str:
+    """The page a layer was played from (its stream URL expires)."""
+    data = getattr(source, "data", None) or {}
+    return str(
+        data.get("webpage_url") or data.get("original_url") or source.url
+    )
+
+
+class SceneService:
+    """Saves and restores named background-layer scenes."""
+
+    def __init__(
+        self,
+        guilds: dict[int, GuildConfig],
+        mix_batch: MixBatchService,
+        store: SceneStore,
+    ) -> None:
+        self.guilds = guilds
+        self.mix_batch = mix_batch
+        self.store = store
+
+    async def save(self, guild_id: int, name: str) -> ScenePreset:
+        """Save the guild's current layers as scene *name*."""
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            raise ValueError("Guilda não conectada")
+        if not guild_config.background:
+            raise ValueError("Nenhum layer tocando")
+        scene = ScenePreset(
+            name,
+            tuple(
+                SceneLayer(_layer_link(source), source.volume)
+                for source in guild_config.background.values()
+            ),
+        )
+        self.store.save(guild_id, scene)
+        return scene
+
+    async def load(
+        self, guild_id: int, name: str, channel_id: int | None = None
+    ) -> list[str]:
+        """Replace the current layers with scene *name*.
+
+        Returns the IDs of the new layers.
+        """
+        scene = self.store.get(guild_id, name)
+        if scene is None:
+            raise ValueError("Cena não encontrada")
+        guild_config = self.guilds.get(guild_id)
+        current = list(guild_config.background or {}) if guild_config else []
+        ops: list[MixOp] = [RemoveLayer(i) for i in current]
+        ops += [AddLayer(layer.link, layer.volume) for layer in scene.layers]
+        if not ops:
+            return []
+        return await self.mix_batch.apply(guild_id, ops, channel_id)
+
+    def list_scenes(self, guild_id: int) -> list[ScenePreset]:
+        return self.store.scenes(guild_id)
+
+    def delete(self, guild_id: int, name: str) -> None:
+        self.store.delete(guild_id, name)
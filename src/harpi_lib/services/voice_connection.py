@@ -10,12 +10,34 @@ calls with ``run_on_bot_loop()`` (see ``src.api.deps``).
 The ``guilds`` dict is mutated here (insert in ``connect_to_voice``,
 delete in ``disconnect``), but these mutations only happen on the bot's
 event loop, so no lock is required.
+
+Connecting a guild that is already connected moves the existing voice
+client with ``VoiceClient.move_to``: the mixer, its controller and every
+source keep running, and the voice-sending thread just skips frames
+while the voice server handshake is redone.
+
+Lifecycle
+---------
+Once ``attach`` has run, a reaper task on the bot loop checks every
+``REAP_INTERVAL`` seconds which guilds are still worth their resources
+(mixer reader threads, FFmpeg processes, the voice connection and its
+20 ms send loop).  A guild is released, exactly as by ``disconnect``,
+when nothing has played for ``HARPI_IDLE_TIMEOUT`` seconds or when its
+voice channel has had no human member for
+``HARPI_EMPTY_CHANNEL_TIMEOUT`` seconds (0 turns either check off).
+A pause is not idleness: a guild whose playback is paused, or that
+holds paused sources, keeps its audio until resumed, unless its
+channel empties.
+``resources`` reports what a guild currently holds.
 """
 
 from __future__ import annotations
 
 import asyncio
+import os
+import time
 from collections.abc import Callable
+from dataclasses import dataclass
 from functools import partial
 from typing import TYPE_CHECKING, cast
 
@@ -24,12 +46,47 @@ from discord.channel import VoiceChannel
 from discord.ext.commands import Bot, Context
 from loguru import logger
 
+from src.harpi_lib.audio import engine
+from src.harpi_lib.audio.loudness import LoudnessCache
 from src.harpi_lib.audio.mixer import MixerSource
 from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.voice_scheduler import (
+    TickStats,
+    VoiceScheduler,
+    voice_client_class,
+)
+from src.harpi_lib.services.admission import decoder_of
 
 if TYPE_CHECKING:
     from src.harpi_lib.api import GuildConfig
 
+# How long a channel move may take before it is reported as failed.
+VOICE_MOVE_TIMEOUT = 5.0
+IDLE_TIMEOUT = float(os.getenv("HARPI_IDLE_TIMEOUT", "600"))
+EMPTY_CHANNEL_TIMEOUT = float(os.getenv("HARPI_EMPTY_CHANNEL_TIMEOUT", "60"))
+REAP_INTERVAL = 15.0
+
+
+@dataclass(frozen=True)
+class GuildResources:
+    """What a connected guild holds in the bot process."""
+
+    sources: int
+    threads: int
+    ffmpeg_processes: int
+    buffered_bytes: int
+    # Load of the shared voice scheduler, which every guild uses.
+    voice_scheduler: TickStats | None = None
+
+
+def _ffmpeg_running(source: discord.AudioSource) -> bool:
+    """Whether *source* (or the source it wraps) has a live FFmpeg."""
+    decoder = decoder_of(source)
+    if decoder is None:
+        return False
+    process = decoder._process
+    return bool(process) and process.poll() is None
+
 
 class VoiceConnectionService:
     """Manages voice channel connections and guild lifecycle."""
@@ -40,11 +97,43 @@ class VoiceConnectionService:
         guilds: dict[int, GuildConfig],
         on_queue_end: Callable,
         on_track_end: Callable,
+        voice_scheduler: VoiceScheduler | None = None,
+        idle_timeout: float = IDLE_TIMEOUT,
+        empty_channel_timeout: float = EMPTY_CHANNEL_TIMEOUT,
+        loudness: LoudnessCache | None = None,
     ) -> None:
         self.bot = bot
         self.guilds = guilds
         self._on_queue_end = on_queue_end
         self._on_track_end = on_track_end
+        # When set, every connection is sent by this one scheduler
+        # instead of a player thread of its own.
+        self.voice_scheduler = voice_scheduler
+        self.idle_timeout = idle_timeout
+        self.empty_channel_timeout = empty_channel_timeout
+        # Shared by every guild's mixer to normalize queue tracks.
+        self.loudness = loudness
+        # Per guild (monotonic): last time audio played, and since when
+        # its channel has been empty.
+        self._last_active: dict[int, float] = {}
+        self._empty_since: dict[int, float] = {}
+        self._reaper: asyncio.Task[None] | None = None
+
+    def attach(self) -> None:
+        """Start the idle reaper once the bot is ready."""
+        self.bot.add_listener(self._start_reaper, "on_ready")
+
+    async def _start_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            try:
+                await self.reap()
+            except Exception:
+                logger.opt(exception=True).error("Idle guild reaper failed")
 
     @staticmethod
     def resolve_guild(bot: Bot, guild_id: int) -> discord.Guild:
@@ -67,12 +156,25 @@ class VoiceConnectionService:
     async def connect(
         self, guild_id: int, channel_id: int, ctx: Context | None = None
     ) -> GuildConfig:
-        """Connect to a voice channel and create a guild config."""
+        """Connect to a voice channel and create a guild config.
+
+        If the guild is already connected, the connection is moved to
+        *channel* and its guild config returned unchanged otherwise.
+        """
         from src.harpi_lib.api import GuildConfig
 
         guild = self.resolve_guild(self.bot, guild_id)
         channel = self.resolve_voice_channel(guild, channel_id)
 
+        existing = self.guilds.get(guild.id)
+        if existing is not None:
+            if await self._move(existing, channel, ctx):
+                self._last_active[guild.id] = time.monotonic()
+                self._empty_since.pop(guild.id, None)
+                return existing
+            # The old connection is gone; rebuild from scratch.
+            self._release(existing)
+
         voice: discord.VoiceClient | None = cast(
             "discord.VoiceClient | None", guild.voice_client
         )
@@ -85,14 +187,22 @@ class VoiceConnectionService:
                 )
 
         try:
-            vc = await channel.connect()
+            if self.voice_scheduler is not None:
+                vc = await channel.connect(
+                    cls=voice_client_class(self.voice_scheduler)
+                )
+            else:
+                vc = await channel.connect()
         except discord.ClientException as e:
             raise ValueError(f"Cannot connect to voice channel: {e}") from e
         except asyncio.TimeoutError as e:
             raise ValueError("Voice connection timed out") from e
 
         controller = AudioController()
-        mixer = MixerSource(controller)
+        if engine.AUDIO_ENGINE == "process":
+            mixer: MixerSource = engine.EngineMixerSource(controller)
+        else:
+            mixer = MixerSource(controller, loudness=self.loudness)
         guild_config = GuildConfig(
             id=guild.id,
             mixer=mixer,
@@ -111,8 +221,11 @@ class VoiceConnectionService:
         )
         mixer.add_observer("queue_end", callback)
         mixer.add_observer("track_end", bg_callback)
+        controller.on_change(guild_config.bump_version)
         guild_config.ctx = ctx
         self.guilds[guild.id] = guild_config
+        self._last_active[guild.id] = time.monotonic()
+        self._empty_since.pop(guild.id, None)
         vc.play(mixer)
         logger.info(
             f"Connected to voice channel {channel.name} in guild {guild.name}"
@@ -120,13 +233,37 @@ class VoiceConnectionService:
 
         return guild_config
 
-    async def disconnect(self, guild_id: int) -> None:
-        """Disconnect from voice and clean up all audio resources."""
-        guild_config = self.guilds.get(guild_id)
-        if not guild_config:
-            raise ValueError("Guilda não conectada")
+    async def _move(
+        self,
+        guild_config: GuildConfig,
+        channel: VoiceChannel,
+        ctx: Context | None,
+    ) -> bool:
+        """Move a live connection to *channel*, keeping its mixer.
 
-        # Clean up all audio resources before disconnecting
+        Returns False when the voice client is no longer connected.
+        """
+        voice = guild_config.voice_client
+        if voice is None or not voice.is_connected():
+            return False
+        if ctx is not None:
+            guild_config.ctx = ctx
+        if voice.channel is not None and voice.channel.id == channel.id:
+            return True
+
+        await voice.move_to(channel, timeout=VOICE_MOVE_TIMEOUT)
+        if voice.channel is None or voice.channel.id != channel.id:
+            raise ValueError("Voice channel move timed out")
+        guild_config.channel = channel
+        guild_config.bump_version()
+        logger.info(
+            f"Moved to voice channel {channel.name} in guild {guild_config.id}"
+        )
+        return True
+
+    def _release(self, guild_config: GuildConfig) -> None:
+        """Stop a guild's sources and its mixer."""
+        guild_id = guild_config.id
         try:
             guild_config.controller.cleanup_all()
         except Exception:
@@ -142,10 +279,109 @@ class VoiceConnectionService:
                 f"Error cleaning up mixer for guild {guild_id}"
             )
 
+    async def disconnect(self, guild_id: int) -> None:
+        """Disconnect from voice and clean up all audio resources."""
+        guild_config = self.guilds.get(guild_id)
+        if not guild_config:
+            raise ValueError("Guilda não conectada")
+
+        # Clean up all audio resources before disconnecting
+        self._release(guild_config)
+
         # Disconnect from voice
         voice_client = guild_config.voice_client
         if voice_client and voice_client.is_connected():
             await voice_client.disconnect()
 
         del self.guilds[guild_id]
+        self._last_active.pop(guild_id, None)
+        self._empty_since.pop(guild_id, None)
         logger.info(f"Disconnected and cleaned up guild {guild_id}")
+
+    # --- Lifecycle ---
+
+    @staticmethod
+    def _is_active(guild_config: GuildConfig) -> bool:
+        """Whether the guild plays audio or holds paused audio."""
+        voice = guild_config.voice_client
+        if voice is None:
+            return False
+        controller = guild_config.controller
+        if voice.is_paused():
+            return bool(controller.all_sources())
+        return voice.is_playing() and (
+            guild_config.mixer.has_active_tracks
+            or bool(controller.get_paused_sounds())
+        )
+
+    @staticmethod
+    def _channel_empty(guild_config: GuildConfig) -> bool:
+        voice = guild_config.voice_client
+        channel = voice.channel if voice is not None else None
+        if channel is None:
+            return False
+        return all(member.bot for member in channel.members)
+
+    def _reap_reason(
+        self, guild_id: int, guild_config: GuildConfig, now: float
+    ) -> str | None:
+        """Why the guild should be released now, or None to keep it."""
+        if self._is_active(guild_config):
+            self._last_active[guild_id] = now
+        idle = now - self._last_active.setdefault(guild_id, now)
+        if self.idle_timeout and idle >= self.idle_timeout:
+            return f"idle for {idle:.0f}s"
+
+        if not self._channel_empty(guild_config):
+            self._empty_since.pop(guild_id, None)
+            return None
+        empty = now - self._empty_since.setdefault(guild_id, now)
+        if self.empty_channel_timeout and empty >= self.empty_channel_timeout:
+            return f"channel empty for {empty:.0f}s"
+        return None
+
+    async def reap(self, now: float | None = None) -> list[int]:
+        """Disconnect the guilds that are idle or alone; return their IDs."""
+        now = time.monotonic() if now is None else now
+        reaped = []
+        for guild_id, guild_config in list(self.guilds.items()):
+            reason = self._reap_reason(guild_id, guild_config, now)
+            if reason is None:
+                continue
+            logger.info(f"Releasing guild {guild_id}: {reason}")
+            try:
+                await self.disconnect(guild_id)
+            except Exception:
+                logger.opt(exception=True).warning(
+                    f"Error releasing idle guild {guild_id}"
+                )
+                continue
+            reaped.append(guild_id)
+        return reaped
+
+    def resources(self, guild_id: int) -> GuildResources | None:
+        """What *guild_id* holds, or None if it is not connected."""
+        guild_config = self.guilds.get(guild_id)
+        if guild_config is None:
+            return None
+        mixer = guild_config.mixer
+        sources = guild_config.controller.all_sources()
+        ffmpeg = sum(1 for source in sources if _ffmpeg_running(source))
+        threads = mixer.reader_threads()
+        if isinstance(mixer, engine.EngineMixerSource):
+            ffmpeg += mixer.remote_sources
+        voice = guild_config.voice_client
+        # discord.py's player thread; the shared scheduler is not
+        # counted against any one guild.
+        if self.voice_scheduler is None and voice is not None:
+            if voice.is_playing() or voice.is_paused():
+                threads += 1
+        return GuildResources(
+            sources=len(sources),
+            threads=threads,
+            ffmpeg_processes=ffmpeg,
+            buffered_bytes=mixer.buffered_bytes(),
+            voice_scheduler=(
+                self.voice_scheduler.stats() if self.voice_scheduler else None
+            ),
+        )
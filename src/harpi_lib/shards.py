@@ -0,0 +1,118 @@
+"""Sharded deployment: several bot processes, one web app.
+
+Discord assigns every guild to a shard, ``(guild_id >> 22) %
+shard_count``.  With ``HARPI_SHARD_WORKERS=N`` the bot host starts N
+worker processes; worker *i* runs a ``ShardedHarpiBot`` for a contiguous
+range of the ``HARPI_SHARD_COUNT`` shards (``worker_shards``), with its
+own ``HarpiAPI``, and serves it on its own socket (``worker_socket``).
+
+In the web app, ``ShardRouter`` stands in for the single
+``RemoteControl``: it has the same coroutines and forwards each call to
+the worker owning the guild.  Calls that are not about one guild fan out
+to every worker: ``guilds`` merges the directories, ``get_add_job`` asks
+each worker for the job.
+
+With one worker (the default) nothing changes: the bot runs every shard
+and the socket is ``HARPI_BOT_SOCKET`` itself.
+
+Thread safety
+-------------
+A ``ShardRouter`` belongs to the event loop that first uses it, like the
+``RemoteControl`` instances it holds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from src.harpi_lib.guild_directory import DirectorySnapshot, GuildEntry
+from src.harpi_lib.rpc import CALLS
+
+if TYPE_CHECKING:
+    from src.harpi_lib.rpc import RemoteControl, RemoteStatusStream
+
+SHARD_COUNT = int(os.getenv("HARPI_SHARD_COUNT", "1"))
+SHARD_WORKERS = int(os.getenv("HARPI_SHARD_WORKERS", "1"))
+
+# RPC calls that are not about one guild; the others take it first.
+_FAN_OUT = frozenset({"guilds", "get_add_job"})
+
+
+def shard_of(guild_id: int, shard_count: int) -> int:
+    """The shard Discord delivers *guild_id*'s events on."""
+    return (guild_id >> 22) % shard_count
+
+
+def worker_shards(worker: int, workers: int, shard_count: int) -> range:
+    """The shards run by *worker*, an even contiguous split."""
+    if not 0 <= worker < workers <= shard_count:
+        raise ValueError(
+            f"Worker {worker} de {workers} inválido para {shard_count} shards"
+        )
+    return range(
+        worker * shard_count // workers, (worker + 1) * shard_count // workers
+    )
+
+
+def worker_socket(base: Path | str, worker: int, workers: int) -> Path:
+    """Socket of *worker*: *base* itself when there is only one."""
+    base = Path(base)
+    if workers == 1:
+        return base
+    return base.with_name(f"{base.stem}-{worker}{base.suffix}")
+
+
+class ShardRouter:
+    """``BotControl`` of a bot split across shard workers."""
+
+    def __init__(
+        self, workers: Sequence[RemoteControl], shard_count: int
+    ) -> None:
+        if not workers:
+            raise ValueError("ShardRouter needs at least one worker")
+        self.workers = list(workers)
+        self.shard_count = shard_count
+        # Owning worker, by shard.
+        self._owners: list[RemoteControl] = []
+        for index, worker in enumerate(self.workers):
+            shards = worker_shards(index, len(self.workers), shard_count)
+            self._owners.extend([worker] * len(shards))
+
+    def worker_for(self, guild_id: int) -> RemoteControl:
+        """The worker whose shards include *guild_id*."""
+        return self._owners[shard_of(guild_id, self.shard_count)]
+
+    def __getattr__(self, method: str) -> Callable[..., Any]:
+        if method not in CALLS or method in _FAN_OUT:
+            raise AttributeError(method)
+
+        async def call(guild_id: int, /, *args: Any, **kwargs: Any) -> Any:
+            worker = self.worker_for(guild_id)
+            return await getattr(worker, method)(guild_id, *args, **kwargs)
+
+        call.__name__ = method
+        return call
+
+    async def guilds(self) -> tuple[GuildEntry, ...]:
+        parts = await asyncio.gather(*(w.guilds() for w in self.workers))
+        return DirectorySnapshot.build(
+            entry for part in parts for entry in part
+        ).guilds
+
+    async def get_add_job(self, job_id: str) -> dict[str, Any] | None:
+        jobs = await asyncio.gather(
+            *(w.get_add_job(job_id) for w in self.workers)
+        )
+        return next((job for job in jobs if job is not None), None)
+
+    async def open_status_stream(
+        self, guild_id: int
+    ) -> RemoteStatusStream | None:
+        return await self.worker_for(guild_id).open_status_stream(guild_id)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(w.close() for w in self.workers))
@@ -0,0 +1,211 @@
+"""Push channel for per-guild playback status.
+
+Services publish small ``StatusEvent`` deltas (track change, queue edit,
+volume, loop mode, layer add/remove) whenever they mutate a
+``GuildConfig``.  HTTP handlers subscribe to a guild, send a full snapshot
+first and then stream the deltas to the dashboard (see the
+``/api/music/<guild_id>/events`` endpoint), instead of the dashboard
+polling and rebuilding the whole status every few seconds.
+
+Thread safety
+-------------
+``publish`` is called from the bot's event loop (and occasionally from
+Quart handlers), while each ``StatusSubscription`` is consumed on the
+Quart event loop.  ``StatusHub._lock`` guards the subscriber registry
+and each subscription guards its buffer with its own lock, so publishing
+never touches another loop's asyncio objects directly: the consumer is
+woken with ``loop.call_soon_threadsafe``.
+
+A subscriber that falls more than ``SUBSCRIBER_BUFFER`` events behind
+drops its buffered deltas and is flagged with ``needs_resync`` so the
+stream sends a fresh snapshot instead of an inconsistent delta.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import discord
+
+    from src.harpi_lib.api import GuildConfig
+    from src.harpi_lib.music.track_queue import QueueEntry
+    from src.harpi_lib.music.ytmusicdata import YoutubeDLSource, YTMusicData
+
+# Deltas buffered per subscriber before it is forced to resync.
+SUBSCRIBER_BUFFER = 256
+
+
+@dataclass(frozen=True, slots=True)
+class StatusEvent:
+    """A named status change with a JSON-serializable payload."""
+
+    type: str
+    data: dict[str, Any]
+
+    def encode(self) -> str:
+        """Encode as a Server-Sent Events frame."""
+        payload = json.dumps(self.data, separators=(",", ":"))
+        return f"event: {self.type}\ndata: {payload}\n\n"
+
+
+def track_payload(music: YTMusicData | None) -> dict[str, Any] | None:
+    """Serialize a track like ``MusicTrackResponse``/``QueueItemResponse``."""
+    if music is None:
+        return None
+    return {
+        "title": music.title,
+        "duration": music.duration,
+        "url": music.url,
+    }
+
+
+def queue_item_payload(entry: QueueEntry) -> dict[str, Any]:
+    """Serialize a queue entry like ``QueueItemResponse``."""
+    return {"id": entry.id, **(track_payload(entry.item) or {})}
+
+
+def layer_payload(
+    layer_id: str, source: YoutubeDLSource, paused: bool = False
+) -> dict[str, Any]:
+    """Serialize a background layer like ``MusicLayerResponse``."""
+    return {
+        "title": source.title,
+        "id": layer_id,
+        "url": source.url,
+        "volume": source.volume,
+        "paused": paused,
+    }
+
+
+def playback_payload(
+    guild_config: GuildConfig | None, voice_client: discord.VoiceClient | None
+) -> dict[str, Any]:
+    """Serialize the position and play/pause state of a guild.
+
+    These fields change without a version bump; they are sent as
+    ``playback`` events and ``position`` ticks.
+    """
+    source = (
+        guild_config.controller.get_queue_source() if guild_config else None
+    )
+    return {
+        "progress": int(getattr(source, "progress", 0)),
+        "is_playing": voice_client.is_playing() if voice_client else False,
+        "is_paused": voice_client.is_paused() if voice_client else False,
+    }
+
+
+class StatusSubscription:
+    """One consumer's buffered view of a guild's status events."""
+
+    def __init__(self, guild_id: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.guild_id = guild_id
+        self.needs_resync = False
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._buffer: deque[StatusEvent] = deque()
+        self._wakeup = asyncio.Event()
+
+    def push(self, event: StatusEvent) -> None:
+        """Buffer *event* and wake the consumer (any thread)."""
+        with self._lock:
+            if len(self._buffer) >= SUBSCRIBER_BUFFER:
+                self._buffer.clear()
+                self.needs_resync = True
+            else:
+                self._buffer.append(event)
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def drain(self) -> list[StatusEvent]:
+        """Return and clear all buffered events (any thread)."""
+        with self._lock:
+            events = list(self._buffer)
+            self._buffer.clear()
+        return events
+
+    def resynced(self) -> None:
+        """Mark that a fresh snapshot has been sent."""
+        with self._lock:
+            self.needs_resync = False
+
+    async def wait(self, timeout: float) -> list[StatusEvent]:
+        """Wait up to *timeout* seconds for events and drain them.
+
+        Returns an empty list on timeout (or when only a resync is due).
+        """
+        # A wake-up scheduled by a concurrent ``push`` runs after this
+        # clear, so no event is missed.
+        self._wakeup.clear()
+        if not self._buffer and not self.needs_resync:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+        return self.drain()
+
+
+class StatusHub:
+    """Fan status events out to the subscribers of each guild."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, list[StatusSubscription]] = {}
+
+    def subscribe(
+        self,
+        guild_id: int,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> StatusSubscription:
+        """Register a subscription consumed on *loop* (default: current)."""
+        subscription = StatusSubscription(
+            guild_id, loop or asyncio.get_running_loop()
+        )
+        with self._lock:
+            self._subscribers.setdefault(guild_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription) -> None:
+        """Remove a subscription; unknown subscriptions are ignored."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.guild_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.guild_id, None)
+
+    def subscriber_count(self, guild_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(guild_id, []))
+
+    def publish(
+        self, guild_id: int, event_type: str, data: dict[str, Any]
+    ) -> None:
+        """Send an event to every subscriber of *guild_id*.
+
+        Cheap when nobody is listening: a dict lookup under the lock.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(guild_id, ()))
+        if not subscribers:
+            return
+        event = StatusEvent(event_type, data)
+        for subscription in subscribers:
+            subscription.push(event)
+
+    def changed(
+        self, guild_config: GuildConfig, event_type: str, data: dict[str, Any]
+    ) -> None:
+        """Record a mutation of *guild_config* that was just made.
+
+        Bumps its version first, so a subscriber woken by the event never
+        reads the version from before the change.
+        """
+        guild_config.bump_version()
+        self.publish(guild_config.id, event_type, data)
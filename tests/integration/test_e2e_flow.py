@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 
 from src.harpi_lib.api import LoopMode
+from src.harpi_lib.music.track_queue import TrackQueue
 
 
 class TestFullPlaybackFlow:
@@ -38,7 +39,7 @@ class TestFullPlaybackFlow:
         mock_music2 = MagicMock()
         mock_music2.title = "Song 2"
 
-        guild_config.queue = [mock_music1, mock_music2]
+        guild_config.queue = TrackQueue([mock_music1, mock_music2])
         guild_config.current_music = None
 
         with patch(
@@ -62,7 +63,7 @@ class TestFullPlaybackFlow:
 
         await api.stop_music(12345)
 
-        assert guild_config.queue == []
+        assert list(guild_config.queue) == []
         assert guild_config.current_music is None
         assert guild_config.controller.get_queue_source() is None
 
@@ -109,7 +110,7 @@ class TestLoopModes:
         mock_music2 = MagicMock()
         mock_music2.title = "Song 2"
 
-        guild_config.queue = [mock_music1]
+        guild_config.queue = TrackQueue([mock_music1])
         guild_config.current_music = mock_music2
         guild_config.loop = LoopMode.QUEUE
 
@@ -208,7 +209,7 @@ class TestMultipleGuilds:
 
         assert 111 in api.guilds
         assert 222 in api.guilds
-        assert config1.queue == []
+        assert list(config1.queue) == []
         assert config2.queue is None
 
         await api.set_music_volume(111, 0.5)
@@ -126,9 +126,10 @@ class TestMusicPlayback:
                 "type": "queue",
             },
         )
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = response.json()
-        assert data.get("status") == "ok"
+        assert data.get("status") == "accepted"
+        assert data.get("job_id")
         await asyncio.sleep(3)
 
     @pytest.mark.asyncio
@@ -159,9 +160,10 @@ class TestMusicPlayback:
                 "type": "queue",
             },
         )
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = response.json()
-        assert data.get("status") == "ok"
+        assert data.get("status") == "accepted"
+        assert data.get("job_id")
         await asyncio.sleep(2)
 
     @pytest.mark.asyncio
@@ -282,9 +284,10 @@ class TestLayers:
                 "type": "layer",
             },
         )
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = response.json()
-        assert data.get("status") == "ok"
+        assert data.get("status") == "accepted"
+        assert data.get("job_id")
         await asyncio.sleep(2)
 
     @pytest.mark.asyncio
@@ -0,0 +1,358 @@
+"""Tests for asynchronous add-music jobs."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import music
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.command_bus import CommandBus
+from src.harpi_lib.jobs import JobRegistry, JobStage
+from src.harpi_lib.music.track_queue import QueueEntry
+from src.harpi_lib.music.ytmusicdata import YoutubeDLSource
+from src.harpi_lib.services.add_jobs import AddJobService
+from src.harpi_lib.status_events import StatusHub
+
+FROM_URL = "src.harpi_lib.services.add_jobs.YTMusicData.from_url"
+
+
+def _drain_types(subscription) -> list[str]:
+    return [event.data["stage"] for event in subscription.drain()]
+
+
+class TestJobRegistry:
+    def test_update_records_stage_and_publishes(self):
+        hub = StatusHub()
+        registry = JobRegistry(hub)
+        job = registry.create(1, "queue", ["a"])
+        subscription = hub.subscribe(1, loop=asyncio.new_event_loop())
+
+        registry.update(job, JobStage.RESOLVE)
+        registry.update(job, JobStage.DONE, tracks=2)
+
+        payload = registry.payload(job.id)
+        assert payload["stage"] == "done"
+        assert payload["tracks"] == 2
+        assert set(payload["stage_times"]) == {"resolve", "done"}
+        assert _drain_types(subscription) == ["resolve", "done"]
+
+    def test_unknown_job(self):
+        assert JobRegistry().payload("nope") is None
+
+    def test_evicts_expired_finished_jobs(self):
+        registry = JobRegistry(ttl=0.0)
+        old = registry.create(1, "queue", ["a"])
+        registry.update(old, JobStage.DONE)
+        old.finished_at -= 1
+
+        registry.create(1, "queue", ["b"])
+        assert registry.payload(old.id) is None
+        assert len(registry) == 1
+
+    def test_caps_number_of_jobs(self):
+        registry = JobRegistry(max_jobs=2)
+        first = registry.create(1, "queue", ["a"])
+        registry.create(1, "queue", ["b"])
+        registry.create(1, "queue", ["c"])
+        assert registry.payload(first.id) is None
+        assert len(registry) == 2
+
+
+@pytest.fixture
+def guilds():
+    return {}
+
+
+@pytest.fixture
+def music_queue():
+    service = MagicMock()
+    service.enqueue = AsyncMock()
+    service.stop = AsyncMock()
+    return service
+
+
+@pytest.fixture
+def background():
+    service = MagicMock()
+    service.add_resolved = AsyncMock()
+    return service
+
+
+@pytest.fixture
+def jobs():
+    return JobRegistry()
+
+
+@pytest.fixture
+async def commands(music_queue, background):
+    bot = MagicMock()
+    bot.loop = asyncio.get_running_loop()
+    return CommandBus(
+        bot,
+        {
+            "enqueue": music_queue.enqueue,
+            "add_layer": background.add_resolved,
+            "stop": music_queue.stop,
+        },
+    )
+
+
+@pytest.fixture
+def service(guilds, commands, jobs):
+    return AddJobService(MagicMock(), guilds, commands, jobs)
+
+
+def _guild(guilds, guild_id: int = 1) -> GuildConfig:
+    gc = GuildConfig(id=guild_id, mixer=MagicMock(), controller=MagicMock())
+    guilds[guild_id] = gc
+    return gc
+
+
+class TestAddJobService:
+    @pytest.mark.asyncio
+    async def test_resolves_links_concurrently_in_order(
+        self, service, guilds, music_queue, jobs
+    ):
+        _guild(guilds)
+        in_flight = 0
+        peak = 0
+
+        async def from_url(link):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01 if link == "a" else 0)
+            in_flight -= 1
+            return [f"track-{link}"]
+
+        music_queue.enqueue.return_value = [QueueEntry(1, "track-a")]
+        job = jobs.create(1, "queue", ["a", "b", "c"])
+        with patch(FROM_URL, side_effect=from_url):
+            await service.run(job, channel_id=2)
+
+        music_queue.enqueue.assert_awaited_once_with(
+            1, channel_id=2, music_data_list=["track-a", "track-b", "track-c"]
+        )
+        assert peak == 3
+        payload = jobs.payload(job.id)
+        assert payload["stage"] == "done"
+        assert payload["resolved"] == 3
+        assert payload["tracks"] == 3
+        # Only queued behind the current track.
+        assert payload["started"] is None
+
+    @pytest.mark.asyncio
+    async def test_failed_links_are_skipped(
+        self, service, guilds, music_queue, jobs
+    ):
+        _guild(guilds)
+
+        async def from_url(link):
+            if link == "bad":
+                raise ValueError("nope")
+            return [link]
+
+        music_queue.enqueue.return_value = [QueueEntry(1, "good")]
+        job = jobs.create(1, "queue", ["bad", "good"])
+        with patch(FROM_URL, side_effect=from_url):
+            await service.run(job, channel_id=2)
+
+        payload = jobs.payload(job.id)
+        assert payload["stage"] == "done"
+        assert payload["failed_links"] == ["bad"]
+
+    @pytest.mark.asyncio
+    async def test_fails_when_nothing_resolves(self, service, jobs):
+        job = jobs.create(1, "queue", ["x"])
+        with patch(FROM_URL, AsyncMock(return_value=[])):
+            await service.run(job, channel_id=2)
+
+        payload = jobs.payload(job.id)
+        assert payload["stage"] == "failed"
+        assert payload["error"]
+
+    @pytest.mark.asyncio
+    async def test_enqueue_error_fails_job(self, service, music_queue, jobs):
+        music_queue.enqueue.side_effect = ValueError("Canal não encontrado")
+        job = jobs.create(1, "queue", ["x"])
+        with patch(FROM_URL, AsyncMock(return_value=["x"])):
+            await service.run(job, channel_id=2)
+
+        payload = jobs.payload(job.id)
+        assert payload["stage"] == "failed"
+        assert payload["error"] == "Canal não encontrado"
+
+    @pytest.mark.asyncio
+    async def test_waits_for_first_frame_of_started_track(
+        self, service, guilds, music_queue, jobs
+    ):
+        gc = _guild(guilds)
+        source = MagicMock(spec=YoutubeDLSource)
+        source.frames_read = 0
+        gc.controller.get_queue_source.return_value = source
+
+        async def enqueue(guild_id, channel_id, music_data_list):
+            gc.current_music = music_data_list[0]
+            return [QueueEntry(1, music_data_list[0])]
+
+        music_queue.enqueue.side_effect = enqueue
+        job = jobs.create(1, "queue", ["x"])
+        with patch(FROM_URL, AsyncMock(return_value=["x"])):
+            task = asyncio.create_task(service.run(job, channel_id=2))
+            while jobs.payload(job.id)["stage"] != "first_frame":
+                await asyncio.sleep(0)
+            source.on_first_frame()
+            await task
+
+        payload = jobs.payload(job.id)
+        assert payload["stage"] == "done"
+        assert payload["started"] is True
+        assert source.on_first_frame is None
+
+    @pytest.mark.asyncio
+    async def test_guild_disconnected_during_enqueue(
+        self, service, guilds, music_queue, background, jobs
+    ):
+        _guild(guilds)
+
+        async def enqueue(guild_id, channel_id, music_data_list):
+            guilds.pop(guild_id)
+            return [QueueEntry(1, music_data_list[0])]
+
+        music_queue.enqueue.side_effect = enqueue
+        background.add_resolved.return_value = "l1"
+        queued = jobs.create(1, "queue", ["x"])
+        with patch(FROM_URL, AsyncMock(return_value=["x"])):
+            await service.run(queued, channel_id=2)
+            layered = jobs.create(1, "layer", ["y"])
+            await service.run(layered, channel_id=2)
+
+        for job in (queued, layered):
+            payload = jobs.payload(job.id)
+            assert payload["stage"] == "done"
+            assert payload["started"] is None
+
+    @pytest.mark.asyncio
+    async def test_enqueue_waits_for_earlier_guild_commands(
+        self, service, commands, guilds, music_queue, jobs
+    ):
+        _guild(guilds)
+        order = []
+        release = asyncio.Event()
+
+        async def stop(guild_id):
+            await release.wait()
+            order.append("stop")
+
+        async def enqueue(guild_id, channel_id, music_data_list):
+            order.append("enqueue")
+            return [QueueEntry(1, music_data_list[0])]
+
+        music_queue.stop.side_effect = stop
+        music_queue.enqueue.side_effect = enqueue
+        stopped = asyncio.wrap_future(commands.submit(1, "stop"))
+        job = jobs.create(1, "queue", ["x"])
+        with patch(FROM_URL, AsyncMock(return_value=["x"])):
+            task = asyncio.create_task(service.run(job, channel_id=2))
+            while jobs.payload(job.id)["stage"] != "enqueue":
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.01)
+            release.set()
+            await asyncio.gather(stopped, task)
+
+        assert order == ["stop", "enqueue"]
+
+    @pytest.mark.asyncio
+    async def test_layers_are_added_in_order(
+        self, service, guilds, background, jobs
+    ):
+        gc = _guild(guilds)
+        gc.background = {}
+        background.add_resolved.side_effect = ["l1", "l2"]
+        job = jobs.create(1, "layer", ["a", "b"])
+        with patch(FROM_URL, AsyncMock(side_effect=lambda link: [link])):
+            await service.run(job, channel_id=2)
+
+        added = [
+            c.kwargs["music_data"]
+            for c in background.add_resolved.await_args_list
+        ]
+        assert added == ["a", "b"]
+        assert jobs.payload(job.id)["stage"] == "done"
+
+
+@pytest.fixture
+def client():
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.api.get_guild_config.return_value = None
+    bot.api.submit_add_job.return_value.id = "job-1"
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client(), bot.api
+
+    deps._bot_ref = original
+
+
+class TestAddEndpoint:
+    @pytest.mark.asyncio
+    async def test_returns_202_with_job_id(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/add",
+            json={
+                "guild_id": "1",
+                "channel_id": "2",
+                "link": "a",
+                "links": ["b", "c"],
+            },
+        )
+        assert response.status_code == 202
+        body = json.loads(await response.get_data())
+        assert body == {"status": "accepted", "error": None, "job_id": "job-1"}
+        api.submit_add_job.assert_called_once_with(
+            1, 2, ["a", "b", "c"], "queue"
+        )
+
+    @pytest.mark.asyncio
+    async def test_requires_a_link(self, client):
+        test_client, _ = client
+        response = await test_client.post(
+            "/api/music/add", json={"guild_id": "1", "channel_id": "2"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_requires_channel_when_not_connected(self, client):
+        test_client, _ = client
+        response = await test_client.post(
+            "/api/music/add", json={"guild_id": "1", "link": "a"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_job_status(self, client):
+        test_client, api = client
+        api.get_add_job.return_value = (
+            JobRegistry().create(1, "queue", ["a"]).to_dict()
+        )
+        response = await test_client.get("/api/music/jobs/whatever")
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["stage"] == "pending"
+        assert body["guild_id"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_is_404(self, client):
+        test_client, api = client
+        api.get_add_job.return_value = None
+        response = await test_client.get("/api/music/jobs/nope")
+        assert response.status_code == 404
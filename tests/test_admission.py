@@ -0,0 +1,142 @@
+"""Tests for resource budgets and admission control."""
+
+import uuid
+from unittest.mock import MagicMock
+
+import discord
+import pytest
+
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.audio.broadcast import BroadcastRegistry
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.music.ytmusicdata import FFmpegPCMAudio, UniqueAudioSource
+from src.harpi_lib.services.admission import (
+    DECODER_MEMORY_BYTES,
+    Admission,
+    BudgetExceeded,
+    ResourceBudget,
+    decoder_of,
+)
+
+
+def _decoder() -> MagicMock:
+    source = MagicMock(spec=FFmpegPCMAudio)
+    source.id = str(uuid.uuid4())
+    source.is_opus.return_value = False
+    return source
+
+
+def _guild(guilds, guild_id: int, decoders: int = 0, buttons: int = 0):
+    controller = AudioController()
+    for _ in range(decoders):
+        controller.add_layer(_decoder())
+    for _ in range(buttons):
+        controller.add_button_sound(MagicMock())
+    mixer = MagicMock()
+    mixer.buffered_bytes.return_value = 0
+    guilds[guild_id] = GuildConfig(
+        id=guild_id, mixer=mixer, controller=controller
+    )
+    return guilds[guild_id]
+
+
+def _budget(**limits) -> ResourceBudget:
+    unlimited = dict(
+        guild_sources=0, guild_decoders=0, decoders=0, memory_bytes=0
+    )
+    return ResourceBudget(**{**unlimited, **limits})
+
+
+class TestDecoderOf:
+    def test_unwraps_volume_transformer(self):
+        decoder = _decoder()
+        assert decoder_of(discord.PCMVolumeTransformer(decoder)) is decoder
+
+    def test_other_sources_have_none(self):
+        assert decoder_of(MagicMock()) is None
+
+
+class TestAdmit:
+    def test_counts_sources_and_decoders(self):
+        guilds = {}
+        _guild(guilds, 1, decoders=2, buttons=1)
+        usage = Admission(guilds).usage(1)
+        assert (usage.sources, usage.decoders) == (3, 2)
+        assert usage.memory_bytes == 2 * DECODER_MEMORY_BYTES
+
+    def test_shared_decoder_counts_once(self):
+        guilds, registry, decoder = {}, BroadcastRegistry(), _decoder()
+        for guild_id in (1, 2):
+            cursor = registry.subscribe("url", live=True)
+            if cursor is None:
+                cursor = registry.publish("url", decoder, {}, live=True)
+            _guild(guilds, guild_id).controller.add_layer(
+                UniqueAudioSource(original=cursor)
+            )
+        usage = Admission(guilds).usage()
+        assert (usage.sources, usage.decoders) == (2, 1)
+
+    def test_guild_source_limit(self):
+        guilds = {}
+        _guild(guilds, 1, decoders=1, buttons=1)
+        admission = Admission(guilds, _budget(guild_sources=3))
+        admission.admit(1)
+        with pytest.raises(BudgetExceeded, match="3 sons"):
+            admission.admit(1, decoders=2)
+
+    def test_guild_decoder_limit(self):
+        guilds = {}
+        _guild(guilds, 1, decoders=2)
+        _guild(guilds, 2)
+        admission = Admission(guilds, _budget(guild_decoders=2))
+        with pytest.raises(BudgetExceeded, match="2 camadas"):
+            admission.admit(1)
+        admission.admit(2, decoders=2)
+
+    def test_bot_wide_limits(self):
+        guilds = {}
+        _guild(guilds, 1, decoders=3)
+        _guild(guilds, 2)
+        with pytest.raises(BudgetExceeded, match="tente novamente"):
+            Admission(guilds, _budget(decoders=3)).admit(2)
+        memory = _budget(memory_bytes=4 * DECODER_MEMORY_BYTES)
+        Admission(guilds, memory).admit(2)
+        with pytest.raises(BudgetExceeded, match="Memória"):
+            Admission(guilds, memory).admit(2, decoders=2)
+
+    def test_zero_decoders_always_fit(self):
+        guilds = {}
+        _guild(guilds, 1, decoders=5)
+        Admission(guilds, _budget(guild_decoders=1)).admit(1, decoders=0)
+
+    def test_budget_exceeded_is_a_value_error(self):
+        assert issubclass(BudgetExceeded, ValueError)
+
+
+class TestReserve:
+    def test_holds_slots_until_released(self):
+        guilds = {}
+        _guild(guilds, 1)
+        admission = Admission(guilds, _budget(guild_decoders=2))
+        with admission.reserve(1, 2):
+            assert admission.usage(1).decoders == 2
+            with pytest.raises(BudgetExceeded):
+                admission.admit(1)
+        assert admission.usage(1).decoders == 0
+        admission.admit(1, 2)
+
+    def test_released_on_error(self):
+        guilds = {}
+        _guild(guilds, 1)
+        admission = Admission(guilds, _budget(decoders=1))
+        with pytest.raises(RuntimeError), admission.reserve(1):
+            raise RuntimeError("open failed")
+        assert admission.usage().decoders == 0
+
+    def test_rejected_reservation_holds_nothing(self):
+        guilds = {}
+        _guild(guilds, 1, decoders=1)
+        admission = Admission(guilds, _budget(guild_decoders=1))
+        with pytest.raises(BudgetExceeded), admission.reserve(1):
+            pass
+        assert admission._reserved == {}
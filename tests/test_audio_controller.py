@@ -227,6 +227,40 @@ class TestGetPlayingSounds:
         assert len(sounds) == 4
 
 
+class TestOnChange:
+    def test_mutations_notify(self, soundboard_controller: AudioController):
+        changes = MagicMock()
+        soundboard_controller.on_change(changes)
+        source = MagicMock()
+
+        layer_id = soundboard_controller.add_layer(source)
+        soundboard_controller.remove_layer(layer_id)
+        soundboard_controller.set_queue_source(MagicMock())
+        soundboard_controller.clear_queue_source()
+
+        assert changes.call_count == 4
+
+    def test_removing_unknown_layer_does_not_notify(
+        self, soundboard_controller: AudioController
+    ):
+        changes = MagicMock()
+        soundboard_controller.on_change(changes)
+
+        soundboard_controller.remove_layer("missing")
+        changes.assert_not_called()
+
+    def test_finished_source_notifies(
+        self, soundboard_controller: AudioController
+    ):
+        changes = MagicMock()
+        source = MagicMock()
+        soundboard_controller.set_queue_source(source)
+        soundboard_controller.on_change(changes)
+
+        soundboard_controller.remove_finished_source(source)
+        changes.assert_called_once()
+
+
 class TestThreadSafety:
     def test_concurrent_add_remove(
         self, soundboard_controller: AudioController
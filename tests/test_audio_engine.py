@@ -0,0 +1,367 @@
+"""Tests for the out-of-process audio engine and its frame ring."""
+
+import queue
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.dsp import EffectSpec
+from src.harpi_lib.audio.engine import (
+    AudioEngine,
+    EngineMixerSource,
+    StreamSpec,
+    _EngineWorker,
+    stream_spec,
+)
+from src.harpi_lib.audio.frame_ring import FRAME_SIZE, FrameRing
+from src.harpi_lib.audio.tone_source import TestToneSource
+from src.harpi_lib.music.ytmusicdata import FFmpegPCMAudio, YoutubeDLSource
+from tests.conftest import generate_silence_frame, generate_tone_frame
+
+
+def _frame(value: int) -> bytes:
+    return bytes([value]) * FRAME_SIZE
+
+
+def _stream(url: str = "https://stream/a", volume: float = 0.5):
+    return YoutubeDLSource(
+        FFmpegPCMAudio(url, before_options="-re", options="-vn"),
+        data={"title": "a", "url": url},
+        volume=volume,
+    )
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create(slots=3)
+    yield ring
+    ring.close()
+
+
+class TestFrameRing:
+    def test_frames_come_out_in_order(self, ring):
+        assert ring.write(_frame(1))
+        assert ring.write(_frame(2))
+        assert ring.read() == _frame(1)
+        assert ring.read() == _frame(2)
+        assert ring.read() is None
+
+    def test_full_ring_rejects_writes(self, ring):
+        for n in range(3):
+            assert ring.write(_frame(n))
+        assert not ring.write(_frame(9))
+        assert ring.available() == 3
+
+    def test_wraps_around(self, ring):
+        for n in range(10):
+            assert ring.write(_frame(n))
+            assert ring.read() == _frame(n)
+
+    def test_attached_ring_shares_frames(self, ring):
+        other = FrameRing.attach(ring.name, ring.slots)
+        try:
+            ring.write(_frame(7))
+            assert other.read() == _frame(7)
+            assert ring.available() == 0
+        finally:
+            other.close()
+
+
+class TestStreamSpec:
+    def test_url_source(self):
+        assert stream_spec(_stream()) == StreamSpec(
+            "https://stream/a", "-re", "-vn"
+        )
+
+    def test_piped_and_generated_sources_stay_local(self):
+        assert stream_spec(TestToneSource()) is None
+        piped = FFmpegPCMAudio(MagicMock(), pipe=True)
+        assert stream_spec(piped) is None
+
+
+@pytest.fixture
+def worker(ring, monkeypatch):
+    monkeypatch.setattr(
+        StreamSpec, "open", lambda self: TestToneSource(duration_ms=60)
+    )
+    worker = _EngineWorker(ring, queue.Queue(), queue.Queue())
+    yield worker
+    worker.close()
+
+
+def _drain(q) -> list:
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+class TestEngineWorker:
+    def test_mixes_sources_into_the_ring(self, worker, ring):
+        worker.apply([("add", "s1", StreamSpec("https://x"), 1.0, "ambience")])
+        worker.render()
+        frame = np.frombuffer(ring.read(), dtype=np.int16)
+        assert np.any(frame != 0)
+        assert _drain(worker.events) == [("progress", {"s1": 1})]
+
+    def test_reports_ended_sources(self, worker, ring):
+        worker.apply([("add", "s1", StreamSpec("https://x"), 1.0, "ambience")])
+        for _ in range(4):
+            worker.render()
+            ring.read()
+        assert ("ended", "s1", 3) in _drain(worker.events)
+        assert worker.sources == {}
+
+    def test_remove_and_volume(self, worker):
+        worker.apply([
+            ("add", "s1", StreamSpec("https://x"), 1.0, "ambience"),
+            ("volume", "s1", 0.25),
+        ])
+        assert worker.sources["s1"].volume == 0.25
+        worker.apply([("remove", "s1")])
+        assert worker.controller.get_playing_sounds() == []
+
+    def test_pause_stops_reading_the_source(self, worker, ring):
+        worker.apply([
+            ("add", "s1", StreamSpec("https://x"), 1.0, "ambience"),
+            ("pause", "s1", True),
+        ])
+        worker.render()
+        assert not np.frombuffer(ring.read(), dtype=np.int16).any()
+        assert worker.sources["s1"].frames == 0
+        worker.apply([("pause", "s1", False)])
+        worker.render()
+        assert np.frombuffer(ring.read(), dtype=np.int16).any()
+
+    def test_effects_run_in_the_engine(self, worker, ring):
+        pan = (EffectSpec("pan", pan=-1.0),)
+        worker.apply([
+            ("add", "s1", StreamSpec("https://x"), 1.0, "ambience"),
+            ("effects", "s1", pan),
+        ])
+        assert worker.controller.get_effects()["s1"].specs == pan
+        worker.render()
+        frame = np.frombuffer(ring.read(), dtype=np.int16)
+        assert frame[0::2].any()
+        assert not frame[1::2].any()
+        worker.apply([("effects", "s1", ())])
+        assert worker.controller.get_effects() == {}
+
+    def test_sources_play_on_their_buses(self, worker, ring):
+        worker.apply([
+            ("add", "s1", StreamSpec("https://x"), 1.0, "music"),
+            ("bus", "music", 1.0, True, ()),
+        ])
+        # The first frame ramps down to the mute.
+        worker.render()
+        ring.read()
+        worker.render()
+        assert not np.frombuffer(ring.read(), dtype=np.int16).any()
+        assert worker.controller.get_buses()["music"].muted is True
+        assert worker.controller.get_buses()["ambience"].muted is False
+
+    def test_duck_lowers_the_music_bus(self, worker, ring):
+        worker.apply([
+            ("add", "s1", StreamSpec("https://x"), 1.0, "music"),
+            ("duck", True),
+        ])
+        worker.render()
+        ducked = np.abs(np.frombuffer(ring.read(), dtype=np.int16)).max()
+        worker.render()
+        later = np.abs(np.frombuffer(ring.read(), dtype=np.int16)).max()
+        assert worker.mixer.ducked is True
+        assert later < ducked
+
+    def test_stop_message(self, worker):
+        worker.control.put(("sync", [("remove", "nope")]))
+        worker.control.put(("stop",))
+        assert worker.drain_control() is False
+
+
+class _FakeEngine:
+    def __init__(self, ring):
+        self.ring = ring
+        self.ops = []
+        self.events = []
+        self.closed = False
+
+    def sync(self, ops):
+        self.ops.extend(ops)
+
+    def poll_events(self):
+        events, self.events = self.events, []
+        return events
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def engine(ring):
+    return _FakeEngine(ring)
+
+
+@pytest.fixture
+def controller():
+    return AudioController()
+
+
+@pytest.fixture
+def mixer(controller, engine):
+    mixer = EngineMixerSource(controller, engine)
+    yield mixer
+    mixer.cleanup()
+
+
+class TestEngineMixerSource:
+    def test_sends_changes_once(self, mixer, controller, engine):
+        source = _stream()
+        controller.add_layer(source)
+        mixer.read()
+        mixer.read()
+        assert [op[0] for op in engine.ops] == ["add"]
+        source_id = engine.ops[0][1]
+        assert engine.ops[0][2:] == (
+            StreamSpec("https://stream/a", "-re", "-vn"),
+            0.5,
+            "ambience",
+        )
+
+        source.volume = 1.0
+        controller.remove_layer(source.id)
+        other = _stream("https://stream/b")
+        controller.add_layer(other)
+        mixer.read()
+        assert engine.ops[1] == ("remove", source_id)
+        assert engine.ops[2][0] == "add"
+
+    def test_volume_change(self, mixer, controller, engine):
+        source = _stream()
+        controller.add_layer(source)
+        mixer.read()
+        source.volume = 1.5
+        mixer.read()
+        assert engine.ops[-1] == ("volume", engine.ops[0][1], 1.5)
+
+    def test_effects_are_sent_with_the_source(self, mixer, controller, engine):
+        queued, layer = _stream(), _stream("https://stream/b")
+        controller.set_queue_source(queued)
+        controller.add_layer(layer)
+        echo = [EffectSpec("reverb", mix=0.5)]
+        controller.set_effects("queue", echo)
+        controller.set_effects(layer.id, echo)
+        mixer.read()
+        mixer.read()
+        effects = [op for op in engine.ops if op[0] == "effects"]
+        assert len(effects) == 2
+        assert {op[2] for op in effects} == {tuple(echo)}
+
+        controller.set_effects("queue", [])
+        mixer.read()
+        assert engine.ops[-1] == ("effects", mixer._remote[queued].id, ())
+
+    def test_bus_changes_and_ducking_are_sent(self, mixer, controller, engine):
+        controller.set_queue_source(_stream())
+        mixer.read()
+        assert engine.ops[0][4] == "music"
+        controller.set_bus("music", gain=0.5, muted=True)
+        mixer.read()
+        mixer.read()
+        assert engine.ops[1:] == [("bus", "music", 0.5, True, ())]
+
+        controller.set_tts_track(TestToneSource())
+        mixer.read()
+        assert engine.ops[-1] == ("duck", True)
+        controller.set_bus("voice", muted=True)
+        mixer.read()
+        assert engine.ops[-2:] == [
+            ("bus", "voice", 1.0, True, ()),
+            ("duck", False),
+        ]
+
+    def test_paused_source_stays_in_the_engine(
+        self, mixer, controller, engine
+    ):
+        source = _stream()
+        controller.add_layer(source)
+        mixer.read()
+        controller.set_paused(source.id, True)
+        mixer.read()
+        mixer.read()
+        controller.set_paused(source.id, False)
+        mixer.read()
+        source_id = engine.ops[0][1]
+        assert engine.ops[1:] == [
+            ("pause", source_id, True),
+            ("pause", source_id, False),
+        ]
+
+    def test_plays_the_engine_frame(self, mixer, controller, engine, ring):
+        controller.add_layer(_stream())
+        tone = generate_tone_frame()
+        ring.write(tone)
+        assert mixer.read() == tone
+        assert mixer.has_active_tracks is True
+        assert mixer.read() == generate_silence_frame()
+        assert mixer.underruns == 1
+
+    def test_local_sources_mix_on_top(self, mixer, controller, engine):
+        controller.set_tts_track(TestToneSource())
+        frame = np.frombuffer(mixer.read(), dtype=np.int16)
+        assert np.any(frame != 0)
+        # Only the ducking of the engine's music under the local TTS.
+        assert engine.ops == [("duck", True)]
+        assert mixer.underruns == 0
+
+    def test_progress_and_first_frame(self, mixer, controller, engine):
+        source = _stream()
+        source.on_first_frame = MagicMock()
+        controller.set_queue_source(source)
+        mixer.read()
+        engine.events.append(("progress", {engine.ops[0][1]: 50}))
+        mixer.read()
+        assert source.progress == 1.0
+        source.on_first_frame.assert_called_once()
+
+    def test_ended_queue_track_advances_the_queue(
+        self, mixer, controller, engine
+    ):
+        first, second = _stream(), _stream("https://stream/b")
+        controller.add_to_queue(first)
+        controller.add_to_queue(second)
+        queue_end = MagicMock()
+        mixer.add_observer("queue_end", queue_end)
+        mixer.read()
+
+        engine.events.append(("ended", engine.ops[0][1], 100))
+        mixer.read()
+
+        queue_end.assert_called_once()
+        assert controller.get_queue_source() is second
+        assert engine.ops[-1][0] == "add"
+        assert engine.ops[-1][2].url == "https://stream/b"
+
+    def test_cleanup_closes_engine(self, controller, engine):
+        mixer = EngineMixerSource(controller, engine)
+        mixer.cleanup()
+        mixer.cleanup()
+        assert engine.closed is True
+        assert mixer.read() == generate_silence_frame()
+
+
+class TestAudioEngineProcess:
+    def test_engine_process_fills_the_ring(self):
+        engine = AudioEngine(slots=3)
+        engine.start()
+        try:
+            deadline = time.monotonic() + 30
+            while engine.ring.available() < 3:
+                assert time.monotonic() < deadline, "engine never wrote"
+                time.sleep(0.05)
+            assert engine.ring.read() == generate_silence_frame()
+        finally:
+            engine.close()
+        assert not engine.process.is_alive()
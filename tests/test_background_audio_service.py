@@ -7,6 +7,7 @@ import pytest
 
 from src.harpi_lib.api import GuildConfig
 from src.harpi_lib.services.background_audio import BackgroundAudioService
+from src.harpi_lib.status_events import StatusEvent
 
 
 @pytest.fixture
@@ -75,6 +76,18 @@ class TestRemove:
         assert "layer-1" not in gc.background
         gc.controller.remove_layer.assert_called_once_with("layer-1")
 
+    @pytest.mark.asyncio
+    async def test_publishes_layer_removed(self, service, guilds):
+        guilds[1] = _make_guild_config(
+            guild_id=1, background={"layer-1": MagicMock()}
+        )
+        subscription = service.status_events.subscribe(1)
+
+        await service.remove(1, "layer-1")
+        assert subscription.drain() == [
+            StatusEvent("layer_removed", {"id": "layer-1"})
+        ]
+
 
 class TestSetVolume:
     @pytest.mark.asyncio
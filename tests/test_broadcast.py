@@ -0,0 +1,120 @@
+"""Tests for shared decoders (broadcasts) and their cursors."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.harpi_lib.audio.broadcast import BroadcastRegistry
+from src.harpi_lib.music.ytmusicdata import YoutubeDLSource
+
+
+def _decoder(frames: int = 100) -> MagicMock:
+    """A decoder whose n-th frame is n's bytes, then end of stream."""
+    decoder = MagicMock()
+    decoder.read.side_effect = [
+        n.to_bytes(2, "big") * 1920 for n in range(frames)
+    ] + [b""]
+    return decoder
+
+
+def _frame(n: int) -> bytes:
+    return n.to_bytes(2, "big") * 1920
+
+
+@pytest.fixture
+def registry():
+    return BroadcastRegistry(frames=10)
+
+
+class TestBroadcast:
+    def test_cursors_share_one_decode(self, registry):
+        decoder = _decoder()
+        a = registry.publish("url", decoder, {}, live=True)
+        b = registry.subscribe("url", live=True)
+        for n in range(5):
+            assert a.read() == b.read() == _frame(n)
+        assert decoder.read.call_count == 5
+
+    def test_live_join_starts_at_the_newest_frame(self, registry):
+        a = registry.publish("url", _decoder(), {}, live=True)
+        for _ in range(30):
+            a.read()
+        b = registry.subscribe("url", live=True)
+        assert b.read() == _frame(30)
+
+    def test_join_from_start_only_while_it_is_buffered(self, registry):
+        a = registry.publish("url", _decoder(), {}, live=False)
+        for _ in range(5):
+            a.read()
+        b = registry.subscribe("url", live=False)
+        assert b.read() == _frame(0)
+
+        for _ in range(20):
+            a.read()
+        assert registry.subscribe("url", live=False) is None
+        c = registry.publish("url", _decoder(), {}, live=False)
+        assert c.broadcast is not a.broadcast
+        assert c.read() == _frame(0)
+        assert registry.stats() == {"streams": 1, "listeners": 1}
+
+    def test_lagging_cursor_skips_ahead(self, registry):
+        a = registry.publish("url", _decoder(), {}, live=True)
+        b = registry.subscribe("url", live=True)
+        for _ in range(25):
+            a.read()
+        assert b.read() == _frame(15)
+
+    def test_last_listener_releases_the_decoder(self, registry):
+        decoder = _decoder()
+        a = registry.publish("url", decoder, {}, live=True)
+        b = registry.subscribe("url", live=True)
+        a.cleanup()
+        a.cleanup()
+        decoder.cleanup.assert_not_called()
+        assert registry.stats() == {"streams": 1, "listeners": 1}
+
+        b.cleanup()
+        decoder.cleanup.assert_called_once()
+        assert registry.stats() == {"streams": 0, "listeners": 0}
+        assert registry.subscribe("url", live=True) is None
+
+    def test_ended_stream_is_not_joined(self, registry):
+        a = registry.publish("url", _decoder(frames=1), {}, live=True)
+        a.read()
+        assert a.read() == b""
+        assert registry.subscribe("url", live=True) is None
+
+    def test_concurrent_publish_joins_the_first(self, registry):
+        first = registry.publish("url", _decoder(), {}, live=True)
+        late = _decoder()
+        second = registry.publish("url", late, {}, live=True)
+        assert second.broadcast is first.broadcast
+        late.cleanup.assert_called_once()
+
+
+class TestSharedYoutubeDLSource:
+    @pytest.mark.asyncio
+    async def test_second_guild_skips_extraction(self, registry):
+        music_data = MagicMock()
+        music_data.get_url.return_value = "https://youtu.be/rain"
+        info = {"url": "https://cdn/rain", "title": "Rain", "id": "rain"}
+        with patch(
+            "src.harpi_lib.music.ytmusicdata._thread_ytdl"
+        ) as thread_ytdl:
+            ytdl = thread_ytdl.return_value
+            ytdl.extract_info.return_value = info
+            first = await YoutubeDLSource.from_music_data(
+                music_data, broadcasts=registry, live=True
+            )
+            second = await YoutubeDLSource.from_music_data(
+                music_data, volume=0.8, broadcasts=registry, live=True
+            )
+        ytdl.extract_info.assert_called_once()
+        assert first.original.broadcast is second.original.broadcast
+        assert first.id != second.id
+        assert (first.volume, second.volume) == (0.3, 0.8)
+        assert second.title == "Rain"
+
+        first.cleanup()
+        second.cleanup()
+        assert registry.stats()["streams"] == 0
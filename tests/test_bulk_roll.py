@@ -0,0 +1,82 @@
+"""Tests for NumPy rolling of large dice groups."""
+
+import numpy as np
+import pytest
+
+from src.harpi_lib.math.bulk_roll import roll_bulk
+from src.harpi_lib.math.parser import DiceLimits, DiceParser
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+class TestRollBulk:
+    def test_total_in_range(self, rng):
+        result = roll_bulk(rng, 100_000, (1, 6), None, 20)
+        assert 100_000 <= result.total <= 600_000
+        assert len(result.shown) == 20 and result.kept_mask is None
+
+    def test_mean_close_to_expected(self, rng):
+        result = roll_bulk(rng, 1_000_000, (1, 6), None, 20)
+        assert result.total / 1_000_000 == pytest.approx(3.5, abs=0.01)
+
+    def test_many_sides_uses_direct_draws(self, rng):
+        result = roll_bulk(rng, 5_000, (1, 1_000_000), None, 5)
+        assert 5_000 <= result.total <= 5_000_000_000
+
+    def test_keep_highest_of_d2_counts_twos(self, rng):
+        result = roll_bulk(rng, 10_000, (1, 2), ("kh", 10), 20)
+        assert result.total == 20
+
+    def test_keep_lowest_of_d2_counts_ones(self, rng):
+        result = roll_bulk(rng, 10_000, (1, 2), ("kl", 10), 20)
+        assert result.total == 10
+
+    def test_keep_mask_matches_total_for_small_group(self, rng):
+        result = roll_bulk(rng, 8, (1, 6), ("kh", 3), 8)
+        kept = [
+            v for v, k in zip(result.shown, result.kept_mask, strict=True) if k
+        ]
+        assert len(kept) == 3
+        assert sum(kept) == result.total == sum(sorted(result.shown)[-3:])
+
+    def test_keep_zero(self, rng):
+        result = roll_bulk(rng, 5_000, (1, 6), ("kh", 0), 4)
+        assert result.total == 0 and result.kept_mask == [False] * 4
+
+    def test_fudge_range(self, rng):
+        result = roll_bulk(rng, 10_000, (-1, 1), None, 10)
+        assert set(result.shown) <= {-1, 0, 1}
+        assert -10_000 <= result.total <= 10_000
+
+
+class TestParserLimits:
+    @pytest.fixture
+    def parser(self, rng):
+        return DiceParser(
+            DiceLimits(max_dice=50_000, max_repeat=5, bulk_threshold=100),
+            rng,
+        )
+
+    def test_large_group_rolls_in_bulk(self, parser):
+        result = parser.parse("20000d6")
+        assert 20_000 <= result.value <= 120_000
+        assert len(result.rolls[0][0]) == 20
+
+    def test_large_group_display_is_truncated(self, parser):
+        assert "… 19,980 more]" in parser.roll("20000d6")
+
+    def test_too_many_dice_rejected(self, parser):
+        assert parser.roll("60000d6").startswith("Error: Too many dice")
+
+    def test_repeat_multiplies_dice(self, parser):
+        assert parser.roll("3#20000d6").startswith("Error: Too many dice")
+
+    def test_repeat_count_capped(self, parser):
+        assert parser.roll("6#1d6").startswith("Error: repeat count")
+
+    def test_too_many_sides_rejected(self):
+        parser = DiceParser(DiceLimits(max_sides=100))
+        assert parser.roll("1d1000").startswith("Error: Too many sides")
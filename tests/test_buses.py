@@ -0,0 +1,218 @@
+"""Tests for mix buses: gain, mute, effects and ducking."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import music
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.audio import buses
+from src.harpi_lib.audio.buses import Bus
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.dsp import EffectSpec
+from src.harpi_lib.audio.mixer import MixerSource
+from src.harpi_lib.services.buses import BusService
+from tests.conftest import generate_tone_frame
+
+
+def _frame(value: int = 1000) -> np.ndarray:
+    return np.full(1920, value, dtype=np.int32)
+
+
+class TestBus:
+    def test_unity_passes_through(self):
+        pcm = _frame()
+        assert Bus("music").render(pcm) is pcm
+
+    def test_gain_change_is_ramped_over_a_frame(self):
+        bus = Bus("ambience")
+        bus.configure(gain=0.5)
+        ramped = bus.render(_frame())
+        assert ramped[0] == 1000
+        assert ramped[-1] == 500
+        assert np.all(np.diff(ramped) <= 0)
+        np.testing.assert_array_equal(bus.render(_frame()), _frame(500))
+
+    def test_mute_fades_out_then_stays_silent(self):
+        bus = Bus("sfx")
+        bus.configure(muted=True)
+        assert bus.render(_frame())[-1] == 0
+        assert not bus.render(_frame()).any()
+
+    def test_idle_frames_skip_the_ramp(self):
+        bus = Bus("music")
+        bus.configure(gain=0.5)
+        bus.idle()
+        np.testing.assert_array_equal(bus.render(_frame()), _frame(500))
+
+    def test_invalid_settings_change_nothing(self):
+        bus = Bus("music")
+        with pytest.raises(ValueError):
+            bus.configure(gain=3)
+        with pytest.raises(ValueError):
+            bus.configure(gain=0.5, effects=[EffectSpec("flanger")])
+        assert bus.gain == 1.0
+        assert bus.chain is None
+
+    def test_unknown_bus(self):
+        with pytest.raises(ValueError, match="não existe"):
+            AudioController().set_bus("master", gain=0.5)
+
+
+def _layer(value: int = 1000) -> MagicMock:
+    layer = MagicMock()
+    layer.read.return_value = np.full(1920, value, np.int16).tobytes()
+    return layer
+
+
+@pytest.fixture
+def mixer():
+    controller = AudioController()
+    mixer = MixerSource(controller)
+    yield mixer, controller
+    mixer.cleanup()
+
+
+def _read(mixer: MixerSource) -> np.ndarray:
+    return np.frombuffer(mixer.read(), dtype=np.int16)
+
+
+class TestMixerBuses:
+    def test_bus_gain_applies_to_all_its_sources(self, mixer):
+        mixer, controller = mixer
+        controller.add_layer(_layer())
+        controller.add_layer(_layer())
+        controller.set_bus("ambience", gain=0.25)
+        _read(mixer)
+        assert np.all(_read(mixer) == 500)
+
+    def test_bus_effects_run_once_per_frame(self, mixer):
+        mixer, controller = mixer
+        for _ in range(3):
+            controller.add_layer(_layer())
+        controller.set_bus("ambience", effects=[EffectSpec("pan", pan=1)])
+        chain = controller.get_buses()["ambience"].chain
+        chain.process = MagicMock(side_effect=lambda pcm: pcm)
+        _read(mixer)
+        assert chain.process.call_count == 1
+        np.testing.assert_array_equal(
+            chain.process.call_args.args[0], _frame(3000)
+        )
+
+    def test_tts_ducks_the_music(self, mixer):
+        mixer, controller = mixer
+        controller.add_to_queue(_layer(10000))
+        _read(mixer)
+        steady = _read(mixer)
+        assert np.all(steady == 10000)
+
+        controller.set_tts_track(_layer(0))
+        _read(mixer)
+        ducked = _read(mixer)
+        expected = int(10000 * 10 ** (buses.DUCK_DB / 20))
+        assert np.all(np.abs(ducked.astype(int) - expected) <= 1)
+
+    def test_muted_voice_does_not_duck(self, mixer):
+        mixer, controller = mixer
+        controller.add_to_queue(_layer(10000))
+        controller.set_tts_track(_layer(0))
+        controller.set_bus("voice", muted=True)
+        _read(mixer)
+        assert np.all(_read(mixer) == 10000)
+
+    def test_muted_source_still_advances(self, mixer):
+        mixer, controller = mixer
+        layer = MagicMock()
+        layer.read.return_value = generate_tone_frame(440, 8000)
+        controller.add_layer(layer)
+        controller.set_bus("ambience", muted=True)
+        _read(mixer)
+        assert not _read(mixer).any()
+        assert layer.read.call_count >= 2
+
+
+class TestBusService:
+    @pytest.fixture
+    def guilds(self):
+        config = GuildConfig(
+            id=1, mixer=MagicMock(), controller=AudioController()
+        )
+        return {1: config}
+
+    @pytest.mark.asyncio
+    async def test_sets_and_reports_buses(self, guilds):
+        service = BusService(guilds)
+        await service.set_bus(
+            1, "music", gain=0.5, effects=[EffectSpec("lowpass")]
+        )
+        status = {bus["name"]: bus for bus in service.status(1)}
+        assert set(status) == set(buses.BUSES)
+        assert status["music"]["gain"] == 0.5
+        assert status["music"]["effects"][0]["kind"] == "lowpass"
+        assert status["voice"]["effects"] == []
+
+    @pytest.mark.asyncio
+    async def test_disconnected_guild(self, guilds):
+        with pytest.raises(ValueError, match="não conectada"):
+            await BusService(guilds).set_bus(2, "music", muted=True)
+        assert BusService(guilds).status(2) == []
+
+
+@pytest.fixture
+def client():
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.api.commands.send = AsyncMock()
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client(), bot.api
+
+    deps._bot_ref = original
+
+
+class TestBusEndpoints:
+    @pytest.mark.asyncio
+    async def test_volume_is_a_percentage(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/bus",
+            json={"guild_id": "1", "bus": "ambience", "volume": 50},
+        )
+        assert response.status_code == 200
+        api.commands.send.assert_awaited_once_with(
+            1, "bus", bus="ambience", gain=0.5, muted=None, effects=None
+        )
+
+    @pytest.mark.asyncio
+    async def test_unknown_bus_is_rejected(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/bus", json={"guild_id": "1", "bus": "master"}
+        )
+        assert response.status_code == 400
+        api.commands.send.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_lists_buses(self, client):
+        test_client, api = client
+        api.bus_status.return_value = [
+            {
+                "name": "music",
+                "gain": 0.8,
+                "muted": False,
+                "effects": [],
+                "bypassed": False,
+            }
+        ]
+        response = await test_client.get("/api/music/1/buses")
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["buses"][0]["volume"] == pytest.approx(80)
@@ -0,0 +1,150 @@
+"""Tests for the per-guild command bus."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.harpi_lib.command_bus import Command, CommandBus, _coalesce
+
+
+class Recorder:
+    """Command handlers that log calls and can be held open."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[int, str, dict]] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.running: set[int] = set()
+        self.overlaps = 0
+
+    def handler(self, name: str):
+        async def handle(guild_id: int, **args):
+            if guild_id in self.running:
+                self.overlaps += 1
+            self.running.add(guild_id)
+            self.calls.append((guild_id, name, args))
+            await self.gate.wait()
+            self.running.discard(guild_id)
+            if name == "fail":
+                raise ValueError("Guilda não conectada")
+            return name
+
+        return handle
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+@pytest.fixture
+async def bus(recorder):
+    bot = MagicMock()
+    bot.loop = asyncio.get_running_loop()
+    names = ["stop", "skip", "advance", "volume", "layer_volume", "fail"]
+    return CommandBus(bot, {name: recorder.handler(name) for name in names})
+
+
+async def _until_running(recorder: Recorder, guild_id: int = 1) -> None:
+    while guild_id not in recorder.running:
+        await asyncio.sleep(0)
+
+
+class TestCommandBus:
+    @pytest.mark.asyncio
+    async def test_send_returns_result(self, bus):
+        assert await bus.send(1, "stop") == "stop"
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_the_caller(self, bus):
+        with pytest.raises(ValueError, match="não conectada"):
+            await bus.send(1, "fail")
+
+    @pytest.mark.asyncio
+    async def test_unknown_command(self, bus):
+        with pytest.raises(ValueError, match="Unknown command"):
+            bus.submit(1, "dance")
+
+    @pytest.mark.asyncio
+    async def test_commands_of_a_guild_never_overlap(self, bus, recorder):
+        await asyncio.gather(
+            bus.send(1, "stop"),
+            bus.send(1, "volume", volume=1.0),
+            bus.send(2, "stop"),
+            bus.send(1, "stop"),
+        )
+        assert recorder.overlaps == 0
+        assert [c[1] for c in recorder.calls if c[0] == 1] == [
+            "stop",
+            "volume",
+            "stop",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_guilds_run_independently(self, bus, recorder):
+        recorder.gate.clear()
+        first = asyncio.ensure_future(bus.send(1, "stop"))
+        second = asyncio.ensure_future(bus.send(2, "stop"))
+        await _until_running(recorder, 1)
+        await _until_running(recorder, 2)
+        recorder.gate.set()
+        await asyncio.gather(first, second)
+
+    @pytest.mark.asyncio
+    async def test_repeated_skips_coalesce(self, bus, recorder):
+        recorder.gate.clear()
+        running = asyncio.ensure_future(bus.send(1, "stop"))
+        await _until_running(recorder)
+        skips = [asyncio.ensure_future(bus.send(1, "skip")) for _ in range(3)]
+        await asyncio.sleep(0)
+        recorder.gate.set()
+
+        assert await asyncio.gather(running, *skips) == ["stop"] + ["skip"] * 3
+        assert recorder.calls[1:] == [(1, "skip", {"count": 3})]
+
+    @pytest.mark.asyncio
+    async def test_batch_uses_one_loop_handoff(self, bus):
+        with patch.object(bus, "_dispatch", wraps=bus._dispatch) as dispatch:
+            # Nothing yields between submissions: one batch.
+            futures = [bus.submit(1, "volume", volume=v) for v in range(10)]
+            results = await asyncio.gather(*map(asyncio.wrap_future, futures))
+        assert dispatch.call_count == 1
+        assert results == ["volume"] * 10
+
+
+def _command(name: str, **args) -> Command:
+    return Command(1, name, args, [MagicMock()])
+
+
+class TestCoalesce:
+    def test_last_volume_wins(self):
+        merged = _coalesce(
+            _command("volume", volume=0.1), _command("volume", volume=0.9)
+        )
+        assert merged.args == {"volume": 0.9}
+        assert len(merged.futures) == 2
+
+    def test_layer_volumes_of_different_layers_stay_apart(self):
+        assert (
+            _coalesce(
+                _command("layer_volume", layer_id="a", volume=1),
+                _command("layer_volume", layer_id="b", volume=1),
+            )
+            is None
+        )
+
+    def test_queue_end_next_to_skip_is_one_advance(self):
+        merged = _coalesce(_command("advance"), _command("skip"))
+        assert merged.name == "skip"
+        merged = _coalesce(_command("skip", count=2), _command("advance"))
+        assert (merged.name, merged.args) == ("skip", {"count": 2})
+
+    def test_stop_absorbs_pending_skip(self):
+        merged = _coalesce(_command("skip"), _command("stop"))
+        assert merged.name == "stop"
+        assert len(merged.futures) == 2
+
+    def test_different_commands_are_kept(self):
+        assert _coalesce(_command("skip"), _command("volume")) is None
+        assert _coalesce(_command("stop"), _command("skip")) is None
@@ -227,4 +227,4 @@ class TestParsePrimaryError:
         import pytest
 
         with pytest.raises(ValueError, match="Unexpected token"):
-            parser._parse_primary(["abc"])
+            parser.parse("*3")
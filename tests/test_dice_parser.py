@@ -3,6 +3,7 @@ from unittest.mock import patch
 
 import pytest
 
+from src.harpi_lib.math.expression import DiceNode
 from src.harpi_lib.math.parser import DiceParser, RollResult
 
 
@@ -157,31 +158,30 @@ class TestIsValidDiceString:
 
 
 class TestRollDice:
-    def _make_match(self, token: str) -> object:
-        """Create a real regex match for _roll_dice."""
-        parser = DiceParser()
-        m = parser.dice_pattern.match(token)
-        assert m is not None, f"Token {token!r} did not match dice_pattern"
-        return m
+    def _make_node(self, token: str) -> DiceNode:
+        """Compile a single dice token into the node _roll_dice expects."""
+        node = DiceParser().compile(token).root
+        assert isinstance(node, DiceNode), f"Token {token!r} is not dice"
+        return node
 
     def test_roll_single_die(self):
         parser = DiceParser()
         with patch.object(random, "randint", return_value=4):
-            result = parser._roll_dice(self._make_match("1d6"))
+            result = parser._roll_dice(self._make_node("1d6"))
             assert result.value == 4
             assert result.rolls == [([4], "1d6", None)]
 
     def test_roll_multiple_dice(self):
         parser = DiceParser()
         with patch.object(random, "randint", return_value=3):
-            result = parser._roll_dice(self._make_match("3d6"))
+            result = parser._roll_dice(self._make_node("3d6"))
             assert result.value == 9
             assert len(result.rolls[0][0]) == 3
 
     def test_roll_keep_highest(self):
         parser = DiceParser()
         with patch.object(random, "randint", side_effect=[3, 5, 1, 6]):
-            result = parser._roll_dice(self._make_match("4d6kh3"))
+            result = parser._roll_dice(self._make_node("4d6kh3"))
             # Keep highest 3: 5, 3, 6 = 14
             assert result.value == 14
             kept_mask = result.rolls[0][2]
@@ -190,7 +190,7 @@ class TestRollDice:
     def test_roll_keep_lowest(self):
         parser = DiceParser()
         with patch.object(random, "randint", side_effect=[15, 5]):
-            result = parser._roll_dice(self._make_match("2d20kl1"))
+            result = parser._roll_dice(self._make_node("2d20kl1"))
             assert result.value == 5
             kept_mask = result.rolls[0][2]
             assert kept_mask == [False, True]
@@ -198,90 +198,114 @@ class TestRollDice:
     def test_roll_fudge_dice(self):
         parser = DiceParser()
         with patch.object(random, "choice", side_effect=[1, -1, 0, 1]):
-            result = parser._roll_dice(self._make_match("4dF"))
+            result = parser._roll_dice(self._make_node("4dF"))
             assert result.value == 1  # 1 + (-1) + 0 + 1
             assert result.rolls[0][0] == [1, -1, 0, 1]
 
     def test_invalid_dice_spec_raises(self):
         parser = DiceParser()
         with pytest.raises(ValueError, match="Invalid dice specification"):
-            parser._roll_dice(self._make_match("1d0"))
+            parser._roll_dice(self._make_node("1d0"))
 
 
 class TestParsePrimary:
     def test_parse_number(self):
         parser = DiceParser()
-        result = parser._parse_primary(["42"])
+        result = parser.parse("42")
         assert result.value == 42
         assert result.rolls == []
         assert result.expression == "42"
 
     def test_parse_float(self):
         parser = DiceParser()
-        result = parser._parse_primary(["3.5"])
+        result = parser.parse("3.5")
         assert result.value == 3.5
 
     def test_parse_parentheses(self):
         parser = DiceParser()
-        result = parser._parse_primary(["(", "5", ")"])
+        result = parser.parse("(5)")
         assert result.value == 5
 
-    def test_parse_empty_returns_zero(self):
+    def test_parse_missing_operand_is_zero(self):
         parser = DiceParser()
-        result = parser._parse_primary([])
-        assert result.value == 0
+        result = parser.parse("5+")
+        assert result.value == 5
 
 
 class TestParseAddition:
     def test_simple_addition(self):
         parser = DiceParser()
-        result = parser._parse_addition(["3", "+", "5"])
+        result = parser.parse("3+5")
         assert result.value == 8
 
     def test_simple_subtraction(self):
         parser = DiceParser()
-        result = parser._parse_addition(["10", "-", "4"])
+        result = parser.parse("10-4")
         assert result.value == 6
 
     def test_chained_addition(self):
         parser = DiceParser()
-        result = parser._parse_addition(["1", "+", "2", "+", "3"])
+        result = parser.parse("1+2+3")
         assert result.value == 6
 
+    def test_long_chain_does_not_recurse_per_term(self):
+        parser = DiceParser()
+        result = parser.parse("+".join(["1"] * 5000))
+        assert result.value == 5000
+
 
 class TestParseMultiplication:
     def test_simple_multiplication(self):
         parser = DiceParser()
-        result = parser._parse_multiplication(["3", "*", "4"])
+        result = parser.parse("3*4")
         assert result.value == 12
 
     def test_simple_division(self):
         parser = DiceParser()
-        result = parser._parse_multiplication(["12", "/", "4"])
+        result = parser.parse("12/4")
         assert result.value == 3
 
     def test_floor_division(self):
         parser = DiceParser()
-        result = parser._parse_multiplication(["10", "//", "3"])
+        result = parser.parse("10//3")
         assert result.value == 3
 
     def test_modulo(self):
         parser = DiceParser()
-        result = parser._parse_multiplication(["10", "%", "3"])
+        result = parser.parse("10%3")
         assert result.value == 1
 
 
 class TestParseExponentiation:
     def test_simple_power(self):
         parser = DiceParser()
-        result = parser._parse_exponentiation(["2", "^", "3"])
+        result = parser.parse("2^3")
         assert result.value == 8
 
     def test_right_associative(self):
         parser = DiceParser()
-        result = parser._parse_exponentiation(["2", "^", "3", "^", "2"])
+        result = parser.parse("2^3^2")
         assert result.value == 512
 
+    def test_nested_power_hits_limit(self):
+        parser = DiceParser()
+        result = parser.roll("1d2^9^9^9")
+        assert result.startswith("Error: Result too large")
+
+    def test_huge_power_hits_limit(self):
+        parser = DiceParser()
+        result = parser.roll("1d6+2^99999")
+        assert result.startswith("Error: Result too large")
+
+    def test_power_within_limit(self):
+        parser = DiceParser()
+        assert parser.parse("2^4095").value == 2**4095
+
+    def test_product_of_powers_hits_limit(self):
+        parser = DiceParser()
+        with pytest.raises(ValueError, match="Result too large"):
+            parser.parse("2^4000*2^4000")
+
 
 class TestParse:
     def test_parse_simple_number(self):
@@ -423,3 +447,36 @@ class TestMismatchedParentheses:
             raise AssertionError("Should have raised ValueError")
         except ValueError as e:
             assert "Mismatched parentheses" in str(e)
+
+
+class TestCompile:
+    def test_compile_is_cached_per_expression(self):
+        parser = DiceParser()
+        assert parser.compile("2d6+3") is parser.compile("2d6+3")
+
+    def test_compile_shared_between_parsers(self):
+        assert DiceParser().compile("1d20+5") is DiceParser().compile("1d20+5")
+
+    def test_dice_spans_point_at_source(self):
+        compiled = DiceParser().compile("1d6 + 2d8kh1")
+        assert [
+            compiled.source[d.span.start : d.span.end] for d in compiled.dice
+        ] == ["1d6", "2d8kh1"]
+
+    def test_compiled_expression_rendered_once(self):
+        compiled = DiceParser().compile("(2d6+3)*2")
+        assert compiled.expression == "(2d6 + 3) * 2"
+
+    def test_evaluate_reuses_compiled_tree(self):
+        parser = DiceParser()
+        compiled = parser.compile("1d6+1")
+        with patch.object(random, "randint", side_effect=[2, 5]):
+            first = parser.evaluate(compiled)
+            second = parser.evaluate(compiled)
+        assert (first.value, second.value) == (3, 6)
+
+    def test_format_uses_spans_for_repeated_notation(self):
+        parser = DiceParser()
+        with patch.object(random, "randint", side_effect=[4, 2]):
+            output = parser.roll("1d6 - 1d6")
+        assert output.index("[4]") < output.index("[2]")
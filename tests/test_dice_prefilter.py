@@ -0,0 +1,138 @@
+"""Tests and an opt-in benchmark for the on_message dice pre-filter.
+
+The benchmark only reports timings; run it with
+``HARPI_BENCHMARK=1 pytest -m benchmark -s tests/test_dice_prefilter.py``.
+"""
+
+import os
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.harpi_lib.math.parser import DICE_CANDIDATE_PATTERN, DiceParser
+
+CHAT_SAMPLES = [
+    "bom dia pessoal",
+    "alguém on hoje?",
+    "kkkkkkkkk",
+    "lol",
+    "hahahaha que isso",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "<@123456789012345678> bora jogar?",
+    "<:pepega:987654321098765432>",
+    "a sessão é sábado às 20h",
+    "rolei 18 no teste de percepção",
+    "dd",
+    "ddd",
+    "d",
+    "d&d hoje?",
+    "2+3",
+    "42",
+    "(10*3)/2",
+    "1.5",
+    "hp 12/20",
+    "lvl 5",
+    "o dado caiu no chão",
+    "deu 1d20 ali?",
+    "!play lofi hip hop",
+    "```python\nprint('d20')\n```",
+    "",
+    "   ",
+    "#d20",
+    "dfff",
+    "kh",
+    "hk hk hk",
+]
+
+DICE_SAMPLES = [
+    "1d20",
+    "d20",
+    "2d6+3",
+    "4d6kh3",
+    "2d20kl1+5",
+    "4dF",
+    "  1d8 + 1d6  ",
+    "(2d6+3)*2",
+    "3#d20+7",
+    "1d100",
+]
+
+
+def _corpus(size: int, dice_ratio: float = 0.02) -> list[str]:
+    """Busy-server mix: mostly chat, a small share of dice rolls."""
+    rng = random.Random(0)
+    return [
+        rng.choice(DICE_SAMPLES)
+        if rng.random() < dice_ratio
+        else rng.choice(CHAT_SAMPLES)
+        for _ in range(size)
+    ]
+
+
+@pytest.fixture
+def parser():
+    return DiceParser()
+
+
+class TestPrefilter:
+    @pytest.mark.parametrize("message", CHAT_SAMPLES + DICE_SAMPLES)
+    def test_agrees_with_full_grammar_check(self, parser, message):
+        expected = parser._matches_dice_grammar(message.strip())
+        assert parser.is_valid_dice_string(message) is expected
+
+    @pytest.mark.parametrize("message", DICE_SAMPLES)
+    def test_never_rejects_dice(self, message):
+        assert DICE_CANDIDATE_PATTERN.match(message)
+
+    @pytest.mark.parametrize(
+        "message", ["bom dia pessoal", "hahahaha", "42", "", "#d20"]
+    )
+    def test_rejects_chat(self, message):
+        assert DICE_CANDIDATE_PATTERN.match(message) is None
+
+
+class TestPrefilterCost:
+    def test_full_check_only_runs_on_candidates(self, parser):
+        """Chat is rejected by the pattern alone, without tokenizing.
+
+        A count of full checks instead of a timing, so the suite does
+        not depend on the machine's speed.
+        """
+        corpus = _corpus(50_000)
+        with patch.object(
+            parser,
+            "_matches_dice_grammar",
+            wraps=parser._matches_dice_grammar,
+        ) as full_check:
+            matches = sum(parser.is_valid_dice_string(m) for m in corpus)
+
+        assert matches > 0
+        assert full_check.call_count == sum(
+            1 for m in corpus if DICE_CANDIDATE_PATTERN.match(m)
+        )
+        # 2% dice plus the rare chat message that looks like one.
+        assert full_check.call_count < len(corpus) * 0.1
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    not os.getenv("HARPI_BENCHMARK"), reason="set HARPI_BENCHMARK=1"
+)
+class TestPrefilterBenchmark:
+    def test_per_message_cost(self, parser):
+        """Print the cost per message of the filter and of the full check."""
+        corpus = _corpus(50_000)
+        for name, check in (
+            ("prefilter", parser.is_valid_dice_string),
+            (
+                "full grammar",
+                lambda m: parser._matches_dice_grammar(m.strip()),
+            ),
+        ):
+            start = time.perf_counter()
+            for message in corpus:
+                check(message)
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {elapsed / len(corpus) * 1e6:.2f} us per message")
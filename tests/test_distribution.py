@@ -0,0 +1,157 @@
+"""Tests for exact dice distributions."""
+
+import itertools
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import src.harpi_lib.math.distribution as distribution_module
+from src.harpi_lib.math.distribution import (
+    Distribution,
+    DistributionEngine,
+    convolve,
+    keep_distribution,
+)
+from src.harpi_lib.math.monte_carlo import MonteCarloEngine
+from src.harpi_lib.math.parser import DiceLimits, DiceParser
+
+
+@pytest.fixture
+def engine():
+    return DistributionEngine(MonteCarloEngine(np.random.default_rng(3)))
+
+
+def _distribution_of(engine, expression: str) -> Distribution:
+    return engine.distribution(DiceParser().compile(expression))
+
+
+def _brute_force_keep(count, sides, keep_mode, keep_count) -> dict:
+    totals: dict[int, int] = {}
+    for rolls in itertools.product(range(1, sides + 1), repeat=count):
+        ordered = sorted(rolls, reverse=keep_mode == "kh")
+        total = sum(ordered[:keep_count])
+        totals[total] = totals.get(total, 0) + 1
+    outcomes = sides**count
+    return {value: n / outcomes for value, n in sorted(totals.items())}
+
+
+class TestDiceSums:
+    def test_two_d6_is_triangular(self, engine):
+        dist = _distribution_of(engine, "2d6")
+        assert dict(
+            zip(dist.values.tolist(), dist.probs, strict=True)
+        ) == pytest.approx({v: (6 - abs(v - 7)) / 36 for v in range(2, 13)})
+
+    def test_modifier_shifts_support(self, engine):
+        dist = _distribution_of(engine, "1d20+5")
+        assert (dist.minimum, dist.maximum) == (6, 25)
+
+    def test_subtraction_is_symmetric(self, engine):
+        dist = _distribution_of(engine, "1d6-1d6")
+        assert dist.mean == pytest.approx(0.0)
+
+    def test_fudge_dice(self, engine):
+        dist = _distribution_of(engine, "4dF")
+        assert dist.probability_at_least(4) == pytest.approx(1 / 81)
+
+    def test_large_count_uses_fft_and_normalizes(self, engine):
+        dist = _distribution_of(engine, "1000d6")
+        assert (dist.mean, dist.probs.sum()) == pytest.approx((3500, 1.0))
+
+
+class TestKeepDistribution:
+    @pytest.mark.parametrize(
+        ("count", "sides", "mode", "keep"),
+        [(4, 6, "kh", 3), (2, 20, "kh", 1), (3, 6, "kl", 2), (5, 4, "kh", 2)],
+    )
+    def test_matches_brute_force(self, count, sides, mode, keep):
+        dist = keep_distribution(count, list(range(1, sides + 1)), mode, keep)
+        expected = _brute_force_keep(count, sides, mode, keep)
+        assert dict(
+            zip(dist.values.tolist(), dist.probs, strict=True)
+        ) == pytest.approx(expected)
+
+    def test_four_d6_keep_three_mean(self, engine):
+        dist = _distribution_of(engine, "4d6kh3+2")
+        assert dist.mean == pytest.approx(14.2446, abs=1e-4)
+
+
+class TestOperators:
+    def test_product_of_dice_enumerated_exactly(self, engine):
+        dist = _distribution_of(engine, "1d6*1d6")
+        assert (dist.exact, dist.mean) == (True, pytest.approx(12.25))
+
+    def test_true_division_keeps_fractions(self, engine):
+        dist = _distribution_of(engine, "1d2/2")
+        assert dist.values.tolist() == [0.5, 1.0]
+
+    def test_division_by_possible_zero_raises(self, engine):
+        with pytest.raises(ZeroDivisionError):
+            _distribution_of(engine, "1d6/(1d2-1)")
+
+
+class TestFallback:
+    def test_oversized_support_is_sampled(self, engine):
+        with patch.object(distribution_module, "MAX_ORDER_STATISTIC_DICE", 3):
+            dist = _distribution_of(engine, "4d6kh3")
+        assert dist.exact is False
+
+    def test_huge_keep_group_is_sampled_without_enumerating(self, engine):
+        with patch.object(
+            distribution_module, "_shifted_add", side_effect=AssertionError
+        ):
+            dist = _distribution_of(engine, "4d1000000kh3")
+        assert dist.exact is False
+
+    def test_fallback_samples_fit_the_simulation_limit(self):
+        sampler = MonteCarloEngine(
+            np.random.default_rng(3),
+            limits=DiceLimits(max_simulated_dice=10_000),
+        )
+        engine = DistributionEngine(sampler)
+        with patch.object(
+            sampler, "simulate", wraps=sampler.simulate
+        ) as simulate:
+            dist = _distribution_of(engine, "10d1000000")
+        assert simulate.call_args.args[1] == 1_000
+        assert dist.exact is False
+
+
+class TestLimits:
+    def test_too_many_sides_is_rejected_before_building_faces(self):
+        engine = DistributionEngine(limits=DiceLimits(max_sides=1_000))
+        with pytest.raises(ValueError, match="Too many sides"):
+            _distribution_of(engine, "1d1001")
+
+    def test_too_many_dice_is_rejected(self):
+        engine = DistributionEngine(limits=DiceLimits(max_dice=100))
+        with pytest.raises(ValueError, match="Too many dice"):
+            _distribution_of(engine, "60d6+41d6")
+
+    def test_limits_default_to_the_samplers(self):
+        limits = DiceLimits(max_dice=5)
+        engine = DistributionEngine(MonteCarloEngine(limits=limits))
+        assert engine.limits is limits
+
+
+class TestCaching:
+    def test_same_compiled_expression_is_cached(self, engine):
+        compiled = DiceParser().compile("3d8+2")
+        assert engine.distribution(compiled) is engine.distribution(compiled)
+
+
+class TestSummary:
+    def test_percentile_nearest_rank(self):
+        dist = Distribution(np.array([1, 2, 3, 4]), np.full(4, 0.25))
+        assert (dist.percentile(50), dist.percentile(51)) == (2, 3)
+
+    def test_probability_at_least(self):
+        dist = Distribution(np.array([1, 2, 3, 4]), np.full(4, 0.25))
+        assert dist.probability_at_least(3) == pytest.approx(0.5)
+
+    def test_convolve_fft_matches_direct(self):
+        probs = np.full(400, 1 / 400)
+        assert convolve(probs, probs) == pytest.approx(
+            np.convolve(probs, probs), abs=1e-12
+        )
@@ -0,0 +1,220 @@
+"""Tests for per-source effect chains."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import music
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.audio import dsp
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.dsp import DspChain, EffectSpec
+from src.harpi_lib.audio.mixer import MixerSource
+from src.harpi_lib.services.effects import EffectsService
+from src.harpi_lib.status_events import StatusHub
+from tests.conftest import generate_tone_frame
+
+
+def _tone(freq: float, frames: int = 10, amplitude: float = 8000):
+    t = np.arange(960 * frames) / 48000
+    wave = amplitude * np.sin(2 * np.pi * freq * t)
+    stereo = np.repeat(wave[:, None], 2, axis=1).astype(np.int16)
+    return [stereo[i : i + 960].reshape(-1) for i in range(0, len(t), 960)]
+
+
+def _run(chain: DspChain, frames) -> np.ndarray:
+    return np.concatenate([chain.process(f) for f in frames]).reshape(-1, 2)
+
+
+def _rms(x: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(x.astype(np.float64) ** 2)))
+
+
+class TestDspChain:
+    def test_lowpass_keeps_lows_and_cuts_highs(self):
+        spec = EffectSpec("lowpass", frequency=500)
+        low = _run(DspChain([spec]), _tone(100))[960:]
+        high = _run(DspChain([spec]), _tone(8000))[960:]
+        assert _rms(low) > 0.9 * _rms(np.concatenate(_tone(100)))
+        assert _rms(high) < 0.02 * _rms(np.concatenate(_tone(8000)))
+
+    def test_peaking_boosts_its_band(self):
+        spec = EffectSpec("peaking", frequency=1000, gain_db=6)
+        out = _run(DspChain([spec]), _tone(1000))[960:]
+        gain = _rms(out) / _rms(np.concatenate(_tone(1000)))
+        assert gain == pytest.approx(10 ** (6 / 20), rel=0.05)
+
+    def test_hard_pan_silences_the_other_side(self):
+        out = _run(DspChain([EffectSpec("pan", pan=-1)]), _tone(440))
+        assert _rms(out[:, 1]) == 0
+        assert _rms(out[:, 0]) > 0
+
+    def test_reverb_tail_outlasts_the_input(self):
+        chain = DspChain([EffectSpec("reverb", mix=0.5, room=0.8)])
+        _run(chain, _tone(440, frames=5))
+        tail = _run(chain, [np.zeros(1920, dtype=np.int16)] * 3)
+        assert _rms(tail) > 0
+
+    def test_same_kinds_only_update_parameters(self):
+        chain = DspChain([EffectSpec("lowpass", frequency=500)])
+        _run(chain, _tone(440, frames=2))
+        (effect,) = chain._effects
+        state = effect.biquad.state.copy()
+        chain.configure([EffectSpec("lowpass", frequency=2000)])
+        assert chain._effects == [effect]
+        np.testing.assert_array_equal(effect.biquad.state, state)
+
+        chain.configure([EffectSpec("highpass")])
+        assert chain._effects[0] is not effect
+
+    def test_limits(self):
+        with pytest.raises(ValueError, match="máximo"):
+            DspChain([EffectSpec("pan")] * (dsp.MAX_EFFECTS + 1))
+        with pytest.raises(ValueError, match="desconhecido"):
+            DspChain([EffectSpec("flanger")])
+        with pytest.raises(ValueError, match="Frequência"):
+            DspChain([EffectSpec("lowpass", frequency=5)])
+
+    def test_over_budget_chain_is_bypassed(self, monkeypatch):
+        monkeypatch.setattr(dsp, "DSP_BUDGET", 0.0)
+        monkeypatch.setattr(dsp, "OVERRUN_FRAMES", 3)
+        chain = DspChain([EffectSpec("lowpass")])
+        frames = _tone(8000, frames=4)
+        _run(chain, frames[:3])
+        assert chain.bypassed
+        assert chain.peak_cost > 0
+        assert chain.process(frames[3]) is frames[3]
+
+        chain.configure([EffectSpec("lowpass")])
+        assert not chain.bypassed
+
+
+class TestControllerEffects:
+    def test_layer_chain_goes_with_the_layer(self):
+        controller = AudioController()
+        layer = MagicMock(id="a")
+        controller.add_layer(layer)
+        controller.set_effects("a", [EffectSpec("pan", pan=1)])
+        controller.set_effects("queue", [EffectSpec("lowpass")])
+        assert set(controller.get_effects()) == {"a", "queue"}
+
+        controller.remove_layer("a")
+        assert set(controller.get_effects()) == {"queue"}
+        controller.set_effects("queue", [])
+        assert controller.get_effects() == {}
+
+    def test_mixer_runs_the_chain(self):
+        controller = AudioController()
+        mixer = MixerSource(controller)
+        layer = MagicMock(id="a")
+        layer.read.return_value = generate_tone_frame(440, 8000)
+        controller.add_layer(layer)
+        controller.set_effects("a", [EffectSpec("pan", pan=1)])
+        try:
+            mixer.read()
+            out = np.frombuffer(mixer.read(), dtype=np.int16).reshape(-1, 2)
+        finally:
+            mixer.cleanup()
+        assert np.all(out[:, 0] == 0)
+        assert np.any(out[:, 1] != 0)
+
+
+class TestEffectsService:
+    @pytest.fixture
+    def guilds(self):
+        controller = AudioController()
+        controller.add_layer(MagicMock(id="rain"))
+        config = GuildConfig(
+            id=1,
+            mixer=MagicMock(),
+            controller=controller,
+            background={"rain": MagicMock()},
+        )
+        return {1: config}
+
+    @pytest.mark.asyncio
+    async def test_sets_and_reports_chains(self, guilds):
+        hub = StatusHub()
+        service = EffectsService(guilds, hub)
+        await service.set_effects(1, "rain", [EffectSpec("reverb")])
+        (chain,) = service.status(1)
+        assert chain["target"] == "rain"
+        assert chain["effects"][0]["kind"] == "reverb"
+        assert chain["bypassed"] is False
+
+    @pytest.mark.asyncio
+    async def test_unknown_target(self, guilds):
+        service = EffectsService(guilds)
+        with pytest.raises(ValueError, match="não encontrado"):
+            await service.set_effects(1, "wind", [EffectSpec("pan")])
+        with pytest.raises(ValueError, match="não conectada"):
+            await service.set_effects(2, "queue", [])
+
+
+@pytest.fixture
+def client():
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.api.commands.send = AsyncMock()
+    bot.api.effects_status.return_value = []
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client(), bot.api
+
+    deps._bot_ref = original
+
+
+class TestEffectsEndpoint:
+    @pytest.mark.asyncio
+    async def test_sends_effects_command(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/effects",
+            json={
+                "guild_id": "1",
+                "target": "rain",
+                "effects": [{"kind": "lowpass", "frequency": 400}],
+            },
+        )
+        assert response.status_code == 200
+        api.commands.send.assert_awaited_once_with(
+            1,
+            "effects",
+            target="rain",
+            effects=[EffectSpec("lowpass", frequency=400)],
+        )
+
+    @pytest.mark.asyncio
+    async def test_out_of_range_parameter_is_rejected(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/effects",
+            json={"guild_id": "1", "effects": [{"kind": "pan", "pan": 3}]},
+        )
+        assert response.status_code == 400
+        api.commands.send.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_lists_chains(self, client):
+        test_client, api = client
+        api.effects_status.return_value = [
+            {
+                "target": "queue",
+                "effects": [{"kind": "pan", "pan": 0.5}],
+                "mean_cost_ms": 0.1,
+                "peak_cost_ms": 0.3,
+                "bypassed": False,
+            }
+        ]
+        response = await test_client.get("/api/music/1/effects")
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["chains"][0]["effects"][0]["pan"] == 0.5
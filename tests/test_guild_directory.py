@@ -0,0 +1,201 @@
+"""Tests for the gateway-fed guild directory and the guild endpoints."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import guild as guild_api
+from src.harpi_lib.audio.voice_scheduler import TickStats
+from src.harpi_lib.guild_directory import GuildDirectory
+from src.harpi_lib.services.voice_connection import GuildResources
+
+
+def _voice_channel(channel_id: int, name: str, guild) -> MagicMock:
+    channel = MagicMock(spec=discord.VoiceChannel)
+    channel.id = channel_id
+    channel.name = name
+    channel.guild = guild
+    return channel
+
+
+def _guild(guild_id: int, name: str, *channels: str) -> MagicMock:
+    guild = MagicMock()
+    guild.id = guild_id
+    guild.name = name
+    guild.icon = None
+    guild.voice_channels = [
+        _voice_channel(guild_id * 10 + i, channel, guild)
+        for i, channel in enumerate(channels)
+    ]
+    return guild
+
+
+@pytest.fixture
+def bot():
+    bot = MagicMock()
+    bot.guilds = [_guild(2, "beta", "Lobby"), _guild(1, "Alpha", "Music")]
+    return bot
+
+
+@pytest.fixture
+def directory(bot):
+    directory = GuildDirectory(bot)
+    directory.attach()
+    return directory
+
+
+def _listener(bot, event: str):
+    for call in bot.add_listener.call_args_list:
+        if call.args[1] == event:
+            return call.args[0]
+    raise AssertionError(f"No listener for {event}")
+
+
+class TestGuildDirectory:
+    @pytest.mark.asyncio
+    async def test_ready_builds_from_gateway_cache(self, bot, directory):
+        assert directory.guilds() == ()
+        await _listener(bot, "on_ready")()
+
+        assert [g.name for g in directory.guilds()] == ["Alpha", "beta"]
+        assert directory.get(2).voice_channels[0].name == "Lobby"
+
+    def test_lists_more_than_150_guilds(self, directory):
+        directory.rebuild(_guild(i, f"g{i:03}") for i in range(400))
+        assert len(directory.guilds()) == 400
+
+    @pytest.mark.asyncio
+    async def test_join_and_remove(self, bot, directory):
+        await _listener(bot, "on_ready")()
+        new = _guild(3, "gamma")
+        await _listener(bot, "on_guild_join")(new)
+        assert directory.get(3).name == "gamma"
+
+        await _listener(bot, "on_guild_remove")(new)
+        assert directory.get(3) is None
+        assert len(directory.guilds()) == 2
+
+    @pytest.mark.asyncio
+    async def test_voice_channel_events_refresh_the_guild(
+        self, bot, directory
+    ):
+        await _listener(bot, "on_ready")()
+        guild = bot.guilds[0]
+        channel = _voice_channel(99, "Stage", guild)
+        guild.voice_channels.append(channel)
+
+        await _listener(bot, "on_guild_channel_create")(channel)
+
+        names = [c.name for c in directory.get(2).voice_channels]
+        assert names == ["Lobby", "Stage"]
+
+    @pytest.mark.asyncio
+    async def test_text_channel_events_are_ignored(self, bot, directory):
+        await _listener(bot, "on_ready")()
+        before = directory.snapshot
+        text = MagicMock(spec=discord.TextChannel)
+        await _listener(bot, "on_guild_channel_create")(text)
+        assert directory.snapshot is before
+
+    @pytest.mark.asyncio
+    async def test_readers_keep_their_snapshot(self, bot, directory):
+        await _listener(bot, "on_ready")()
+        snapshot = directory.snapshot
+        directory.remove(1)
+        assert 1 in snapshot.by_id
+        assert directory.get(1) is None
+
+
+@pytest.fixture
+def client(bot, directory):
+    original = deps._bot_ref
+    directory.rebuild(bot.guilds)
+    bot.api.directory = directory
+    bot.api.get_guild_config.return_value = None
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    app.secret_key = "test"
+    QuartSchema(app)
+    app.register_blueprint(guild_api.bp)
+    yield app.test_client(), bot
+
+    deps._bot_ref = original
+
+
+class TestGuildEndpoints:
+    @pytest.mark.asyncio
+    async def test_list_guilds(self, client):
+        test_client, bot = client
+        response = await test_client.get("/api/guild")
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert [g["id"] for g in body] == ["1", "2"]
+        bot.fetch_guilds.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_channels(self, client):
+        test_client, _ = client
+        response = await test_client.get("/api/guild/1/channels")
+        body = json.loads(await response.get_data())
+        assert body == {
+            "channels": [{"id": "10", "name": "Music"}],
+            "current_channel": None,
+        }
+
+    @pytest.mark.asyncio
+    async def test_unknown_guild_channels(self, client):
+        test_client, _ = client
+        response = await test_client.get("/api/guild/7/channels")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_select_guild(self, client):
+        test_client, _ = client
+        response = await test_client.post("/api/guild", json={"guild_id": "2"})
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["guild"]["name"] == "beta"
+
+    @pytest.mark.asyncio
+    async def test_select_channel_failure(self, client, monkeypatch):
+        test_client, bot = client
+        bot.api.connect_to_voice = MagicMock()
+        monkeypatch.setattr(
+            deps,
+            "run_on_bot_loop",
+            AsyncMock(side_effect=ValueError("Voice connection timed out")),
+        )
+        response = await test_client.post(
+            "/api/guild/channel", json={"guild_id": "1", "channel_id": "10"}
+        )
+        assert response.status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_resources(self, client):
+        test_client, bot = client
+        bot.api.guild_resources.return_value = GuildResources(
+            sources=2,
+            threads=3,
+            ffmpeg_processes=1,
+            buffered_bytes=3840,
+            voice_scheduler=TickStats(streams=4, late_frames=2),
+        )
+        response = await test_client.get("/api/guild/1/resources")
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["threads"] == 3 and body["buffered_bytes"] == 3840
+        assert body["voice_scheduler"]["streams"] == 4
+        assert body["voice_scheduler"]["late_frames"] == 2
+
+        bot.api.guild_resources.return_value = None
+        response = await test_client.get("/api/guild/1/resources")
+        assert response.status_code == 404
+
+        response = await test_client.get("/api/guild/abc/resources")
+        assert response.status_code == 400
@@ -55,6 +55,11 @@ class TestHarpiAPIInit:
     def test_stores_bot_reference(self, api, mock_bot):
         assert api.bot == mock_bot
 
+    def test_close_stops_the_voice_scheduler(self, api):
+        api.voice_scheduler = MagicMock()
+        api.close()
+        api.voice_scheduler.close.assert_called_once_with()
+
 
 class TestGuildHelper:
     def test_guild_returns_guild(self, api, mock_bot, mock_guild):
@@ -131,7 +136,7 @@ class TestStopMusic:
 
         await api.stop_music(12345)
 
-        assert guild_config.queue == []
+        assert list(guild_config.queue) == []
         mock_controller.clear_queue_source.assert_called_once()
 
     @pytest.mark.asyncio
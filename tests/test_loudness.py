@@ -0,0 +1,156 @@
+"""Tests for loudness measurement, the loudness cache and normalization."""
+
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from src.harpi_lib.audio import loudness
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.dsp import Biquad
+from src.harpi_lib.audio.loudness import (
+    LoudnessCache,
+    LoudnessMeter,
+    gain_for,
+    track_key,
+)
+from src.harpi_lib.audio.mixer import MixerSource
+
+FRAME = 960
+
+
+def _sine(seconds: float, amplitude: float, freq: float = 1000.0):
+    """Stereo int16 frames of a sine wave."""
+    t = np.arange(int(seconds * 48000)) / 48000
+    wave = amplitude * 32767 * np.sin(2 * np.pi * freq * t)
+    stereo = np.repeat(wave[:, None], 2, axis=1).astype(np.int16)
+    return [
+        stereo[i : i + FRAME].reshape(-1) for i in range(0, len(stereo), FRAME)
+    ]
+
+
+def _measure(frames, volume: float = 1.0) -> LoudnessMeter:
+    meter = LoudnessMeter()
+    for frame in frames:
+        meter.feed(frame, volume)
+    return meter
+
+
+class TestBiquad:
+    def test_matches_sample_by_sample_filter(self):
+        b, a = [0.2, 0.3, 0.1], [1.0, -0.5, 0.25]
+        x = np.random.default_rng(0).standard_normal((FRAME * 3, 1))
+        expected = np.empty(len(x))
+        s1 = s2 = 0.0
+        for n, sample in enumerate(x[:, 0]):
+            y = b[0] * sample + s1
+            s1 = b[1] * sample - a[1] * y + s2
+            s2 = b[2] * sample - a[2] * y
+            expected[n] = y
+
+        biquad = Biquad(b, a, channels=1)
+        blocks = [biquad.process(x[i : i + FRAME]) for i in (0, 960, 1920)]
+        np.testing.assert_allclose(np.concatenate(blocks)[:, 0], expected)
+
+    def test_short_frame(self):
+        biquad = Biquad([1.0, 0.0, 0.0], [1.0, 0.0, 0.0])
+        x = np.ones((100, 2))
+        np.testing.assert_allclose(biquad.process(x), x)
+
+
+class TestLoudnessMeter:
+    def test_sine_reads_its_level(self):
+        # A 1 kHz sine at -20 dBFS in both channels is about -20 LUFS.
+        lufs = _measure(_sine(3, 0.1)).integrated()
+        assert lufs == pytest.approx(-20, abs=0.3)
+
+    def test_volume_is_undone(self):
+        plain = _measure(_sine(2, 0.1)).integrated()
+        halved = _measure(_sine(2, 0.05), volume=0.5).integrated()
+        assert halved == pytest.approx(plain, abs=0.1)
+
+    def test_silence_has_no_loudness(self):
+        assert _measure(_sine(2, 0.0)).integrated() is None
+
+    def test_quiet_passages_are_gated(self):
+        loud = _measure(_sine(3, 0.1)).integrated()
+        mixed = _measure(_sine(3, 0.1) + _sine(3, 0.001)).integrated()
+        assert mixed == pytest.approx(loud, abs=0.3)
+
+    def test_gain_for_caps_the_boost(self):
+        assert gain_for(-16, target=-16) == 1.0
+        assert gain_for(-10, target=-16) == pytest.approx(0.5, rel=0.01)
+        assert gain_for(-60, target=-16) == pytest.approx(10 ** (12 / 20))
+
+
+class TestLoudnessCache:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "loudness.json"
+        cache = LoudnessCache(path)
+        cache.put("Youtube:a", -9.123)
+        deadline = time.monotonic() + 2
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert LoudnessCache(path).get("Youtube:a") == -9.12
+
+    def test_oldest_entries_are_dropped(self, monkeypatch):
+        monkeypatch.setattr(loudness, "MAX_CACHED_TRACKS", 2)
+        cache = LoudnessCache()
+        for key in "abc":
+            cache.put(key, -10)
+        assert len(cache) == 2
+        assert cache.get("a") is None
+
+    def test_track_key(self):
+        source = MagicMock(data={"id": "x1", "extractor_key": "Youtube"})
+        assert track_key(source) == "Youtube:x1"
+        assert track_key(MagicMock(data={})) is None
+
+
+def _track(frames, volume: float = 1.0) -> MagicMock:
+    source = MagicMock()
+    source.data = {"id": "song", "extractor_key": "Youtube"}
+    source.volume = volume
+    source.read.side_effect = [f.tobytes() for f in frames] + [b""]
+    return source
+
+
+def _play(mixer, controller, source) -> list[np.ndarray]:
+    controller.add_to_queue(source)
+    out = []
+    while controller.get_queue_source() is source:
+        out.append(np.frombuffer(mixer.read(), dtype=np.int16))
+    return out
+
+
+class TestNormalization:
+    @pytest.fixture
+    def mixer(self):
+        controller = AudioController()
+        mixer = MixerSource(controller, loudness=LoudnessCache())
+        mixer.READ_TIMEOUT = 1.0
+        yield mixer, controller
+        mixer.cleanup()
+
+    def test_first_play_is_measured_then_normalized(self, mixer):
+        mixer, controller = mixer
+        frames = _sine(11, 0.5)
+        first = _play(mixer, controller, _track(frames))
+        lufs = mixer.loudness.get("Youtube:song")
+        assert lufs == pytest.approx(-6, abs=0.3)
+        assert np.abs(first[10]).max() == np.abs(frames[10]).max()
+
+        second = _play(mixer, controller, _track(frames))
+        ratio = np.abs(second[10]).max() / np.abs(frames[10]).max()
+        assert ratio == pytest.approx(gain_for(lufs), rel=0.01)
+
+    def test_skipped_track_is_not_cached(self, mixer):
+        mixer, controller = mixer
+        controller.add_to_queue(_track(_sine(11, 0.5)))
+        for _ in range(50):
+            mixer.read()
+        controller.clear_queue()
+        mixer.read()
+        assert mixer.loudness.get("Youtube:song") is None
+        assert mixer._meters == {}
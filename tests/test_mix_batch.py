@@ -0,0 +1,402 @@
+"""Tests for atomic mix batches."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import music
+from src.harpi_lib.api import GuildConfig, LoopMode
+from src.harpi_lib.audio.controller import AudioController, FrameBatch
+from src.harpi_lib.audio.mixer import MixerSource
+from src.harpi_lib.music.ytmusicdata import FFmpegPCMAudio
+from src.harpi_lib.services.admission import (
+    Admission,
+    BudgetExceeded,
+    ResourceBudget,
+)
+from src.harpi_lib.services.mix_batch import (
+    AddLayer,
+    LayerVolume,
+    MixBatchService,
+    MusicVolume,
+    RemoveLayer,
+    SetLoop,
+)
+from src.harpi_lib.status_events import StatusHub
+from tests.conftest import generate_tone_frame
+
+FROM_URL = "src.harpi_lib.services.mix_batch.YTMusicData.from_url"
+FROM_MUSIC_DATA = (
+    "src.harpi_lib.services.mix_batch.YoutubeDLSource.from_music_data"
+)
+
+
+def _layer(layer_id: str, volume: float = 0.5) -> MagicMock:
+    source = MagicMock()
+    source.id = layer_id
+    source.volume = volume
+    source.read.return_value = generate_tone_frame()
+    return source
+
+
+class TestFrameBatch:
+    def test_batch_waits_for_the_next_frame(self):
+        controller = AudioController()
+        old, new = _layer("old"), _layer("new")
+        controller.add_layer(old)
+
+        future = controller.schedule_batch(
+            FrameBatch(
+                add_layers=[new],
+                remove_layers=["old"],
+                volumes=[(new, 1.5)],
+            )
+        )
+        assert [s for _, s in controller.get_playing_sounds()] == [old]
+        assert not future.done()
+
+        MixerSource(controller).read()
+
+        assert future.done()
+        assert [s for _, s in controller.get_playing_sounds()] == [new]
+        assert new.volume == 1.5
+        old.cleanup.assert_called_once()
+
+    def test_apply_pending_notifies_once(self):
+        controller = AudioController()
+        changes = []
+        controller.on_change(lambda: changes.append(1))
+        controller.schedule_batch(FrameBatch(add_layers=[_layer("a")]))
+        controller.schedule_batch(FrameBatch(add_layers=[_layer("b")]))
+
+        controller.apply_pending()
+        controller.apply_pending()
+
+        assert len(controller.get_playing_sounds()) == 2
+        assert changes == [1]
+
+    def test_removed_layers_are_cleaned_up_outside_the_lock(self):
+        controller = AudioController()
+        old = _layer("old")
+        old.cleanup.side_effect = lambda: held.append(
+            controller._lock.locked()
+        )
+        held: list[bool] = []
+        controller.add_layer(old)
+        controller.schedule_batch(FrameBatch(remove_layers=["old"]))
+        controller.apply_pending()
+        assert held == [False]
+
+    def test_queue_volume_targets_current_track(self):
+        controller = AudioController()
+        track = _layer("track")
+        controller.set_queue_source(track)
+        controller.schedule_batch(FrameBatch(queue_volume=0.2))
+        controller.apply_pending()
+        assert track.volume == 0.2
+
+
+@pytest.fixture
+def guilds():
+    return {}
+
+
+@pytest.fixture
+def service(guilds):
+    voice_service = MagicMock()
+    voice_service.connect = AsyncMock()
+    return MixBatchService(MagicMock(), guilds, voice_service, StatusHub())
+
+
+def _guild(guilds, **layers) -> GuildConfig:
+    controller = AudioController()
+    for source in layers.values():
+        controller.add_layer(source)
+    mixer = MagicMock()
+    mixer.buffered_bytes.return_value = 0
+    gc = GuildConfig(
+        id=1,
+        mixer=mixer,
+        controller=controller,
+        background=dict(layers),
+    )
+    guilds[1] = gc
+    return gc
+
+
+class TestMixBatchService:
+    @pytest.mark.asyncio
+    async def test_applies_all_ops_in_one_controller_update(
+        self, service, guilds
+    ):
+        a, b = _layer("a"), _layer("b")
+        gc = _guild(guilds, a=a, b=b)
+        changes = []
+        gc.controller.on_change(lambda: changes.append(1))
+
+        added = await service.apply(
+            1,
+            [
+                LayerVolume("a", 1.2),
+                RemoveLayer("b"),
+                MusicVolume(3.0),
+                SetLoop(LoopMode.QUEUE),
+            ],
+        )
+
+        assert added == []
+        assert changes == [1]
+        assert a.volume == 1.2
+        assert set(gc.background) == {"a"}
+        assert gc.volume == 2.0
+        assert gc.loop is LoopMode.QUEUE
+
+    @pytest.mark.asyncio
+    async def test_invalid_op_changes_nothing(self, service, guilds):
+        a = _layer("a")
+        gc = _guild(guilds, a=a)
+
+        with pytest.raises(ValueError, match="não encontrado"):
+            await service.apply(
+                1,
+                [
+                    LayerVolume("a", 1.5),
+                    RemoveLayer("a"),
+                    LayerVolume("a", 0.1),
+                ],
+            )
+
+        assert a.volume == 0.5
+        assert set(gc.background) == {"a"}
+
+    @pytest.mark.asyncio
+    async def test_new_layers_resolve_concurrently(self, service, guilds):
+        gc = _guild(guilds)
+        in_flight = 0
+        peak = 0
+
+        async def from_url(link):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [link]
+
+        async def open_source(link, **kwargs):
+            return _layer(f"layer-{link}")
+
+        with (
+            patch(FROM_URL, side_effect=from_url),
+            patch(FROM_MUSIC_DATA, side_effect=open_source),
+        ):
+            added = await service.apply(
+                1,
+                [
+                    AddLayer("x", 0.3),
+                    AddLayer("y"),
+                ],
+            )
+
+        assert peak == 2
+        assert added == ["layer-x", "layer-y"]
+        assert gc.background["layer-x"].volume == 0.3
+        assert gc.background["layer-y"].volume == 0.7
+        assert len(gc.controller.get_playing_sounds()) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_link_cleans_up_opened_layers(self, service, guilds):
+        gc = _guild(guilds)
+        opened = _layer("ok")
+
+        async def from_url(link):
+            return [] if link == "bad" else [link]
+
+        with (
+            patch(FROM_URL, side_effect=from_url),
+            patch(FROM_MUSIC_DATA, AsyncMock(return_value=opened)),
+        ):
+            with pytest.raises(ValueError, match="No audio found"):
+                await service.apply(
+                    1,
+                    [
+                        AddLayer("good"),
+                        AddLayer("bad"),
+                    ],
+                )
+
+        opened.cleanup.assert_called_once()
+        assert gc.background == {}
+        assert gc.controller.get_playing_sounds() == []
+
+    @pytest.mark.asyncio
+    async def test_requires_connection_or_channel(self, service):
+        with pytest.raises(ValueError, match="não conectada"):
+            await service.apply(1, [MusicVolume(1.0)])
+
+    @pytest.mark.asyncio
+    async def test_frame_boundary_is_used_while_playing(self, service, guilds):
+        a = _layer("a")
+        gc = _guild(guilds, a=a)
+        mixer = MixerSource(gc.controller)
+        task = asyncio.create_task(service.apply(1, [LayerVolume("a", 2)]))
+        while not gc.controller._pending_batches:
+            await asyncio.sleep(0)
+        assert a.volume == 0.5
+
+        mixer.read()
+        await task
+        mixer.cleanup()
+        assert a.volume == 2
+
+
+class TestMixBatchAdmission:
+    def _service(self, guilds, decoders: int) -> MixBatchService:
+        voice_service = MagicMock()
+        voice_service.connect = AsyncMock()
+        budget = ResourceBudget(
+            guild_sources=0, guild_decoders=0, decoders=decoders
+        )
+        return MixBatchService(
+            MagicMock(),
+            guilds,
+            voice_service,
+            StatusHub(),
+            admission=Admission(guilds, budget),
+        )
+
+    @pytest.mark.asyncio
+    async def test_over_budget_batch_opens_nothing(self, guilds):
+        _guild(guilds)
+        service = self._service(guilds, decoders=1)
+        with (
+            patch(FROM_URL) as from_url,
+            pytest.raises(BudgetExceeded),
+        ):
+            await service.apply(
+                1,
+                [
+                    AddLayer("x"),
+                    AddLayer("y"),
+                ],
+            )
+        from_url.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_removals_in_the_batch_free_slots(self, guilds):
+        a = MagicMock(spec=FFmpegPCMAudio, id="a", volume=0.5)
+        gc = _guild(guilds, a=a)
+        service = self._service(guilds, decoders=1)
+
+        with (
+            patch(FROM_URL, AsyncMock(side_effect=lambda link: [link])),
+            patch(FROM_MUSIC_DATA, AsyncMock(return_value=_layer("b"))),
+        ):
+            with pytest.raises(BudgetExceeded):
+                await service.apply(1, [AddLayer("b")])
+            added = await service.apply(
+                1,
+                [
+                    RemoveLayer("a"),
+                    AddLayer("b"),
+                ],
+            )
+
+        assert added == ["b"]
+        assert set(gc.background) == {"b"}
+
+
+@pytest.fixture
+def client():
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.api.commands.send = AsyncMock(return_value=["new-layer"])
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client(), bot.api
+
+    deps._bot_ref = original
+
+
+class TestBatchEndpoint:
+    @pytest.mark.asyncio
+    async def test_sends_one_batch_command(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/batch",
+            json={
+                "guild_id": "1",
+                "ops": [
+                    {"op": "layer_volume", "layer_id": "a", "volume": 0.4},
+                    {"op": "add_layer", "link": "rain"},
+                    {"op": "loop", "mode": "fila"},
+                ],
+            },
+        )
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["layer_ids"] == ["new-layer"]
+        api.commands.send.assert_awaited_once_with(
+            1,
+            "batch",
+            ops=[
+                LayerVolume("a", 0.4),
+                AddLayer("rain"),
+                SetLoop(LoopMode.QUEUE),
+            ],
+            channel_id=None,
+        )
+
+    @pytest.mark.asyncio
+    async def test_unknown_op_is_rejected(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/batch",
+            json={"guild_id": "1", "ops": [{"op": "dance"}]},
+        )
+        assert response.status_code == 400
+        api.commands.send.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_invalid_loop_mode(self, client):
+        test_client, _ = client
+        response = await test_client.post(
+            "/api/music/batch",
+            json={"guild_id": "1", "ops": [{"op": "loop", "mode": "x"}]},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_over_budget_is_429(self, client):
+        test_client, api = client
+        api.commands.send.side_effect = BudgetExceeded("Limite atingido")
+        response = await test_client.post(
+            "/api/music/batch",
+            json={"guild_id": "1", "ops": [{"op": "add_layer", "link": "x"}]},
+        )
+        assert response.status_code == 429
+        body = json.loads(await response.get_data())
+        assert body["error"] == "Limite atingido"
+
+    @pytest.mark.asyncio
+    async def test_validation_error_is_400(self, client):
+        test_client, api = client
+        api.commands.send.side_effect = ValueError("Layer a não encontrado")
+        response = await test_client.post(
+            "/api/music/batch",
+            json={
+                "guild_id": "1",
+                "ops": [{"op": "remove_layer", "layer_id": "a"}],
+            },
+        )
+        assert response.status_code == 400
+        body = json.loads(await response.get_data())
+        assert body["error"] == "Layer a não encontrado"
@@ -1,5 +1,6 @@
 import numpy as np
 
+from src.harpi_lib.audio import mixer
 from tests.conftest import (
     FRAME_SIZE,
     SAMPLES_PER_FRAME,
@@ -267,3 +268,117 @@ class TestTimeoutHandling:
 
         result = mixer_source.read()
         assert len(result) == FRAME_SIZE
+
+
+class TestResourceCounts:
+    def test_slow_read_is_buffered_until_mixed(
+        self, mixer_source, soundboard_controller
+    ):
+        import threading
+
+        release = threading.Event()
+        mock_source = MagicMock()
+
+        def slow_read():
+            release.wait(1)
+            return generate_tone_frame()
+
+        mock_source.read = slow_read
+        soundboard_controller.add_layer(mock_source)
+
+        mixer_source.read()
+        assert mixer_source.buffered_bytes() == 0
+        release.set()
+        mixer_source.pending_futures[mock_source].result(1)
+        assert mixer_source.buffered_bytes() == FRAME_SIZE
+        assert mixer_source.reader_threads() == 1
+
+        mixer_source.read()
+        assert mixer_source.buffered_bytes() == 0
+
+
+class TestLoadShedding:
+    def _starve(self, mixer_source, frames):
+        sources = mixer_source.controller.get_playing_sounds()
+        for _ in range(frames):
+            mixer_source._shed_if_starved(mixer.FRAME_SECONDS * 2, sources)
+
+    def test_sheds_button_before_layers(
+        self, mixer_source, soundboard_controller
+    ):
+        layer = MagicMock(volume=0.1)
+        button = MagicMock(volume=1.0)
+        soundboard_controller.add_layer(layer)
+        soundboard_controller.add_button_sound(button)
+
+        self._starve(mixer_source, mixer.SHED_AFTER_FRAMES - 1)
+        assert mixer_source.shed_sources == 0
+        self._starve(mixer_source, 1)
+
+        playing = [s for _, s in soundboard_controller.get_playing_sounds()]
+        assert playing == [layer]
+        assert mixer_source.shed_sources == 1
+
+    def test_sheds_quietest_layer_and_notifies(
+        self, mixer_source, soundboard_controller
+    ):
+        loud, quiet = MagicMock(volume=0.9), MagicMock(volume=0.2)
+        soundboard_controller.add_layer(loud)
+        soundboard_controller.add_layer(quiet)
+        callback = MagicMock()
+        mixer_source.add_observer("track_end", callback)
+
+        self._starve(mixer_source, mixer.SHED_AFTER_FRAMES)
+
+        playing = [s for _, s in soundboard_controller.get_playing_sounds()]
+        assert playing == [loud]
+        callback.assert_called_once()
+        quiet.cleanup.assert_called()
+
+    def test_on_time_frame_resets_count(
+        self, mixer_source, soundboard_controller
+    ):
+        soundboard_controller.add_layer(MagicMock(volume=0.5))
+        self._starve(mixer_source, mixer.SHED_AFTER_FRAMES - 1)
+        mixer_source._shed_if_starved(0.0, [])
+        self._starve(mixer_source, mixer.SHED_AFTER_FRAMES - 1)
+        assert mixer_source.shed_sources == 0
+        assert mixer_source.late_frames == mixer.SHED_AFTER_FRAMES - 1
+
+    def test_queue_and_tts_are_never_shed(
+        self, mixer_source, soundboard_controller
+    ):
+        soundboard_controller.add_to_queue(MagicMock())
+        soundboard_controller.set_tts_track(MagicMock())
+        self._starve(mixer_source, mixer.SHED_AFTER_FRAMES * 2)
+        assert mixer_source.shed_sources == 0
+        assert len(soundboard_controller.get_playing_sounds()) == 2
+
+    def test_stalled_source_does_not_shed_others(
+        self, mixer_source, soundboard_controller, monkeypatch
+    ):
+        import threading
+
+        monkeypatch.setattr(mixer, "SHED_AFTER_FRAMES", 3)
+        release = threading.Event()
+        stalled = MagicMock()
+
+        def stalled_read():
+            release.wait(0.2)
+            return generate_tone_frame()
+
+        stalled.read = stalled_read
+        healthy = MagicMock(volume=0.2)
+        healthy.read.return_value = generate_tone_frame()
+        soundboard_controller.add_to_queue(stalled)
+        soundboard_controller.add_layer(healthy)
+
+        try:
+            for _ in range(6):
+                mixer_source.read()
+        finally:
+            release.set()
+
+        playing = [s for _, s in soundboard_controller.get_playing_sounds()]
+        assert healthy in playing
+        assert mixer_source.shed_sources == 0
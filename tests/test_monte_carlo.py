@@ -0,0 +1,132 @@
+"""Tests for the vectorized Monte Carlo engine."""
+
+import numpy as np
+import pytest
+
+from src.harpi_lib.math.monte_carlo import MonteCarloEngine, keep_sum
+from src.harpi_lib.math.parser import DiceLimits, DiceParser
+
+
+@pytest.fixture
+def engine():
+    return MonteCarloEngine(rng=np.random.default_rng(1234))
+
+
+def _compile(expression: str):
+    return DiceParser().compile(expression)
+
+
+class TestSample:
+    def test_constant_expression(self, engine):
+        samples = engine.sample(_compile("2+3*4"), 10)
+        assert np.all(samples == 14)
+
+    def test_dice_stay_in_range(self, engine):
+        samples = engine.sample(_compile("3d6"), 10_000)
+        assert samples.min() >= 3 and samples.max() <= 18
+
+    def test_fudge_dice_range(self, engine):
+        samples = engine.sample(_compile("4dF"), 10_000)
+        assert samples.min() == -4 and samples.max() == 4
+
+    def test_keep_highest_never_below_keep_lowest(self):
+        kh = MonteCarloEngine(rng=np.random.default_rng(7)).sample(
+            _compile("2d20kh1"), 5_000
+        )
+        kl = MonteCarloEngine(rng=np.random.default_rng(7)).sample(
+            _compile("2d20kl1"), 5_000
+        )
+        assert np.all(kh >= kl)
+
+    def test_right_associative_power(self, engine):
+        samples = engine.sample(_compile("2^3^2"), 3)
+        assert np.all(samples == 512)
+
+    def test_integral_results_are_ints(self, engine):
+        samples = engine.sample(_compile("1d6*2/2"), 100)
+        assert samples.dtype == np.int64
+
+    def test_division_by_zero_raises(self, engine):
+        with pytest.raises(ZeroDivisionError):
+            engine.sample(_compile("1d6/0"), 10)
+
+    def test_invalid_dice_raises(self, engine):
+        with pytest.raises(ValueError, match="Invalid dice specification"):
+            engine.sample(_compile("1d0"), 10)
+
+
+class TestKeepSum:
+    def test_keep_highest(self):
+        rolls = np.array([[3, 5, 1, 6]])
+        assert keep_sum(rolls, "kh", 3)[0] == 14
+
+    def test_keep_lowest(self):
+        rolls = np.array([[15, 5]])
+        assert keep_sum(rolls, "kl", 1)[0] == 5
+
+    def test_keep_more_than_count_keeps_all(self):
+        rolls = np.array([[3, 5]])
+        assert keep_sum(rolls, "kh", 5)[0] == 8
+
+
+class TestSimulate:
+    def test_batches_cover_all_iterations(self):
+        engine = MonteCarloEngine(
+            rng=np.random.default_rng(0), cell_budget=300
+        )
+        batches = list(engine.iter_batches(_compile("3d6"), 1_000))
+        assert sum(len(b) for b in batches) == 1_000
+        assert max(len(b) for b in batches) == 100
+
+    def test_mean_close_to_expected(self, engine):
+        stats = engine.simulate(_compile("2d6+3"), 200_000)
+        assert stats.mean == pytest.approx(10.0, abs=0.05)
+
+    def test_stats_match_numpy(self):
+        engine = MonteCarloEngine(rng=np.random.default_rng(5), cell_budget=64)
+        stats = engine.simulate(_compile("4d6kh3"), 1_001)
+        samples = MonteCarloEngine(
+            rng=np.random.default_rng(5), cell_budget=64
+        )
+        raw = np.concatenate(
+            list(samples.iter_batches(_compile("4d6kh3"), 1_001))
+        )
+        assert (
+            stats.median,
+            stats.minimum,
+            stats.maximum,
+            stats.std_dev,
+        ) == pytest.approx((
+            float(np.median(raw)),
+            raw.min(),
+            raw.max(),
+            float(raw.std(ddof=1)),
+        ))
+
+    def test_top_results_most_common_first(self, engine):
+        stats = engine.simulate(_compile("2d6"), 100_000)
+        assert stats.top_results(1)[0][0] == 7
+
+    def test_non_positive_iterations_rejected(self, engine):
+        with pytest.raises(ValueError):
+            engine.simulate(_compile("1d6"), 0)
+
+
+class TestLimits:
+    def test_iterations_times_dice_are_capped(self):
+        engine = MonteCarloEngine(limits=DiceLimits(max_simulated_dice=1_000))
+        engine.simulate(_compile("10d6"), 100)
+        with pytest.raises(ValueError, match="Simulation too large"):
+            engine.simulate(_compile("10d6"), 101)
+
+    def test_dice_and_sides_limits_apply(self):
+        engine = MonteCarloEngine(limits=DiceLimits(max_dice=5, max_sides=6))
+        with pytest.raises(ValueError, match="Too many dice"):
+            engine.simulate(_compile("6d6"), 1)
+        with pytest.raises(ValueError, match="Too many sides"):
+            engine.simulate(_compile("1d7"), 1)
+
+    def test_one_sample_must_fit_a_batch(self):
+        engine = MonteCarloEngine(cell_budget=10)
+        with pytest.raises(ValueError, match="per sample"):
+            engine.iter_batches(_compile("11d6"), 1)
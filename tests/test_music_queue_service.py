@@ -7,6 +7,7 @@ import pytest
 
 from src.harpi_lib.api import GuildConfig, LoopMode
 from src.harpi_lib.services.music_queue import MusicQueueService
+from src.harpi_lib.status_events import StatusEvent
 
 
 @pytest.fixture
@@ -176,16 +177,77 @@ class TestStop:
         guilds[1] = gc
 
         await service.stop(1)
-        assert gc.queue == []
+        assert list(gc.queue) == []
         assert gc.current_music is None
         gc.controller.clear_queue_source.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_stop_publishes_queue_and_track(self, service, guilds):
+        guilds[1] = _make_guild_config(guild_id=1, queue=[MagicMock()])
+        subscription = service.status_events.subscribe(1)
+
+        await service.stop(1)
+        assert subscription.drain() == [
+            StatusEvent("queue", {"op": "clear"}),
+            StatusEvent("track", {"current_music": None}),
+        ]
+
     @pytest.mark.asyncio
     async def test_stop_raises_when_not_connected(self, service):
         with pytest.raises(ValueError, match="não conectada"):
             await service.stop(999)
 
 
+class TestQueueEdits:
+    @pytest.fixture
+    def queued(self, guilds):
+        gc = _make_guild_config(guild_id=1, queue=["a", "b", "c"])
+        guilds[1] = gc
+        return gc
+
+    @pytest.mark.asyncio
+    async def test_move_publishes_final_index(self, service, queued):
+        entry = queued.queue.snapshot()[0]
+        subscription = service.status_events.subscribe(1)
+
+        await service.move(1, entry.id, 5)
+        assert list(queued.queue) == ["b", "c", "a"]
+        assert subscription.drain() == [
+            StatusEvent("queue", {"op": "move", "id": entry.id, "index": 2})
+        ]
+
+    @pytest.mark.asyncio
+    async def test_remove(self, service, queued):
+        entry = queued.queue.snapshot()[1]
+        subscription = service.status_events.subscribe(1)
+
+        await service.remove(1, entry.id)
+        assert list(queued.queue) == ["a", "c"]
+        assert subscription.drain() == [
+            StatusEvent("queue", {"op": "remove", "id": entry.id})
+        ]
+
+    @pytest.mark.asyncio
+    async def test_remove_unknown_item_raises(self, service, queued):
+        with pytest.raises(ValueError, match="não encontrada"):
+            await service.remove(1, 999)
+
+    @pytest.mark.asyncio
+    async def test_shuffle_publishes_order(self, service, queued):
+        subscription = service.status_events.subscribe(1)
+
+        await service.shuffle(1)
+        order = [entry.id for entry in queued.queue.snapshot().entries()]
+        assert subscription.drain() == [
+            StatusEvent("queue", {"op": "shuffle", "order": order})
+        ]
+
+    @pytest.mark.asyncio
+    async def test_edits_raise_when_not_connected(self, service):
+        with pytest.raises(ValueError, match="não conectada"):
+            await service.shuffle(999)
+
+
 class TestSkip:
     @pytest.mark.asyncio
     async def test_skip_calls_next_music_with_force(self, service, guilds):
@@ -203,6 +265,83 @@ class TestSkip:
         with pytest.raises(ValueError, match="não conectada"):
             await service.skip(999)
 
+    @pytest.mark.asyncio
+    async def test_skip_count_drops_intermediate_tracks(self, service, guilds):
+        gc = _make_guild_config(guild_id=1, queue=["a", "b", "c"])
+        guilds[1] = gc
+
+        with patch.object(
+            service, "next_music", new_callable=AsyncMock
+        ) as mock_next:
+            await service.skip(1, count=3)
+            mock_next.assert_called_once_with(gc, force_next=True)
+        assert list(gc.queue) == ["c"]
+
+    @pytest.mark.asyncio
+    async def test_skip_count_keeps_looped_queue_order(self, service, guilds):
+        cur, a, b, c = (MagicMock() for _ in range(4))
+        gc = _make_guild_config(
+            guild_id=1, queue=[a, b, c], current_music=cur, loop=LoopMode.QUEUE
+        )
+        guilds[1] = gc
+
+        with patch(
+            "src.harpi_lib.services.music_queue.YoutubeDLSource.from_music_data",
+            new_callable=AsyncMock,
+        ):
+            await service.skip(1, count=3)
+        # Same as three single skips.
+        assert gc.current_music is c
+        assert list(gc.queue) == [cur, a, b]
+
+
+class TestOnQueueEnd:
+    def test_submits_advance_command(self, service):
+        service.commands = MagicMock()
+        gc = _make_guild_config(guild_id=7)
+
+        service.on_queue_end(gc)
+        service.commands.submit.assert_called_once_with(7, "advance")
+
+    @pytest.mark.asyncio
+    async def test_advance_plays_next(self, service, guilds):
+        gc = _make_guild_config(guild_id=1)
+        guilds[1] = gc
+
+        with patch.object(
+            service, "next_music", new_callable=AsyncMock
+        ) as mock_next:
+            await service.advance(1)
+            await service.advance(2)
+        mock_next.assert_called_once_with(gc)
+
+
+class TestPauseResume:
+    @pytest.mark.asyncio
+    async def test_pause_publishes_playback(self, service, mock_bot):
+        voice_client = mock_bot.get_guild.return_value.voice_client
+        voice_client.is_playing.return_value = False
+        voice_client.is_paused.return_value = True
+        subscription = service.status_events.subscribe(1)
+
+        await service.pause(1)
+        voice_client.pause.assert_called_once()
+        assert subscription.drain() == [
+            StatusEvent(
+                "playback",
+                {"progress": 0, "is_playing": False, "is_paused": True},
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_resume_without_voice_client_is_noop(
+        self, service, mock_bot
+    ):
+        mock_bot.get_guild.return_value = None
+        subscription = service.status_events.subscribe(1)
+        await service.resume(1)
+        assert subscription.drain() == []
+
 
 class TestSetLoop:
     @pytest.mark.asyncio
@@ -213,6 +352,16 @@ class TestSetLoop:
         await service.set_loop(1, LoopMode.TRACK)
         assert gc.loop == LoopMode.TRACK
 
+    @pytest.mark.asyncio
+    async def test_publishes_loop_event(self, service, guilds):
+        guilds[1] = _make_guild_config(guild_id=1)
+        subscription = service.status_events.subscribe(1)
+
+        await service.set_loop(1, LoopMode.QUEUE)
+        assert subscription.drain() == [
+            StatusEvent("loop", {"loop_mode": "queue"})
+        ]
+
     @pytest.mark.asyncio
     async def test_raises_when_not_connected(self, service):
         with pytest.raises(ValueError, match="não conectada"):
@@ -0,0 +1,197 @@
+"""Tests for the cached, ETag-aware music status endpoint."""
+
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+import src.harpi_lib.api as api_module
+from src.api import music
+from src.harpi_lib.api import GuildConfig, LoopMode
+from src.harpi_lib.control import STATUS_QUEUE_PREVIEW, BotControl
+from src.harpi_lib.music.track_queue import TrackQueue
+
+
+def _track(n: int) -> MagicMock:
+    track = MagicMock()
+    track.title = f"track {n}"
+    track.duration = 60
+    track.url = f"https://example.com/{n}"
+    return track
+
+
+@pytest.fixture
+def guild_config():
+    gc = GuildConfig(id=1, mixer=MagicMock(), controller=MagicMock())
+    gc.controller.get_queue_source.return_value = None
+    gc.queue = TrackQueue()
+    gc.background = {}
+    gc.loop = LoopMode.OFF
+    return gc
+
+
+@pytest.fixture
+def client(guild_config):
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.get_guild.return_value.voice_client = None
+    bot.api.bot = bot
+    bot.api.get_guild_config.side_effect = lambda gid: (
+        guild_config if gid == guild_config.id else None
+    )
+    deps.init_bot(bot)
+    music._status_cache.clear()
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client()
+
+    deps._bot_ref = original
+    music._status_cache.clear()
+
+
+class TestMusicStatus:
+    @pytest.mark.asyncio
+    async def test_returns_full_status_with_etag(self, client):
+        response = await client.get("/api/music/1/status")
+        assert response.status_code == 200
+        assert response.headers["ETag"]
+        body = json.loads(await response.get_data())
+        assert body["volume"] == 0.7
+        assert body["progress"] == 0
+        assert body["is_playing"] is False
+
+    @pytest.mark.asyncio
+    async def test_unchanged_state_returns_304(self, client):
+        first = await client.get("/api/music/1/status")
+        etag = first.headers["ETag"]
+        second = await client.get(
+            "/api/music/1/status", headers={"If-None-Match": etag}
+        )
+        assert second.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_progress_alone_keeps_the_etag(self, client, guild_config):
+        source = MagicMock(progress=10)
+        guild_config.controller.get_queue_source.return_value = source
+        first = await client.get("/api/music/1/status")
+        source.progress = 11
+        second = await client.get(
+            "/api/music/1/status",
+            headers={"If-None-Match": first.headers["ETag"]},
+        )
+        assert second.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_disconnected_guild_leaves_the_cache(
+        self, client, guild_config
+    ):
+        await client.get("/api/music/1/status")
+        assert 1 in music._status_cache
+        guild_config.id = 2  # no config for guild 1 any more
+        await client.get("/api/music/1/status")
+        assert 1 not in music._status_cache
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, client, monkeypatch):
+        monkeypatch.setattr(music, "STATUS_CACHE_SIZE", 2)
+        music._status_cache.update({7: (1, b"{}"), 8: (2, b"{}")})
+        await client.get("/api/music/1/status")
+        assert set(music._status_cache) == {8, 1}
+
+    @pytest.mark.asyncio
+    async def test_version_bump_invalidates(self, client, guild_config):
+        first = await client.get("/api/music/1/status")
+        guild_config.volume = 1.5
+        guild_config.bump_version()
+
+        second = await client.get(
+            "/api/music/1/status",
+            headers={"If-None-Match": first.headers["ETag"]},
+        )
+        assert second.status_code == 200
+        assert json.loads(await second.get_data())["volume"] == 1.5
+
+    @pytest.mark.asyncio
+    async def test_body_is_cached_per_version(self, client, monkeypatch):
+        calls = []
+        original = BotControl.status
+
+        async def status(self, guild_id):
+            calls.append(guild_id)
+            return await original(self, guild_id)
+
+        monkeypatch.setattr(BotControl, "status", status)
+        await client.get("/api/music/1/status")
+        await client.get("/api/music/1/status")
+        assert calls == [1]
+
+    @pytest.mark.asyncio
+    async def test_invalid_guild_id(self, client):
+        response = await client.get("/api/music/abc/status")
+        assert response.status_code == 400
+
+
+class TestQueuePages:
+    @pytest.mark.asyncio
+    async def test_status_previews_queue(self, client, guild_config):
+        guild_config.queue.extend(
+            _track(n) for n in range(STATUS_QUEUE_PREVIEW + 10)
+        )
+        body = json.loads(
+            await (await client.get("/api/music/1/status")).get_data()
+        )
+        assert len(body["queue"]) == STATUS_QUEUE_PREVIEW
+        assert body["queue_length"] == STATUS_QUEUE_PREVIEW + 10
+        assert body["queue"][0]["id"] == guild_config.queue.snapshot()[0].id
+
+    @pytest.mark.asyncio
+    async def test_queue_page(self, client, guild_config):
+        guild_config.queue.extend(_track(n) for n in range(30))
+        response = await client.get(
+            "/api/music/queue",
+            query_string={"guild_id": "1", "offset": "10", "limit": "5"},
+        )
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert [item["title"] for item in body["items"]] == [
+            f"track {n}" for n in range(10, 15)
+        ]
+        assert body["total"] == 30
+
+    @pytest.mark.asyncio
+    async def test_queue_page_rejects_large_limit(self, client):
+        response = await client.get(
+            "/api/music/queue",
+            query_string={"guild_id": "1", "limit": "100000"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_queue_page_unknown_guild_is_empty(self, client):
+        response = await client.get(
+            "/api/music/queue", query_string={"guild_id": "2"}
+        )
+        body = json.loads(await response.get_data())
+        assert body["items"] == []
+        assert body["total"] == 0
+
+
+class TestVersion:
+    def test_bump_increases_version(self, guild_config):
+        before = guild_config.version
+        assert guild_config.bump_version() > before
+
+    def test_versions_unique_across_configs(self, guild_config):
+        other = GuildConfig(id=2, mixer=MagicMock(), controller=MagicMock())
+        assert other.version != guild_config.version
+
+    def test_versions_count_from_the_boot_time(self, guild_config):
+        # A restarted bot must not reuse versions of the previous boot.
+        assert guild_config.version >= api_module._BOOT_EPOCH
+        assert api_module._BOOT_EPOCH <= time.time_ns() // 1000
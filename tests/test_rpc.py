@@ -0,0 +1,149 @@
+"""Tests for the bot control surface served over a Unix socket."""
+
+import asyncio
+import os
+import pickle
+import struct
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.audio.dsp import EffectSpec
+from src.harpi_lib.control import BotControl, on_current_loop
+from src.harpi_lib.rpc import RemoteControl, RpcServer
+from src.harpi_lib.services.admission import BudgetExceeded
+from src.harpi_lib.status_events import StatusEvent, StatusHub
+
+
+@pytest.fixture
+def api():
+    api = MagicMock()
+    api.bot.get_guild.return_value.voice_client = None
+    api.status_events = StatusHub()
+    config = GuildConfig(id=1, mixer=MagicMock(), controller=MagicMock())
+    config.controller.get_queue_source.return_value = None
+    config.controller.is_paused.return_value = False
+    api.get_guild_config.side_effect = lambda gid: config if gid == 1 else None
+    api.commands.send = AsyncMock()
+    return api
+
+
+@pytest.fixture
+async def remote(api, tmp_path):
+    path = tmp_path / "bot.sock"
+    server = RpcServer(BotControl(api, on_current_loop), path)
+    await server.start()
+    remote = RemoteControl(path)
+    yield remote
+    await remote.close()
+    await server.close()
+
+
+class TestRemoteControl:
+    @pytest.mark.asyncio
+    async def test_status_round_trip(self, remote, api):
+        version, status = await remote.status(1)
+        assert version == api.get_guild_config(1).version
+        assert status["loop_mode"] == "off"
+        assert status["is_playing"] is False
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_a_connection(self, remote):
+        results = await asyncio.gather(
+            *(remote.is_connected(gid) for gid in (1, 2, 1))
+        )
+        assert results == [True, False, True]
+
+    @pytest.mark.asyncio
+    async def test_command_arguments_and_errors(self, remote, api):
+        api.commands.send.side_effect = ValueError("Cena não encontrada")
+        with pytest.raises(ValueError, match="Cena não encontrada"):
+            await remote.send(1, "load_scene", name="x", channel_id=None)
+        api.commands.send.assert_awaited_once_with(
+            1, "load_scene", name="x", channel_id=None
+        )
+
+    def test_unknown_method(self, remote):
+        with pytest.raises(AttributeError):
+            remote.get_api  # noqa: B018
+
+    @pytest.mark.asyncio
+    async def test_server_down(self, tmp_path):
+        remote = RemoteControl(tmp_path / "missing.sock")
+        with pytest.raises(OSError):
+            await remote.status(1)
+
+
+class TestRemoteStatusStream:
+    @pytest.mark.asyncio
+    async def test_snapshot_then_events(self, remote, api):
+        stream = await remote.open_status_stream(1)
+        assert stream.snapshot["volume"] == api.get_guild_config(1).volume
+
+        api.status_events.publish(1, "loop", {"loop_mode": "track"})
+        assert await stream.next() == [
+            StatusEvent("loop", {"loop_mode": "track"})
+        ]
+
+        stream.close()
+        for _ in range(100):
+            if not api.status_events.subscriber_count(1):
+                break
+            await asyncio.sleep(0.01)
+        assert api.status_events.subscriber_count(1) == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_guild(self, remote, api):
+        api.bot.get_guild.return_value = None
+        assert await remote.open_status_stream(7) is None
+        assert api.status_events.subscriber_count(7) == 0
+
+
+class _Exploit:
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __reduce__(self):
+        return (os.system, (f"touch {self.marker}",))
+
+
+class TestSecurity:
+    @pytest.mark.asyncio
+    async def test_socket_directory_is_private(self, api, tmp_path):
+        path = tmp_path / "rpc" / "bot.sock"
+        server = RpcServer(BotControl(api, on_current_loop), path)
+        await server.start()
+        try:
+            assert path.parent.stat().st_mode & 0o777 == 0o700
+        finally:
+            await server.close()
+
+    @pytest.mark.asyncio
+    async def test_shared_directory_is_refused(self, api, tmp_path):
+        tmp_path.chmod(0o1777)
+        server = RpcServer(BotControl(api, on_current_loop), tmp_path / "s")
+        with pytest.raises(PermissionError):
+            await server.start()
+        with pytest.raises(PermissionError):
+            await RemoteControl(tmp_path / "s").status(1)
+
+    @pytest.mark.asyncio
+    async def test_frames_naming_callables_are_dropped(self, remote, tmp_path):
+        marker = tmp_path / "ran"
+        payload = pickle.dumps((1, "status", (_Exploit(marker),), {}))
+        reader, writer = await asyncio.open_unix_connection(str(remote.path))
+        writer.write(struct.pack(">I", len(payload)) + payload)
+        await writer.drain()
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        writer.close()
+        assert not marker.exists()
+
+    @pytest.mark.asyncio
+    async def test_package_types_cross_the_socket(self, remote, api):
+        api.commands.send.side_effect = BudgetExceeded("Sem orçamento")
+        with pytest.raises(BudgetExceeded):
+            await remote.send(1, "effects", effects=[EffectSpec("pan")])
+        assert api.commands.send.await_args.kwargs == {
+            "effects": [EffectSpec("pan")]
+        }
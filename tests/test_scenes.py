@@ -0,0 +1,213 @@
+"""Tests for scene presets."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import music
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.scenes import SceneLayer, ScenePreset, SceneStore
+from src.harpi_lib.services.mix_batch import AddLayer, RemoveLayer
+from src.harpi_lib.services.scenes import SceneService
+
+TAVERN = ScenePreset(
+    "tavern",
+    (SceneLayer("https://yt/fire", 0.4), SceneLayer("https://yt/crowd", 1.0)),
+)
+
+
+class TestSceneStore:
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "scenes.json"
+        SceneStore(path).save(1, TAVERN)
+
+        store = SceneStore(path)
+        assert store.get(1, "tavern") == TAVERN
+        assert store.get(2, "tavern") is None
+        assert not path.with_name("scenes.json.tmp").exists()
+
+    def test_scenes_are_sorted_by_name(self):
+        store = SceneStore()
+        store.save(1, ScenePreset("forest", ()))
+        store.save(1, TAVERN)
+        store.save(1, ScenePreset("cave", ()))
+        assert [s.name for s in store.scenes(1)] == [
+            "cave",
+            "forest",
+            "tavern",
+        ]
+
+    def test_delete_unknown_scene(self):
+        with pytest.raises(ValueError, match="não encontrada"):
+            SceneStore().delete(1, "nope")
+
+    def test_unreadable_file_starts_empty(self, tmp_path):
+        path = tmp_path / "scenes.json"
+        path.write_text("{not json")
+        assert SceneStore(path).scenes(1) == []
+
+
+def _source(page_url: str, volume: float) -> MagicMock:
+    source = MagicMock()
+    source.data = {"webpage_url": page_url, "url": "https://stream/x"}
+    source.volume = volume
+    return source
+
+
+@pytest.fixture
+def guilds():
+    return {}
+
+
+@pytest.fixture
+def mix_batch():
+    service = MagicMock()
+    service.apply = AsyncMock(return_value=["n1", "n2"])
+    return service
+
+
+@pytest.fixture
+def service(guilds, mix_batch):
+    return SceneService(guilds, mix_batch, SceneStore())
+
+
+class TestSceneService:
+    @pytest.mark.asyncio
+    async def test_save_records_page_links_and_volumes(self, service, guilds):
+        guilds[1] = GuildConfig(
+            id=1,
+            mixer=MagicMock(),
+            controller=MagicMock(),
+            background={
+                "a": _source("https://yt/fire", 0.4),
+                "b": _source("https://yt/crowd", 1.0),
+            },
+        )
+        scene = await service.save(1, "tavern")
+        assert scene == TAVERN
+        assert service.list_scenes(1) == [TAVERN]
+
+    @pytest.mark.asyncio
+    async def test_save_without_layers(self, service, guilds):
+        guilds[1] = GuildConfig(
+            id=1, mixer=MagicMock(), controller=MagicMock()
+        )
+        with pytest.raises(ValueError, match="Nenhum layer"):
+            await service.save(1, "empty")
+
+    @pytest.mark.asyncio
+    async def test_load_swaps_layers_in_one_batch(
+        self, service, guilds, mix_batch
+    ):
+        service.store.save(1, TAVERN)
+        guilds[1] = GuildConfig(
+            id=1,
+            mixer=MagicMock(),
+            controller=MagicMock(),
+            background={"old": _source("https://yt/rain", 0.7)},
+        )
+
+        assert await service.load(1, "tavern") == ["n1", "n2"]
+
+        mix_batch.apply.assert_awaited_once_with(
+            1,
+            [
+                RemoveLayer("old"),
+                AddLayer("https://yt/fire", 0.4),
+                AddLayer("https://yt/crowd", 1.0),
+            ],
+            None,
+        )
+
+    @pytest.mark.asyncio
+    async def test_load_connects_when_needed(self, service, mix_batch):
+        service.store.save(1, TAVERN)
+        await service.load(1, "tavern", channel_id=5)
+        ops = mix_batch.apply.await_args.args[1]
+        assert [type(op) for op in ops] == [AddLayer, AddLayer]
+        assert mix_batch.apply.await_args.args[2] == 5
+
+    @pytest.mark.asyncio
+    async def test_load_unknown_scene(self, service, mix_batch):
+        with pytest.raises(ValueError, match="não encontrada"):
+            await service.load(1, "nope")
+        mix_batch.apply.assert_not_awaited()
+
+
+@pytest.fixture
+def client():
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.api.commands.send = AsyncMock()
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client(), bot.api
+
+    deps._bot_ref = original
+
+
+class TestSceneEndpoints:
+    @pytest.mark.asyncio
+    async def test_list(self, client):
+        test_client, api = client
+        api.list_scenes.return_value = [TAVERN]
+        response = await test_client.get("/api/music/1/scenes")
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["scenes"][0]["name"] == "tavern"
+        assert body["scenes"][0]["layers"][1] == {
+            "link": "https://yt/crowd",
+            "volume": 1.0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_save_goes_through_command_bus(self, client):
+        test_client, api = client
+        api.commands.send.return_value = TAVERN
+        response = await test_client.post(
+            "/api/music/scenes/save", json={"guild_id": "1", "name": "tavern"}
+        )
+        assert response.status_code == 200
+        api.commands.send.assert_awaited_once_with(
+            1, "save_scene", name="tavern"
+        )
+
+    @pytest.mark.asyncio
+    async def test_load_returns_new_layer_ids(self, client):
+        test_client, api = client
+        api.commands.send.return_value = ["n1"]
+        response = await test_client.post(
+            "/api/music/scenes/load",
+            json={"guild_id": "1", "name": "tavern", "channel_id": "5"},
+        )
+        assert response.status_code == 200
+        body = json.loads(await response.get_data())
+        assert body["layer_ids"] == ["n1"]
+        api.commands.send.assert_awaited_once_with(
+            1, "load_scene", name="tavern", channel_id=5
+        )
+
+    @pytest.mark.asyncio
+    async def test_load_failure_is_400(self, client):
+        test_client, api = client
+        api.commands.send.side_effect = ValueError("Cena não encontrada")
+        response = await test_client.post(
+            "/api/music/scenes/load", json={"guild_id": "1", "name": "x"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_delete_unknown_is_404(self, client):
+        test_client, api = client
+        api.delete_scene.side_effect = ValueError("Cena não encontrada")
+        response = await test_client.post(
+            "/api/music/scenes/delete", json={"guild_id": "1", "name": "x"}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,138 @@
+"""Tests for shard workers and the guild router."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+import pytest
+
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.control import BotControl, on_current_loop
+from src.harpi_lib.guild_directory import GuildEntry
+from src.harpi_lib.harpi_bot import ShardedHarpiBot
+from src.harpi_lib.rpc import RemoteControl, RpcServer
+from src.harpi_lib.shards import (
+    ShardRouter,
+    shard_of,
+    worker_shards,
+    worker_socket,
+)
+from src.harpi_lib.status_events import StatusHub
+
+SHARD_COUNT = 4
+
+
+def _guild_on(shard: int, n: int = 0) -> int:
+    """A guild ID Discord would deliver on *shard*."""
+    return ((n * SHARD_COUNT + shard) << 22) | 12345
+
+
+class TestShardLayout:
+    def test_shard_of_uses_the_timestamp_bits(self):
+        shards = [shard_of(_guild_on(s, 7), SHARD_COUNT) for s in range(4)]
+        assert shards == [0, 1, 2, 3]
+
+    def test_workers_split_every_shard_once(self):
+        ranges = [worker_shards(w, 3, 8) for w in range(3)]
+        assert [list(r) for r in ranges] == [[0, 1], [2, 3, 4], [5, 6, 7]]
+
+    def test_more_workers_than_shards(self):
+        with pytest.raises(ValueError):
+            worker_shards(0, 3, 2)
+
+    def test_worker_socket(self, tmp_path):
+        base = tmp_path / "harpi-bot.sock"
+        assert worker_socket(base, 0, 1) == base
+        assert worker_socket(base, 1, 2) == tmp_path / "harpi-bot-1.sock"
+
+    def test_sharded_bot_runs_its_range(self):
+        bot = ShardedHarpiBot(
+            command_prefix="-",
+            intents=discord.Intents.none(),
+            shard_ids=[2, 3],
+            shard_count=SHARD_COUNT,
+        )
+        assert bot.shard_ids == [2, 3]
+        assert bot.shard_count == SHARD_COUNT
+
+
+def _worker_api(guild_ids: list[int]) -> MagicMock:
+    """A worker's ``HarpiAPI``, standing in for its gateway connection."""
+    api = MagicMock()
+    api.bot.get_guild.return_value.voice_client = None
+    api.status_events = StatusHub()
+    entries = tuple(GuildEntry(gid, f"g{gid}", "", ()) for gid in guild_ids)
+    api.directory.guilds.return_value = entries
+    configs = {}
+    for gid in guild_ids:
+        configs[gid] = GuildConfig(
+            id=gid, mixer=MagicMock(), controller=MagicMock()
+        )
+        configs[gid].controller.get_queue_source.return_value = None
+        configs[gid].controller.is_paused.return_value = False
+    api.get_guild_config.side_effect = configs.get
+    api.commands.send = AsyncMock(return_value="ok")
+    api.get_add_job.return_value = None
+    return api
+
+
+@pytest.fixture
+async def cluster(tmp_path):
+    """Two shard workers, each served on its own socket."""
+    guilds = [[_guild_on(0), _guild_on(1)], [_guild_on(2), _guild_on(3)]]
+    apis, servers, remotes = [], [], []
+    for worker, owned in enumerate(guilds):
+        api = _worker_api(owned)
+        path = worker_socket(tmp_path / "bot.sock", worker, 2)
+        server = RpcServer(BotControl(api, on_current_loop), path)
+        await server.start()
+        apis.append(api)
+        servers.append(server)
+        remotes.append(RemoteControl(path))
+    router = ShardRouter(remotes, SHARD_COUNT)
+    yield router, apis, guilds
+    await router.close()
+    for server in servers:
+        await server.close()
+
+
+class TestShardRouter:
+    @pytest.mark.asyncio
+    async def test_calls_go_to_the_owning_worker(self, cluster):
+        router, apis, guilds = cluster
+        for owned in guilds:
+            for guild_id in owned:
+                assert await router.is_connected(guild_id)
+
+        await router.send(guilds[1][0], "skip")
+        apis[1].commands.send.assert_awaited_once_with(guilds[1][0], "skip")
+        apis[0].commands.send.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_guilds_are_merged_in_name_order(self, cluster):
+        router, _, guilds = cluster
+        entries = await router.guilds()
+        assert sorted(e.id for e in entries) == sorted(sum(guilds, []))
+        assert [e.name for e in entries] == sorted(e.name for e in entries)
+
+    @pytest.mark.asyncio
+    async def test_add_job_is_found_on_any_worker(self, cluster):
+        router, apis, _ = cluster
+        apis[1].get_add_job.side_effect = lambda job_id: (
+            {"id": job_id} if job_id == "j1" else None
+        )
+        assert await router.get_add_job("j1") == {"id": "j1"}
+        assert await router.get_add_job("j2") is None
+
+    @pytest.mark.asyncio
+    async def test_status_stream_is_opened_on_the_owner(self, cluster):
+        router, apis, guilds = cluster
+        apis[0].status_events = MagicMock()
+        stream = await router.open_status_stream(guilds[1][1])
+        assert stream is not None
+        stream.close()
+        apis[0].status_events.subscribe.assert_not_called()
+
+    def test_unknown_method(self, cluster):
+        router, _, _ = cluster
+        with pytest.raises(AttributeError):
+            router.get_api  # noqa: B018
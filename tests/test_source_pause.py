@@ -0,0 +1,150 @@
+"""Tests for pausing one source while the rest keep playing."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from quart import Quart
+from quart_schema import QuartSchema
+
+import src.api.deps as deps
+from src.api import music
+from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.mixer import MixerSource
+from src.harpi_lib.services.music_queue import MusicQueueService
+from tests.conftest import MockAudioSource
+
+
+def _frames(value: int, count: int = 20) -> list[bytes]:
+    return [np.full(1920, value + n, np.int16).tobytes() for n in range(count)]
+
+
+def _level(data: bytes) -> int:
+    return int(np.frombuffer(data, dtype=np.int16)[0])
+
+
+@pytest.fixture
+def mixer():
+    controller = AudioController()
+    mixer = MixerSource(controller)
+    mixer.READ_TIMEOUT = 1.0
+    yield mixer, controller
+    mixer.cleanup()
+
+
+class TestControllerPause:
+    def test_paused_source_is_held_but_not_playing(self):
+        controller = AudioController()
+        layer = MagicMock(id="rain")
+        controller.add_layer(layer)
+        controller.set_paused("rain", True)
+        assert controller.get_playing_sounds() == []
+        assert controller.get_paused_sounds() == [("track", layer)]
+        assert controller.is_paused("rain")
+        assert layer in controller.all_sources()
+        layer.cleanup.assert_not_called()
+
+    def test_unknown_target(self):
+        with pytest.raises(ValueError, match="não encontrada"):
+            AudioController().set_paused("queue", True)
+
+    def test_next_queue_track_starts_unpaused(self):
+        controller = AudioController()
+        first, second = MagicMock(), MagicMock()
+        controller.add_to_queue(first)
+        controller.add_to_queue(second)
+        controller.set_paused("queue", True)
+        controller._on_track_finished(first)
+        assert controller.get_playing_sounds() == [("queue", second)]
+        assert controller.get_paused_sounds() == []
+
+
+class TestMixerPause:
+    def test_resume_continues_where_it_stopped(self, mixer):
+        mixer, controller = mixer
+        layer = MockAudioSource(frames=_frames(100))
+        layer.id = "rain"
+        controller.add_layer(layer)
+        heard = [_level(mixer.read()) for _ in range(3)]
+
+        controller.set_paused("rain", True)
+        silence = [_level(mixer.read()) for _ in range(5)]
+        calls = layer.read_calls
+        assert silence == [0] * 5
+        assert [_level(mixer.read()) for _ in range(2)] == [0, 0]
+        assert layer.read_calls == calls
+
+        controller.set_paused("rain", False)
+        heard += [_level(mixer.read()) for _ in range(3)]
+        assert heard == list(range(100, 106))
+
+    def test_other_sources_keep_playing(self, mixer):
+        mixer, controller = mixer
+        rain = MockAudioSource(frames=_frames(100))
+        rain.id = "rain"
+        controller.add_layer(rain)
+        controller.add_to_queue(MockAudioSource(frames=_frames(1000)))
+        controller.set_paused("rain", True)
+        assert [_level(mixer.read()) for _ in range(3)] == [1000, 1001, 1002]
+
+
+class TestPauseCommand:
+    @pytest.mark.asyncio
+    async def test_target_pauses_only_that_source(self):
+        controller = AudioController()
+        controller.add_layer(MagicMock(id="rain"))
+        guilds = {
+            1: GuildConfig(id=1, mixer=MagicMock(), controller=controller)
+        }
+        bot = MagicMock()
+        service = MusicQueueService(bot, guilds, MagicMock())
+        await service.pause(1, target="rain")
+        assert controller.is_paused("rain")
+        bot.get_guild.assert_not_called()
+        await service.resume(1, target="rain")
+        assert not controller.is_paused("rain")
+
+
+@pytest.fixture
+def client():
+    original = deps._bot_ref
+    bot = MagicMock()
+    bot.api.commands.send = AsyncMock()
+    deps.init_bot(bot)
+
+    app = Quart(__name__)
+    QuartSchema(app)
+    app.register_blueprint(music.bp)
+    yield app.test_client(), bot.api
+
+    deps._bot_ref = original
+
+
+class TestPauseEndpoint:
+    @pytest.mark.asyncio
+    async def test_target_is_forwarded(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/pause", json={"guild_id": "1", "target": "rain"}
+        )
+        assert response.status_code == 200
+        api.commands.send.assert_awaited_once_with(1, "pause", target="rain")
+
+    @pytest.mark.asyncio
+    async def test_without_target_pauses_everything(self, client):
+        test_client, api = client
+        response = await test_client.post(
+            "/api/music/resume", json={"guild_id": "1"}
+        )
+        assert response.status_code == 200
+        api.commands.send.assert_awaited_once_with(1, "resume")
+
+    @pytest.mark.asyncio
+    async def test_unknown_source(self, client):
+        test_client, api = client
+        api.commands.send.side_effect = ValueError("Fonte x não encontrada")
+        response = await test_client.post(
+            "/api/music/pause", json={"guild_id": "1", "target": "x"}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,107 @@
+"""Tests for the status push channel."""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+import src.harpi_lib.status_events as status_events
+from src.harpi_lib.status_events import (
+    StatusEvent,
+    StatusHub,
+    layer_payload,
+    track_payload,
+)
+
+
+@pytest.fixture
+def hub():
+    return StatusHub()
+
+
+class TestStatusEvent:
+    def test_encodes_sse_frame(self):
+        event = StatusEvent("volume", {"volume": 0.5})
+        assert event.encode() == 'event: volume\ndata: {"volume":0.5}\n\n'
+
+
+class TestPayloads:
+    def test_track_payload(self):
+        music = MagicMock(title="Song", duration=120, url="http://x")
+        assert track_payload(music) == {
+            "title": "Song",
+            "duration": 120,
+            "url": "http://x",
+        }
+
+    def test_track_payload_none(self):
+        assert track_payload(None) is None
+
+    def test_layer_payload(self):
+        source = MagicMock(title="Rain", url="http://r", volume=0.7)
+        assert layer_payload("l1", source)["id"] == "l1"
+
+
+class TestStatusHub:
+    @pytest.mark.asyncio
+    async def test_subscriber_receives_published_events(self, hub):
+        subscription = hub.subscribe(1)
+        hub.publish(1, "loop", {"loop_mode": "track"})
+        events = await subscription.wait(1.0)
+        assert events == [StatusEvent("loop", {"loop_mode": "track"})]
+
+    @pytest.mark.asyncio
+    async def test_other_guilds_are_not_delivered(self, hub):
+        subscription = hub.subscribe(1)
+        hub.publish(2, "volume", {"volume": 1.0})
+        assert await subscription.wait(0.01) == []
+
+    @pytest.mark.asyncio
+    async def test_publish_from_other_thread_wakes_consumer(self, hub):
+        subscription = hub.subscribe(1)
+        thread = threading.Thread(
+            target=hub.publish, args=(1, "volume", {"volume": 0.3})
+        )
+        thread.start()
+        events = await subscription.wait(1.0)
+        thread.join()
+        assert [e.type for e in events] == ["volume"]
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_stops_delivery(self, hub):
+        subscription = hub.subscribe(1)
+        hub.unsubscribe(subscription)
+        hub.publish(1, "volume", {"volume": 1.0})
+        assert hub.subscriber_count(1) == 0
+        assert subscription.drain() == []
+
+    @pytest.mark.asyncio
+    async def test_overflow_requests_resync(self, hub, monkeypatch):
+        monkeypatch.setattr(status_events, "SUBSCRIBER_BUFFER", 2)
+        subscription = hub.subscribe(1)
+        for volume in range(3):
+            hub.publish(1, "volume", {"volume": volume})
+        assert subscription.needs_resync
+        assert subscription.drain() == []
+        subscription.resynced()
+        assert not subscription.needs_resync
+
+    @pytest.mark.asyncio
+    async def test_publish_without_subscribers_is_noop(self, hub):
+        hub.publish(1, "volume", {"volume": 1.0})
+        assert hub.subscriber_count(1) == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_empty(self, hub):
+        subscription = hub.subscribe(1)
+        assert await asyncio.wait_for(subscription.wait(0.01), 1.0) == []
+
+    @pytest.mark.asyncio
+    async def test_changed_bumps_version_then_publishes(self, hub):
+        guild_config = MagicMock(id=1)
+        subscription = hub.subscribe(1)
+
+        hub.changed(guild_config, "volume", {"volume": 1.0})
+        guild_config.bump_version.assert_called_once()
+        assert [e.type for e in subscription.drain()] == ["volume"]
@@ -0,0 +1,145 @@
+"""Tests for the indexed, snapshot-able TrackQueue."""
+
+import random
+
+import pytest
+
+from src.harpi_lib.music.track_queue import TrackQueue
+
+
+def _items(queue: TrackQueue) -> list:
+    return list(queue)
+
+
+class TestTrackQueue:
+    def test_starts_empty(self):
+        queue = TrackQueue()
+        assert len(queue) == 0
+        assert not queue
+        assert _items(queue) == []
+
+    def test_extend_keeps_order_and_assigns_ids(self):
+        queue = TrackQueue(["a", "b"])
+        entries = queue.extend(["c", "d"])
+        assert _items(queue) == ["a", "b", "c", "d"]
+        assert [entry.item for entry in entries] == ["c", "d"]
+        ids = [entry.id for entry in queue.snapshot().entries()]
+        assert len(set(ids)) == 4
+
+    def test_popleft(self):
+        queue = TrackQueue(["a", "b"])
+        assert queue.popleft() == "a"
+        assert _items(queue) == ["b"]
+
+    def test_popleft_empty_raises(self):
+        with pytest.raises(IndexError):
+            TrackQueue().popleft()
+
+    def test_insert_clamps_index(self):
+        queue = TrackQueue(["a", "b"])
+        queue.insert(1, "x")
+        queue.insert(-5, "first")
+        queue.insert(99, "last")
+        assert _items(queue) == ["first", "a", "x", "b", "last"]
+
+    def test_remove_by_id(self):
+        queue = TrackQueue()
+        _, b, _ = queue.extend(["a", "b", "c"])
+        assert queue.remove(b.id) == "b"
+        assert _items(queue) == ["a", "c"]
+
+    def test_remove_unknown_id_raises(self):
+        with pytest.raises(ValueError, match="não encontrada"):
+            TrackQueue(["a"]).remove(12345)
+
+    def test_move(self):
+        queue = TrackQueue()
+        a, _, _ = queue.extend(["a", "b", "c"])
+        queue.move(a.id, 2)
+        assert _items(queue) == ["b", "c", "a"]
+        assert queue.index_of(a.id) == 2
+        queue.move(a.id, 0)
+        assert _items(queue) == ["a", "b", "c"]
+
+    def test_ids_survive_edits(self):
+        queue = TrackQueue()
+        a, b, c = queue.extend(["a", "b", "c"])
+        queue.move(c.id, 0)
+        queue.remove(b.id)
+        assert [entry.id for entry in queue.snapshot().entries()] == [
+            c.id,
+            a.id,
+        ]
+
+    def test_shuffle_is_a_permutation(self):
+        queue = TrackQueue(range(50))
+        queue.shuffle(random.Random(0))
+        assert sorted(queue) == list(range(50))
+        assert _items(queue) != list(range(50))
+
+    def test_contains(self):
+        queue = TrackQueue(["a"])
+        assert "a" in queue
+        assert "b" not in queue
+
+    def test_repeated_inserts_in_one_gap_renumber(self):
+        queue = TrackQueue(["a", "z"])
+        for value in range(100):
+            queue.insert(1, value)
+        assert _items(queue) == ["a", *reversed(range(100)), "z"]
+
+
+class TestSnapshot:
+    def test_snapshot_is_unaffected_by_later_edits(self):
+        queue = TrackQueue(["a", "b", "c"])
+        snapshot = queue.snapshot()
+        queue.popleft()
+        queue.append("d")
+        queue.shuffle()
+        assert list(snapshot) == ["a", "b", "c"]
+        assert len(snapshot) == 3
+
+    def test_entries_page(self):
+        snapshot = TrackQueue(range(100)).snapshot()
+        page = snapshot.entries(40, 5)
+        assert [entry.item for entry in page] == [40, 41, 42, 43, 44]
+        assert snapshot.entries(98, 10)[-1].item == 99
+        assert snapshot.entries(100, 10) == []
+
+    def test_getitem(self):
+        snapshot = TrackQueue(["a", "b"]).snapshot()
+        assert snapshot[0].item == "a"
+        assert snapshot[-1].item == "b"
+        with pytest.raises(IndexError):
+            snapshot[2]
+
+
+class TestAgainstList:
+    def test_random_edits_match_list_model(self):
+        rng = random.Random(7)
+        queue = TrackQueue()
+        model: list[tuple[int, int]] = []
+        for step in range(2_000):
+            roll = rng.random()
+            if roll < 0.35 or not model:
+                index = rng.randint(0, len(model))
+                entry = queue.insert(index, step)
+                model.insert(index, (entry.id, step))
+            elif roll < 0.5:
+                entries = queue.extend([step, -step])
+                model.extend((entry.id, entry.item) for entry in entries)
+            elif roll < 0.7:
+                entry_id, _ = model.pop(rng.randrange(len(model)))
+                queue.remove(entry_id)
+            elif roll < 0.9:
+                moved = model.pop(rng.randrange(len(model)))
+                index = rng.randint(0, len(model))
+                model.insert(index, moved)
+                queue.move(moved[0], index)
+            else:
+                assert queue.popleft() == model.pop(0)[1]
+
+        entries = queue.snapshot().entries()
+        assert [(entry.id, entry.item) for entry in entries] == model
+        for position, (entry_id, _) in enumerate(model):
+            assert queue.index_of(entry_id) == position
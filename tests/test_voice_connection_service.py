@@ -7,6 +7,10 @@ import discord
 import pytest
 
 from src.harpi_lib.api import GuildConfig
+from src.harpi_lib.audio.controller import AudioController
+from src.harpi_lib.audio.mixer import MixerSource
+from src.harpi_lib.audio.voice_scheduler import ScheduledVoiceClient
+from src.harpi_lib.music.ytmusicdata import FFmpegPCMAudio, UniqueAudioSource
 from src.harpi_lib.services.voice_connection import VoiceConnectionService
 
 
@@ -103,6 +107,33 @@ class TestConnectErrorPaths:
             result = await service.connect(1, 100)
             assert result is not None
 
+    @pytest.mark.asyncio
+    async def test_connects_through_shared_scheduler(
+        self, mock_bot, guilds, on_queue_end, on_track_end
+    ):
+        scheduler = MagicMock()
+        service = VoiceConnectionService(
+            mock_bot,
+            guilds,
+            on_queue_end,
+            on_track_end,
+            voice_scheduler=scheduler,
+        )
+        mock_guild = MagicMock()
+        mock_guild.id = 1
+        mock_guild.voice_client = None
+        mock_bot.get_guild.return_value = mock_guild
+        mock_channel = MagicMock(spec=discord.VoiceChannel)
+        mock_guild.get_channel.return_value = mock_channel
+        mock_channel.connect = AsyncMock(return_value=MagicMock())
+
+        await service.connect(1, 100)
+
+        cls = mock_channel.connect.call_args.kwargs["cls"]
+        assert cls.func is ScheduledVoiceClient
+        assert cls.keywords == {"scheduler": scheduler}
+        guilds[1].mixer.cleanup()
+
 
 class TestDisconnectCleanup:
     @pytest.mark.asyncio
@@ -166,3 +197,216 @@ class TestDisconnectCleanup:
 
         await service.disconnect(1)
         assert 1 not in guilds
+
+
+class TestMoveExistingConnection:
+    def _guild(self, mock_bot, channel_id: int = 200):
+        mock_guild = MagicMock()
+        mock_guild.id = 1
+        mock_bot.get_guild.return_value = mock_guild
+        channel = MagicMock(spec=discord.VoiceChannel)
+        channel.id = channel_id
+        channel.connect = AsyncMock()
+        mock_guild.get_channel.return_value = channel
+        return channel
+
+    def _connected(self, guilds, channel_id: int = 100) -> GuildConfig:
+        vc = MagicMock()
+        vc.is_connected.return_value = True
+        vc.channel.id = channel_id
+
+        async def move_to(channel, timeout):
+            vc.channel = channel
+
+        vc.move_to = AsyncMock(side_effect=move_to)
+        gc = _make_guild_config(guild_id=1, voice_client=vc)
+        guilds[1] = gc
+        return gc
+
+    @pytest.mark.asyncio
+    async def test_moves_without_rebuilding_mixer(
+        self, service, mock_bot, guilds
+    ):
+        gc = self._connected(guilds)
+        channel = self._guild(mock_bot)
+        version = gc.version
+
+        result = await service.connect(1, 200)
+
+        assert result is gc
+        gc.voice_client.move_to.assert_awaited_once()
+        assert gc.voice_client.move_to.call_args.args == (channel,)
+        channel.connect.assert_not_called()
+        gc.mixer.cleanup.assert_not_called()
+        gc.controller.cleanup_all.assert_not_called()
+        assert gc.channel is channel
+        assert gc.version > version
+
+    @pytest.mark.asyncio
+    async def test_same_channel_is_a_no_op(self, service, mock_bot, guilds):
+        gc = self._connected(guilds, channel_id=200)
+        self._guild(mock_bot)
+        ctx = MagicMock()
+
+        assert await service.connect(1, 200, ctx) is gc
+        gc.voice_client.move_to.assert_not_called()
+        assert gc.ctx is ctx
+
+    @pytest.mark.asyncio
+    async def test_failed_move_raises(self, service, mock_bot, guilds):
+        gc = self._connected(guilds)
+        gc.voice_client.move_to = AsyncMock()
+        self._guild(mock_bot)
+
+        with pytest.raises(ValueError, match="move timed out"):
+            await service.connect(1, 200)
+        assert guilds[1] is gc
+
+    @pytest.mark.asyncio
+    async def test_stale_connection_is_rebuilt(
+        self, service, mock_bot, guilds
+    ):
+        gc = self._connected(guilds)
+        gc.voice_client.is_connected.return_value = False
+        channel = self._guild(mock_bot)
+        channel.connect.return_value = MagicMock()
+        mock_bot.get_guild.return_value.voice_client = None
+
+        result = await service.connect(1, 200)
+
+        gc.controller.cleanup_all.assert_called_once()
+        gc.mixer.cleanup.assert_called_once()
+        assert result is not gc
+        assert guilds[1] is result
+        result.mixer.cleanup()
+
+
+def _member(bot: bool) -> MagicMock:
+    member = MagicMock()
+    member.bot = bot
+    return member
+
+
+class TestIdleReaper:
+    @pytest.fixture
+    def reaper(self, mock_bot, guilds, on_queue_end, on_track_end):
+        return VoiceConnectionService(
+            mock_bot,
+            guilds,
+            on_queue_end,
+            on_track_end,
+            idle_timeout=100.0,
+            empty_channel_timeout=10.0,
+        )
+
+    def _connected(self, guilds, playing: bool, members) -> GuildConfig:
+        vc = MagicMock()
+        vc.is_connected.return_value = True
+        vc.is_playing.return_value = playing
+        vc.is_paused.return_value = False
+        vc.disconnect = AsyncMock()
+        vc.channel.members = members
+        gc = _make_guild_config(guild_id=1, voice_client=vc)
+        gc.mixer.has_active_tracks = playing
+        guilds[1] = gc
+        return gc
+
+    @pytest.mark.asyncio
+    async def test_idle_guild_is_released(self, reaper, guilds):
+        gc = self._connected(guilds, playing=False, members=[_member(False)])
+        assert await reaper.reap(now=1000.0) == []
+        assert await reaper.reap(now=1099.0) == []
+        assert await reaper.reap(now=1100.0) == [1]
+        assert 1 not in guilds
+        gc.mixer.cleanup.assert_called_once()
+        gc.voice_client.disconnect.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_playing_guild_is_kept(self, reaper, guilds):
+        self._connected(guilds, playing=True, members=[_member(False)])
+        for now in (0.0, 500.0, 1000.0):
+            assert await reaper.reap(now=now) == []
+        assert 1 in guilds
+
+    @pytest.mark.asyncio
+    async def test_paused_guild_is_kept(self, reaper, guilds):
+        gc = self._connected(guilds, playing=False, members=[_member(False)])
+        gc.voice_client.is_paused.return_value = True
+        gc.controller.all_sources.return_value = [MagicMock()]
+        for now in (0.0, 500.0, 1000.0):
+            assert await reaper.reap(now=now) == []
+
+        gc.controller.all_sources.return_value = []
+        assert await reaper.reap(now=1100.0) == [1]
+
+    @pytest.mark.asyncio
+    async def test_paused_sources_keep_the_guild(self, reaper, guilds):
+        gc = self._connected(guilds, playing=True, members=[_member(False)])
+        # Only a paused layer left: the mixer has nothing to read.
+        gc.mixer.has_active_tracks = False
+        gc.controller.get_paused_sounds.return_value = [("track", MagicMock())]
+        for now in (0.0, 500.0, 1000.0):
+            assert await reaper.reap(now=now) == []
+
+    @pytest.mark.asyncio
+    async def test_empty_channel_is_released(self, reaper, guilds):
+        gc = self._connected(guilds, playing=True, members=[_member(True)])
+        assert await reaper.reap(now=0.0) == []
+        # Someone came back in time: the countdown restarts.
+        gc.voice_client.channel.members = [_member(True), _member(False)]
+        assert await reaper.reap(now=5.0) == []
+        gc.voice_client.channel.members = [_member(True)]
+        assert await reaper.reap(now=12.0) == []
+        assert await reaper.reap(now=22.0) == [1]
+
+    @pytest.mark.asyncio
+    async def test_zero_timeouts_disable_reaping(
+        self, mock_bot, guilds, on_queue_end, on_track_end
+    ):
+        service = VoiceConnectionService(
+            mock_bot,
+            guilds,
+            on_queue_end,
+            on_track_end,
+            idle_timeout=0,
+            empty_channel_timeout=0,
+        )
+        self._connected(guilds, playing=False, members=[])
+        assert await service.reap(now=0.0) == []
+        assert await service.reap(now=10**6) == []
+
+    def test_attach_starts_reaper_on_ready(self, reaper, mock_bot):
+        reaper.attach()
+        mock_bot.add_listener.assert_called_once_with(
+            reaper._start_reaper, "on_ready"
+        )
+
+
+class TestResources:
+    def test_not_connected(self, service):
+        assert service.resources(1) is None
+
+    def test_counts(self, service, guilds):
+        controller = AudioController()
+        mixer = MixerSource(controller)
+        running = FFmpegPCMAudio("https://x")
+        running._process = MagicMock()
+        running._process.poll.return_value = None
+        controller.add_layer(UniqueAudioSource(original=running))
+        controller.add_to_queue(FFmpegPCMAudio("https://y"))
+        vc = MagicMock()
+        vc.is_playing.return_value = True
+        guilds[1] = GuildConfig(
+            id=1, mixer=mixer, controller=controller, voice_client=vc
+        )
+        try:
+            resources = service.resources(1)
+        finally:
+            running._process = None
+            mixer.cleanup()
+        assert resources is not None
+        assert resources.sources == 2
+        assert resources.ffmpeg_processes == 1
+        # No mixer reader started yet, plus discord.py's player thread.
+        assert resources.threads == 1
+        assert resources.buffered_bytes == 0
@@ -0,0 +1,267 @@
+"""Tests for the shared voice-send scheduler."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import discord
+import pytest
+
+from src.harpi_lib.audio import voice_scheduler
+from src.harpi_lib.audio.voice_scheduler import (
+    OPUS_SILENCE,
+    SILENCE_PACKETS,
+    ScheduledVoiceClient,
+    VoiceScheduler,
+    VoiceStream,
+    voice_client_class,
+)
+
+
+class _FakeClient:
+    """Voice client recording the packets it is asked to send."""
+
+    def __init__(self, connected: bool = True) -> None:
+        self.connected = connected
+        self.timeout = 60.0
+        self.sent: list[bytes] = []
+        self.encoder = MagicMock()
+        self.encoder.encode.side_effect = lambda data, _: b"opus:" + data
+        self.ws = MagicMock()
+        self.client = MagicMock()
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def send_audio_packet(self, data: bytes, *, encode: bool = True) -> None:
+        assert encode is False
+        self.sent.append(data)
+
+
+class _FakeSource(discord.AudioSource):
+    def __init__(self, frames: int = 3, delay: float = 0.0) -> None:
+        self.frames = frames
+        self.delay = delay
+        self.cleaned = False
+
+    def read(self) -> bytes:
+        time.sleep(self.delay)
+        if self.frames == 0:
+            return b""
+        self.frames -= 1
+        return b"pcm"
+
+    def cleanup(self) -> None:
+        self.cleaned = True
+
+
+@pytest.fixture(autouse=True)
+def _no_speaking():
+    with patch.object(VoiceStream, "_speak"):
+        yield
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = VoiceScheduler(workers=2)
+    yield scheduler
+    scheduler.close()
+
+
+def _tick(scheduler, streams, budget: float = 0.5) -> None:
+    scheduler.tick(streams, time.perf_counter() + budget)
+
+
+class TestTick:
+    def test_sends_one_encoded_frame_per_stream(self, scheduler):
+        clients = [_FakeClient(), _FakeClient()]
+        streams = [VoiceStream(c, _FakeSource(), None) for c in clients]
+        _tick(scheduler, streams)
+        assert [c.sent for c in clients] == [[b"opus:pcm"], [b"opus:pcm"]]
+
+    def test_slow_stream_does_not_hold_up_others(self, scheduler):
+        slow, fast = _FakeClient(), _FakeClient()
+        streams = [
+            VoiceStream(slow, _FakeSource(delay=0.2), None),
+            VoiceStream(fast, _FakeSource(), None),
+        ]
+        _tick(scheduler, streams, budget=0.05)
+        assert fast.sent == [b"opus:pcm"]
+        assert slow.sent == []
+        assert scheduler.stats().late_frames == 1
+
+        time.sleep(0.25)
+        _tick(scheduler, streams)
+        # The late frame is sent; no second read was started meanwhile.
+        assert slow.sent == [b"opus:pcm"]
+        assert len(fast.sent) == 2
+
+    def test_stuck_workers_do_not_stall_other_streams(self, scheduler):
+        release = threading.Event()
+        stuck = [_FakeClient(), _FakeClient()]
+        fast = _FakeClient()
+        streams = [VoiceStream(c, _FakeSource(), None) for c in stuck]
+        for stream in streams:
+            stream.source.read = lambda: release.wait(5) and b"pcm"
+        _tick(scheduler, streams, budget=0.01)
+
+        fast_stream = VoiceStream(fast, _FakeSource(), None)
+        _tick(scheduler, [*streams, fast_stream], budget=0.5)
+        release.set()
+        assert fast.sent == [b"opus:pcm"]
+        assert scheduler.stats().stalled_renders == 1
+
+    def test_end_of_source_finishes_stream(self, scheduler):
+        client = _FakeClient()
+        source = _FakeSource(frames=1)
+        after = MagicMock()
+        stream = VoiceStream(client, source, after)
+        _tick(scheduler, [stream])
+        _tick(scheduler, [stream])
+        scheduler._stall_pool.shutdown(wait=True)
+        assert stream.ended
+        after.assert_called_once_with(None)
+        assert source.cleaned
+
+    def test_read_error_is_passed_to_after(self, scheduler):
+        source = _FakeSource()
+        source.read = MagicMock(side_effect=OSError("boom"))
+        after = MagicMock()
+        stream = VoiceStream(_FakeClient(), source, after)
+        _tick(scheduler, [stream])
+        scheduler._stall_pool.shutdown(wait=True)
+        (error,) = after.call_args.args
+        assert isinstance(error, OSError)
+
+    def test_pause_sends_silence_then_nothing(self, scheduler):
+        client = _FakeClient()
+        stream = VoiceStream(client, _FakeSource(), None)
+        stream.pause()
+        _tick(scheduler, [stream])
+        _tick(scheduler, [stream])
+        assert client.sent == [OPUS_SILENCE] * SILENCE_PACKETS
+        assert stream.is_paused() and not stream.is_playing()
+
+        stream.resume()
+        _tick(scheduler, [stream])
+        assert client.sent[-1] == b"opus:pcm"
+
+    def test_disconnected_client_is_skipped_then_stopped(self, scheduler):
+        client = _FakeClient(connected=False)
+        client.timeout = 0.0
+        stream = VoiceStream(client, _FakeSource(), None)
+        _tick(scheduler, [stream])
+        assert client.sent == [] and not stream.ended
+        time.sleep(0.01)
+        _tick(scheduler, [stream])
+        assert stream.ended
+
+    def test_opus_sources_are_not_reencoded(self, scheduler):
+        client = _FakeClient()
+        source = _FakeSource()
+        source.is_opus = lambda: True
+        _tick(scheduler, [VoiceStream(client, source, None)])
+        assert client.sent == [b"pcm"]
+        client.encoder.encode.assert_not_called()
+
+
+class TestScheduler:
+    def test_plays_many_guilds_on_fixed_threads(self):
+        scheduler = VoiceScheduler(workers=2)
+        done = threading.Event()
+        remaining = [20]
+        lock = threading.Lock()
+
+        def after(error):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+
+        before = threading.active_count()
+        clients = [_FakeClient() for _ in range(20)]
+        try:
+            for client in clients:
+                scheduler.add(client, _FakeSource(frames=5), after)
+            assert threading.active_count() <= before + 1 + 2
+            assert done.wait(5)
+        finally:
+            scheduler.close()
+        assert all(len(c.sent) == 5 for c in clients)
+        stats = scheduler.stats()
+        assert stats.ticks >= 5
+        assert stats.streams == 0
+
+    def test_close_stops_streams(self):
+        scheduler = VoiceScheduler(workers=1)
+        after = MagicMock()
+        scheduler.add(_FakeClient(), _FakeSource(frames=10**6), after)
+        scheduler.close()
+        after.assert_called_once_with(None)
+        with pytest.raises(RuntimeError):
+            scheduler.add(_FakeClient(), _FakeSource())
+
+    def test_overrun_is_counted(self, scheduler):
+        scheduler._record(voice_scheduler.TICK * 2)
+        scheduler._record(voice_scheduler.TICK / 2)
+        stats = scheduler.stats()
+        assert stats.overruns == 1
+        assert stats.peak_load == pytest.approx(2.0)
+        assert stats.last_load == pytest.approx(0.5)
+
+
+class TestScheduledVoiceClient:
+    def _client(self, scheduler):
+        factory = voice_client_class(scheduler)
+        with patch.object(discord.VoiceClient, "__init__", return_value=None):
+            vc = factory(MagicMock(), MagicMock())
+        assert isinstance(vc, ScheduledVoiceClient)
+        return vc
+
+    def test_play_registers_with_scheduler(self):
+        scheduler = MagicMock()
+        stream = scheduler.add.return_value
+        stream.is_playing.return_value = True
+        vc = self._client(scheduler)
+        source = _FakeSource()
+        with (
+            patch.object(
+                ScheduledVoiceClient, "is_connected", return_value=True
+            ),
+            patch.object(voice_scheduler.opus, "Encoder") as encoder,
+        ):
+            vc.play(source, after=None)
+            with pytest.raises(discord.ClientException):
+                vc.play(_FakeSource())
+        encoder.assert_called_once()
+        scheduler.add.assert_called_once_with(vc, source, None)
+        assert vc.source is stream.source
+
+        vc.pause()
+        stream.pause.assert_called_once()
+        vc.resume()
+        stream.resume.assert_called_once()
+        vc.stop()
+        stream.stop.assert_called_once()
+        assert not vc.is_playing()
+
+    def test_source_setter_swaps_the_stream_source(self, scheduler):
+        vc = self._client(scheduler)
+        with pytest.raises(ValueError):
+            vc.source = _FakeSource()
+        old, new = _FakeSource(), _FakeSource()
+        vc._stream = VoiceStream(_FakeClient(), old, None)
+        vc.source = new
+        assert vc.source is new
+        with pytest.raises(TypeError):
+            vc.source = "not a source"
+
+    def test_play_requires_connection(self):
+        vc = self._client(MagicMock())
+        with (
+            patch.object(
+                ScheduledVoiceClient, "is_connected", return_value=False
+            ),
+            pytest.raises(discord.ClientException),
+        ):
+            vc.play(_FakeSource())
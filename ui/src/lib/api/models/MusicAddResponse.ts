@@ -14,7 +14,7 @@
 
 import { mapValues } from '../runtime';
 /**
- * Response after adding music.
+ * Response after accepting an add request.
  * @export
  * @interface MusicAddResponse
  */
@@ -25,6 +25,12 @@ export interface MusicAddResponse {
      * @memberof MusicAddResponse
      */
     error?: string | null;
+    /**
+     * 
+     * @type {string}
+     * @memberof MusicAddResponse
+     */
+    job_id?: string | null;
     /**
      * 
      * @type {string}
@@ -52,6 +58,7 @@ export function MusicAddResponseFromJSONTyped(json: any, ignoreDiscriminator: bo
     return {
         
         'error': json['error'] == null ? undefined : json['error'],
+        'job_id': json['job_id'] == null ? undefined : json['job_id'],
         'status': json['status'],
     };
 }
@@ -68,6 +75,7 @@ export function MusicAddResponseToJSONTyped(value?: MusicAddResponse | null, ign
     return {
         
         'error': value['error'],
+        'job_id': value['job_id'],
         'status': value['status'],
     };
 }
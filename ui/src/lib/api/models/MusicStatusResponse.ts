@@ -83,6 +83,12 @@ export interface MusicStatusResponse {
      * @memberof MusicStatusResponse
      */
     queue: Array<QueueItemResponse>;
+    /**
+     * 
+     * @type {number}
+     * @memberof MusicStatusResponse
+     */
+    queueLength?: number;
     /**
      * 
      * @type {number}
@@ -123,6 +129,7 @@ export function MusicStatusResponseFromJSONTyped(json: any, ignoreDiscriminator:
         'loopMode': json['loop_mode'],
         'progress': json['progress'],
         'queue': ((json['queue'] as Array<any>).map(QueueItemResponseFromJSON)),
+        'queueLength': json['queue_length'] == null ? undefined : json['queue_length'],
         'volume': json['volume'],
     };
 }
@@ -145,6 +152,7 @@ export function MusicStatusResponseToJSONTyped(value?: MusicStatusResponse | nul
         'loop_mode': value['loopMode'],
         'progress': value['progress'],
         'queue': ((value['queue'] as Array<any>).map(QueueItemResponseToJSON)),
+        'queue_length': value['queueLength'],
         'volume': value['volume'],
     };
 }
@@ -25,6 +25,12 @@ export interface QueueItemResponse {
      * @memberof QueueItemResponse
      */
     duration: number;
+    /**
+     * 
+     * @type {number}
+     * @memberof QueueItemResponse
+     */
+    id: number;
     /**
      * 
      * @type {string}
@@ -44,6 +50,7 @@ export interface QueueItemResponse {
  */
 export function instanceOfQueueItemResponse(value: object): value is QueueItemResponse {
     if (!('duration' in value) || value['duration'] === undefined) return false;
+    if (!('id' in value) || value['id'] === undefined) return false;
     if (!('title' in value) || value['title'] === undefined) return false;
     if (!('url' in value) || value['url'] === undefined) return false;
     return true;
@@ -60,6 +67,7 @@ export function QueueItemResponseFromJSONTyped(json: any, ignoreDiscriminator: b
     return {
         
         'duration': json['duration'],
+        'id': json['id'],
         'title': json['title'],
         'url': json['url'],
     };
@@ -77,6 +85,7 @@ export function QueueItemResponseToJSONTyped(value?: QueueItemResponse | null, i
     return {
         
         'duration': value['duration'],
+        'id': value['id'],
         'title': value['title'],
         'url': value['url'],
     };
@@ -0,0 +1,119 @@
+import {
+	MusicLayerResponseFromJSON,
+	MusicStatusResponseFromJSON,
+	MusicTrackResponseFromJSON,
+	QueueItemResponseFromJSON,
+	type MusicStatusResponse
+} from '$lib/api/models';
+
+type Reducer = (status: MusicStatusResponse, data: any) => MusicStatusResponse;
+
+// Applies each server-sent delta to the last known status.
+const reducers: Record<string, Reducer> = {
+	track: (status, data) => ({
+		...status,
+		currentMusic: data.current_music ? MusicTrackResponseFromJSON(data.current_music) : null,
+		progress: 0
+	}),
+	queue: (status, data) => {
+		// `queue` is only a preview of the first items; `queueLength`
+		// counts the whole queue.
+		const length = status.queueLength ?? status.queue.length;
+		const complete = status.queue.length === length;
+		switch (data.op) {
+			case 'extend':
+				return {
+					...status,
+					queue: complete
+						? [...status.queue, ...data.items.map(QueueItemResponseFromJSON)]
+						: status.queue,
+					queueLength: length + data.items.length
+				};
+			case 'pop_front':
+				return { ...status, queue: status.queue.slice(1), queueLength: Math.max(0, length - 1) };
+			case 'clear':
+				return { ...status, queue: [], queueLength: 0 };
+			case 'remove':
+				return {
+					...status,
+					queue: status.queue.filter((item) => item.id !== data.id),
+					queueLength: Math.max(0, length - 1)
+				};
+			case 'move': {
+				const item = status.queue.find((queued) => queued.id === data.id);
+				const rest = status.queue.filter((queued) => queued.id !== data.id);
+				if (!item || data.index > rest.length) return { ...status, queue: rest };
+				return {
+					...status,
+					queue: [...rest.slice(0, data.index), item, ...rest.slice(data.index)]
+				};
+			}
+			case 'shuffle': {
+				const byId = new Map(status.queue.map((item) => [item.id, item]));
+				return {
+					...status,
+					queue: data.order
+						.map((id: number) => byId.get(id))
+						.filter((item: unknown) => item !== undefined)
+						.slice(0, status.queue.length)
+				};
+			}
+			default:
+				return status;
+		}
+	},
+	volume: (status, data) => ({ ...status, volume: data.volume }),
+	loop: (status, data) => ({ ...status, loopMode: data.loop_mode }),
+	layer_added: (status, data) => ({
+		...status,
+		layers: [...status.layers, MusicLayerResponseFromJSON(data)]
+	}),
+	layer_removed: (status, data) => ({
+		...status,
+		layers: status.layers.filter((layer) => layer.id !== data.id)
+	}),
+	layer_volume: (status, data) => ({
+		...status,
+		layers: status.layers.map((layer) =>
+			layer.id === data.id ? { ...layer, volume: data.volume } : layer
+		)
+	}),
+	layers_cleared: (status) => ({ ...status, layers: [] }),
+	playback: (status, data) => ({
+		...status,
+		progress: data.progress,
+		isPlaying: data.is_playing,
+		isPaused: data.is_paused
+	})
+};
+reducers.position = reducers.playback;
+
+/**
+ * Subscribe to /api/music/<guildId>/events.
+ *
+ * `onStatus` receives the initial snapshot and every status derived from
+ * later deltas.  Returns a function that closes the stream.
+ */
+export function subscribeMusicStatus(
+	guildId: string,
+	onStatus: (status: MusicStatusResponse) => void,
+	onError?: () => void
+): () => void {
+	const source = new EventSource(`/api/music/${guildId}/events`);
+	let status: MusicStatusResponse | null = null;
+
+	source.addEventListener('snapshot', (event) => {
+		status = MusicStatusResponseFromJSON(JSON.parse(event.data));
+		onStatus(status);
+	});
+	for (const [type, reduce] of Object.entries(reducers)) {
+		source.addEventListener(type, (event) => {
+			if (!status) return;
+			status = reduce(status, JSON.parse((event as MessageEvent).data));
+			onStatus(status);
+		});
+	}
+	if (onError) source.onerror = onError;
+
+	return () => source.close();
+}